@@ -8,861 +8,9564 @@ import sys
 import math
 import random
 import traceback
-from threading import Thread
+import io
+import threading
+from threading import Thread, Event
 import queue
 import platform
+import struct
+import heapq
+import mmap
+from array import array
+import collections
+from collections import OrderedDict, defaultdict, deque, Counter
+import subprocess
+import shlex
+import socket
+import selectors
+import asyncio
+import shutil
+import re
+import fnmatch
+import posixpath
+import ast
+import hashlib
+import sqlite3
+import zlib
+import gzip
+import lzma
+import tarfile
+import zipfile
+import tempfile
+import multiprocessing
+from multiprocessing import shared_memory
+import concurrent.futures
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+import bisect
+import itertools
+import functools
+import keyword
+import builtins
+import decimal
+import fractions
 
-class MKSOperatingSystem:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("MKS-OS v1.2 - Mini Operating System")
-        self.root.geometry("1000x700")
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# ========== MEMORY MANAGEMENT SIMULATOR ==========
+
+PAGE_POLICIES = ("FIFO", "LRU", "CLOCK", "LFU", "OPT")
+TRACE_CHUNK = 1 << 20
+
+
+class PageTrace:
+    """Page reference trace stored as a NumPy array or memory-mapped file"""
+    def __init__(self, pages, source="memory"):
+        self.pages = pages
+        self.source = source
+        self._next_use = None
+    
+    def __len__(self):
+        return len(self.pages)
+    
+    @classmethod
+    def synthetic(cls, length, num_pages, locality=0.8, hot_pages=16, phase=10000, seed=None):
+        """Generate a trace with a drifting hot working set"""
+        hot_pages = max(1, min(hot_pages, num_pages))
+        if np is not None:
+            rng = np.random.default_rng(seed)
+            shift = (np.arange(length, dtype=np.int64) // phase) * hot_pages
+            hot = (rng.integers(0, hot_pages, length) + shift) % num_pages
+            cold = rng.integers(0, num_pages, length)
+            pages = np.where(rng.random(length) < locality, hot, cold).astype(np.uint32)
+        else:
+            rng = random.Random(seed)
+            pages = array('I', bytes(4 * length))
+            for i in range(length):
+                if rng.random() < locality:
+                    pages[i] = (rng.randrange(hot_pages) + (i // phase) * hot_pages) % num_pages
+                else:
+                    pages[i] = rng.randrange(num_pages)
+        return cls(pages, source="synthetic")
+    
+    @classmethod
+    def load(cls, path):
+        """Load trace: raw uint32 files are memory-mapped, text files are parsed"""
+        if path.endswith(('.bin', '.trace', '.u32')):
+            if np is not None:
+                return cls(np.memmap(path, dtype=np.uint32, mode='r'), source=path)
+            with open(path, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return cls(memoryview(mapped).cast('I'), source=path)
         
-        # Load settings
-        self.settings = self.load_settings()
-        self.current_language = "english"  # English by default
+        with open(path, 'r', encoding='utf-8') as f:
+            values = [int(token, 0) for token in f.read().split()]
+        if np is not None:
+            return cls(np.array(values, dtype=np.uint32), source=path)
+        return cls(array('I', values), source=path)
+    
+    def save(self, path):
+        """Save trace as raw uint32 (can be memory-mapped back)"""
+        with open(path, 'wb') as f:
+            for chunk in self.chunks():
+                f.write(array('I', chunk).tobytes())
+    
+    def chunks(self, size=TRACE_CHUNK):
+        """Yield the trace as plain int lists of bounded size"""
+        for start in range(0, len(self.pages), size):
+            block = self.pages[start:start + size]
+            yield block.tolist() if hasattr(block, 'tolist') else list(block)
+    
+    def next_use(self):
+        """Index of the next reference to the same page (len(trace) if none)"""
+        if self._next_use is not None:
+            return self._next_use
+        n = len(self.pages)
+        if np is not None:
+            pages = np.asarray(self.pages)
+            order = np.argsort(pages, kind='stable')
+            ordered = pages[order]
+            same = ordered[1:] == ordered[:-1]
+            result = np.full(n, n, dtype=np.int64)
+            result[order[:-1][same]] = order[1:][same]
+        else:
+            result = array('q', bytes(8 * n))
+            last_seen = {}
+            for i in range(n - 1, -1, -1):
+                page = self.pages[i]
+                result[i] = last_seen.get(page, n)
+                last_seen[page] = i
+        self._next_use = result
+        return result
+
+
+def simulate_page_policy(trace, frames, policy):
+    """Replay a trace through a page replacement policy, return (hits, faults)"""
+    policy = policy.upper()
+    hits = 0
+    faults = 0
+    
+    if policy == "FIFO":
+        resident = set()
+        order = []
+        head = 0
+        for chunk in trace.chunks():
+            for page in chunk:
+                if page in resident:
+                    hits += 1
+                    continue
+                faults += 1
+                if len(resident) >= frames:
+                    resident.discard(order[head])
+                    head += 1
+                    if head > 4096:
+                        del order[:head]
+                        head = 0
+                resident.add(page)
+                order.append(page)
+    
+    elif policy == "LRU":
+        resident = OrderedDict()
+        for chunk in trace.chunks():
+            for page in chunk:
+                if page in resident:
+                    hits += 1
+                    resident.move_to_end(page)
+                    continue
+                faults += 1
+                if len(resident) >= frames:
+                    resident.popitem(last=False)
+                resident[page] = True
+    
+    elif policy == "CLOCK":
+        slots = [None] * frames
+        referenced = [False] * frames
+        where = {}
+        hand = 0
+        for chunk in trace.chunks():
+            for page in chunk:
+                slot = where.get(page)
+                if slot is not None:
+                    hits += 1
+                    referenced[slot] = True
+                    continue
+                faults += 1
+                while referenced[hand]:
+                    referenced[hand] = False
+                    hand = (hand + 1) % frames
+                if slots[hand] is not None:
+                    del where[slots[hand]]
+                slots[hand] = page
+                where[page] = hand
+                hand = (hand + 1) % frames
+    
+    elif policy == "LFU":
+        counts = {}
+        stamps = {}
+        heap = []
+        clock = 0
+        for chunk in trace.chunks():
+            for page in chunk:
+                clock += 1
+                if page in counts:
+                    hits += 1
+                    counts[page] += 1
+                else:
+                    faults += 1
+                    if len(counts) >= frames:
+                        # Lazy deletion: skip heap entries that are out of date
+                        while True:
+                            count, stamp, victim = heapq.heappop(heap)
+                            if counts.get(victim) == count and stamps[victim] == stamp:
+                                break
+                        del counts[victim]
+                        del stamps[victim]
+                    counts[page] = 1
+                stamps[page] = clock
+                heapq.heappush(heap, (counts[page], clock, page))
+                if len(heap) > 4 * frames + 1024:
+                    heap = [(counts[p], stamps[p], p) for p in counts]
+                    heapq.heapify(heap)
+    
+    elif policy == "OPT":
+        next_use = trace.next_use()
+        resident = {}
+        heap = []
+        index = 0
+        for chunk in trace.chunks():
+            upcoming = next_use[index:index + len(chunk)]
+            upcoming = upcoming.tolist() if hasattr(upcoming, 'tolist') else list(upcoming)
+            for page, nxt in zip(chunk, upcoming):
+                if page in resident:
+                    hits += 1
+                else:
+                    faults += 1
+                    if len(resident) >= frames:
+                        # Evict the page used furthest in the future
+                        while True:
+                            neg_next, victim = heapq.heappop(heap)
+                            if resident.get(victim) == -neg_next:
+                                break
+                        del resident[victim]
+                resident[page] = nxt
+                heapq.heappush(heap, (-nxt, page))
+                index += 1
+            if len(heap) > 4 * frames + 1024:
+                heap = [(-nxt, p) for p, nxt in resident.items()]
+                heapq.heapify(heap)
+    else:
+        raise ValueError(f"Unknown page replacement policy: {policy}")
+    
+    return hits, faults
+
+
+def lru_hit_curve(trace, max_frames):
+    """Hit rate for 1..max_frames frames in one pass (Mattson stack distances)"""
+    n = len(trace)
+    histogram = [0] * (max_frames + 1)
+    # Fenwick tree over time: 1 marks the latest reference of some page. Timestamps are
+    # renumbered 1..distinct pages whenever the clock runs out, so the tree stays
+    # proportional to the distinct pages rather than to the trace length.
+    size = 1024
+    tree = array('q', bytes(8 * (size + 1)))
+    last_seen = {}
+    time_index = 0
+    for chunk in trace.chunks():
+        for page in chunk:
+            if time_index == size:
+                live = sorted(last_seen, key=last_seen.__getitem__)
+                time_index = len(live)
+                for stamp, live_page in enumerate(live, start=1):
+                    last_seen[live_page] = stamp
+                size = max(1024, 2 * time_index)
+                # Prefix counts of a tree holding ones at 1..time_index
+                tree = array('q', [0] + [max(0, min(i, time_index) - (i - (i & -i))) for i in range(1, size + 1)])
+            time_index += 1
+            previous = last_seen.get(page)
+            if previous is not None:
+                # Distinct pages touched since the previous reference
+                distance = 0
+                i = time_index - 1
+                while i > 0:
+                    distance += tree[i]
+                    i -= i & -i
+                i = previous
+                while i > 0:
+                    distance -= tree[i]
+                    i -= i & -i
+                if distance < max_frames:
+                    histogram[distance + 1] += 1
+                i = previous
+                while i <= size:
+                    tree[i] -= 1
+                    i += i & -i
+            last_seen[page] = time_index
+            i = time_index
+            while i <= size:
+                tree[i] += 1
+                i += i & -i
+    
+    curve = []
+    hits = 0
+    for frames in range(1, max_frames + 1):
+        hits += histogram[frames]
+        curve.append(hits / n if n else 0.0)
+    return curve
+
+
+class MemoryAllocator:
+    """Base class for heap allocator simulations"""
+    name = "Allocator"
+    
+    def __init__(self, size):
+        self.size = size
+        self.allocated = {}
+        self.failures = 0
+    
+    def allocate(self, size):
+        raise NotImplementedError
+    
+    def free(self, address):
+        raise NotImplementedError
+    
+    def used(self):
+        return sum(self.allocated.values())
+    
+    def free_blocks(self):
+        return []
+    
+    def stats(self):
+        """Usage and external fragmentation"""
+        blocks = self.free_blocks()
+        free_total = sum(size for _, size in blocks)
+        largest = max((size for _, size in blocks), default=0)
+        fragmentation = 1 - largest / free_total if free_total else 0.0
+        return {
+            'used': self.used(),
+            'free': free_total,
+            'largest_free': largest,
+            'fragmentation': fragmentation,
+            'failures': self.failures
+        }
+
+
+class FreeListAllocator(MemoryAllocator):
+    """First-fit or best-fit allocator over a sorted free list"""
+    def __init__(self, size, strategy="first"):
+        super().__init__(size)
+        self.strategy = strategy
+        self.name = "First-fit" if strategy == "first" else "Best-fit"
+        self.holes = [(0, size)]
+    
+    def allocate(self, size):
+        chosen = None
+        for i, (start, hole) in enumerate(self.holes):
+            if hole >= size:
+                if self.strategy == "first":
+                    chosen = i
+                    break
+                if chosen is None or hole < self.holes[chosen][1]:
+                    chosen = i
+                    if hole == size:
+                        break
+        if chosen is None:
+            self.failures += 1
+            return None
         
-        # System information
-        self.system_name = "MKS-OS"
-        self.version = "1.2"
-        self.username = self.settings.get('username', 'User')
-        self.start_time = time.time()
+        start, hole = self.holes[chosen]
+        if hole == size:
+            del self.holes[chosen]
+        else:
+            self.holes[chosen] = (start + size, hole - size)
+        self.allocated[start] = size
+        return start
+    
+    def free(self, address):
+        size = self.allocated.pop(address)
+        index = 0
+        while index < len(self.holes) and self.holes[index][0] < address:
+            index += 1
+        self.holes.insert(index, (address, size))
+        # Coalesce with neighbours
+        if index + 1 < len(self.holes) and address + size == self.holes[index + 1][0]:
+            self.holes[index] = (address, size + self.holes[index + 1][1])
+            del self.holes[index + 1]
+        if index > 0 and self.holes[index - 1][0] + self.holes[index - 1][1] == address:
+            self.holes[index - 1] = (self.holes[index - 1][0], self.holes[index - 1][1] + self.holes[index][1])
+            del self.holes[index]
+    
+    def free_blocks(self):
+        return list(self.holes)
+
+
+class BuddyAllocator(MemoryAllocator):
+    """Binary buddy allocator"""
+    name = "Buddy"
+    
+    def __init__(self, size, min_block=16):
+        self.max_order = max(0, (size // min_block).bit_length() - 1)
+        super().__init__(min_block << self.max_order)
+        self.min_block = min_block
+        self.free_lists = [set() for _ in range(self.max_order + 1)]
+        self.free_lists[self.max_order].add(0)
+        self.orders = {}
+    
+    def allocate(self, size):
+        order = 0
+        while (self.min_block << order) < size:
+            order += 1
+        current = order
+        while current <= self.max_order and not self.free_lists[current]:
+            current += 1
+        if current > self.max_order:
+            self.failures += 1
+            return None
         
-        # Development variables
-        self.output_queue = queue.Queue()
+        address = self.free_lists[current].pop()
+        # Split down to the requested order
+        while current > order:
+            current -= 1
+            self.free_lists[current].add(address + (self.min_block << current))
+        self.orders[address] = order
+        self.allocated[address] = self.min_block << order
+        return address
+    
+    def free(self, address):
+        order = self.orders.pop(address)
+        del self.allocated[address]
+        while order < self.max_order:
+            buddy = address ^ (self.min_block << order)
+            if buddy not in self.free_lists[order]:
+                break
+            self.free_lists[order].remove(buddy)
+            address = min(address, buddy)
+            order += 1
+        self.free_lists[order].add(address)
+    
+    def free_blocks(self):
+        return [(address, self.min_block << order)
+                for order, addresses in enumerate(self.free_lists)
+                for address in addresses]
+
+
+class SlabAllocator(MemoryAllocator):
+    """Slab allocator with power-of-two object caches"""
+    name = "Slab"
+    
+    def __init__(self, size, slab_size=4096, min_object=16):
+        super().__init__(size)
+        self.slab_size = slab_size
+        self.min_object = min_object
+        self.pages = FreeListAllocator(size, "first")
+        self.caches = defaultdict(list)
+        self.slabs = {}
+        self.large = {}
+    
+    def _object_size(self, size):
+        object_size = self.min_object
+        while object_size < size:
+            object_size <<= 1
+        return object_size
+    
+    def allocate(self, size):
+        object_size = self._object_size(size)
+        if object_size > self.slab_size // 2:
+            address = self.pages.allocate(object_size)
+            if address is None:
+                self.failures += 1
+                return None
+            self.large[address] = object_size
+            self.allocated[address] = object_size
+            return address
         
-        # Create interface
-        self.create_widgets()
-        self.update_time()
+        cache = self.caches[object_size]
+        slab = next((s for s in cache if s['free']), None)
+        if slab is None:
+            base = self.pages.allocate(self.slab_size)
+            if base is None:
+                self.failures += 1
+                return None
+            slab = {'base': base, 'size': object_size,
+                    'free': list(range(base + self.slab_size - object_size, base - 1, -object_size))}
+            cache.append(slab)
+            self.slabs[base] = slab
+        address = slab['free'].pop()
+        self.allocated[address] = object_size
+        return address
+    
+    def free(self, address):
+        size = self.allocated.pop(address)
+        if address in self.large:
+            del self.large[address]
+            self.pages.free(address)
+            return
+        base = address - address % self.slab_size
+        slab = self.slabs[base]
+        slab['free'].append(address)
+        # Return empty slabs to the page allocator
+        if len(slab['free']) == self.slab_size // size:
+            self.caches[size].remove(slab)
+            del self.slabs[base]
+            self.pages.free(base)
+    
+    def free_blocks(self):
+        return self.pages.free_blocks()
+
+
+def run_allocation_workload(allocator, operations=20000, max_size=512, seed=None):
+    """Random malloc/free workload, return allocator statistics"""
+    rng = random.Random(seed)
+    live = []
+    for _ in range(operations):
+        if live and rng.random() < 0.45:
+            allocator.free(live.pop(rng.randrange(len(live))))
+        else:
+            address = allocator.allocate(rng.randint(1, max_size))
+            if address is not None:
+                live.append(address)
+    return allocator.stats()
+
+
+
+# ========== VIRTUAL FILE SYSTEM ==========
+
+VFS_MAGIC = b'MKSVFS01'
+VFS_BLOCK_SIZE = 4096
+VFS_INODE_SIZE = 128
+VFS_MAX_EXTENTS = 12
+VFS_ZERO_CHUNK = 1 << 20
+VFS_DIRENT_SIZE = 64
+VFS_NAME_MAX = 60
+VFS_ROOT_INODE = 1
+VFS_FILE = 1
+VFS_DIR = 2
+
+SUPERBLOCK_FORMAT = struct.Struct('<8sIIIIIIIII')
+INODE_FORMAT = struct.Struct('<HHQdd' + 'I' + 'II' * VFS_MAX_EXTENTS)
+DIRENT_FORMAT = struct.Struct('<I60s')
+
+
+class VFSError(OSError):
+    """Virtual file system error"""
+
+
+class VFSInode:
+    """On-disk inode: type, size, timestamps and up to 12 extents"""
+    def __init__(self, number, mode=0, links=0, size=0, mtime=0.0, ctime=0.0, extents=None):
+        self.number = number
+        self.mode = mode
+        self.links = links
+        self.size = size
+        self.mtime = mtime
+        self.ctime = ctime
+        self.extents = extents or []
+    
+    @classmethod
+    def unpack(cls, number, raw):
+        fields = INODE_FORMAT.unpack(raw)
+        mode, links, size, mtime, ctime, count = fields[:6]
+        pairs = fields[6:]
+        extents = [(pairs[2 * i], pairs[2 * i + 1]) for i in range(min(count, VFS_MAX_EXTENTS))]
+        return cls(number, mode, links, size, mtime, ctime, extents)
+    
+    def pack(self):
+        pairs = []
+        for start, length in self.extents:
+            pairs.extend((start, length))
+        pairs.extend([0] * (2 * VFS_MAX_EXTENTS - len(pairs)))
+        raw = INODE_FORMAT.pack(self.mode, self.links, self.size, self.mtime, self.ctime,
+                                len(self.extents), *pairs)
+        return raw.ljust(VFS_INODE_SIZE, b'\0')
+    
+    def allocated_blocks(self):
+        return sum(length for _, length in self.extents)
+
+
+class BlockCache:
+    """LRU write-back cache of disk image blocks"""
+    def __init__(self, image, block_size, capacity=256):
+        self.image = image
+        self.block_size = block_size
+        self.capacity = capacity
+        self.blocks = OrderedDict()
+        self.dirty = set()
+        self.hits = 0
+        self.misses = 0
+    
+    def read(self, number):
+        block = self.blocks.get(number)
+        if block is not None:
+            self.hits += 1
+            self.blocks.move_to_end(number)
+            return block
+        self.misses += 1
+        offset = number * self.block_size
+        block = bytearray(self.image[offset:offset + self.block_size])
+        self.blocks[number] = block
+        self._evict()
+        return block
+    
+    def mark_dirty(self, number):
+        self.dirty.add(number)
+    
+    def invalidate(self, start, count):
+        """Drop cached copies of blocks that were written around the cache"""
+        for number in range(start, start + count):
+            if number in self.blocks:
+                self.dirty.discard(number)
+                del self.blocks[number]
+    
+    def cached(self, number):
+        return self.blocks.get(number)
+    
+    def _evict(self):
+        while len(self.blocks) > self.capacity:
+            number, block = self.blocks.popitem(last=False)
+            if number in self.dirty:
+                self._write_back(number, block)
+    
+    def _write_back(self, number, block):
+        offset = number * self.block_size
+        self.image[offset:offset + self.block_size] = block
+        self.dirty.discard(number)
+    
+    def flush(self):
+        for number in sorted(self.dirty):
+            self._write_back(number, self.blocks[number])
+        self.dirty.clear()
+
+
+def vfs_locked(method):
+    """Run a VirtualFileSystem operation under the instance lock"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class VirtualFileSystem:
+    """Extent-based file system stored in a single memory-mapped image file
+    
+    Public operations are serialized on an RLock: the terminal, the benchmark thread
+    and the UI may use one mounted image at the same time. Open files share one
+    in-memory inode per inode number, so every handle sees the others' size and extents.
+    """
+    def __init__(self, path, cache_blocks=256):
+        self.path = path
+        self.file = open(path, 'r+b')
+        self.image = mmap.mmap(self.file.fileno(), 0)
         
-    def load_settings(self):
-        """Load settings from file"""
-        default = {
-            'language': 'english',
-            'username': 'User',
-            'theme': 'dark',
-            'font_size': 12,
-            'recent_files': []
-        }
+        fields = SUPERBLOCK_FORMAT.unpack_from(self.image, 0)
+        (magic, self.block_size, self.total_blocks, self.inode_count,
+         self.bitmap_start, self.bitmap_blocks, self.inode_start,
+         self.inode_blocks, self.data_start, self.root) = fields
+        if magic != VFS_MAGIC:
+            self.image.close()
+            self.file.close()
+            raise VFSError(f"Not an MKS-OS disk image: {path}")
+        
+        self.cache = BlockCache(self.image, self.block_size, cache_blocks)
+        self.lock = threading.RLock()
+        self.inodes_per_block = self.block_size // VFS_INODE_SIZE
+        self._inode_hint = VFS_ROOT_INODE
+        # Open-inode table: number -> [shared VFSInode, handle count]
+        self.open_inodes = {}
+        
+        # The allocation bitmap lives in memory and is written back on flush
+        start = self.bitmap_start * self.block_size
+        self.bitmap = bytearray(self.image[start:start + (self.total_blocks + 7) // 8])
+        self.bitmap_dirty = False
+    
+    @classmethod
+    def format(cls, path, size_mb=64, bytes_per_inode=16384):
+        """Create a new empty disk image"""
+        block_size = VFS_BLOCK_SIZE
+        total_blocks = max(64, size_mb * 1024 * 1024 // block_size)
+        inode_count = max(64, total_blocks * block_size // bytes_per_inode)
+        bitmap_blocks = (total_blocks + block_size * 8 - 1) // (block_size * 8)
+        inode_blocks = (inode_count * VFS_INODE_SIZE + block_size - 1) // block_size
+        bitmap_start = 1
+        inode_start = bitmap_start + bitmap_blocks
+        data_start = inode_start + inode_blocks
+        
+        with open(path, 'wb') as f:
+            f.truncate(total_blocks * block_size)
+            f.write(SUPERBLOCK_FORMAT.pack(VFS_MAGIC, block_size, total_blocks, inode_count,
+                                           bitmap_start, bitmap_blocks, inode_start,
+                                           inode_blocks, data_start, VFS_ROOT_INODE))
+        
+        vfs = cls(path)
+        # Metadata blocks are always in use
+        for block in range(data_start):
+            vfs._set_bit(block, True)
+        now = time.time()
+        vfs._write_inode(VFSInode(VFS_ROOT_INODE, VFS_DIR, 2, 0, now, now))
+        vfs.flush()
+        return vfs
+    
+    # --- low level ---
+    
+    def _set_bit(self, block, used):
+        if used:
+            self.bitmap[block >> 3] |= 1 << (block & 7)
+        else:
+            self.bitmap[block >> 3] &= ~(1 << (block & 7)) & 0xff
+        self.bitmap_dirty = True
+    
+    def _bit(self, block):
+        return self.bitmap[block >> 3] >> (block & 7) & 1
+    
+    def _read_inode(self, number):
+        if not 0 < number < self.inode_count:
+            raise VFSError(f"Bad inode number {number}")
+        entry = self.open_inodes.get(number)
+        if entry is not None:
+            return entry[0]
+        block = self.cache.read(self.inode_start + number // self.inodes_per_block)
+        offset = (number % self.inodes_per_block) * VFS_INODE_SIZE
+        return VFSInode.unpack(number, block[offset:offset + INODE_FORMAT.size])
+    
+    def _write_inode(self, inode):
+        block_number = self.inode_start + inode.number // self.inodes_per_block
+        block = self.cache.read(block_number)
+        offset = (inode.number % self.inodes_per_block) * VFS_INODE_SIZE
+        block[offset:offset + VFS_INODE_SIZE] = inode.pack()
+        self.cache.mark_dirty(block_number)
+    
+    def _alloc_inode(self, mode):
+        for step in range(1, self.inode_count):
+            number = (self._inode_hint + step) % self.inode_count
+            # Inodes of removed files stay reserved while a handle is still open on them
+            if number == 0 or number in self.open_inodes:
+                continue
+            inode = self._read_inode(number)
+            if inode.mode == 0:
+                now = time.time()
+                inode = VFSInode(number, mode, 1, 0, now, now)
+                self._write_inode(inode)
+                self._inode_hint = number
+                return inode
+        raise VFSError(28, "No free inodes")
+    
+    def _alloc_run(self, want, goal=None):
+        """Allocate up to want contiguous blocks, preferring to start at goal"""
+        if goal is not None and goal < self.total_blocks and not self._bit(goal):
+            start = goal
+        else:
+            start = None
+            # Byte-aligned free run first, then any free bit
+            need = min((want + 7) // 8, 64)
+            index = self.bitmap.find(bytes(need), self.data_start >> 3)
+            if index < 0:
+                index = self.bitmap.find(bytes(1), self.data_start >> 3)
+            if index >= 0:
+                for block in range(max(index * 8, self.data_start), min(index * 8 + 8, self.total_blocks)):
+                    if not self._bit(block):
+                        start = block
+                        break
+            if start is None:
+                for block in range(self.data_start, self.total_blocks):
+                    if not self._bit(block):
+                        start = block
+                        break
+            if start is None:
+                raise VFSError(28, "No space left on virtual disk")
+        
+        length = 0
+        while length < want and start + length < self.total_blocks and not self._bit(start + length):
+            self._set_bit(start + length, True)
+            length += 1
+        return start, length
+    
+    def _grow(self, inode, blocks_needed):
+        """Make sure inode owns at least blocks_needed data blocks"""
+        missing = blocks_needed - inode.allocated_blocks()
+        while missing > 0:
+            goal = None
+            if inode.extents:
+                last_start, last_length = inode.extents[-1]
+                goal = last_start + last_length
+            start, length = self._alloc_run(missing, goal)
+            if inode.extents and start == goal:
+                inode.extents[-1] = (last_start, last_length + length)
+            elif len(inode.extents) >= VFS_MAX_EXTENTS:
+                for block in range(start, start + length):
+                    self._set_bit(block, False)
+                raise VFSError(27, "File too fragmented (extent limit reached)")
+            else:
+                inode.extents.append((start, length))
+            missing -= length
+    
+    def _hold(self, inode):
+        """Count a handle on an inode; the first one puts it in the open-inode table"""
+        entry = self.open_inodes.setdefault(inode.number, [inode, 0])
+        entry[1] += 1
+        return entry[0]
+    
+    def _drop(self, inode):
+        entry = self.open_inodes.get(inode.number)
+        if entry is not None:
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del self.open_inodes[inode.number]
+    
+    def _release(self, inode):
+        for start, length in inode.extents:
+            for block in range(start, start + length):
+                self._set_bit(block, False)
+            self.cache.invalidate(start, length)
+        inode.extents = []
+    
+    def _runs(self, inode, first, count):
+        """Map file blocks [first, first+count) to (disk_block, length) runs"""
+        position = 0
+        for start, length in inode.extents:
+            if count <= 0:
+                break
+            if first < position + length:
+                skip = max(0, first - position)
+                take = min(length - skip, count)
+                yield start + skip, take
+                first += take
+                count -= take
+            position += length
+    
+    def _read_data(self, inode, offset, size):
+        size = max(0, min(size, inode.size - offset))
+        if size == 0:
+            return b''
+        bs = self.block_size
+        first = offset // bs
+        last = (offset + size - 1) // bs
+        parts = []
+        for start, length in self._runs(inode, first, last - first + 1):
+            if any(self.cache.cached(b) is not None for b in range(start, start + length)):
+                for block in range(start, start + length):
+                    cached = self.cache.cached(block)
+                    parts.append(cached if cached is not None else self.image[block * bs:(block + 1) * bs])
+            else:
+                parts.append(self.image[start * bs:(start + length) * bs])
+        data = b''.join(parts)
+        skip = offset - first * bs
+        return data[skip:skip + size]
+    
+    def _write_data(self, inode, offset, data):
+        if not data:
+            return
+        bs = self.block_size
+        end = offset + len(data)
+        self._grow(inode, (end + bs - 1) // bs)
+        first = offset // bs
+        last = (end - 1) // bs
+        if offset > inode.size:
+            self._zero_fill(inode, inode.size, min(offset, first * bs))
+        
+        # Read-modify-write partial edge blocks
+        head = offset - first * bs
+        if head or end % bs:
+            original = self._read_data(inode, first * bs, head).ljust(head, b'\0') if head else b''
+            tail_start = end
+            tail_end = min(inode.size, (last + 1) * bs)
+            tail = self._read_data(inode, tail_start, tail_end - tail_start) if tail_end > tail_start else b''
+            data = original + data + tail
+            data = data + bytes(-len(data) % bs)
         
+        # Data blocks are streamed straight to the image, bypassing the cache
+        position = 0
+        for start, length in self._runs(inode, first, last - first + 1):
+            chunk = data[position:position + length * bs]
+            self.image[start * bs:start * bs + len(chunk)] = chunk
+            self.cache.invalidate(start, length)
+            position += length * bs
+        
+        inode.size = max(inode.size, end)
+        inode.mtime = time.time()
+        self._write_inode(inode)
+    
+    def _zero_fill(self, inode, start, end):
+        """Zero file bytes [start, end): blocks past the old end may still hold a freed file's data"""
+        bs = self.block_size
+        if end <= start:
+            return
+        first = start // bs
+        position = first * bs
+        for disk_start, length in self._runs(inode, first, (end - 1) // bs - first + 1):
+            lo = max(start, position) - position
+            hi = min(end, position + length * bs) - position
+            base = disk_start * bs
+            for chunk_start in range(lo, hi, VFS_ZERO_CHUNK):
+                chunk_end = min(hi, chunk_start + VFS_ZERO_CHUNK)
+                self.image[base + chunk_start:base + chunk_end] = bytes(chunk_end - chunk_start)
+            self.cache.invalidate(disk_start, length)
+            position += length * bs
+    
+    def _truncate(self, inode):
+        self._release(inode)
+        inode.size = 0
+        inode.mtime = time.time()
+        self._write_inode(inode)
+    
+    # --- directories ---
+    
+    def _entries(self, directory):
+        data = self._read_data(directory, 0, directory.size)
+        for slot in range(len(data) // VFS_DIRENT_SIZE):
+            number, raw = DIRENT_FORMAT.unpack_from(data, slot * VFS_DIRENT_SIZE)
+            if number:
+                yield slot, raw.rstrip(b'\0').decode('utf-8'), number
+    
+    def _lookup(self, directory, name):
+        for _, entry, number in self._entries(directory):
+            if entry == name:
+                return number
+        return None
+    
+    def _add_entry(self, directory, name, number):
+        encoded = name.encode('utf-8')
+        if not name or '/' in name or len(encoded) > VFS_NAME_MAX:
+            raise VFSError(22, f"Invalid file name: {name!r}")
+        record = DIRENT_FORMAT.pack(number, encoded)
+        slots = set(slot for slot, _, _ in self._entries(directory))
+        slot = next((i for i in range(directory.size // VFS_DIRENT_SIZE) if i not in slots),
+                    directory.size // VFS_DIRENT_SIZE)
+        self._write_data(directory, slot * VFS_DIRENT_SIZE, record)
+    
+    def _remove_entry(self, directory, name):
+        for slot, entry, _ in self._entries(directory):
+            if entry == name:
+                self._write_data(directory, slot * VFS_DIRENT_SIZE, bytes(VFS_DIRENT_SIZE))
+                return
+    
+    def _split(self, path):
+        parts = [p for p in path.replace('\\', '/').split('/') if p and p != '.']
+        resolved = []
+        for part in parts:
+            if part == '..':
+                if resolved:
+                    resolved.pop()
+            else:
+                resolved.append(part)
+        return resolved
+    
+    def _resolve(self, path):
+        inode = self._read_inode(self.root)
+        for part in self._split(path):
+            if inode.mode != VFS_DIR:
+                raise VFSError(20, f"Not a directory: {path}")
+            number = self._lookup(inode, part)
+            if number is None:
+                raise FileNotFoundError(2, f"No such file or directory: {path}")
+            inode = self._read_inode(number)
+        return inode
+    
+    def _parent(self, path):
+        parts = self._split(path)
+        if not parts:
+            raise VFSError(22, "Cannot operate on the root directory")
+        parent = self._resolve('/'.join(parts[:-1]))
+        if parent.mode != VFS_DIR:
+            raise VFSError(20, f"Not a directory: {path}")
+        return parent, parts[-1]
+    
+    # --- public API ---
+    
+    @vfs_locked
+    def open(self, path, mode='r'):
+        """Open a file; modes r, w, a and r+ (binary)"""
+        mode = mode.replace('b', '')
+        if mode not in ('r', 'w', 'a', 'r+'):
+            raise ValueError(f"Unsupported mode: {mode}")
         try:
-            if os.path.exists('mksos_settings.json'):
-                with open('mksos_settings.json', 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except:
-            pass
-        return default
+            inode = self._resolve(path)
+        except FileNotFoundError:
+            if mode == 'r' or mode == 'r+':
+                raise
+            parent, name = self._parent(path)
+            inode = self._alloc_inode(VFS_FILE)
+            self._add_entry(parent, name, inode.number)
+        if inode.mode == VFS_DIR:
+            raise IsADirectoryError(21, f"Is a directory: {path}")
+        if mode == 'w':
+            self._truncate(inode)
+        return VFSFile(self, self._hold(inode), mode)
     
-    def save_settings(self):
-        """Save settings to file"""
+    @vfs_locked
+    def read_file(self, path):
+        with self.open(path, 'r') as f:
+            return f.read()
+    
+    @vfs_locked
+    def write_file(self, path, data):
+        with self.open(path, 'w') as f:
+            f.write(data)
+    
+    @vfs_locked
+    def listdir(self, path='/'):
+        inode = self._resolve(path)
+        if inode.mode != VFS_DIR:
+            raise VFSError(20, f"Not a directory: {path}")
+        return sorted(name for _, name, _ in self._entries(inode))
+    
+    @vfs_locked
+    def stat(self, path):
+        inode = self._resolve(path)
+        return {
+            'inode': inode.number,
+            'type': 'dir' if inode.mode == VFS_DIR else 'file',
+            'size': inode.size,
+            'blocks': inode.allocated_blocks(),
+            'extents': len(inode.extents),
+            'links': inode.links,
+            'mtime': inode.mtime,
+            'ctime': inode.ctime
+        }
+    
+    @vfs_locked
+    def exists(self, path):
         try:
-            with open('mksos_settings.json', 'w', encoding='utf-8') as f:
-                json.dump(self.settings, f, indent=4, ensure_ascii=False)
-        except:
+            self._resolve(path)
+            return True
+        except (FileNotFoundError, VFSError):
+            return False
+    
+    @vfs_locked
+    def isdir(self, path):
+        try:
+            return self._resolve(path).mode == VFS_DIR
+        except (FileNotFoundError, VFSError):
+            return False
+    
+    @vfs_locked
+    def mkdir(self, path):
+        parent, name = self._parent(path)
+        if self._lookup(parent, name) is not None:
+            raise FileExistsError(17, f"File exists: {path}")
+        inode = self._alloc_inode(VFS_DIR)
+        inode.links = 2
+        self._write_inode(inode)
+        self._add_entry(parent, name, inode.number)
+    
+    @vfs_locked
+    def remove(self, path):
+        parent, name = self._parent(path)
+        inode = self._resolve(path)
+        if inode.mode == VFS_DIR:
+            if any(True for _ in self._entries(inode)):
+                raise VFSError(39, f"Directory not empty: {path}")
+        self._remove_entry(parent, name)
+        self._release(inode)
+        # Handles still open on the file see it as removed (mode 0) and refuse to write
+        inode.mode, inode.links, inode.size = 0, 0, 0
+        self._write_inode(VFSInode(inode.number))
+    
+    @vfs_locked
+    def usage(self):
+        """Total, used and free bytes"""
+        used = sum(bin(byte).count('1') for byte in self.bitmap)
+        return {
+            'total': self.total_blocks * self.block_size,
+            'used': used * self.block_size,
+            'free': (self.total_blocks - used) * self.block_size
+        }
+    
+    @vfs_locked
+    def flush(self):
+        """Write back cached metadata and the bitmap"""
+        self.cache.flush()
+        if self.bitmap_dirty:
+            start = self.bitmap_start * self.block_size
+            self.image[start:start + len(self.bitmap)] = self.bitmap
+            self.bitmap_dirty = False
+        self.image.flush()
+    
+    @vfs_locked
+    def close(self):
+        if self.image.closed:
+            return
+        self.flush()
+        self.image.close()
+        self.file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    @vfs_locked
+    def fsck(self, repair=False):
+        """Check consistency; with repair, rebuild the bitmap and drop orphans"""
+        problems = []
+        owner = {}
+        reachable = {}
+        
+        # Walk the tree from the root
+        stack = [(self.root, '/')]
+        while stack:
+            number, path = stack.pop()
+            if number in reachable:
+                problems.append(f"{path}: inode {number} linked more than once")
+                continue
+            inode = self._read_inode(number)
+            reachable[number] = path
+            if inode.mode not in (VFS_FILE, VFS_DIR):
+                problems.append(f"{path}: entry points to free inode {number}")
+                continue
+            for start, length in inode.extents:
+                if start < self.data_start or start + length > self.total_blocks:
+                    problems.append(f"{path}: extent {start}+{length} outside data area")
+                    continue
+                for block in range(start, start + length):
+                    if block in owner:
+                        problems.append(f"{path}: block {block} also used by {owner[block]}")
+                    owner[block] = path
+            if inode.size > inode.allocated_blocks() * self.block_size:
+                problems.append(f"{path}: size {inode.size} exceeds allocated blocks")
+            if inode.mode == VFS_DIR:
+                for _, name, child in self._entries(inode):
+                    if not 0 < child < self.inode_count:
+                        problems.append(f"{path}{name}: bad inode number {child}")
+                        if repair:
+                            self._remove_entry(inode, name)
+                        continue
+                    if self._read_inode(child).mode == 0:
+                        problems.append(f"{path}{name}: dangling entry to inode {child}")
+                        if repair:
+                            self._remove_entry(inode, name)
+                        continue
+                    stack.append((child, f"{path}{name}/" if self._read_inode(child).mode == VFS_DIR
+                                  else f"{path}{name}"))
+        
+        # Orphaned inodes
+        for number in range(1, self.inode_count):
+            if number not in reachable and self._read_inode(number).mode != 0:
+                problems.append(f"inode {number}: allocated but unreachable")
+                if repair:
+                    self._write_inode(VFSInode(number))
+        
+        # Bitmap against actual ownership
+        mismatched = 0
+        for block in range(self.data_start, self.total_blocks):
+            if bool(self._bit(block)) != (block in owner):
+                mismatched += 1
+                if repair:
+                    self._set_bit(block, block in owner)
+        if mismatched:
+            problems.append(f"bitmap: {mismatched} blocks marked incorrectly")
+        
+        if repair:
+            self.flush()
+        return problems
+
+
+class VFSFile:
+    """File handle returned by VirtualFileSystem.open"""
+    def __init__(self, vfs, inode, mode):
+        self.vfs = vfs
+        self.inode = inode
+        self.mode = mode
+        self.position = inode.size if mode == 'a' else 0
+        self.closed = False
+    
+    def read(self, size=-1):
+        with self.vfs.lock:
+            if size is None or size < 0:
+                size = self.inode.size - self.position
+            data = self.vfs._read_data(self.inode, self.position, size)
+        self.position += len(data)
+        return data
+    
+    def write(self, data):
+        if self.mode == 'r':
+            raise VFSError(9, "File not open for writing")
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        with self.vfs.lock:
+            if self.inode.mode == 0:
+                raise VFSError(116, "File was removed")
+            if self.mode == 'a':
+                self.position = self.inode.size
+            self.vfs._write_data(self.inode, self.position, data)
+        self.position += len(data)
+        return len(data)
+    
+    def seek(self, offset, whence=0):
+        with self.vfs.lock:
+            base = (0, self.position, self.inode.size)[whence]
+        self.position = max(0, base + offset)
+        return self.position
+    
+    def tell(self):
+        return self.position
+    
+    def close(self):
+        with self.vfs.lock:
+            if not self.closed:
+                self.vfs._drop(self.inode)
+            self.closed = True
+    
+    def __iter__(self):
+        # Line iteration for text tools (terminal, viewers)
+        pending = b''
+        while True:
+            chunk = self.read(65536)
+            if not chunk:
+                break
+            pending += chunk
+            lines = pending.split(b'\n')
+            pending = lines.pop()
+            for line in lines:
+                yield line + b'\n'
+        if pending:
+            yield pending
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+def benchmark_vfs(vfs, host_dir, size_mb=32, chunk_kb=1024):
+    """Sequential write/read throughput of the VFS compared with the host"""
+    chunk = os.urandom(chunk_kb * 1024)
+    count = max(1, size_mb * 1024 // chunk_kb)
+    results = {}
+    
+    start = time.perf_counter()
+    with vfs.open('/.benchmark', 'w') as f:
+        for _ in range(count):
+            f.write(chunk)
+    vfs.flush()
+    results['vfs_write'] = size_mb / (time.perf_counter() - start)
+    start = time.perf_counter()
+    with vfs.open('/.benchmark', 'r') as f:
+        while f.read(len(chunk)):
             pass
+    results['vfs_read'] = size_mb / (time.perf_counter() - start)
+    vfs.remove('/.benchmark')
+    vfs.flush()
     
-    def create_widgets(self):
-        """Create user interface"""
-        # Top panel
-        self.create_top_panel()
+    host_path = os.path.join(host_dir, '.mksos_benchmark')
+    try:
+        start = time.perf_counter()
+        with open(host_path, 'wb') as f:
+            for _ in range(count):
+                f.write(chunk)
+            f.flush()
+        results['host_write'] = size_mb / (time.perf_counter() - start)
+        start = time.perf_counter()
+        with open(host_path, 'rb') as f:
+            while f.read(len(chunk)):
+                pass
+        results['host_read'] = size_mb / (time.perf_counter() - start)
+    finally:
+        if os.path.exists(host_path):
+            os.remove(host_path)
+    return results
+
+
+# ========== TERMINAL SHELL ==========
+
+class ShellCancelled(Exception):
+    """Raised inside a pipeline when the user presses Ctrl-C"""
+
+
+class TerminalShell:
+    """Command interpreter with streaming built-ins and host subprocesses"""
+    BUILTINS = ('cat', 'cd', 'clear', 'df', 'echo', 'find', 'grep', 'head', 'help',
+                'history', 'ls', 'ps', 'pwd', 'tail', 'wc')
+    CHUNK = 65536
+    QUEUE_ITEMS = 32
+    
+    def __init__(self, get_vfs=None, cwd=None):
+        self.get_vfs = get_vfs or (lambda: None)
+        self.cwd = cwd or os.path.expanduser('~')
+        self.history = []
+        self.cancel_event = Event()
+        self.processes = []
+        self._executables = None
+        self._emit = None
+    
+    # --- paths ---
+    
+    def resolve(self, path):
+        """Map a shell path to ('vfs', path) or ('host', path)"""
+        path = os.path.expanduser(path) if path.startswith('~') else path
+        if self.cwd.startswith('/vfs') and not (path.startswith('/') or os.path.isabs(path)):
+            path = posixpath.normpath(posixpath.join(self.cwd, path))
+        elif not (path.startswith('/') or os.path.isabs(path)):
+            path = os.path.normpath(os.path.join(self.cwd, path))
         
-        # Main tabs
-        self.create_main_tabs()
+        vfs = self.get_vfs()
+        normalized = path.replace('\\', '/')
+        if vfs is not None and (normalized == '/vfs' or normalized.startswith('/vfs/')):
+            return 'vfs', posixpath.normpath(normalized[4:] or '/')
+        return 'host', os.path.normpath(path)
+    
+    def isdir(self, path):
+        kind, target = self.resolve(path)
+        if kind == 'vfs':
+            return self.get_vfs().isdir(target)
+        return os.path.isdir(target)
+    
+    def listdir(self, path):
+        kind, target = self.resolve(path)
+        if kind == 'vfs':
+            return self.get_vfs().listdir(target)
+        return sorted(os.listdir(target))
+    
+    def stat(self, path):
+        """(is_dir, size, mtime)"""
+        kind, target = self.resolve(path)
+        if kind == 'vfs':
+            st = self.get_vfs().stat(target)
+            return st['type'] == 'dir', st['size'], st['mtime']
+        st = os.stat(target)
+        return os.path.isdir(target), st.st_size, st.st_mtime
+    
+    def join(self, base, name):
+        if base.replace('\\', '/').startswith('/vfs'):
+            return base.rstrip('/') + '/' + name
+        return os.path.join(base, name)
+    
+    def read_lines(self, path):
+        """Stream a file line by line in bounded chunks"""
+        kind, target = self.resolve(path)
+        if kind == 'vfs':
+            with self.get_vfs().open(target, 'r') as f:
+                for line in f:
+                    self.check_cancelled()
+                    yield line.decode('utf-8', errors='replace')
+        else:
+            with open(target, 'r', encoding='utf-8', errors='replace', buffering=self.CHUNK) as f:
+                for count, line in enumerate(f):
+                    if count & 1023 == 0:
+                        self.check_cancelled()
+                    yield line
+    
+    # --- execution ---
+    
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise ShellCancelled()
+    
+    def cancel(self):
+        """Ctrl-C: stop the running pipeline and kill child processes"""
+        self.cancel_event.set()
+        for proc in list(self.processes):
+            try:
+                proc.kill()
+            except OSError:
+                pass
+    
+    def error(self, message):
+        """Write to the terminal directly, like stderr"""
+        if self._emit:
+            self._emit(message.rstrip('\n') + '\n')
+    
+    def parse(self, line):
+        """Split a command line into pipeline stages"""
+        lexer = shlex.shlex(line, posix=True, punctuation_chars='|')
+        lexer.whitespace_split = True
+        if os.name == 'nt':
+            lexer.escape = ''
+        stages = [[]]
+        for token in lexer:
+            if token == '|':
+                stages.append([])
+            else:
+                stages[-1].append(token)
+        if any(not stage for stage in stages):
+            raise ValueError("empty command in pipeline")
+        return stages
+    
+    def run(self, line, emit):
+        """Run a command line, passing output chunks to emit"""
+        line = line.strip()
+        if not line:
+            return
+        self.cancel_event.clear()
+        self.history.append(line)
+        self._emit = emit
+        try:
+            stages = self.parse(line)
+        except ValueError as e:
+            emit(f"mksh: {e}\n")
+            return
         
-        # Status bar
-        self.create_status_bar()
+        stream = None
+        for args in stages:
+            stream = self.stage(args, stream)
+        try:
+            for chunk in stream:
+                emit(chunk)
+        except ShellCancelled:
+            emit("^C\n")
+        except (OSError, re.error, ValueError) as e:
+            emit(f"mksh: {e}\n")
+        finally:
+            stream.close()
+            self._emit = None
+    
+    def run_queued(self, line, out):
+        """Run a command line into a bounded queue, batching output into CHUNK-sized items
         
-        # Update system info
-        self.update_system_info()
+        A full queue makes the pipeline wait, so `cat` of a huge file cannot run ahead of
+        the terminal widget; the wait keeps checking for Ctrl-C. Output is sent right away
+        while the reader keeps up and batched while it is behind.
+        """
+        parts = []
+        state = {'size': 0, 'since': 0.0}
+        
+        def send():
+            if not parts:
+                return
+            data = ''.join(parts)
+            del parts[:]
+            state['size'] = 0
+            while True:
+                try:
+                    out.put(data, timeout=0.1)
+                    return
+                except queue.Full:
+                    if self.cancel_event.is_set():
+                        return
+        
+        def emit(chunk):
+            if not parts:
+                state['since'] = time.monotonic()
+            parts.append(chunk)
+            state['size'] += len(chunk)
+            if state['size'] >= self.CHUNK or out.empty() or time.monotonic() - state['since'] > 0.1:
+                send()
+        
+        try:
+            self.run(line, emit)
+        finally:
+            send()
     
-    def create_top_panel(self):
-        """Create top panel"""
-        top_frame = tk.Frame(self.root, bg='#2c3e50', height=60)
-        top_frame.pack(fill=tk.X)
-        top_frame.pack_propagate(False)
+    def stage(self, args, stdin):
+        if args[0] in self.BUILTINS:
+            return getattr(self, 'cmd_' + args[0])(args[1:], stdin)
+        return self.run_host(args, stdin)
+    
+    def run_host(self, args, stdin):
+        """Run a host program with non-blocking pipe readers"""
+        kind, cwd = self.resolve(self.cwd)
+        if kind == 'vfs':
+            cwd = os.path.expanduser('~')
+        if os.name == 'nt' and shutil.which(args[0]) is None:
+            args = ['cmd', '/c'] + args
+        try:
+            proc = subprocess.Popen(args, cwd=cwd, bufsize=0,
+                                    stdin=subprocess.PIPE if stdin is not None else subprocess.DEVNULL,
+                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        except FileNotFoundError:
+            self.error(f"{args[0]}: command not found")
+            return
+        self.processes.append(proc)
         
-        # Logo
-        tk.Label(top_frame, text="MKS-OS", font=("Arial", 22, "bold"),
-                bg="#2c3e50", fg="white").pack(side=tk.LEFT, padx=20)
+        if stdin is not None:
+            Thread(target=self._feed, args=(proc.stdin, stdin), daemon=True).start()
+        # Bounded queue gives backpressure on chatty programs
+        chunks = queue.Queue(maxsize=256)
+        Thread(target=self._drain, args=(proc.stdout, chunks), daemon=True).start()
         
-        tk.Label(top_frame, text=f"v{self.version}", font=("Arial", 10),
-                bg="#2c3e50", fg="#bdc3c7").pack(side=tk.LEFT)
+        try:
+            while True:
+                try:
+                    chunk = chunks.get(timeout=0.1)
+                except queue.Empty:
+                    self.check_cancelled()
+                    continue
+                if chunk is None:
+                    break
+                self.check_cancelled()
+                yield from chunk.splitlines(keepends=True)
+            proc.wait()
+            self.check_cancelled()
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            self.processes.remove(proc)
+    
+    def _feed(self, pipe, stream):
+        try:
+            for chunk in stream:
+                pipe.write(chunk.encode('utf-8'))
+        except (OSError, ShellCancelled):
+            pass
+        finally:
+            try:
+                pipe.close()
+            except OSError:
+                pass
+    
+    def _drain(self, pipe, chunks):
+        pending = b''
+        while True:
+            data = pipe.read(self.CHUNK)
+            if not data:
+                break
+            pending += data
+            cut = pending.rfind(b'\n') + 1
+            if cut:
+                chunks.put(pending[:cut].decode('utf-8', errors='replace'))
+                pending = pending[cut:]
+        if pending:
+            chunks.put(pending.decode('utf-8', errors='replace'))
+        chunks.put(None)
+    
+    def _inputs(self, files, stdin):
+        """Lines from the named files, or from the pipe when no files are given"""
+        if not files:
+            if stdin is not None:
+                yield from stdin
+            return
+        for name in files:
+            try:
+                yield from self.read_lines(name)
+            except (OSError, VFSError) as e:
+                self.error(f"{name}: {e.strerror or e}")
+    
+    def _options(self, args, with_value=()):
+        """Split -x style options from operands"""
+        options = {}
+        operands = []
+        i = 0
+        while i < len(args):
+            arg = args[i]
+            if arg.startswith('-') and len(arg) > 1 and not operands:
+                flag = arg[1:]
+                if flag in with_value and i + 1 < len(args):
+                    options[flag] = args[i + 1]
+                    i += 1
+                elif flag[0] in with_value and flag[1:].isdigit():
+                    options[flag[0]] = flag[1:]
+                elif flag.isdigit():
+                    options['n'] = flag
+                else:
+                    for letter in flag:
+                        options[letter] = True
+            else:
+                operands.append(arg)
+            i += 1
+        return options, operands
+    
+    # --- built-ins ---
+    
+    def cmd_cat(self, args, stdin):
+        yield from self._inputs(args, stdin)
+    
+    def cmd_cd(self, args, stdin):
+        target = args[0] if args else os.path.expanduser('~')
+        kind, path = self.resolve(target)
+        if not self.isdir(target):
+            self.error(f"cd: {target}: No such directory")
+            return
+        self.cwd = '/vfs' + (path if path != '/' else '') if kind == 'vfs' else path
+        yield from ()
+    
+    def cmd_clear(self, args, stdin):
+        yield from ()
+    
+    def cmd_echo(self, args, stdin):
+        yield ' '.join(args) + '\n'
+    
+    def cmd_pwd(self, args, stdin):
+        yield self.cwd + '\n'
+    
+    def cmd_help(self, args, stdin):
+        yield "Built-in commands: " + ", ".join(self.BUILTINS) + "\n"
+        yield "Pipelines: cat big.log | grep ERROR | wc -l\n"
+        yield "Other commands run on the host. Ctrl-C cancels, Tab completes, Up/Down browse history.\n"
+    
+    def cmd_history(self, args, stdin):
+        for number, line in enumerate(self.history, start=1):
+            yield f"{number:5}  {line}\n"
+    
+    def cmd_ls(self, args, stdin):
+        options, paths = self._options(args)
+        for path in paths or ['.']:
+            try:
+                if not self.isdir(path):
+                    names, base = [path], None
+                else:
+                    names, base = self.listdir(path), path
+            except (OSError, VFSError) as e:
+                self.error(f"ls: {path}: {e.strerror or e}")
+                continue
+            if len(paths) > 1:
+                yield f"{path}:\n"
+            for name in names:
+                if name.startswith('.') and 'a' not in options:
+                    continue
+                self.check_cancelled()
+                if 'l' in options:
+                    try:
+                        is_dir, size, mtime = self.stat(self.join(base, name) if base else name)
+                    except (OSError, VFSError):
+                        continue
+                    stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(mtime))
+                    yield f"{'d' if is_dir else '-'} {size:>12} {stamp} {name}{'/' if is_dir else ''}\n"
+                else:
+                    yield name + '\n'
+    
+    def cmd_grep(self, args, stdin):
+        options, operands = self._options(args)
+        if not operands:
+            self.error("usage: grep [-ivcn] PATTERN [FILE...]")
+            return
+        pattern = re.compile(operands[0], re.IGNORECASE if 'i' in options else 0)
+        invert = 'v' in options
+        count = 0
+        for number, line in enumerate(self._inputs(operands[1:], stdin), start=1):
+            if (pattern.search(line) is None) == invert:
+                count += 1
+                if 'c' not in options:
+                    yield f"{number}:{line}" if 'n' in options else line
+        if 'c' in options:
+            yield f"{count}\n"
+    
+    def cmd_find(self, args, stdin):
+        root = '.'
+        if args and not args[0].startswith('-'):
+            root, args = args[0], args[1:]
+        options, _ = self._options(args, with_value=('name', 'type'))
+        name_pattern = options.get('name')
+        wanted_type = options.get('type')
+        
+        stack = [root]
+        while stack:
+            self.check_cancelled()
+            path = stack.pop()
+            try:
+                is_dir = self.isdir(path)
+            except (OSError, VFSError):
+                continue
+            name = posixpath.basename(path.replace('\\', '/').rstrip('/')) or path
+            if (name_pattern is None or fnmatch.fnmatch(name, name_pattern)) and \
+                    (wanted_type is None or wanted_type == ('d' if is_dir else 'f')):
+                yield path + '\n'
+            if is_dir:
+                try:
+                    children = self.listdir(path)
+                except (OSError, VFSError) as e:
+                    self.error(f"find: {path}: {e.strerror or e}")
+                    continue
+                stack.extend(self.join(path, child) for child in reversed(children))
+    
+    def cmd_wc(self, args, stdin):
+        options, files = self._options(args)
+        lines = words = chars = 0
+        for line in self._inputs(files, stdin):
+            lines += line.endswith('\n')
+            words += len(line.split())
+            chars += len(line)
+        selected = [value for flag, value in (('l', lines), ('w', words), ('c', chars)) if flag in options]
+        yield ' '.join(f"{v:>8}" for v in (selected or [lines, words, chars])) + '\n'
+    
+    def cmd_head(self, args, stdin):
+        options, files = self._options(args, with_value=('n',))
+        remaining = int(options.get('n', 10))
+        if remaining <= 0:
+            return
+        for line in self._inputs(files, stdin):
+            yield line
+            remaining -= 1
+            if remaining <= 0:
+                break
+    
+    def cmd_tail(self, args, stdin):
+        options, files = self._options(args, with_value=('n',))
+        yield from deque(self._inputs(files, stdin), maxlen=int(options.get('n', 10)))
+    
+    def cmd_ps(self, args, stdin):
+        yield f"{'PID':>7}  COMMAND\n"
+        if os.path.isdir('/proc'):
+            for entry in sorted((e for e in os.listdir('/proc') if e.isdigit()), key=int):
+                try:
+                    with open(f'/proc/{entry}/comm', 'r') as f:
+                        yield f"{entry:>7}  {f.read().strip()}\n"
+                except OSError:
+                    continue
+        else:
+            yield f"{os.getpid():>7}  mks-os\n"
+            for proc in self.processes:
+                yield f"{proc.pid:>7}  {' '.join(proc.args)}\n"
+        for thread in threading.enumerate():
+            yield f"{'-':>7}  thread: {thread.name}\n"
+    
+    def cmd_df(self, args, stdin):
+        yield f"{'Filesystem':<12} {'Size':>10} {'Used':>10} {'Avail':>10}  Mounted on\n"
+        kind, cwd = self.resolve(self.cwd)
+        host = shutil.disk_usage(cwd if kind == 'host' else os.path.expanduser('~'))
+        mb = 1024 * 1024
+        yield f"{'host':<12} {host.total // mb:>9}M {host.used // mb:>9}M {host.free // mb:>9}M  /\n"
+        vfs = self.get_vfs()
+        if vfs is not None:
+            usage = vfs.usage()
+            yield (f"{'mksvfs':<12} {usage['total'] // mb:>9}M {usage['used'] // mb:>9}M "
+                   f"{usage['free'] // mb:>9}M  /vfs\n")
+    
+    # --- completion ---
+    
+    def executables(self):
+        if self._executables is None:
+            found = set()
+            for folder in os.environ.get('PATH', '').split(os.pathsep):
+                try:
+                    with os.scandir(folder) as it:
+                        for entry in it:
+                            if entry.is_file() and os.access(entry.path, os.X_OK):
+                                found.add(entry.name)
+                except OSError:
+                    continue
+            self._executables = found
+        return self._executables
+    
+    def complete(self, line):
+        """Return (completed line, candidates) for tab completion"""
+        head, _, word = line.rpartition(' ')
+        command_position = not head.strip() or head.rstrip().endswith('|')
+        if command_position:
+            matches = sorted(name for name in set(self.BUILTINS) | self.executables()
+                             if name.startswith(word))
+            prefix = ''
+        else:
+            cut = max(word.rfind('/'), word.rfind(os.sep)) + 1
+            prefix, partial = word[:cut], word[cut:]
+            try:
+                names = self.listdir(prefix or '.')
+            except (OSError, VFSError):
+                names = []
+            matches = []
+            for name in names:
+                if name.startswith(partial):
+                    is_dir = self.isdir(self.join(prefix, name) if prefix else name)
+                    matches.append(name + ('/' if is_dir else ''))
+        if not matches:
+            return line, []
+        common = os.path.commonprefix(matches)
+        if len(matches) == 1 and command_position:
+            common += ' '
+        return (head + ' ' if head else '') + prefix + common, matches
+
+
+# ========== PROJECT INDEX ==========
+
+INDEX_TEXT_EXTENSIONS = ('.py', '.pyw', '.txt', '.md', '.rst', '.json', '.toml', '.cfg', '.ini',
+                         '.yaml', '.yml', '.html', '.css', '.js', '.ts', '.c', '.h', '.cpp',
+                         '.rs', '.go', '.java', '.sh', '.bat')
+INDEX_SKIP_DIRS = {'.git', '.hg', '.svn', '__pycache__', 'node_modules', '.venv', 'venv',
+                   '.tox', '.mypy_cache', '.pytest_cache', 'build', 'dist'}
+INDEX_MAX_FILE = 1024 * 1024
+# Shorter queries have no trigram to narrow by: no find in files, no substring symbol scan
+INDEX_MIN_QUERY = 3
+
+
+def mksos_data_dir(*parts):
+    """Per-user data directory (created on demand)"""
+    if os.name == 'nt':
+        base = os.environ.get('APPDATA') or os.path.expanduser('~')
+        folder = os.path.join(base, 'MKS-OS', *parts)
+    else:
+        base = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+        folder = os.path.join(base, 'mks-os', *parts)
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def process_pool(workers=None):
+    """Process pool that is safe to start from a Tk application"""
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                               mp_context=multiprocessing.get_context('spawn'))
+
+
+def text_trigrams(text):
+    """Lowercase trigrams of a text as 63-bit integer keys, skipping line breaks"""
+    text = text.lower()
+    return {(ord(g[0]) << 42) | (ord(g[1]) << 21) | ord(g[2])
+            for g in {text[i:i + 3] for i in range(len(text) - 2)} if '\n' not in g}
+
+
+def python_symbols(tree):
+    """Definitions, classes and imports as (name, kind, line, column, scope)"""
+    symbols = []
+    stack = [(tree, '')]
+    while stack:
+        node, scope = stack.pop()
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.ClassDef):
+                symbols.append((child.name, 'class', child.lineno, child.col_offset, scope))
+                stack.append((child, f"{scope}.{child.name}" if scope else child.name))
+            elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                symbols.append((child.name, 'def', child.lineno, child.col_offset, scope))
+                stack.append((child, f"{scope}.{child.name}" if scope else child.name))
+            elif isinstance(child, ast.Import):
+                for alias in child.names:
+                    symbols.append((alias.asname or alias.name, 'import', child.lineno,
+                                    child.col_offset, alias.name))
+            elif isinstance(child, ast.ImportFrom):
+                for alias in child.names:
+                    symbols.append((alias.asname or alias.name, 'import', child.lineno,
+                                    child.col_offset, child.module or ''))
+            else:
+                stack.append((child, scope))
+    return symbols
+
+
+def index_source_file(path):
+    """Parse one file for the project index (runs in a worker process)"""
+    try:
+        st = os.stat(path)
+        with open(path, 'rb') as f:
+            raw = f.read(INDEX_MAX_FILE + 1)
+    except OSError:
+        return path, None, None, [], []
+    if len(raw) > INDEX_MAX_FILE or b'\0' in raw[:8192]:
+        return path, st.st_mtime, st.st_size, [], []
+    
+    text = raw.decode('utf-8', errors='replace')
+    symbols = []
+    if path.endswith(('.py', '.pyw')):
+        try:
+            symbols = python_symbols(ast.parse(text))
+        except (SyntaxError, ValueError, RecursionError):
+            pass
+    return path, st.st_mtime, st.st_size, symbols, sorted(text_trigrams(text))
+
+
+class ProjectIndex:
+    """Persistent symbol and trigram index of a project folder (SQLite)"""
+    def __init__(self, root, db_path=None):
+        self.root = os.path.abspath(root)
+        key = hashlib.sha1(self.root.encode('utf-8')).hexdigest()[:16]
+        self.db_path = db_path or os.path.join(mksos_data_dir('index'), f"{key}.sqlite")
+        self._local = threading.local()
+        db = self._db()
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY, path TEXT UNIQUE, mtime REAL, size INTEGER);
+            CREATE TABLE IF NOT EXISTS symbols (
+                file_id INTEGER, name TEXT, kind TEXT, line INTEGER, col INTEGER, scope TEXT);
+            CREATE INDEX IF NOT EXISTS symbols_name ON symbols (name COLLATE NOCASE);
+            CREATE INDEX IF NOT EXISTS symbols_prefix ON symbols (name);
+            CREATE INDEX IF NOT EXISTS symbols_file ON symbols (file_id);
+            CREATE TABLE IF NOT EXISTS trigrams (
+                trigram INTEGER, file_id INTEGER, PRIMARY KEY (trigram, file_id)) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS trigrams_file ON trigrams (file_id);
+        """)
+        db.commit()
+    
+    def _db(self):
+        """One connection per thread; WAL lets the UI read while indexing"""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA cache_size=-131072")
+            self._local.db = db
+        return db
+    
+    def scan(self):
+        """Current indexable files as {path: (mtime, size)}"""
+        found = {}
+        stack = [self.root]
+        while stack:
+            folder = stack.pop()
+            try:
+                with os.scandir(folder) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in INDEX_SKIP_DIRS:
+                                stack.append(entry.path)
+                        elif entry.name.lower().endswith(INDEX_TEXT_EXTENSIONS):
+                            st = entry.stat()
+                            if st.st_size <= INDEX_MAX_FILE:
+                                found[entry.path] = (st.st_mtime, st.st_size)
+            except OSError:
+                continue
+        return found
+    
+    def update(self, progress=None, workers=None):
+        """Re-index files whose mtime or size changed since the last run"""
+        start = time.time()
+        db = self._db()
+        current = self.scan()
+        known = {path: (file_id, mtime, size)
+                 for file_id, path, mtime, size in db.execute("SELECT id, path, mtime, size FROM files")}
+        
+        stale = [path for path, stamp in current.items()
+                 if path not in known or known[path][1:] != stamp]
+        removed = [known[path][0] for path in known if path not in current]
+        for file_id in removed:
+            self._forget(db, file_id)
+        db.commit()
+        
+        if len(stale) < 64:
+            results = map(index_source_file, stale)
+            pool = None
+        else:
+            pool = process_pool(workers)
+            results = pool.map(index_source_file, stale, chunksize=32)
+        try:
+            for done, (path, mtime, size, symbols, grams) in enumerate(results, start=1):
+                if mtime is None:
+                    continue
+                if path in known:
+                    file_id = known[path][0]
+                    self._forget(db, file_id, keep_file=True)
+                    db.execute("UPDATE files SET mtime = ?, size = ? WHERE id = ?", (mtime, size, file_id))
+                else:
+                    file_id = db.execute("INSERT INTO files (path, mtime, size) VALUES (?, ?, ?)",
+                                         (path, mtime, size)).lastrowid
+                db.executemany("INSERT INTO symbols VALUES (?, ?, ?, ?, ?, ?)",
+                               [(file_id,) + symbol for symbol in symbols])
+                db.executemany("INSERT OR IGNORE INTO trigrams VALUES (?, ?)",
+                               [(gram, file_id) for gram in grams])
+                if done % 500 == 0:
+                    db.commit()
+                    if progress:
+                        progress(done, len(stale))
+        finally:
+            db.commit()
+            if pool is not None:
+                pool.shutdown()
+        
+        return {'files': len(current), 'indexed': len(stale), 'removed': len(removed),
+                'seconds': time.time() - start}
+    
+    def _forget(self, db, file_id, keep_file=False):
+        db.execute("DELETE FROM symbols WHERE file_id = ?", (file_id,))
+        db.execute("DELETE FROM trigrams WHERE file_id = ?", (file_id,))
+        if not keep_file:
+            db.execute("DELETE FROM files WHERE id = ?", (file_id,))
+    
+    def find_symbols(self, query, limit=50):
+        """Go to symbol: prefix matches first, then substring matches for queries of 3+ characters"""
+        if not query:
+            return []
+        db = self._db()
+        sql = ("SELECT s.name, s.kind, s.scope, f.path, s.line, s.col FROM symbols s "
+               "JOIN files f ON f.id = s.file_id WHERE ")
+        rows = db.execute(sql + "s.name LIKE ? ESCAPE '\\' ORDER BY length(s.name), s.name LIMIT ?",
+                          (self._escape(query) + '%', limit)).fetchall()
+        if len(rows) < limit and len(query) >= INDEX_MIN_QUERY:
+            # Substring matches cannot use the name index: a full scan, so only for longer queries
+            seen = set(rows)
+            more = db.execute(sql + "s.name LIKE ? ESCAPE '\\' LIMIT ?",
+                              ('%' + self._escape(query) + '%', limit)).fetchall()
+            rows.extend(row for row in more if row not in seen)
+        return rows[:limit]
+    
+    def complete_symbols(self, prefix, limit=50):
+        """Distinct names starting with prefix (case-sensitive), as a range scan on the name index"""
+        if not prefix:
+            return []
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return [row[0] for row in self._db().execute(
+            "SELECT DISTINCT name FROM symbols WHERE name >= ? AND name < ? ORDER BY name LIMIT ?",
+            (prefix, upper, limit))]
+    
+    def _escape(self, text):
+        return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    
+    def candidate_files(self, query):
+        """Files containing every trigram of the query; none for queries without a trigram"""
+        db = self._db()
+        grams = sorted(text_trigrams(query))
+        if not grams:
+            return []
+        sql = " INTERSECT ".join(["SELECT file_id FROM trigrams WHERE trigram = ?"] * len(grams))
+        return [row[0] for row in db.execute(
+            f"SELECT path FROM files WHERE id IN ({sql}) ORDER BY path", grams)]
+    
+    def search_text(self, query, limit=200, cancel_event=None):
+        """Find in files (case-insensitive): list of (path, line, text); needs INDEX_MIN_QUERY characters"""
+        if len(query) < INDEX_MIN_QUERY:
+            return []
+        needle = query.lower()
+        matches = []
+        for path in self.candidate_files(query):
+            if cancel_event is not None and cancel_event.is_set():
+                return matches
+            try:
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    for number, line in enumerate(f, start=1):
+                        if needle in line.lower():
+                            matches.append((path, number, line.rstrip('\n')))
+                            if len(matches) >= limit:
+                                return matches
+            except OSError:
+                continue
+        return matches
+    
+    def stats(self):
+        db = self._db()
+        return {
+            'files': db.execute("SELECT COUNT(*) FROM files").fetchone()[0],
+            'symbols': db.execute("SELECT COUNT(*) FROM symbols").fetchone()[0]
+        }
+    
+    def close(self):
+        db = getattr(self._local, 'db', None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+
+# ========== CODE COMPLETION ==========
+
+# Builtins and modules available to code run from the Development tab
+SAFE_BUILTINS = {
+    'print': print,
+    'len': len,
+    'range': range,
+    'str': str,
+    'int': int,
+    'float': float,
+    'list': list,
+    'dict': dict,
+    'tuple': tuple,
+    'set': set,
+    'bool': bool,
+    'type': type,
+    'abs': abs,
+    'min': min,
+    'max': max,
+    'sum': sum,
+    'sorted': sorted,
+    'enumerate': enumerate,
+    'zip': zip,
+    'map': map,
+    'filter': filter,
+    'isinstance': isinstance,
+    'issubclass': issubclass
+}
+
+SAFE_MODULES = {
+    'math': math,
+    'random': random,
+    'datetime': datetime,
+    'time': time,
+    'json': json
+}
+
+IDENTIFIER = re.compile(r'[A-Za-z_]\w*')
+
+
+def prefix_range(names, prefix, limit):
+    """Names starting with prefix from a sorted list (binary search)"""
+    start = bisect.bisect_left(names, prefix)
+    result = []
+    for name in itertools.islice(names, start, None):
+        if not name.startswith(prefix) or len(result) >= limit:
+            break
+        result.append(name)
+    return result
+
+
+class BufferNames:
+    """Identifiers of an editor buffer, re-scanned only where lines changed"""
+    def __init__(self):
+        self.lines = []
+        self.counts = Counter()
+        self.names = []
+        self._line_cache = {}
+    
+    def _line_names(self, line):
+        names = self._line_cache.get(line)
+        if names is None:
+            code = line.split('#', 1)[0]
+            names = tuple(name for name in IDENTIFIER.findall(code) if len(name) > 1)
+            if len(self._line_cache) > 50000:
+                self._line_cache.clear()
+            self._line_cache[line] = names
+        return names
+    
+    def update(self, text):
+        """Re-scan the changed middle section of the buffer"""
+        lines = text.split('\n')
+        old = self.lines
+        start = 0
+        limit = min(len(old), len(lines))
+        while start < limit and old[start] == lines[start]:
+            start += 1
+        old_end, new_end = len(old), len(lines)
+        while old_end > start and new_end > start and old[old_end - 1] == lines[new_end - 1]:
+            old_end -= 1
+            new_end -= 1
+        if start == old_end and start == new_end:
+            return False
+        
+        changed = False
+        for line in old[start:old_end]:
+            for name in self._line_names(line):
+                self.counts[name] -= 1
+                if self.counts[name] == 0:
+                    del self.counts[name]
+                    changed = True
+        for line in lines[start:new_end]:
+            for name in self._line_names(line):
+                if name not in self.counts:
+                    changed = True
+                self.counts[name] += 1
+        self.lines = lines
+        if changed:
+            self.names = sorted(self.counts)
+        return changed
+
+
+class CompletionEngine:
+    """Completion candidates from builtins, safe modules, the buffer and the project"""
+    def __init__(self):
+        self.globals = sorted(set(SAFE_BUILTINS) | set(SAFE_MODULES) | set(keyword.kwlist))
+        self.kinds = {}
+        for name in keyword.kwlist:
+            self.kinds[name] = 'keyword'
+        for name in SAFE_BUILTINS:
+            self.kinds[name] = 'builtin'
+        for name in SAFE_MODULES:
+            self.kinds[name] = 'module'
+        self.module_attributes = {
+            name: sorted(attr for attr in dir(module) if not attr.startswith('_'))
+            for name, module in SAFE_MODULES.items()
+        }
+    
+    def complete(self, prefix, qualifier=None, buffer=None, project=None, limit=30):
+        """List of (name, kind) completing prefix"""
+        if qualifier is not None:
+            attributes = self.module_attributes.get(qualifier)
+            if attributes is None:
+                return []
+            return [(name, 'attribute') for name in prefix_range(attributes, prefix, limit)]
+        if not prefix:
+            return []
+        
+        results = []
+        seen = {prefix}
+        
+        def add(names, kind):
+            for name in names:
+                if name not in seen and len(results) < limit:
+                    seen.add(name)
+                    results.append((name, self.kinds.get(name, kind)))
+        
+        if buffer is not None:
+            add(prefix_range(buffer.names, prefix, limit), 'name')
+        add(prefix_range(self.globals, prefix, limit), 'builtin')
+        if project is not None and len(results) < limit:
+            try:
+                symbols = project.complete_symbols(prefix, limit)
+            except sqlite3.Error:
+                symbols = []
+            add(symbols, 'project')
+        return results
+
+
+# ========== CALCULATOR ENGINE ==========
+
+CALC_MODES = ("float", "decimal", "fraction")
+CALC_BINARY_OPS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow)
+CALC_UNARY_OPS = (ast.UAdd, ast.USub)
+CALC_MAX_BITS = 1 << 20
+CALC_NUMPY_NAMES = {'asin': 'arcsin', 'acos': 'arccos', 'atan': 'arctan', 'atan2': 'arctan2',
+                    'asinh': 'arcsinh', 'acosh': 'arccosh', 'atanh': 'arctanh', 'fabs': 'abs',
+                    'pow': 'power', 'abs': 'abs', 'min': 'minimum', 'max': 'maximum', 'round': 'round'}
+
+
+class CalculatorError(ValueError):
+    """Invalid or unsafe calculator expression"""
+
+
+def calc_check_bits(bits):
+    if bits > CALC_MAX_BITS:
+        raise CalculatorError("Result too large")
+
+
+def calc_pow(base, exponent):
+    """Power with a bound on the size of exact results so (9**9999)**9999 cannot hang the UI
+    
+    Checked on the actual operands, so nested powers are bounded too. Float and Decimal
+    powers are inexact and overflow on their own.
+    """
+    if isinstance(exponent, fractions.Fraction) and exponent.denominator == 1:
+        exponent = exponent.numerator
+    if isinstance(exponent, int) and not isinstance(exponent, bool):
+        if isinstance(base, int) and base:
+            calc_check_bits(abs(exponent) * math.log2(abs(base)))
+        elif isinstance(base, fractions.Fraction) and base:
+            calc_check_bits(abs(exponent) * (math.log2(abs(base.numerator)) + math.log2(base.denominator)))
+    return base ** exponent
+
+
+def calc_factorial(n):
+    if isinstance(n, int) and n > 2:
+        calc_check_bits(n * math.log2(n))
+    return math.factorial(n)
+
+
+def calc_comb(n, k):
+    if isinstance(n, int) and isinstance(k, int) and n > 2:
+        calc_check_bits(min(n, k, n - k) * math.log2(n))
+    return math.comb(n, k)
+
+
+def calc_perm(n, k=None):
+    if isinstance(n, int) and n > 2:
+        calc_check_bits((n if k is None else min(n, k)) * math.log2(n))
+    return math.perm(n, k)
+
+
+def calc_decimal_constant(name):
+    """pi, e or tau to the precision of the current Decimal context"""
+    with decimal.localcontext() as context:
+        context.prec += 2
+        if name == 'e':
+            value = decimal.Decimal(1).exp()
+        else:
+            # Series from the decimal module documentation
+            three = decimal.Decimal(3)
+            last, t, total, n, na, d, da = 0, three, 3, 1, 0, 0, 24
+            while total != last:
+                last = total
+                n, na = n + na, na + 8
+                d, da = d + da, da + 32
+                t = (t * n) / d
+                total += t
+            value = total * 2 if name == 'tau' else total
+    return +value
+
+
+def calc_format(value):
+    """Text for a result; numbers too long for str() are shown as mantissa and exponent"""
+    try:
+        return str(value)
+    except ValueError:
+        if isinstance(value, fractions.Fraction):
+            magnitude = math.log10(abs(value.numerator)) - math.log10(value.denominator)
+        else:
+            magnitude = math.log10(abs(value))
+        exponent = math.floor(magnitude)
+        return f"{'-' if value < 0 else ''}{10 ** (magnitude - exponent):.15f}E{exponent:+d}"
+
+
+class CalculatorEngine:
+    """Whitelisted, compiled and memoized expression evaluator"""
+    def __init__(self, precision=50):
+        self.precision = precision
+        self.variables = {}
+        self.functions = {name: value for name, value in vars(math).items()
+                          if callable(value) and not name.startswith('_')}
+        self.functions.update({'abs': abs, 'round': round, 'min': min, 'max': max,
+                               'factorial': calc_factorial, 'comb': calc_comb, 'perm': calc_perm})
+        self.constants = {'pi': math.pi, 'e': math.e, 'tau': math.tau, 'inf': math.inf, 'nan': math.nan}
+        self._compiled = OrderedDict()
+        self._results = OrderedDict()
+    
+    def _cache(self, cache, key, value, size=256):
+        cache[key] = value
+        if len(cache) > size:
+            cache.popitem(last=False)
+    
+    def compile(self, expression, mode="float"):
+        """Parse, validate and compile an expression once per mode"""
+        key = (expression, mode)
+        cached = self._compiled.get(key)
+        if cached is not None:
+            self._compiled.move_to_end(key)
+            return cached
+        
+        try:
+            tree = ast.parse(expression.replace('^', '**').strip(), mode='eval')
+        except SyntaxError as e:
+            raise CalculatorError(f"Syntax error: {e.msg}")
+        names = set()
+        tree = ast.fix_missing_locations(self._rewrite(tree.body, mode, names))
+        code = compile(ast.Expression(tree), '<calculator>', 'eval')
+        result = (code, frozenset(names))
+        self._cache(self._compiled, key, result)
+        return result
+    
+    def _rewrite(self, node, mode, names):
+        """Reject anything that is not arithmetic; route ** and literals through helpers"""
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float, complex)):
+                raise CalculatorError("Only numbers are allowed")
+            if mode != "float" and not isinstance(node.value, complex):
+                return ast.Call(ast.Name('_num', ast.Load()), [ast.Constant(repr(node.value))], [])
+            return node
+        if isinstance(node, ast.BinOp) and isinstance(node.op, CALC_BINARY_OPS):
+            left = self._rewrite(node.left, mode, names)
+            right = self._rewrite(node.right, mode, names)
+            if isinstance(node.op, ast.Pow):
+                return ast.Call(ast.Name('_pow', ast.Load()), [left, right], [])
+            return ast.BinOp(left, node.op, right)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, CALC_UNARY_OPS):
+            return ast.UnaryOp(node.op, self._rewrite(node.operand, mode, names))
+        if isinstance(node, ast.Name):
+            if node.id.startswith('_'):
+                raise CalculatorError(f"Unknown name: {node.id}")
+            names.add(node.id)
+            return ast.Name(node.id, ast.Load())
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            if node.func.id not in self.functions:
+                raise CalculatorError(f"Unknown function: {node.func.id}")
+            names.add(node.func.id)
+            return ast.Call(ast.Name(node.func.id, ast.Load()),
+                            [self._rewrite(arg, mode, names) for arg in node.args], [])
+        raise CalculatorError(f"Not allowed in calculator: {type(node).__name__}")
+    
+    def _namespace(self, mode, names):
+        """Values for the names an expression uses"""
+        namespace = {'__builtins__': {}, '_pow': calc_pow}
+        if mode == "decimal":
+            namespace['_num'] = decimal.Decimal
+        elif mode == "fraction":
+            namespace['_num'] = fractions.Fraction
+        for name in names:
+            if name in self.variables:
+                namespace[name] = self.variables[name]
+            elif name in self.constants:
+                value = self.constants[name]
+                if mode == "decimal" and name in ('pi', 'e', 'tau'):
+                    value = calc_decimal_constant(name)
+                elif mode == "decimal" and math.isfinite(value):
+                    value = decimal.Decimal(repr(value))
+                namespace[name] = value
+            elif name in self.functions:
+                namespace[name] = self._function(name, mode)
+            else:
+                raise CalculatorError(f"Unknown variable: {name}")
+        return namespace
+    
+    def _function(self, name, mode):
+        function = self.functions[name]
+        if mode == "decimal":
+            exact = {'sqrt': decimal.Decimal.sqrt, 'exp': decimal.Decimal.exp,
+                     'log10': decimal.Decimal.log10}
+            if name in exact:
+                return lambda x: exact[name](decimal.Decimal(x))
+            if name == 'log':
+                return lambda x, base=None: (decimal.Decimal(x).ln() if base is None
+                                             else decimal.Decimal(x).ln() / decimal.Decimal(base).ln())
+            if name in ('abs', 'min', 'max', 'round'):
+                return function
+            return lambda *args: decimal.Decimal(repr(function(*(float(a) for a in args))))
+        return function
+    
+    def evaluate(self, text, mode="float"):
+        """Evaluate 'expression' or 'name = expression'; result is stored in ans"""
+        if mode not in CALC_MODES:
+            raise CalculatorError(f"Unknown mode: {mode}")
+        target = None
+        assignment = re.match(r'^\s*([A-Za-z]\w*)\s*=(?!=)(.*)$', text)
+        if assignment:
+            target, text = assignment.group(1), assignment.group(2)
+            if target in self.functions or target in self.constants:
+                raise CalculatorError(f"Cannot assign to {target}")
+        
+        code, names = self.compile(text, mode)
+        key = (text, mode, tuple(sorted((n, self.variables[n]) for n in names if n in self.variables)))
+        if key in self._results:
+            self._results.move_to_end(key)
+            value = self._results[key]
+        else:
+            with decimal.localcontext() as context:
+                context.prec = self.precision
+                try:
+                    value = eval(code, self._namespace(mode, names))
+                except (ArithmeticError, TypeError, ValueError, decimal.InvalidOperation) as e:
+                    if isinstance(e, CalculatorError):
+                        raise
+                    raise CalculatorError(str(e) or type(e).__name__)
+            self._cache(self._results, key, value)
+        
+        self.variables['ans'] = value
+        if target:
+            self.variables[target] = value
+        return value
+    
+    def evaluate_range(self, text, variable='x', start=0.0, stop=1.0, count=1000):
+        """Evaluate an expression over evenly spaced points (vectorized with NumPy)"""
+        code, names = self.compile(text, "float")
+        if np is not None:
+            xs = np.linspace(start, stop, count)
+            namespace = {'__builtins__': {}, '_pow': np.power}
+            for name in names:
+                if name == variable:
+                    namespace[name] = xs
+                elif name in self.variables:
+                    namespace[name] = float(self.variables[name])
+                elif name in self.constants:
+                    namespace[name] = self.constants[name]
+                elif name in self.functions:
+                    ufunc = getattr(np, CALC_NUMPY_NAMES.get(name, name), None)
+                    if name == 'log':
+                        namespace[name] = lambda x, base=None: np.log(x) if base is None else np.log(x) / np.log(base)
+                    elif isinstance(ufunc, np.ufunc) or name in CALC_NUMPY_NAMES:
+                        namespace[name] = ufunc
+                    else:
+                        namespace[name] = np.vectorize(self.functions[name], otypes=[float])
+                else:
+                    raise CalculatorError(f"Unknown variable: {name}")
+            with np.errstate(all='ignore'):
+                ys = eval(code, namespace)
+            return xs, np.broadcast_to(np.asarray(ys, dtype=float), xs.shape)
+        
+        step = (stop - start) / (count - 1) if count > 1 else 0.0
+        xs = [start + i * step for i in range(count)]
+        namespace = self._namespace("float", names - {variable})
+        ys = []
+        for x in xs:
+            namespace[variable] = x
+            try:
+                ys.append(float(eval(code, namespace)))
+            except (ArithmeticError, ValueError):
+                ys.append(math.nan)
+        return xs, ys
+
+
+# ========== SESSION STORE ==========
+
+class SessionStore:
+    """Settings and workspace in SQLite, written by a debounced background thread
+    
+    Changes are committed once they stop arriving for `delay` seconds, but never later
+    than `max_delay` after the first uncommitted change, so continuous typing is saved too.
+    """
+    def __init__(self, path=None, delay=0.5, max_delay=5.0):
+        self.path = path or os.path.join(mksos_data_dir(), 'session.sqlite')
+        self.delay = delay
+        self.max_delay = max_delay
+        self.pending = {}
+        self.last_change = 0.0
+        self.first_change = None
+        self.closed = False
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition(self.lock)
+        self.commit_lock = threading.Lock()
+        self._local = threading.local()
+        
+        db = self._db()
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS tabs (
+                key TEXT PRIMARY KEY, position INTEGER, title TEXT, path TEXT,
+                content TEXT, dirty INTEGER, cursor TEXT);
+        """)
+        db.commit()
+        self.thread = Thread(target=self._writer, name="session-writer", daemon=True)
+        self.thread.start()
+    
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+    
+    # --- reads (startup) ---
+    
+    def get(self, key, default=None):
+        with self.lock:
+            if ('kv', key) in self.pending:
+                return json.loads(self.pending[('kv', key)])
+        row = self._db().execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+    
+    def tabs(self):
+        """Saved editor tabs in order"""
+        self.flush()
+        columns = ('key', 'position', 'title', 'path', 'content', 'dirty', 'cursor')
+        rows = self._db().execute(f"SELECT {', '.join(columns)} FROM tabs ORDER BY position")
+        return [dict(zip(columns, row)) for row in rows]
+    
+    # --- writes (coalesced) ---
+    
+    def _queue(self, key, value):
+        with self.wakeup:
+            self.pending[key] = value
+            self.last_change = time.monotonic()
+            if self.first_change is None:
+                self.first_change = self.last_change
+            self.wakeup.notify()
+    
+    def set(self, key, value):
+        self._queue(('kv', key), json.dumps(value, ensure_ascii=False))
+    
+    def save_tab(self, key, title, path, content, dirty, cursor='1.0'):
+        self._queue(('tab', key), (title, path, content, int(dirty), cursor))
+    
+    def remove_tab(self, key):
+        self._queue(('tab', key), None)
+    
+    def set_tab_order(self, keys):
+        """Tab positions; saved tabs missing from keys are dropped
+        
+        An empty list is ignored: closed tabs go through remove_tab, so an empty order only
+        means no editors were found and must not wipe the saved workspace.
+        """
+        if keys:
+            self._queue(('order', None), list(keys))
+    
+    def _writer(self):
+        while True:
+            with self.wakeup:
+                while not self.pending and not self.closed:
+                    self.wakeup.wait()
+                if self.closed:
+                    return
+                # Wait until changes stop arriving for `delay` seconds (at most `max_delay`)
+                while not self.closed and self.pending:
+                    deadline = min(self.last_change + self.delay, self.first_change + self.max_delay)
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.wakeup.wait(remaining)
+            self.flush()
+    
+    def flush(self):
+        """Commit everything pending in one transaction"""
+        with self.commit_lock:
+            with self.lock:
+                batch, self.pending = self.pending, {}
+                self.first_change = None
+            if not batch:
+                return
+            db = self._db()
+            with db:
+                for (kind, key), value in batch.items():
+                    if kind == 'kv':
+                        db.execute("INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)", (key, value))
+                    elif kind == 'tab' and value is None:
+                        db.execute("DELETE FROM tabs WHERE key = ?", (key,))
+                    elif kind == 'tab':
+                        title, path, content, dirty, cursor = value
+                        db.execute("INSERT INTO tabs (key, position, title, path, content, dirty, cursor) "
+                                   "VALUES (?, (SELECT COALESCE(MAX(position), -1) + 1 FROM tabs), ?, ?, ?, ?, ?) "
+                                   "ON CONFLICT (key) DO UPDATE SET title = excluded.title, "
+                                   "path = excluded.path, content = excluded.content, "
+                                   "dirty = excluded.dirty, cursor = excluded.cursor",
+                                   (key, title, path, content, dirty, cursor))
+                # Order is applied last so new tabs from the same batch are placed too
+                order = batch.get(('order', None))
+                if order is not None:
+                    db.executemany("UPDATE tabs SET position = ? WHERE key = ?",
+                                   [(position, key) for position, key in enumerate(order)])
+                    placeholders = ','.join('?' * len(order))
+                    db.execute(f"DELETE FROM tabs WHERE key NOT IN ({placeholders})", order)
+    
+    def close(self):
+        """Stop the writer and commit what is left"""
+        with self.wakeup:
+            self.closed = True
+            self.wakeup.notify()
+        self.thread.join(timeout=5)
+        self.flush()
+        db = getattr(self._local, 'db', None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+
+# ========== DUPLICATE FINDER ==========
+
+DUP_EDGE = 64 * 1024
+DUP_BATCH = 32
+DUP_WINDOW = 4096
+
+
+def hash_file(path, size, edges):
+    """blake2b of a file, or of its first and last DUP_EDGE bytes (worker process)"""
+    digest = hashlib.blake2b(digest_size=20)
+    if size == 0:
+        return digest.hexdigest()
+    try:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            if len(m) != size:
+                return None  # changed since the scan
+            if edges and size > 2 * DUP_EDGE:
+                digest.update(m[:DUP_EDGE])
+                digest.update(m[-DUP_EDGE:])
+            else:
+                if hasattr(m, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                    m.madvise(mmap.MADV_SEQUENTIAL)
+                view = memoryview(m)
+                try:
+                    for offset in range(0, size, 1024 * 1024):
+                        digest.update(view[offset:offset + 1024 * 1024])
+                finally:
+                    view.release()
+    except (OSError, ValueError):
+        return None
+    return digest.hexdigest()
+
+
+def hash_file_batch(jobs, edges):
+    """Hash (path, size) pairs in one worker call to keep IPC overhead low"""
+    return [hash_file(path, size, edges) for path, size in jobs]
+
+
+class DuplicateFinder:
+    """Staged duplicate search: size, then head+tail hash, then full hash of the survivors"""
+    def __init__(self, roots, min_size=1, io_limit=2, cache_path=None):
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.min_size = min_size
+        # Reads in flight at once; low values keep spinning disks from seeking between files
+        self.io_limit = max(1, io_limit)
+        self.cache_path = cache_path or os.path.join(mksos_data_dir(), 'hashes.sqlite')
+        self.cancel_event = Event()
+        self.stats = Counter()
+    
+    def cancel(self):
+        self.cancel_event.set()
+    
+    def scan(self):
+        """Group regular files by size: {size: [(path, dev, ino, mtime_ns)]}"""
+        by_size = defaultdict(list)
+        seen = set()
+        stack = list(self.roots)
+        while stack and not self.cancel_event.is_set():
+            folder = stack.pop()
+            try:
+                with os.scandir(folder) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                                continue
+                            if not entry.is_file(follow_symlinks=False):
+                                continue
+                            st = entry.stat(follow_symlinks=False)
+                            inode = (st.st_dev, entry.inode())
+                        except OSError:
+                            continue
+                        self.stats['files'] += 1
+                        # Hard links share their data, they are not duplicates
+                        if st.st_size < self.min_size or inode in seen:
+                            continue
+                        seen.add(inode)
+                        by_size[st.st_size].append((entry.path, inode[0], inode[1], st.st_mtime_ns))
+            except OSError:
+                continue
+        return by_size
+    
+    def _cache(self):
+        db = sqlite3.connect(self.cache_path, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("""CREATE TABLE IF NOT EXISTS hashes (
+                          dev INTEGER, ino INTEGER, size INTEGER, mtime_ns INTEGER,
+                          edge TEXT, full TEXT, PRIMARY KEY (dev, ino))""")
+        return db
+    
+    def _hash_stage(self, db, pool, files, edges):
+        """Hash files (size, path, dev, ino, mtime_ns), cached digests first; yields progress events"""
+        column, other = ('edge', 'full') if edges else ('full', 'edge')
+        stage = 'head+tail' if edges else 'full'
+        digests = {}
+        missing = []
+        for record in files:
+            size, path, dev, ino, mtime_ns = record
+            row = db.execute(f"SELECT {column} FROM hashes WHERE dev = ? AND ino = ? "
+                             f"AND size = ? AND mtime_ns = ?", (dev, ino, size, mtime_ns)).fetchone()
+            if row and row[0]:
+                digests[record] = row[0]
+                self.stats['cached'] += 1
+            else:
+                missing.append(record)
+        
+        # Inode order approximates on-disk order, so reads stay mostly sequential
+        missing.sort(key=lambda record: (record[2], record[3]))
+        batches = deque(missing[i:i + DUP_BATCH] for i in range(0, len(missing), DUP_BATCH))
+        pending = {}
+        done = 0
+        while (batches or pending) and not self.cancel_event.is_set():
+            while batches and len(pending) < self.io_limit:
+                batch = batches.popleft()
+                jobs = [(path, size) for size, path, _, _, _ in batch]
+                pending[pool.submit(hash_file_batch, jobs, edges)] = batch
+            finished, _ = wait(list(pending), timeout=0.2, return_when=FIRST_COMPLETED)
+            rows = []
+            for future in finished:
+                batch = pending.pop(future)
+                for record, digest in zip(batch, future.result()):
+                    if digest is None:
+                        self.stats['unreadable'] += 1
+                        continue
+                    digests[record] = digest
+                    size, path, dev, ino, mtime_ns = record
+                    rows.append((dev, ino, size, mtime_ns, digest))
+                    self.stats['bytes_read'] += min(size, 2 * DUP_EDGE) if edges else size
+                done += len(batch)
+            if rows:
+                # The other digest survives only if the file is unchanged
+                with db:
+                    db.executemany(f"INSERT INTO hashes (dev, ino, size, mtime_ns, {column}) "
+                                   f"VALUES (?, ?, ?, ?, ?) ON CONFLICT (dev, ino) DO UPDATE SET "
+                                   f"{other} = CASE WHEN size = excluded.size AND mtime_ns = excluded.mtime_ns "
+                                   f"THEN {other} END, size = excluded.size, "
+                                   f"mtime_ns = excluded.mtime_ns, {column} = excluded.{column}", rows)
+                yield ('progress', stage, done, len(missing))
+        return digests
+    
+    def _regroup(self, files, digests):
+        groups = defaultdict(list)
+        for record in files:
+            if record in digests:
+                groups[(record[0], digests[record])].append(record)
+        return [group for group in groups.values() if len(group) > 1]
+    
+    def find(self):
+        """Generator of ('scan'|'progress'|'group'|'done', ...) events; groups stream as confirmed"""
+        start = time.perf_counter()
+        by_size = self.scan()
+        candidates = [sorted((size, *info) for info in files)
+                      for size, files in by_size.items() if len(files) > 1]
+        del by_size
+        if self.cancel_event.is_set():
+            candidates = []
+        # Largest files first: they waste the most space
+        candidates.sort(key=lambda group: group[0][0], reverse=True)
+        candidates = deque(candidates)
+        self.stats['candidates'] = sum(len(group) for group in candidates)
+        yield ('scan', self.stats['files'], self.stats['candidates'])
+        
+        db = self._cache()
+        pool = process_pool(self.io_limit)
+        try:
+            # Work in windows of groups so results appear long before the last file is read
+            while candidates:
+                window = []
+                while candidates and len(window) < DUP_WINDOW:
+                    window.extend(candidates.popleft())
+                edge = yield from self._hash_stage(db, pool, window, True)
+                large = []
+                for group in self._regroup(window, edge):
+                    if group[0][0] <= 2 * DUP_EDGE:
+                        # Head and tail cover the whole file
+                        yield ('group', group[0][0], edge[group[0]], [record[1] for record in group])
+                        self.stats['groups'] += 1
+                    else:
+                        large.extend(group)
+                full = yield from self._hash_stage(db, pool, large, False)
+                if self.cancel_event.is_set():
+                    break
+                for group in self._regroup(large, full):
+                    yield ('group', group[0][0], full[group[0]], [record[1] for record in group])
+                    self.stats['groups'] += 1
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            db.close()
+        self.stats['seconds'] = time.perf_counter() - start
+        self.stats['cancelled'] = self.cancel_event.is_set()
+        yield ('done', dict(self.stats))
+
+
+# ========== DISK USAGE ==========
+
+DU_BATCH = 128
+
+
+def du_walk_batch(jobs):
+    """Stat a batch of (path, known mtime) directories, listing only the changed ones (worker thread)"""
+    results = []
+    for path, known_mtime in jobs:
+        try:
+            mtime = os.stat(path, follow_symlinks=False).st_mtime_ns
+        except OSError:
+            results.append(None)
+            continue
+        if mtime == known_mtime:
+            results.append((mtime, None, 0, 0))
+            continue
+        own = files = 0
+        subdirs = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                        else:
+                            own += entry.stat(follow_symlinks=False).st_size
+                            files += 1
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        results.append((mtime, subdirs, own, files))
+    return results
+
+
+class DiskUsageTree:
+    """Directory sizes in parallel arrays; node 0 is the root, children always follow their parent"""
+    MAGIC = b'MKSDU1'
+    
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.names = []
+        self.parent = array('q')
+        self.own = array('Q')      # bytes of the files directly inside
+        self.files = array('Q')    # number of files directly inside
+        self.mtime = array('q')
+        self.total = array('Q')    # own + all subdirectories
+        self.count = array('Q')    # files in the whole subtree
+        self._children = None
+    
+    def __len__(self):
+        return len(self.names)
+    
+    def add(self, name, parent):
+        self.names.append(name)
+        self.parent.append(parent)
+        self.own.append(0)
+        self.files.append(0)
+        self.mtime.append(-1)
+        return len(self.names) - 1
+    
+    def finish(self):
+        """Aggregate sizes bottom-up"""
+        self.total = array('Q', self.own)
+        self.count = array('Q', self.files)
+        total, count, parent = self.total, self.count, self.parent
+        for i in range(len(self.names) - 1, 0, -1):
+            total[parent[i]] += total[i]
+            count[parent[i]] += count[i]
+        self._children = None
+    
+    def children(self, node):
+        """Subdirectory nodes of a node, largest first"""
+        if self._children is None:
+            self._children = defaultdict(list)
+            for i in range(1, len(self.names)):
+                self._children[self.parent[i]].append(i)
+        return sorted(self._children.get(node, ()), key=lambda i: self.total[i], reverse=True)
+    
+    def path(self, node):
+        parts = []
+        while node > 0:
+            parts.append(self.names[node])
+            node = self.parent[node]
+        return os.path.join(self.root, *reversed(parts))
+    
+    def find(self, path):
+        """Node of a directory below the root, or None"""
+        rel = os.path.relpath(os.path.abspath(path), self.root)
+        if rel.startswith(os.pardir):
+            return None
+        node = 0
+        for part in ([] if rel == os.curdir else rel.split(os.sep)):
+            node = next((child for child in self.children(node) if self.names[child] == part), None)
+            if node is None:
+                return None
+        return node
+    
+    def save(self, path):
+        names = '\0'.join(self.names).encode('utf-8', 'surrogateescape')
+        header = json.dumps({'root': self.root, 'nodes': len(self.names), 'names': len(names)}).encode('utf-8')
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(self.MAGIC + struct.pack('<I', len(header)) + header)
+            for column in (self.parent, self.own, self.files, self.mtime):
+                column.tofile(f)
+            f.write(names)
+        os.replace(tmp, path)
+    
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            if f.read(len(cls.MAGIC)) != cls.MAGIC:
+                raise ValueError("not a disk usage scan")
+            header = json.loads(f.read(struct.unpack('<I', f.read(4))[0]))
+            tree = cls(header['root'])
+            for column in (tree.parent, tree.own, tree.files, tree.mtime):
+                column.fromfile(f, header['nodes'])
+            names = f.read(header['names']).decode('utf-8', 'surrogateescape')
+        tree.names = names.split('\0') if header['nodes'] else []
+        tree.finish()
+        return tree
+
+
+def du_cache_path(root):
+    key = hashlib.sha1(os.path.abspath(root).encode('utf-8', 'surrogateescape')).hexdigest()[:16]
+    return os.path.join(mksos_data_dir('du'), f"{key}.bin")
+
+
+def scan_disk_usage(root, previous=None, workers=16, cancel_event=None, progress=None):
+    """Walk root with a thread pool; directories whose mtime matches `previous` are not listed again"""
+    start = time.perf_counter()
+    tree = DiskUsageTree(root)
+    tree.add('', -1)
+    old = previous if previous is not None and previous.root == tree.root and len(previous) else None
+    work = deque([(0, tree.root, 0 if old else None)])
+    pending = {}
+    stats = Counter()
+    
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while work or pending:
+            if cancel_event is not None and cancel_event.is_set():
+                for future in pending:
+                    future.cancel()
+                return None
+            while work and len(pending) < workers * 2:
+                batch = [work.popleft() for _ in range(min(DU_BATCH, len(work)))]
+                jobs = [(path, old.mtime[old_node] if old_node is not None else None)
+                        for _, path, old_node in batch]
+                pending[pool.submit(du_walk_batch, jobs)] = batch
+            finished, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in finished:
+                for (node, path, old_node), result in zip(pending.pop(future), future.result()):
+                    if result is None:
+                        continue
+                    mtime, subdirs, own, files = result
+                    tree.mtime[node] = mtime
+                    if subdirs is None:
+                        # Unchanged: reuse the entry, still check every subdirectory
+                        stats['reused'] += 1
+                        tree.own[node] = old.own[old_node]
+                        tree.files[node] = old.files[old_node]
+                        for old_child in old.children(old_node):
+                            name = old.names[old_child]
+                            work.append((tree.add(name, node), os.path.join(path, name), old_child))
+                        continue
+                    stats['listed'] += 1
+                    tree.own[node] = own
+                    tree.files[node] = files
+                    known = {}
+                    if old_node is not None:
+                        known = {old.names[child]: child for child in old.children(old_node)}
+                    for name in subdirs:
+                        work.append((tree.add(name, node), os.path.join(path, name), known.get(name)))
+            if progress is not None:
+                progress(len(tree), stats['listed'])
+    
+    tree.finish()
+    tree.scan_stats = dict(stats, dirs=len(tree), files=tree.count[0],
+                           seconds=time.perf_counter() - start)
+    return tree
+
+
+def squarify(sizes, x, y, width, height):
+    """Squarified treemap layout: rectangles (x, y, w, h) for sizes sorted largest first"""
+    rects = []
+    sizes = [size for size in sizes if size > 0]
+    total = sum(sizes)
+    if not total or width <= 0 or height <= 0:
+        return rects
+    scale = width * height / total
+    areas = [size * scale for size in sizes]
+    
+    def worst(row, side):
+        s = sum(row)
+        return max(max(side * side * a / (s * s), (s * s) / (side * side * a)) for a in row)
+    
+    i = 0
+    while i < len(areas):
+        side = min(width, height)
+        row = [areas[i]]
+        i += 1
+        while i < len(areas) and worst(row + [areas[i]], side) <= worst(row, side):
+            row.append(areas[i])
+            i += 1
+        thickness = sum(row) / side
+        offset = 0.0
+        for area in row:
+            length = area / thickness
+            if width >= height:
+                rects.append((x, y + offset, thickness, length))
+            else:
+                rects.append((x + offset, y, length, thickness))
+            offset += length
+        if width >= height:
+            x, width = x + thickness, width - thickness
+        else:
+            y, height = y + thickness, height - thickness
+    return rects
+
+
+# ========== ARCHIVES ==========
+
+ARCHIVE_FORMATS = ('zip', 'tar.gz', 'tar.xz', 'tar.zst')
+ARCHIVE_LEVELS = {'zip': (1, 6, 9), 'tar.gz': (1, 6, 9), 'tar.xz': (0, 3, 6), 'tar.zst': (1, 3, 9, 19)}
+ARCHIVE_DEFAULT_LEVEL = {'zip': 6, 'tar.gz': 6, 'tar.xz': 6, 'tar.zst': 3}
+ARCHIVE_BLOCK = {'zip': 1 << 20, 'tar.gz': 1 << 20, 'tar.xz': 4 << 20, 'tar.zst': 1 << 20}
+ZIP64_THRESHOLD = 0xF0000000
+
+
+class ArchiveCancelled(Exception):
+    pass
+
+
+def archive_formats():
+    """Formats that can be written with the installed modules"""
+    return tuple(fmt for fmt in ARCHIVE_FORMATS if fmt != 'tar.zst' or zstd is not None)
+
+
+def archive_format(path):
+    """Format of an archive from its file name, or None"""
+    name = path.lower()
+    if name.endswith('.zip'):
+        return 'zip'
+    for fmt, suffixes in (('tar.gz', ('.tar.gz', '.tgz')), ('tar.xz', ('.tar.xz', '.txz')),
+                          ('tar.zst', ('.tar.zst', '.tzst'))):
+        if name.endswith(suffixes):
+            return fmt
+    return None
+
+
+def compress_block(fmt, level, data, final):
+    """Compress one independent block (worker process)"""
+    if fmt == 'zip':
+        # Sync-flushed raw deflate segments concatenate into one valid stream
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+    if fmt == 'tar.gz':
+        return gzip.compress(data, level, mtime=0)      # gzip members concatenate
+    if fmt == 'tar.xz':
+        return lzma.compress(data, preset=level)        # so do xz streams
+    return zstd.ZstdCompressor(level=level).compress(data)  # and zstd frames
+
+
+def _done_future(value):
+    future = concurrent.futures.Future()
+    future.set_result(value)
+    return future
+
+
+class BlockCompressor:
+    """Compresses blocks in a process pool and writes them in order; at most `window` blocks in flight"""
+    def __init__(self, out, fmt, level, pool, window, cancel_event=None):
+        self.out = out
+        self.fmt = fmt
+        self.level = level
+        self.pool = pool
+        self.window = window
+        self.cancel_event = cancel_event
+        self.block_size = ARCHIVE_BLOCK[fmt]
+        self.buffer = bytearray()
+        self.pending = deque()
+        self.written = 0
+    
+    def _check(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ArchiveCancelled()
+    
+    def _queue(self, future, on_written):
+        self.pending.append((future, on_written))
+        while len(self.pending) >= self.window:
+            self._write_one()
+    
+    def _write_one(self):
+        future, on_written = self.pending.popleft()
+        data = future.result()
+        offset = self.written
+        self.out.write(data)
+        self.written += len(data)
+        if on_written is not None:
+            on_written(offset, len(data))
+    
+    def submit(self, data, final=False, on_written=None):
+        """Compress data as one block; on_written(offset, length) runs once it is in the output"""
+        self._check()
+        self._queue(self.pool.submit(compress_block, self.fmt, self.level, bytes(data), final), on_written)
+    
+    def raw(self, data, on_written=None):
+        """Write uncompressed bytes (headers) in order with the blocks"""
+        self._queue(_done_future(bytes(data)), on_written)
+    
+    def write(self, data):
+        """File-like write for tarfile: cut the stream into blocks"""
+        self.buffer += data
+        while len(self.buffer) >= self.block_size:
+            self.submit(self.buffer[:self.block_size])
+            del self.buffer[:self.block_size]
+        return len(data)
+    
+    def drain(self):
+        if self.buffer:
+            self.submit(self.buffer)
+            self.buffer = bytearray()
+        while self.pending:
+            self._write_one()
+
+
+class ProgressReader:
+    """File wrapper that counts bytes read, reports progress and honours cancellation"""
+    def __init__(self, f, job):
+        self.f = f
+        self.job = job
+    
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.job.advance(len(data))
+        return data
+
+
+class ArchiveJob:
+    """Progress, throughput and cancellation shared by archive operations"""
+    def __init__(self, total=0, progress=None):
+        self.total = total
+        self.done = 0
+        self.start = time.perf_counter()
+        self.cancel_event = Event()
+        self.progress = progress
+    
+    def cancel(self):
+        self.cancel_event.set()
+    
+    def advance(self, count):
+        if self.cancel_event.is_set():
+            raise ArchiveCancelled()
+        self.done += count
+        if self.progress is not None:
+            self.progress(self)
+    
+    def throughput(self):
+        return self.done / max(1e-9, time.perf_counter() - self.start)
+
+
+def archive_sources(sources):
+    """(path, archive name) for the given files and folders, folders recursively"""
+    entries = []
+    for source in sources:
+        source = os.path.abspath(source)
+        base = os.path.dirname(source)
+        entries.append((source, os.path.relpath(source, base)))
+        if os.path.isdir(source) and not os.path.islink(source):
+            for folder, dirs, files in os.walk(source):
+                dirs.sort()
+                for name in sorted(dirs) + sorted(files):
+                    path = os.path.join(folder, name)
+                    entries.append((path, os.path.relpath(path, base)))
+    return entries
+
+
+def _zip_dos_time(mtime):
+    t = time.localtime(max(mtime, 315532800))
+    return ((t.tm_year - 1980) << 9 | t.tm_mon << 5 | t.tm_mday,
+            t.tm_hour << 11 | t.tm_min << 5 | t.tm_sec // 2)
+
+
+def _write_zip(comp, entries, job):
+    """Stream a zip archive through a BlockCompressor; members and their blocks compress in parallel"""
+    members = []
+    for path, arcname in entries:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        is_dir = os.path.isdir(path)
+        name = arcname.replace(os.sep, '/') + ('/' if is_dir else '')
+        member = {'name': name.encode('utf-8'), 'crc': 0, 'usize': 0, 'csize': 0,
+                  'zip64': not is_dir and st.st_size >= ZIP64_THRESHOLD,
+                  'date_time': _zip_dos_time(st.st_mtime), 'mode': st.st_mode,
+                  'method': 0 if is_dir else 8}
+        extra = struct.pack('<HHQQ', 1, 16, 0, 0) if member['zip64'] else b''
+        header = struct.pack('<IHHHHHIIIHH', 0x04034b50, 45 if member['zip64'] else 20, 0x800,
+                             member['method'], member['date_time'][1], member['date_time'][0],
+                             0, 0, 0, len(member['name']), len(extra)) + member['name'] + extra
+        
+        def placed(offset, length, member=member):
+            member['offset'] = offset
+            member['data'] = offset + length
+        
+        def finished(offset, length, member=member):
+            # Sizes and CRC are known only now: patch them into the local header
+            member['csize'] = offset + length - member['data']
+            out = comp.out
+            position = out.tell()
+            out.seek(member['offset'] + 14)
+            if member['zip64']:
+                out.write(struct.pack('<III', member['crc'], 0xFFFFFFFF, 0xFFFFFFFF))
+                out.seek(member['data'] - 16)
+                out.write(struct.pack('<QQ', member['usize'], member['csize']))
+            else:
+                out.write(struct.pack('<III', member['crc'], member['csize'], member['usize']))
+            out.seek(position)
+        
+        members.append(member)
+        comp.raw(header, placed)
+        if is_dir:
+            continue
+        try:
+            with open(path, 'rb') as f:
+                while True:
+                    data = f.read(comp.block_size)
+                    if not data:
+                        break
+                    member['crc'] = zlib.crc32(data, member['crc'])
+                    member['usize'] += len(data)
+                    comp.submit(data)
+                    job.advance(len(data))
+        except OSError:
+            pass  # unreadable files are stored with the data read so far
+        comp.submit(b'', final=True, on_written=finished)
+    comp.drain()
+    
+    # Central directory
+    directory = bytearray()
+    for member in members:
+        large = member['zip64'] or member['offset'] >= 0xFFFFFFFF
+        extra = struct.pack('<HHQQQ', 1, 24, member['usize'], member['csize'], member['offset']) if large else b''
+        sizes = (0xFFFFFFFF,) * 3 if large else (member['csize'], member['usize'], member['offset'])
+        directory += struct.pack('<IHHHHHHIIIHHHHHII', 0x02014b50, 3 << 8 | 45, 45 if large else 20,
+                                 0x800, member['method'], member['date_time'][1], member['date_time'][0],
+                                 member['crc'], sizes[0], sizes[1], len(member['name']), len(extra), 0, 0, 0,
+                                 (member['mode'] & 0xFFFF) << 16 | (0x10 if member['method'] == 0 else 0),
+                                 sizes[2])
+        directory += member['name'] + extra
+    start = comp.written
+    count = len(members)
+    comp.raw(directory)
+    if count >= 0xFFFF or start >= 0xFFFFFFFF or len(directory) >= 0xFFFFFFFF:
+        end64 = start + len(directory)
+        comp.raw(struct.pack('<IQHHIIQQQQ', 0x06064b50, 44, 45, 45, 0, 0, count, count, len(directory), start))
+        comp.raw(struct.pack('<IIQI', 0x07064b50, 0, end64, 1))
+        comp.raw(struct.pack('<IHHHHIIH', 0x06054b50, 0, 0, 0xFFFF, 0xFFFF, 0xFFFFFFFF, 0xFFFFFFFF, 0))
+    else:
+        comp.raw(struct.pack('<IHHHHIIH', 0x06054b50, 0, 0, count, count, len(directory), start, 0))
+    comp.drain()
+
+
+def create_archive(path, sources, fmt=None, level=None, workers=None, job=None):
+    """Write sources into a zip/tar.gz/tar.xz/tar.zst archive with parallel block compression"""
+    fmt = fmt or archive_format(path)
+    if fmt not in archive_formats():
+        raise ValueError(f"Unsupported archive format: {path}")
+    level = ARCHIVE_DEFAULT_LEVEL[fmt] if level is None else level
+    entries = archive_sources(sources)
+    job = job or ArchiveJob()
+    job.total = sum(os.path.getsize(p) for p, _ in entries if os.path.isfile(p))
+    workers = workers or os.cpu_count() or 1
+    
+    part = path + '.part'
+    pool = process_pool(workers)
+    try:
+        with open(part, 'wb') as out:
+            comp = BlockCompressor(out, fmt, level, pool, window=workers * 2, cancel_event=job.cancel_event)
+            if fmt == 'zip':
+                _write_zip(comp, entries, job)
+            else:
+                with tarfile.open(fileobj=comp, mode='w|', format=tarfile.PAX_FORMAT) as tar:
+                    for source, arcname in entries:
+                        info = tar.gettarinfo(source, arcname)
+                        if info is None:
+                            continue
+                        if info.isreg():
+                            with open(source, 'rb') as f:
+                                tar.addfile(info, ProgressReader(f, job))
+                        else:
+                            tar.addfile(info)
+                comp.drain()
+        os.replace(part, path)
+    except BaseException:
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return {'format': fmt, 'level': level, 'workers': workers, 'files': len(entries),
+            'input': job.total, 'output': os.path.getsize(path),
+            'seconds': time.perf_counter() - job.start}
+
+
+def extract_archive(path, dest, job=None):
+    """Extract an archive member by member (constant memory); paths may not leave dest"""
+    fmt = archive_format(path)
+    if fmt is None or (fmt == 'tar.zst' and zstd is None):
+        raise ValueError(f"Unsupported archive format: {path}")
+    job = job or ArchiveJob()
+    dest = os.path.realpath(dest)
+    os.makedirs(dest, exist_ok=True)
+    count = size = 0
+    if fmt == 'zip':
+        with zipfile.ZipFile(path) as zf:
+            members = zf.infolist()
+            job.total = sum(info.file_size for info in members)
+            for info in members:
+                target = os.path.realpath(os.path.join(dest, info.filename))
+                if not target.startswith(dest + os.sep):
+                    continue
+                if info.is_dir():
+                    os.makedirs(target, exist_ok=True)
+                    continue
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with zf.open(info) as src, open(target, 'wb') as dst:
+                    while True:
+                        data = src.read(1 << 20)
+                        if not data:
+                            break
+                        dst.write(data)
+                        job.advance(len(data))
+                count += 1
+                size += info.file_size
+    else:
+        job.total = os.path.getsize(path)
+        with open(path, 'rb') as raw:
+            # These readers, unlike tarfile's own 'r|gz', continue across concatenated blocks
+            reader = ProgressReader(raw, job)
+            if fmt == 'tar.zst':
+                stream = zstd.ZstdDecompressor().stream_reader(reader, read_across_frames=True)
+            elif fmt == 'tar.xz':
+                stream = lzma.LZMAFile(reader)
+            else:
+                stream = gzip.GzipFile(fileobj=reader)
+            with stream, tarfile.open(fileobj=stream, mode='r|') as tar:
+                if hasattr(tarfile, 'data_filter'):
+                    tar.extraction_filter = tarfile.data_filter
+                for member in tar:
+                    target = os.path.realpath(os.path.join(dest, member.name))
+                    if target != dest and not target.startswith(dest + os.sep):
+                        continue
+                    tar.extract(member, dest)
+                    count += 1
+                    size += member.size
+    return {'format': fmt, 'files': count, 'input': os.path.getsize(path), 'output': size,
+            'seconds': time.perf_counter() - job.start}
+
+
+def archive_sample_corpus(folder, size=24 << 20):
+    """Benchmark corpus: Python sources (text), packed numbers (structured) and random bytes"""
+    os.makedirs(folder, exist_ok=True)
+    text = bytearray()
+    for name in sorted(os.listdir(os.path.dirname(os.__file__))):
+        if name.endswith('.py') and len(text) < size // 2:
+            with open(os.path.join(os.path.dirname(os.__file__), name), 'rb') as f:
+                text += f.read()
+    with open(os.path.join(folder, 'sources.txt'), 'wb') as f:
+        f.write(text[:size // 2])
+    rng = random.Random(1)
+    with open(os.path.join(folder, 'numbers.bin'), 'wb') as f:
+        array('d', (math.sin(i / 100) * 1000 + rng.random() for i in range(size // 32))).tofile(f)
+    with open(os.path.join(folder, 'random.bin'), 'wb') as f:
+        f.write(os.urandom(size // 4))
+    return [os.path.join(folder, name) for name in ('sources.txt', 'numbers.bin', 'random.bin')]
+
+
+def benchmark_archives(sources, folder, workers=None, report=None):
+    """Create and extract every format at several levels; rows of timings and ratios"""
+    workers = workers or os.cpu_count() or 1
+    runs = [(fmt, level, workers) for fmt in archive_formats() for level in ARCHIVE_LEVELS[fmt]]
+    if workers > 1:
+        # Single-core reference for the default gzip level shows the parallel speedup
+        runs.insert(0, ('tar.gz', 6, 1))
+    rows = []
+    for fmt, level, count in runs:
+        path = os.path.join(folder, f"bench-{level}-{count}.{fmt}")
+        created = create_archive(path, sources, fmt, level, count)
+        extracted = extract_archive(path, os.path.join(folder, 'out'))
+        shutil.rmtree(os.path.join(folder, 'out'), ignore_errors=True)
+        os.remove(path)
+        row = {'format': fmt, 'level': level, 'workers': count,
+               'ratio': created['output'] / max(1, created['input']),
+               'compress_mb_s': created['input'] / created['seconds'] / 1e6,
+               'extract_mb_s': created['input'] / extracted['seconds'] / 1e6}
+        rows.append(row)
+        if report is not None:
+            report(row)
+    return rows
+
+
+# ========== CODING CHALLENGES ==========
+
+JUDGE_MODULES = dict(SAFE_MODULES, functools=functools, itertools=itertools,
+                     collections=collections, heapq=heapq, bisect=bisect)
+JUDGE_MEMORY_LIMIT = 256 * 1024 * 1024
+JUDGE_VERDICTS = ('Accepted', 'Wrong Answer', 'Time Limit Exceeded', 'Memory Limit Exceeded', 'Runtime Error')
+
+
+def fibonacci_reference(n):
+    a, b = 0, 1
+    for _ in range(n):
+        a, b = b, a + b
+    return a
+
+
+def fibonacci_input(size):
+    return (size,)
+
+
+def pair_sum_reference(numbers, target):
+    seen = {}
+    for j, number in enumerate(numbers):
+        if target - number in seen:
+            return (seen[target - number], j)
+        seen[number] = j
+    return None
+
+
+def pair_sum_input(size):
+    # Even numbers and one odd one: only a single pair, placed late, reaches the odd target
+    rng = random.Random(size)
+    numbers = [2 * x for x in rng.sample(range(size * 10), size)]
+    i, j = sorted(rng.sample(range(size // 2, size), 2)) if size > 3 else (0, 1)
+    numbers[j] += 1
+    return (numbers, numbers[i] + numbers[j])
+
+
+def pair_sum_check(args, result, expected):
+    numbers, target = args
+    try:
+        i, j = result
+        return 0 <= i < j < len(numbers) and numbers[i] + numbers[j] == target
+    except (TypeError, ValueError, IndexError):
+        return False
+
+
+def count_primes_reference(n):
+    if n < 3:
+        return 0
+    sieve = bytearray([1]) * n
+    sieve[0] = sieve[1] = 0
+    for i in range(2, int(n ** 0.5) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytes(len(range(i * i, n, i)))
+    return sum(sieve)
+
+
+def count_primes_input(size):
+    return (size,)
+
+
+# Hidden tests are (name, input size, time limit); make_input turns the size into arguments
+CHALLENGES = {
+    'fibonacci': {
+        'title': "Fibonacci",
+        'function': 'fibonacci',
+        'description': "Write fibonacci(n) returning the n-th Fibonacci number\n"
+                       "(fibonacci(0) = 0, fibonacci(1) = 1).\n\n"
+                       "Hidden tests go up to n = 300 with a 1 second limit.",
+        'starter': 'def fibonacci(n):\n'
+                   '    """Calculate Fibonacci sequence"""\n'
+                   '    if n <= 1:\n'
+                   '        return n\n'
+                   '    return fibonacci(n - 1) + fibonacci(n - 2)\n',
+        'reference': fibonacci_reference,
+        'make_input': fibonacci_input,
+        'tests': [("n = 0", 0, 1.0), ("n = 1", 1, 1.0), ("n = 2", 2, 1.0), ("small", 10, 1.0),
+                  ("medium", 20, 1.0), ("performance", 35, 1.0), ("large", 300, 1.0)],
+        'sizes': [10, 14, 18, 22, 26, 30, 60, 120, 240, 480],
+    },
+    'pair_sum': {
+        'title': "Pair Sum",
+        'function': 'pair_sum',
+        'description': "Write pair_sum(numbers, target) returning indices (i, j), i < j,\n"
+                       "with numbers[i] + numbers[j] == target. Numbers are distinct.\n\n"
+                       "Hidden tests use up to 200 000 numbers with a 1 second limit.",
+        'starter': 'def pair_sum(numbers, target):\n'
+                   '    for i in range(len(numbers)):\n'
+                   '        for j in range(i + 1, len(numbers)):\n'
+                   '            if numbers[i] + numbers[j] == target:\n'
+                   '                return (i, j)\n',
+        'reference': pair_sum_reference,
+        'make_input': pair_sum_input,
+        'check': pair_sum_check,
+        'tests': [("tiny", 2, 1.0), ("small", 10, 1.0), ("medium", 1000, 1.0), ("performance", 200000, 1.0)],
+        'sizes': [250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000],
+    },
+    'count_primes': {
+        'title': "Count Primes",
+        'function': 'count_primes',
+        'description': "Write count_primes(n) returning how many primes are below n.\n\n"
+                       "Hidden tests go up to n = 2 000 000 with a 2 second limit.",
+        'starter': 'def count_primes(n):\n'
+                   '    count = 0\n'
+                   '    for number in range(2, n):\n'
+                   '        if all(number % d for d in range(2, number)):\n'
+                   '            count += 1\n'
+                   '    return count\n',
+        'reference': count_primes_reference,
+        'make_input': count_primes_input,
+        'tests': [("n = 0", 0, 1.0), ("n = 2", 2, 1.0), ("n = 3", 3, 1.0), ("small", 100, 1.0),
+                  ("medium", 10000, 2.0), ("performance", 2000000, 2.0)],
+        'sizes': [500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000, 256000],
+    },
+}
+
+COMPLEXITY_CLASSES = [
+    ("O(1)", lambda n: 0.0),
+    ("O(log n)", lambda n: math.log(math.log(n))),
+    ("O(√n)", lambda n: 0.5 * math.log(n)),
+    ("O(n)", lambda n: math.log(n)),
+    ("O(n log n)", lambda n: math.log(n) + math.log(math.log(n))),
+    ("O(n²)", lambda n: 2 * math.log(n)),
+    ("O(n³)", lambda n: 3 * math.log(n)),
+    ("O(2ⁿ)", lambda n: n * math.log(2)),
+]
+
+
+def judge_namespace():
+    """Globals for submitted code: the editor sandbox plus algorithm helper modules"""
+    def restricted_import(name, globals=None, locals=None, fromlist=(), level=0):
+        if name not in JUDGE_MODULES:
+            raise ImportError(f"module {name!r} is not available")
+        return JUDGE_MODULES[name]
+    builtins = dict(SAFE_BUILTINS, __import__=restricted_import, __build_class__=__build_class__,
+                    __name__='__main__', Exception=Exception, ValueError=ValueError,
+                    KeyError=KeyError, IndexError=IndexError, reversed=reversed, any=any, all=all,
+                    divmod=divmod, pow=pow, round=round, bytearray=bytearray, bytes=bytes,
+                    iter=iter, next=next, frozenset=frozenset, object=object, super=super)
+    namespace = {'__builtins__': builtins, '__name__': '__main__'}
+    namespace.update(JUDGE_MODULES)
+    return namespace
+
+
+def _limit_memory(limit):
+    """Cap the address space of this worker; returns False where that is not possible"""
+    try:
+        import resource
+        with open('/proc/self/statm') as f:
+            used = int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+        resource.setrlimit(resource.RLIMIT_AS, (used + limit, resource.getrlimit(resource.RLIMIT_AS)[1]))
+        return True
+    except (ImportError, OSError, ValueError, AttributeError):
+        return False
+
+
+def judge_case(conn, code, function, args, memory_limit):
+    """Run one hidden test in a fresh process and send back (status, result, seconds, peak bytes)"""
+    sys.stdout = sys.stderr = io.StringIO()
+    # Without an address space limit the peak is measured with tracemalloc instead
+    import tracemalloc
+    if not _limit_memory(memory_limit):
+        tracemalloc.start()
+    namespace = judge_namespace()
+    conn.send(('ready',))
+    try:
+        exec(compile(code, '<submission>', 'exec'), namespace)
+        if function not in namespace:
+            conn.send(('error', f"function {function}() is not defined", 0.0, 0))
+            return
+        func = namespace[function]
+        start = time.perf_counter()
+        result = func(*args)
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+        if peak > memory_limit:
+            conn.send(('memory', None, seconds, peak))
+        else:
+            conn.send(('ok', result, seconds, peak))
+    except MemoryError:
+        conn.send(('memory', None, 0.0, memory_limit))
+    except BaseException as e:
+        conn.send(('error', f"{type(e).__name__}: {e}", 0.0, 0))
+
+
+def judge_complexity(conn, code, function, challenge, budget):
+    """Time the submission on growing inputs, sending (size, seconds per call) as it goes"""
+    sys.stdout = sys.stderr = io.StringIO()
+    make_input = CHALLENGES[challenge]['make_input']
+    conn.send(('ready',))
+    for size in CHALLENGES[challenge]['sizes']:
+        args = make_input(size)
+        calls = 0
+        total = 0.0
+        # Fresh globals for every call so memo tables do not carry over
+        while True:
+            namespace = judge_namespace()
+            try:
+                exec(compile(code, '<submission>', 'exec'), namespace)
+                call_start = time.perf_counter()
+                namespace[function](*args)
+                elapsed = time.perf_counter() - call_start
+            except BaseException:
+                conn.send(('done',))
+                return
+            calls += 1
+            total += elapsed
+            if total > 0.02 or elapsed > budget:
+                break
+        conn.send(('point', size, total / calls))
+        if elapsed > budget:
+            break
+    conn.send(('done',))
+
+
+def estimate_complexity(points):
+    """Best matching growth class for (size, seconds) points, or None with too few points"""
+    points = [(size, seconds) for size, seconds in points if seconds > 0 and size > 2]
+    if len(points) < 3:
+        return None
+    best = None
+    for name, log_growth in COMPLEXITY_CLASSES:
+        residuals = [math.log(seconds) - log_growth(size) for size, seconds in points]
+        mean = sum(residuals) / len(residuals)
+        spread = sum((r - mean) ** 2 for r in residuals) / len(residuals)
+        if best is None or spread < best[1]:
+            best = (name, spread)
+    return best[0]
+
+
+class Judge:
+    """Runs a submission against the hidden tests of a challenge in parallel worker processes"""
+    def __init__(self, challenge, code, workers=None, memory_limit=JUDGE_MEMORY_LIMIT):
+        self.challenge = challenge
+        self.spec = CHALLENGES[challenge]
+        self.code = code
+        self.workers = workers or os.cpu_count() or 1
+        self.memory_limit = memory_limit
+        self.context = multiprocessing.get_context('spawn')
+        self.cancel_event = Event()
+    
+    def cancel(self):
+        self.cancel_event.set()
+    
+    def _start(self, target, *args):
+        receiver, sender = self.context.Pipe(duplex=False)
+        process = self.context.Process(target=target, args=(sender, *args), daemon=True)
+        process.start()
+        sender.close()
+        return process, receiver
+    
+    def _verdict(self, case, args, message):
+        name, size, time_limit = case
+        status, result, seconds, peak = message
+        if status == 'memory':
+            return 'Memory Limit Exceeded', seconds, peak, ""
+        if status == 'error':
+            return 'Runtime Error', seconds, peak, result
+        if seconds > time_limit:
+            return 'Time Limit Exceeded', seconds, peak, ""
+        check = self.spec.get('check')
+        expected = self.spec['reference'](*args)
+        correct = check(args, result, expected) if check else result == expected
+        return ('Accepted' if correct else 'Wrong Answer'), seconds, peak, ""
+    
+    def run(self, report=None):
+        """Judge every case; report(index, name, verdict, seconds, peak, detail) as they finish"""
+        cases = list(self.spec['tests'])
+        inputs = [self.spec['make_input'](size) for _, size, _ in cases]
+        waiting = deque(enumerate(cases))
+        running = {}
+        results = [None] * len(cases)
+        while waiting or running:
+            while waiting and len(running) < self.workers and not self.cancel_event.is_set():
+                index, case = waiting.popleft()
+                process, receiver = self._start(judge_case, self.code, self.spec['function'], inputs[index],
+                                                self.memory_limit)
+                running[index] = [process, receiver, None]
+            while waiting and self.cancel_event.is_set():
+                index, (name, _, _) = waiting.popleft()
+                results[index] = (name, 'Cancelled', 0.0, 0, "")
+                if report is not None:
+                    report(index, *results[index])
+            for index, entry in list(running.items()):
+                process, receiver, deadline = entry
+                name, _, time_limit = cases[index]
+                outcome = None
+                try:
+                    if receiver.poll():
+                        message = receiver.recv()
+                        if message[0] == 'ready':
+                            # The clock starts once the worker has started up
+                            entry[2] = time.monotonic() + time_limit + 0.5
+                            continue
+                        outcome = self._verdict(cases[index], inputs[index], message)
+                    elif not process.is_alive():
+                        outcome = ('Memory Limit Exceeded' if process.exitcode in (-9, 137) else 'Runtime Error',
+                                   0.0, 0, f"worker exited with code {process.exitcode}")
+                    elif deadline is not None and time.monotonic() > deadline:
+                        outcome = ('Time Limit Exceeded', time_limit, 0, "")
+                    elif self.cancel_event.is_set():
+                        outcome = ('Cancelled', 0.0, 0, "")
+                except (EOFError, OSError):
+                    outcome = ('Runtime Error', 0.0, 0, "worker crashed")
+                if outcome is None:
+                    continue
+                process.kill()
+                process.join()
+                receiver.close()
+                del running[index]
+                results[index] = (name,) + outcome
+                if report is not None:
+                    report(index, *results[index])
+            time.sleep(0.005)
+        return results
+    
+    def complexity(self, budget=0.25, timeout=20.0, report=None):
+        """Measured growth class and the (size, seconds) points behind it"""
+        process, receiver = self._start(judge_complexity, self.code, self.spec['function'], self.challenge, budget)
+        points = []
+        deadline = None
+        try:
+            while not self.cancel_event.is_set():
+                if deadline is not None and time.monotonic() > deadline:
+                    break
+                if not receiver.poll(0.05):
+                    if not process.is_alive():
+                        break
+                    continue
+                message = receiver.recv()
+                if message[0] == 'ready':
+                    deadline = time.monotonic() + timeout
+                elif message[0] == 'point':
+                    points.append(message[1:])
+                    if report is not None:
+                        report(*message[1:])
+                else:
+                    break
+        except (EOFError, OSError):
+            pass
+        finally:
+            process.kill()
+            process.join()
+            receiver.close()
+        return estimate_complexity(points), points
+
+
+# ========== NETWORK LAB ==========
+
+NET_MODES = ('threads', 'selectors', 'asyncio')
+NET_PROTOCOLS = ('echo', 'chat', 'http')
+
+
+def net_frames(protocol, buffer):
+    """Complete requests in buffer and the unfinished rest"""
+    separator = b'\r\n\r\n' if protocol == 'http' else b'\n'
+    *frames, rest = buffer.split(separator)
+    return [frame + separator for frame in frames], rest
+
+
+def net_reply(protocol, frame):
+    """Server answer to one request (chat replies go to every client)"""
+    if protocol == 'http':
+        parts = frame.split(b' ', 2)
+        body = b'Hello from MKS-OS: ' + (parts[1] if len(parts) > 2 else b'/') + b'\n'
+        return (b'HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\nContent-Length: %d\r\n'
+                b'Connection: keep-alive\r\n\r\n' % len(body)) + body
+    return frame
+
+
+def net_request(protocol, client, text=None):
+    if protocol == 'http':
+        return f"GET /{text or client} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode('utf-8')
+    return f"{client} {text or 'ping'}\n".encode('utf-8')
+
+
+async def net_read_reply(reader, protocol, request):
+    """Read the answer to request; chat skips other clients' messages"""
+    if protocol == 'http':
+        header = await reader.readuntil(b'\r\n\r\n')
+        length = int(re.search(rb'Content-Length: (\d+)', header).group(1))
+        return header + await reader.readexactly(length)
+    while True:
+        line = await reader.readuntil(b'\n')
+        if protocol != 'chat' or line == request:
+            return line
+
+
+async def net_exchange(port, protocol, text):
+    """One request from the interactive client"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        request = net_request(protocol, 'console', text)
+        writer.write(request)
+        await writer.drain()
+        return (await asyncio.wait_for(net_read_reply(reader, protocol, request), 5)).decode('utf-8', 'replace')
+    finally:
+        writer.close()
+
+
+def _raise_fd_limit():
+    """Thousands of sockets need more than the default 1024 descriptors"""
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard if hard != resource.RLIM_INFINITY else 65536, hard))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+def _serve_threads(sock, protocol, stop):
+    """One blocking thread per connection"""
+    clients = {}
+    lock = threading.Lock()
+    
+    def handle(conn):
+        with lock:
+            clients[conn] = threading.Lock()
+        buffer = b''
+        try:
+            while True:
+                data = conn.recv(65536)
+                if not data:
+                    break
+                frames, buffer = net_frames(protocol, buffer + data)
+                for frame in frames:
+                    reply = net_reply(protocol, frame)
+                    with lock:
+                        targets = list(clients.items()) if protocol == 'chat' else [(conn, clients[conn])]
+                    for target, send_lock in targets:
+                        try:
+                            with send_lock:
+                                target.sendall(reply)
+                        except OSError:
+                            pass
+        except OSError:
+            pass
+        finally:
+            with lock:
+                clients.pop(conn, None)
+            conn.close()
+    
+    sock.settimeout(0.2)
+    while not stop.is_set():
+        try:
+            conn, _ = sock.accept()
+        except socket.timeout:
+            continue
+        except OSError:
+            time.sleep(0.01)
+            continue
+        conn.settimeout(None)
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        Thread(target=handle, args=(conn,), daemon=True).start()
+
+
+def _serve_selectors(sock, protocol, stop):
+    """Single thread multiplexing non-blocking sockets with the selectors module"""
+    selector = selectors.DefaultSelector()
+    sock.setblocking(False)
+    selector.register(sock, selectors.EVENT_READ, None)
+    buffers = {}
+    
+    def close(conn):
+        selector.unregister(conn)
+        del buffers[conn]
+        conn.close()
+    
+    def flush(conn):
+        out = buffers[conn][1]
+        try:
+            sent = conn.send(out)
+        except BlockingIOError:
+            sent = 0
+        except OSError:
+            close(conn)
+            return
+        del out[:sent]
+        selector.modify(conn, selectors.EVENT_READ | (selectors.EVENT_WRITE if out else 0), 'client')
+    
+    while not stop.is_set():
+        for key, events in selector.select(timeout=0.2):
+            if key.data is None:
+                while True:
+                    try:
+                        conn, _ = sock.accept()
+                    except (BlockingIOError, OSError):
+                        break
+                    conn.setblocking(False)
+                    conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    buffers[conn] = [b'', bytearray()]
+                    selector.register(conn, selectors.EVENT_READ, 'client')
+                continue
+            conn = key.fileobj
+            if conn not in buffers:
+                continue
+            if events & selectors.EVENT_READ:
+                try:
+                    data = conn.recv(65536)
+                except BlockingIOError:
+                    data = None
+                except OSError:
+                    data = b''
+                if data == b'':
+                    close(conn)
+                    continue
+                if data:
+                    frames, buffers[conn][0] = net_frames(protocol, buffers[conn][0] + data)
+                    targets = list(buffers) if protocol == 'chat' else [conn]
+                    for frame in frames:
+                        reply = net_reply(protocol, frame)
+                        for target in targets:
+                            buffers[target][1] += reply
+                    for target in targets:
+                        if target in buffers and buffers[target][1]:
+                            flush(target)
+            elif events & selectors.EVENT_WRITE:
+                flush(conn)
+    selector.close()
+
+
+def _serve_asyncio(sock, protocol, stop):
+    """asyncio streams on one event loop"""
+    async def main():
+        writers = set()
+        
+        async def handle(reader, writer):
+            writers.add(writer)
+            buffer = b''
+            try:
+                while True:
+                    data = await reader.read(65536)
+                    if not data:
+                        break
+                    frames, buffer = net_frames(protocol, buffer + data)
+                    for frame in frames:
+                        reply = net_reply(protocol, frame)
+                        for target in (list(writers) if protocol == 'chat' else [writer]):
+                            if not target.is_closing():
+                                target.write(reply)
+                    await writer.drain()
+            except (ConnectionError, OSError):
+                pass
+            finally:
+                writers.discard(writer)
+                writer.close()
+        
+        server = await asyncio.start_server(handle, sock=sock)
+        while not stop.is_set():
+            await asyncio.sleep(0.2)
+        server.close()
+    
+    asyncio.run(main())
+
+
+def net_lab_server(mode, protocol, ports, stop):
+    """Server process: listen on a free loopback port, report it, serve until stop is set"""
+    _raise_fd_limit()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(4096)
+    ports.put(sock.getsockname()[1])
+    {'threads': _serve_threads, 'selectors': _serve_selectors, 'asyncio': _serve_asyncio}[mode](sock, protocol, stop)
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def net_lab_load(port, protocol, connections, duration, stats):
+    """Load generator process: keeps `connections` clients busy and reports every half second"""
+    _raise_fd_limit()
+    
+    async def main():
+        counts = Counter()
+        interval = []
+        sample = []
+        rng = random.Random(1)
+        start = time.perf_counter()
+        deadline = start + duration
+        
+        async def client(index):
+            try:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            except OSError:
+                counts['errors'] += 1
+                return
+            counts['open'] += 1
+            request = net_request(protocol, index)
+            try:
+                while time.perf_counter() < deadline:
+                    sent = time.perf_counter()
+                    writer.write(request)
+                    await writer.drain()
+                    await net_read_reply(reader, protocol, request)
+                    latency = time.perf_counter() - sent
+                    interval.append(latency)
+                    counts['requests'] += 1
+                    # Reservoir sample for the overall percentiles
+                    if len(sample) < 50000:
+                        sample.append(latency)
+                    elif rng.random() < 50000 / counts['requests']:
+                        sample[rng.randrange(50000)] = latency
+            except (OSError, asyncio.IncompleteReadError, ValueError, AttributeError):
+                counts['errors'] += 1
+            finally:
+                counts['open'] -= 1
+                writer.close()
+        
+        tasks = []
+        last = start
+        done_before = 0
+        while True:
+            # Open connections in steps so the listen backlog does not overflow
+            for index in range(len(tasks), min(connections, len(tasks) + 200)):
+                tasks.append(asyncio.ensure_future(client(index)))
+            await asyncio.sleep(0.5 if len(tasks) >= connections else 0.05)
+            now = time.perf_counter()
+            if now - last >= 0.5 or all(task.done() for task in tasks):
+                ordered = sorted(interval)
+                interval.clear()
+                stats.put({'final': False, 'time': now - start, 'open': counts['open'],
+                           'rps': (counts['requests'] - done_before) / (now - last),
+                           'p50': percentile(ordered, 0.5), 'p90': percentile(ordered, 0.9),
+                           'p99': percentile(ordered, 0.99), 'errors': counts['errors']})
+                last, done_before = now, counts['requests']
+            if len(tasks) >= connections and all(task.done() for task in tasks):
+                break
+        ordered = sorted(sample)
+        stats.put({'final': True, 'requests': counts['requests'], 'errors': counts['errors'],
+                   'rps': counts['requests'] / (time.perf_counter() - start),
+                   'p50': percentile(ordered, 0.5), 'p90': percentile(ordered, 0.9),
+                   'p99': percentile(ordered, 0.99)})
+    
+    asyncio.run(main())
+
+
+class NetLabServer:
+    """Lab server running in its own process"""
+    def __init__(self, mode, protocol):
+        self.mode = mode
+        self.protocol = protocol
+        context = multiprocessing.get_context('spawn')
+        self.stop_event = context.Event()
+        ports = context.Queue()
+        self.process = context.Process(target=net_lab_server, args=(mode, protocol, ports, self.stop_event),
+                                       daemon=True)
+        self.process.start()
+        self.port = ports.get(timeout=60)
+    
+    def stop(self):
+        self.stop_event.set()
+        self.process.join(3)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+
+def run_network_benchmark(mode, protocol, connections, duration, report=None, cancel_event=None, server=None):
+    """Load test one server model; report(stats) every half second; returns the summary"""
+    own_server = server is None
+    server = server or NetLabServer(mode, protocol)
+    context = multiprocessing.get_context('spawn')
+    stats = context.Queue()
+    load = context.Process(target=net_lab_load, args=(server.port, protocol, connections, duration, stats),
+                           daemon=True)
+    load.start()
+    summary = None
+    try:
+        while summary is None:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            try:
+                message = stats.get(timeout=0.2)
+            except queue.Empty:
+                if not load.is_alive():
+                    break
+                continue
+            if message['final']:
+                summary = dict(message, mode=mode, protocol=protocol, connections=connections)
+            elif report is not None:
+                report(message)
+    finally:
+        if load.is_alive():
+            load.kill()
+        load.join()
+        if own_server:
+            server.stop()
+    return summary
+
+
+# ========== SHARED MEMORY IPC ==========
+
+IPC_TRANSPORTS = ('ring', 'queue', 'pipe', 'socket') if hasattr(socket, 'AF_UNIX') else ('ring', 'queue', 'pipe')
+
+
+class RingBuffer:
+    """Single-producer/single-consumer ring of length-prefixed records in shared memory.
+    
+    Header: write counter, read counter (own cache lines) and a closed flag. Both counters
+    only grow; each side writes only its own counter, so no lock is needed. This relies on
+    aligned 8-byte stores being atomic and not reordered before the data they publish, so
+    the header is accessed through a native 'Q' view (one store per counter) rather than
+    struct.pack_into, which copies byte by byte.
+    """
+    HEADER = 192
+    CAPACITY, CLOSED, HEAD, TAIL = 0, 1, 8, 16
+    
+    def __init__(self, name=None, capacity=1 << 20):
+        if name is None:
+            capacity = 1 << max(6, (capacity - 1).bit_length())
+            self.shm = shared_memory.SharedMemory(create=True, size=self.HEADER + capacity)
+            self.owner = True
+        else:
+            # Attaching children share the creator's resource tracker, which unlinks the block
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.buf = self.shm.buf
+        self.header = self.buf[:self.HEADER].cast('Q')
+        if self.owner:
+            self.header[self.CAPACITY] = capacity
+        self.capacity = self.header[self.CAPACITY]
+        self.mask = self.capacity - 1
+    
+    @property
+    def name(self):
+        return self.shm.name
+    
+    @property
+    def head(self):
+        return self.header[self.HEAD]
+    
+    @property
+    def tail(self):
+        return self.header[self.TAIL]
+    
+    @property
+    def closed(self):
+        return self.header[self.CLOSED] == 1
+    
+    def close(self):
+        """Producer is done; the consumer sees end of stream once it has drained the ring"""
+        self.header[self.CLOSED] = 1
+    
+    def _copy_in(self, position, data):
+        offset = self.HEADER + (position & self.mask)
+        first = min(len(data), self.capacity - (position & self.mask))
+        self.buf[offset:offset + first] = data[:first]
+        if first < len(data):
+            self.buf[self.HEADER:self.HEADER + len(data) - first] = data[first:]
+    
+    def _copy_out(self, position, size):
+        offset = self.HEADER + (position & self.mask)
+        first = min(size, self.capacity - (position & self.mask))
+        data = bytes(self.buf[offset:offset + first])
+        if first < size:
+            data += bytes(self.buf[self.HEADER:self.HEADER + size - first])
+        return data
+    
+    @staticmethod
+    def _wait(spins, deadline):
+        """Spin briefly, then back off to short sleeps"""
+        if deadline is not None and time.monotonic() > deadline:
+            return False
+        if spins > 200:
+            time.sleep(0.0005 if spins > 2000 else 0)
+        return True
+    
+    def put(self, data, timeout=None):
+        """Append one record, waiting while the ring is full; False on timeout"""
+        size = 4 + len(data)
+        if size > self.capacity:
+            raise ValueError(f"record of {len(data)} bytes does not fit a {self.capacity} byte ring")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        head = self.head
+        spins = 0
+        while head + size - self.tail > self.capacity:
+            spins += 1
+            if not self._wait(spins, deadline):
+                return False
+        self._copy_in(head, struct.pack('<I', len(data)))
+        self._copy_in(head + 4, data)
+        self.header[self.HEAD] = head + size
+        return True
+    
+    def get(self, timeout=None):
+        """Next record; None on timeout or when the ring is closed and drained"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        tail = self.tail
+        spins = 0
+        while True:
+            head = self.head
+            if head != tail:
+                break
+            if self.closed and self.head == tail:
+                return None
+            spins += 1
+            if not self._wait(spins, deadline):
+                return None
+        if head < tail or head - tail > self.capacity:
+            raise RuntimeError(f"ring counters are inconsistent (head {head}, tail {tail})")
+        size = struct.unpack('<I', self._copy_out(tail, 4))[0]
+        if size > head - tail - 4:
+            raise RuntimeError(f"ring record of {size} bytes overruns the {head - tail} bytes written")
+        data = self._copy_out(tail + 4, size)
+        self.header[self.TAIL] = tail + 4 + size
+        return data
+    
+    def get_nowait(self):
+        return self.get(timeout=0)
+    
+    def release(self):
+        """Detach; the creating side also frees the shared memory"""
+        self.header.release()
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class RingWriter:
+    """Text file object writing into a ring buffer (stdout of the code runner)"""
+    def __init__(self, ring):
+        self.ring = ring
+    
+    def write(self, text):
+        data = text.encode('utf-8', 'replace')
+        for start in range(0, len(data), self.ring.capacity // 4):
+            self.ring.put(data[start:start + self.ring.capacity // 4])
+        return len(text)
+    
+    def flush(self):
+        pass
+
+
+def run_sandboxed_code(code, ring_name):
+    """Code runner process: execute editor code in the sandbox, output goes through the ring"""
+    ring = RingBuffer(ring_name)
+    sys.stdout = sys.stderr = RingWriter(ring)
+    # One namespace, like a script: top-level functions see each other and the __main__ guard runs
+    safe_globals = {'__builtins__': dict(SAFE_BUILTINS), '__name__': '__main__'}
+    safe_globals.update(SAFE_MODULES)
+    status = 0
+    try:
+        exec(code, safe_globals)
+    except BaseException as e:
+        print(f"\n❌ Error: {str(e)}\nTraceback:\n{traceback.format_exc()}", end="")
+        status = 1
+    finally:
+        ring.close()
+        ring.release()
+    sys.exit(status)
+
+
+class CodeRunner:
+    """Editor code running in its own process; output is read from a shared-memory ring"""
+    def __init__(self, code, capacity=1 << 20):
+        self.ring = RingBuffer(capacity=capacity)
+        context = multiprocessing.get_context('spawn')
+        self.process = context.Process(target=run_sandboxed_code, args=(code, self.ring.name), daemon=True)
+        self.process.start()
+    
+    def read(self, limit=1 << 20):
+        """Output available now (up to about `limit` bytes) as text"""
+        chunks = []
+        size = 0
+        while size < limit:
+            data = self.ring.get_nowait()
+            if data is None:
+                break
+            chunks.append(data)
+            size += len(data)
+        return b''.join(chunks).decode('utf-8', 'replace')
+    
+    def finished(self):
+        """True once the process has exited and all output was read"""
+        return not self.process.is_alive() and self.ring.head == self.ring.tail
+    
+    def stop(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+    
+    def release(self):
+        self.stop()
+        self.ring.release()
+
+
+def ipc_pair(kind, capacity=1 << 22, parent_sends=False):
+    """Channel as (parent end, child end); the ring's child end is its shared memory name"""
+    if kind == 'ring':
+        ring = RingBuffer(capacity=capacity)
+        return ring, ring.name
+    if kind == 'queue':
+        channel = multiprocessing.get_context('spawn').Queue()
+        return channel, channel
+    if kind == 'pipe':
+        receiver, sender = multiprocessing.get_context('spawn').Pipe(duplex=False)
+        return (sender, receiver) if parent_sends else (receiver, sender)
+    a, b = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+    return a, b
+
+
+def ipc_open(kind, end):
+    return RingBuffer(end) if kind == 'ring' else end
+
+
+def ipc_close(kind, end):
+    """Detach an end opened with ipc_open; a ring must drop its views before exit"""
+    if kind == 'ring':
+        end.release()
+
+
+def ipc_send(kind, end, data):
+    if kind == 'ring':
+        end.put(data)
+    elif kind == 'queue':
+        end.put(data)
+    elif kind == 'pipe':
+        end.send_bytes(data)
+    else:
+        end.sendall(struct.pack('<I', len(data)) + data)
+
+
+def _recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise EOFError("socket closed")
+        data += chunk
+    return bytes(data)
+
+
+def ipc_recv(kind, end):
+    if kind in ('ring', 'queue'):
+        return end.get()
+    if kind == 'pipe':
+        return end.recv_bytes()
+    return _recv_exact(end, struct.unpack('<I', _recv_exact(end, 4))[0])
+
+
+def ipc_producer(kind, end, count, size):
+    """Benchmark child: send a start record, then `count` messages of `size` bytes"""
+    end = ipc_open(kind, end)
+    try:
+        payload = os.urandom(size)
+        ipc_send(kind, end, b'start')
+        for _ in range(count):
+            ipc_send(kind, end, payload)
+    finally:
+        ipc_close(kind, end)
+
+
+def ipc_echo(kind, inbound, outbound, count):
+    """Benchmark child: send every message back"""
+    inbound = ipc_open(kind, inbound)
+    try:
+        outbound = ipc_open(kind, outbound)
+        try:
+            for _ in range(count):
+                ipc_send(kind, outbound, ipc_recv(kind, inbound))
+        finally:
+            ipc_close(kind, outbound)
+    finally:
+        ipc_close(kind, inbound)
+
+
+def benchmark_ipc(kind, size, count, round_trips=2000):
+    """Messages/s one way and round-trip latency percentiles for one transport and size"""
+    context = multiprocessing.get_context('spawn')
+    parent, child = ipc_pair(kind, capacity=max(1 << 22, 8 * size))
+    process = context.Process(target=ipc_producer, args=(kind, child, count, size), daemon=True)
+    process.start()
+    try:
+        ipc_recv(kind, parent)
+        start = time.perf_counter()
+        for _ in range(count):
+            ipc_recv(kind, parent)
+        seconds = time.perf_counter() - start
+        process.join()
+    finally:
+        if process.is_alive():
+            process.kill()
+        if kind == 'ring':
+            parent.release()
+        elif kind == 'socket':
+            parent.close()
+            child.close()
+    
+    # Ping-pong over a second pair of channels
+    outbound, child_in = ipc_pair(kind, parent_sends=True)
+    inbound, child_out = ipc_pair(kind)
+    process = context.Process(target=ipc_echo, args=(kind, child_in, child_out, round_trips), daemon=True)
+    process.start()
+    latencies = []
+    try:
+        payload = os.urandom(size)
+        for _ in range(round_trips):
+            sent = time.perf_counter()
+            ipc_send(kind, outbound, payload)
+            ipc_recv(kind, inbound)
+            latencies.append(time.perf_counter() - sent)
+        process.join()
+    finally:
+        if process.is_alive():
+            process.kill()
+        for end in (outbound, inbound):
+            if kind == 'ring':
+                end.release()
+            elif kind == 'socket':
+                end.close()
+        if kind == 'socket':
+            child_in.close()
+            child_out.close()
+    latencies.sort()
+    return {'transport': kind, 'size': size, 'messages_s': count / seconds,
+            'mb_s': count * size / seconds / 1e6,
+            'rtt_p50': percentile(latencies, 0.5), 'rtt_p99': percentile(latencies, 0.99)}
+
+
+# ========== WAVEFORM VIEWER ==========
+
+WAVE_BASE = 256
+WAVE_FANOUT = 4
+WAVE_CHUNK = 1 << 20
+WAVE_MAGIC = b'MKSPK1'
+WAVE_INT_TYPES = {1: ('u1', 'B'), 2: ('<i2', 'h'), 4: ('<i4', 'i')}
+WAVE_FLOAT_TYPES = {4: ('<f4', 'f'), 8: ('<f8', 'd')}
+
+
+class WavFile:
+    """RIFF/RF64 WAVE file whose PCM data is memory-mapped, never read as a whole"""
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._parse()
+        except (ValueError, struct.error) as e:
+            self.close()
+            raise ValueError(f"Not a supported WAV file: {e}") from e
+    
+    def _parse(self):
+        riff, _, wave = struct.unpack_from('<4sI4s', self.map, 0)
+        if riff not in (b'RIFF', b'RF64') or wave != b'WAVE':
+            raise ValueError("missing RIFF/WAVE header")
+        position, fmt, data_size64 = 12, None, None
+        self.data_offset = None
+        while position + 8 <= len(self.map):
+            chunk, size = struct.unpack_from('<4sI', self.map, position)
+            body = position + 8
+            if chunk == b'ds64':
+                data_size64 = struct.unpack_from('<Q', self.map, body + 8)[0]
+            elif chunk == b'fmt ':
+                fmt = list(struct.unpack_from('<HHIIHH', self.map, body))
+                if fmt[0] == 0xFFFE and size >= 40:
+                    # WAVE_FORMAT_EXTENSIBLE: real format code starts the sub-format GUID
+                    fmt[0] = struct.unpack_from('<H', self.map, body + 24)[0]
+            elif chunk == b'data':
+                if size == 0xFFFFFFFF and data_size64 is not None:
+                    size = data_size64
+                self.data_offset = body
+                # Writers that exceed 4 GB without RF64 leave a wrong size, trust the file length
+                data_size = len(self.map) - body if size in (0, 0xFFFFFFFF) else min(size, len(self.map) - body)
+                break
+            position = body + size + (size & 1)
+        if fmt is None or self.data_offset is None:
+            raise ValueError("no fmt or data chunk")
+        code, self.channels, self.rate, _, _, bits = fmt
+        self.width = bits // 8
+        types = WAVE_INT_TYPES if code == 1 else WAVE_FLOAT_TYPES if code == 3 else {}
+        if self.channels < 1 or self.rate < 1 or (self.width not in types and not (code == 1 and bits == 24)):
+            raise ValueError(f"format {code} with {bits} bit samples")
+        self.dtype, self.typecode = types.get(self.width, (None, None))
+        self.float = code == 3
+        self.scale = 1.0 if self.float else float(1 << (bits - 1))
+        self.block_align = self.channels * self.width
+        self.frames = data_size // self.block_align
+        if self.frames == 0:
+            raise ValueError("no audio frames")
+    
+    @property
+    def duration(self):
+        return self.frames / self.rate
+    
+    def read(self, start, stop):
+        """Raw samples of frames [start, stop): a (frames, channels) array, or per-channel lists without NumPy"""
+        start, stop = max(0, start), min(self.frames, stop)
+        count = max(0, stop - start)
+        offset = self.data_offset + start * self.block_align
+        if np is not None:
+            if self.width == 3:
+                raw = np.frombuffer(self.map, np.uint8, count * self.block_align, offset).reshape(-1, 3).astype(np.int32)
+                values = (raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)) << 8 >> 8
+            else:
+                values = np.frombuffer(self.map, self.dtype, count * self.channels, offset)
+                if self.width == 1:
+                    values = values.astype(np.int16) - 128
+            return values.reshape(-1, self.channels)
+        data = self.map[offset:offset + count * self.block_align]
+        if self.width == 3:
+            values = [int.from_bytes(data[i:i + 3], 'little', signed=True) for i in range(0, len(data), 3)]
+        else:
+            values = array(self.typecode, data)
+            if sys.byteorder == 'big':
+                values.byteswap()
+            if self.width == 1:
+                values = [value - 128 for value in values]
+        return [values[channel::self.channels] for channel in range(self.channels)]
+    
+    def close(self):
+        try:
+            if getattr(self, 'map', None) is not None:
+                self.map.close()
+        except BufferError:
+            # NumPy views of the mapping are still alive; the map goes away with them
+            pass
+        self.file.close()
+
+
+def wav_peaks_path(path):
+    """Peak cache next to the WAV file, or in the data directory when that folder is read-only"""
+    folder = os.path.dirname(os.path.abspath(path))
+    if os.access(folder, os.W_OK):
+        return path + '.mkspeaks'
+    key = hashlib.sha1(os.path.abspath(path).encode('utf-8', 'surrogateescape')).hexdigest()[:16]
+    return os.path.join(mksos_data_dir('waveforms'), f"{key}.mkspeaks")
+
+
+class WaveformPyramid:
+    """Min/max peaks per channel at block sizes WAVE_BASE * WAVE_FANOUT**level
+    
+    Level arrays are (blocks, channels, 2) float32 in [-1, 1] with NumPy, otherwise flat
+    array('f') in the same layout. Any view needs at most about WAVE_FANOUT blocks per
+    pixel column, so drawing costs the same at every zoom level.
+    """
+    def __init__(self, wav, levels):
+        self.wav = wav
+        self.levels = levels
+    
+    def level_blocks(self, level):
+        data = self.levels[level]
+        return len(data) if np is not None else len(data) // (2 * self.wav.channels)
+    
+    @classmethod
+    def build(cls, wav, progress=None, cancel_event=None):
+        """Scan the PCM data once in WAVE_CHUNK pieces; None if cancelled"""
+        channels = wav.channels
+        parts = []
+        for start in range(0, wav.frames, WAVE_CHUNK):
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            block = wav.read(start, start + WAVE_CHUNK)
+            if np is not None:
+                edges = np.arange(0, len(block), WAVE_BASE)
+                peaks = np.stack([np.minimum.reduceat(block, edges, axis=0),
+                                  np.maximum.reduceat(block, edges, axis=0)], axis=-1)
+                parts.append((peaks / wav.scale).astype(np.float32))
+            else:
+                peaks = array('f')
+                length = len(block[0])
+                for edge in range(0, length, WAVE_BASE):
+                    for channel in range(channels):
+                        samples = block[channel][edge:edge + WAVE_BASE]
+                        peaks.append(min(samples) / wav.scale)
+                        peaks.append(max(samples) / wav.scale)
+                parts.append(peaks)
+            if progress:
+                progress(min(wav.frames, start + WAVE_CHUNK), wav.frames)
+        
+        if np is not None:
+            levels = [np.concatenate(parts) if parts else np.zeros((0, channels, 2), np.float32)]
+            while len(levels[-1]) > 1:
+                previous = levels[-1]
+                edges = np.arange(0, len(previous), WAVE_FANOUT)
+                levels.append(np.stack([np.minimum.reduceat(previous[..., 0], edges, axis=0),
+                                        np.maximum.reduceat(previous[..., 1], edges, axis=0)], axis=-1))
+        else:
+            level = array('f')
+            for part in parts:
+                level.extend(part)
+            levels = [level]
+            stride = 2 * channels
+            while len(levels[-1]) > stride:
+                previous = levels[-1]
+                level = array('f')
+                for first in range(0, len(previous) // stride, WAVE_FANOUT):
+                    group = previous[first * stride:(first + WAVE_FANOUT) * stride]
+                    for channel in range(channels):
+                        level.append(min(group[2 * channel::stride]))
+                        level.append(max(group[2 * channel + 1::stride]))
+                levels.append(level)
+        return cls(wav, levels)
+    
+    def save(self, path):
+        stat = os.stat(self.wav.path)
+        temp = path + '.tmp'
+        with open(temp, 'wb') as f:
+            f.write(struct.pack('<6sQqIIII', WAVE_MAGIC, stat.st_size, stat.st_mtime_ns,
+                                WAVE_BASE, WAVE_FANOUT, self.wav.channels, len(self.levels)))
+            f.write(struct.pack(f'<{len(self.levels)}Q', *(self.level_blocks(i) for i in range(len(self.levels)))))
+            for level in self.levels:
+                f.write(level.astype('<f4').tobytes() if np is not None else level.tobytes())
+        os.replace(temp, path)
+    
+    @classmethod
+    def load(cls, wav, path):
+        """Cached pyramid if it matches the WAV file's size and mtime, else None"""
+        stat = os.stat(wav.path)
+        header = struct.Struct('<6sQqIIII')
+        try:
+            with open(path, 'rb') as f:
+                magic, size, mtime_ns, base, fanout, channels, count = header.unpack(f.read(header.size))
+                if (magic, size, mtime_ns, base, fanout, channels) != (WAVE_MAGIC, stat.st_size, stat.st_mtime_ns,
+                                                                       WAVE_BASE, WAVE_FANOUT, wav.channels):
+                    return None
+                blocks = struct.unpack(f'<{count}Q', f.read(8 * count))
+                offset = f.tell()
+                levels = []
+                for length in blocks:
+                    if np is not None:
+                        levels.append(np.memmap(path, '<f4', 'r', offset, (length, channels, 2)) if length else
+                                      np.zeros((0, channels, 2), np.float32))
+                    else:
+                        level = array('f', f.read(8 * channels * length))
+                        if sys.byteorder == 'big':
+                            level.byteswap()
+                        levels.append(level)
+                    offset += 8 * channels * length
+        except (OSError, struct.error, ValueError):
+            return None
+        return cls(wav, levels)
+    
+    @classmethod
+    def open(cls, wav, progress=None, cancel_event=None):
+        """Load the cached pyramid or build and cache it"""
+        path = wav_peaks_path(wav.path)
+        pyramid = cls.load(wav, path)
+        if pyramid is None:
+            pyramid = cls.build(wav, progress, cancel_event)
+            if pyramid is None:
+                return None
+            try:
+                pyramid.save(path)
+            except OSError:
+                pass
+        return pyramid
+    
+    def columns(self, start, stop, count):
+        """Min/max per channel for `count` pixel columns covering frames [start, stop)
+        
+        Returns a (count, channels, 2) array with NumPy, otherwise a list of
+        per-column lists of (min, max) pairs.
+        """
+        start, stop = max(0, int(start)), min(self.wav.frames, int(stop))
+        count = max(1, min(count, stop - start))
+        per_column = (stop - start) / count
+        if per_column < WAVE_BASE:
+            # Close zoom: few enough raw samples to read straight from the mapping
+            block, data, first = 1, self.wav.read(start, stop), start
+            if np is not None:
+                data = np.stack([data, data], axis=-1) / self.wav.scale
+        else:
+            level = min(len(self.levels) - 1, int(math.log(per_column / WAVE_BASE, WAVE_FANOUT)))
+            block = WAVE_BASE * WAVE_FANOUT ** level
+            first = start // block
+            data = self.levels[level]
+            if np is not None:
+                data = data[first:-(-stop // block)]
+        edges = [int((start + i * per_column) // block) - first for i in range(count)]
+        if np is not None:
+            edges = np.minimum(np.array(edges), len(data) - 1)
+            return np.stack([np.minimum.reduceat(data[..., 0], edges, axis=0),
+                             np.maximum.reduceat(data[..., 1], edges, axis=0)], axis=-1)
+        
+        channels = self.wav.channels
+        result = []
+        for index, edge in enumerate(edges):
+            end = edges[index + 1] if index + 1 < count else -(-(stop - start) // block) + (start // block - first)
+            end = max(end, edge + 1)
+            column = []
+            for channel in range(channels):
+                if block == 1:
+                    samples = data[channel][edge:end]
+                    low, high = min(samples) / self.wav.scale, max(samples) / self.wav.scale
+                else:
+                    stride = 2 * channels
+                    low = min(data[(first + edge) * stride + 2 * channel:(first + end) * stride:stride])
+                    high = max(data[(first + edge) * stride + 2 * channel + 1:(first + end) * stride:stride])
+                column.append((low, high))
+            result.append(column)
+        return result
+
+
+def spectrogram_colors():
+    """256-entry RGB lookup from dark blue through red to yellow"""
+    anchors = [(0, (0, 0, 20)), (80, (60, 10, 120)), (150, (200, 40, 60)), (210, (250, 140, 20)), (255, (255, 250, 180))]
+    table = bytearray()
+    for value in range(256):
+        for (low, c0), (high, c1) in zip(anchors, anchors[1:]):
+            if value <= high:
+                t = (value - low) / (high - low)
+                table.extend(round(a + (b - a) * t) for a, b in zip(c0, c1))
+                break
+    return bytes(table)
+
+
+def wav_spectrogram(path, start, stop, columns, bins=256, floor_db=-100.0):
+    """Spectrogram of frames [start, stop) as a binary PPM (columns x bins), one FFT per column
+    
+    Runs in a worker process; channels are mixed down and each column uses a Hann window of
+    2 * bins samples centred on its position.
+    """
+    wav = WavFile(path)
+    try:
+        size = 2 * bins
+        centres = np.linspace(start, stop, columns, endpoint=False).astype(np.int64) + (stop - start) // (2 * columns)
+        frames = np.zeros((columns, size), np.float32)
+        for index, centre in enumerate(centres):
+            block = wav.read(centre - bins, centre + bins)
+            if len(block):
+                offset = max(0, bins - int(centre))
+                frames[index, offset:offset + len(block)] = block.mean(axis=1) / wav.scale
+        spectrum = np.abs(np.fft.rfft(frames * np.hanning(size).astype(np.float32), axis=1))[:, 1:bins + 1]
+        db = 20 * np.log10(spectrum / (bins / 2) + 1e-12)
+        levels = np.clip((db - floor_db) / -floor_db * 255, 0, 255).astype(np.uint8)
+        lut = np.frombuffer(spectrogram_colors(), np.uint8).reshape(256, 3)
+        pixels = lut[levels.T[::-1]]
+        return b'P6\n%d %d\n255\n' % (columns, bins) + pixels.tobytes()
+    finally:
+        wav.close()
+
+
+# ========== THUMBNAILS ==========
+
+THUMB_SIZE = 32
+THUMB_CACHE_LIMIT = 64 * 1024 * 1024
+THUMB_MEMORY = 500
+THUMB_EXTENSIONS = ('.png', '.gif', '.ppm', '.pgm', '.pnm')
+THUMB_PIL_EXTENSIONS = ('.jpg', '.jpeg', '.bmp', '.webp', '.tif', '.tiff')
+
+
+def thumbnail_extensions():
+    """Image types that get thumbnails (JPEG and friends need Pillow)"""
+    return THUMB_EXTENSIONS + (THUMB_PIL_EXTENSIONS if Image is not None else ())
+
+
+def decode_png(data):
+    """Non-interlaced PNG as (width, height, pixel(x, y) -> (r, g, b)); alpha is blended onto white"""
+    if data[:8] != b'\x89PNG\r\n\x1a\n':
+        raise ValueError("not a PNG file")
+    position, chunks, palette, header = 8, [], b'', None
+    while position + 8 <= len(data):
+        length, kind = struct.unpack_from('>I4s', data, position)
+        body = data[position + 8:position + 8 + length]
+        position += 12 + length
+        if kind == b'IHDR':
+            header = struct.unpack('>IIBBBBB', body)
+        elif kind == b'PLTE':
+            palette = body
+        elif kind == b'IDAT':
+            chunks.append(body)
+        elif kind == b'IEND':
+            break
+    if header is None:
+        raise ValueError("PNG without IHDR")
+    width, height, depth, color, _, _, interlace = header
+    channels = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}.get(color)
+    if channels is None or interlace or (depth < 8 and color not in (0, 3)) or depth not in (1, 2, 4, 8, 16):
+        raise ValueError("unsupported PNG layout")
+    bpp = max(1, channels * depth // 8)
+    stride = (width * channels * depth + 7) // 8
+    raw = zlib.decompress(b''.join(chunks))
+    
+    rows = []
+    previous = bytearray(stride)
+    for y in range(height):
+        start = y * (stride + 1)
+        kind = raw[start]
+        line = bytearray(raw[start + 1:start + 1 + stride])
+        if kind == 1:
+            if np is not None:
+                line = bytearray(np.cumsum(np.frombuffer(line, np.uint8).reshape(-1, bpp), axis=0, dtype=np.uint8))
+            else:
+                for i in range(bpp, stride):
+                    line[i] = (line[i] + line[i - bpp]) & 255
+        elif kind == 2:
+            if np is not None:
+                line = bytearray(np.frombuffer(line, np.uint8) + np.frombuffer(previous, np.uint8))
+            else:
+                line = bytearray((a + b) & 255 for a, b in zip(line, previous))
+        elif kind == 3:
+            for i in range(stride):
+                left = line[i - bpp] if i >= bpp else 0
+                line[i] = (line[i] + ((left + previous[i]) >> 1)) & 255
+        elif kind == 4:
+            for i in range(stride):
+                a = line[i - bpp] if i >= bpp else 0
+                b, c = previous[i], previous[i - bpp] if i >= bpp else 0
+                p = a + b - c
+                pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+                line[i] = (line[i] + (a if pa <= pb and pa <= pc else b if pb <= pc else c)) & 255
+        rows.append(line)
+        previous = line
+    
+    step = 2 if depth == 16 else 1
+    
+    def pixel(x, y):
+        line = rows[y]
+        if depth < 8:
+            bit = x * depth
+            value = (line[bit >> 3] >> (8 - depth - (bit & 7))) & ((1 << depth) - 1)
+            if color == 3:
+                return tuple(palette[3 * value:3 * value + 3]) or (0, 0, 0)
+            value = value * 255 // ((1 << depth) - 1)
+            return value, value, value
+        offset = x * channels * step
+        values = line[offset:offset + channels * step:step]
+        if color == 3:
+            return tuple(palette[3 * values[0]:3 * values[0] + 3]) or (0, 0, 0)
+        if color in (0, 4):
+            values = (values[0], values[0], values[0]) + tuple(values[1:])
+        if len(values) == 4:
+            alpha = values[3]
+            return tuple((value * alpha + 255 * (255 - alpha)) // 255 for value in values[:3])
+        return tuple(values)
+    return width, height, pixel
+
+
+def gif_lzw_decode(data, min_code, count):
+    """Decode GIF LZW codes into at most `count` palette indices"""
+    clear = 1 << min_code
+    size = min_code + 1
+    table = [bytes([i]) for i in range(clear)] + [b'', b'']
+    output = bytearray()
+    previous = None
+    value = bits = 0
+    for byte in data:
+        value |= byte << bits
+        bits += 8
+        while bits >= size:
+            code = value & ((1 << size) - 1)
+            value >>= size
+            bits -= size
+            if code == clear:
+                del table[clear + 2:]
+                size = min_code + 1
+                previous = None
+                continue
+            if code == clear + 1:
+                return output
+            if code < len(table):
+                entry = table[code]
+                if previous is not None:
+                    table.append(previous + entry[:1])
+            elif previous is not None:
+                entry = previous + previous[:1]
+                table.append(entry)
+            else:
+                raise ValueError("corrupt GIF data")
+            output += entry
+            previous = entry
+            if len(table) == 1 << size and size < 12:
+                size += 1
+            if len(output) >= count:
+                return output
+    return output
+
+
+def decode_gif(data):
+    """First frame of a GIF as (width, height, pixel(x, y) -> (r, g, b))"""
+    if data[:6] not in (b'GIF87a', b'GIF89a'):
+        raise ValueError("not a GIF file")
+    flags = data[10]
+    position = 13
+    palette = b''
+    if flags & 0x80:
+        palette = data[position:position + (3 << ((flags & 7) + 1))]
+        position += len(palette)
+    transparent = None
+    while position < len(data):
+        block = data[position]
+        if block == 0x21:
+            if data[position + 1] == 0xF9 and data[position + 3] & 1:
+                transparent = data[position + 6]
+            position += 2
+            while data[position]:
+                position += data[position] + 1
+            position += 1
+        elif block == 0x2C:
+            _, _, width, height, flags = struct.unpack_from('<HHHHB', data, position + 1)
+            position += 10
+            if flags & 0x80:
+                palette = data[position:position + (3 << ((flags & 7) + 1))]
+                position += len(palette)
+            min_code = data[position]
+            position += 1
+            parts = []
+            while data[position]:
+                parts.append(data[position + 1:position + 1 + data[position]])
+                position += data[position] + 1
+            indices = gif_lzw_decode(b''.join(parts), min_code, width * height)
+            rows = list(range(height))
+            if flags & 0x40:
+                # Interlaced: stored rows are 0, 8, ...; 4, 12, ...; 2, 6, ...; 1, 3, ...
+                rows = list(range(0, height, 8)) + list(range(4, height, 8)) + list(range(2, height, 4)) + \
+                    list(range(1, height, 2))
+            line_of = {row: index for index, row in enumerate(rows)}
+            
+            def pixel(x, y):
+                offset = line_of[y] * width + x
+                index = indices[offset] if offset < len(indices) else 0
+                if index == transparent:
+                    return 255, 255, 255
+                return tuple(palette[3 * index:3 * index + 3]) or (0, 0, 0)
+            return width, height, pixel
+        else:
+            break
+    raise ValueError("GIF without image")
+
+
+def decode_ppm(data):
+    """Binary PPM/PGM as (width, height, pixel(x, y) -> (r, g, b))"""
+    kind = data[:2]
+    if kind not in (b'P5', b'P6'):
+        raise ValueError("not a binary PPM/PGM file")
+    fields, position = [], 2
+    while len(fields) < 3:
+        match = re.compile(rb'(?:\s+|#[^\n]*\n)*(\d+)').match(data, position)
+        if match is None:
+            raise ValueError("bad PPM header")
+        fields.append(int(match.group(1)))
+        position = match.end()
+    width, height, maxval = fields
+    position += 1
+    channels = 3 if kind == b'P6' else 1
+    step = 2 if maxval > 255 else 1
+    stride = width * channels * step
+    
+    def pixel(x, y):
+        offset = position + y * stride + x * channels * step
+        values = data[offset:offset + channels * step:step]
+        values = tuple(value * 255 // min(maxval, 255) if maxval < 255 else value for value in values)
+        return values * 3 if channels == 1 else values
+    return width, height, pixel
+
+
+def png_encode(width, height, rgb):
+    """RGB bytes as a PNG file (no filtering; thumbnails are small)"""
+    def chunk(kind, body):
+        return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body))
+    stride = 3 * width
+    raw = b''.join(b'\x00' + rgb[y * stride:(y + 1) * stride] for y in range(height))
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)) +
+            chunk(b'IDAT', zlib.compress(raw, 9)) + chunk(b'IEND', b''))
+
+
+def decode_thumbnail(data, size=THUMB_SIZE):
+    """Image bytes scaled to fit size x size as (width, height, rgb bytes)"""
+    builtin = data[:8] == b'\x89PNG\r\n\x1a\n' or data[:6] in (b'GIF87a', b'GIF89a') or data[:2] in (b'P5', b'P6')
+    if Image is not None:
+        try:
+            image = Image.open(io.BytesIO(data))
+            # JPEG decodes straight at a reduced scale
+            image.draft('RGB', (size, size))
+            image.thumbnail((size, size))
+            image = image.convert('RGB')
+            return image.width, image.height, image.tobytes()
+        except (OSError, ValueError):
+            if not builtin:
+                raise
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        width, height, pixel = decode_png(data)
+    elif data[:6] in (b'GIF87a', b'GIF89a'):
+        width, height, pixel = decode_gif(data)
+    elif data[:2] in (b'P5', b'P6'):
+        width, height, pixel = decode_ppm(data)
+    else:
+        raise ValueError("unsupported image format")
+    if not width or not height:
+        raise ValueError("empty image")
+    scale = min(1.0, size / max(width, height))
+    target_width, target_height = max(1, round(width * scale)), max(1, round(height * scale))
+    rgb = bytearray()
+    for ty in range(target_height):
+        y = min(height - 1, int((ty + 0.5) * height / target_height))
+        for tx in range(target_width):
+            rgb.extend(pixel(min(width - 1, int((tx + 0.5) * width / target_width)), y))
+    return target_width, target_height, bytes(rgb)
+
+
+def thumbnail_store_path(folder, key):
+    return os.path.join(folder, key[:2], key + '.png')
+
+
+def make_thumbnail(path, folder, size=THUMB_SIZE):
+    """Pool worker: PNG thumbnail of an image file in the content-addressed store
+    
+    Returns (key, bytes); identical files share one thumbnail regardless of name.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    key = f"{hashlib.blake2b(data, digest_size=16).hexdigest()}-{size}"
+    target = thumbnail_store_path(folder, key)
+    if os.path.exists(target):
+        return key, os.path.getsize(target)
+    png = png_encode(*decode_thumbnail(data, size))
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    temp = f"{target}.{os.getpid()}.tmp"
+    with open(temp, 'wb') as f:
+        f.write(png)
+    os.replace(temp, target)
+    return key, len(png)
+
+
+class ThumbnailCache:
+    """On-disk thumbnail store with an SQLite index and size-capped LRU eviction
+    
+    `paths` maps a file's (path, size, mtime) to its content key, so unchanged files
+    are found without reading them; `thumbs` records size and last use of each key.
+    """
+    def __init__(self, folder=None, limit=THUMB_CACHE_LIMIT):
+        self.folder = folder or mksos_data_dir('thumbnails')
+        self.limit = limit
+        self.db = sqlite3.connect(os.path.join(self.folder, 'index.db'))
+        self.db.execute("CREATE TABLE IF NOT EXISTS paths "
+                        "(path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, key TEXT)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS thumbs (key TEXT PRIMARY KEY, bytes INTEGER, used REAL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS thumbs_used ON thumbs(used)")
+        self.total = self.db.execute("SELECT COALESCE(SUM(bytes), 0) FROM thumbs").fetchone()[0]
+    
+    def lookup(self, path, stat):
+        """Cached PNG bytes for an unchanged file, or None"""
+        row = self.db.execute("SELECT key FROM paths WHERE path = ? AND size = ? AND mtime_ns = ?",
+                              (path, stat.st_size, stat.st_mtime_ns)).fetchone()
+        return self.read(row[0]) if row else None
+    
+    def read(self, key):
+        try:
+            with open(thumbnail_store_path(self.folder, key), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        self.db.execute("UPDATE thumbs SET used = ? WHERE key = ?", (time.time(), key))
+        return data
+    
+    def add(self, path, stat, key, size):
+        self.db.execute("INSERT OR REPLACE INTO paths VALUES (?, ?, ?, ?)", (path, stat.st_size, stat.st_mtime_ns, key))
+        if self.db.execute("SELECT 1 FROM thumbs WHERE key = ?", (key,)).fetchone() is None:
+            self.total += size
+        self.db.execute("INSERT OR REPLACE INTO thumbs VALUES (?, ?, ?)", (key, size, time.time()))
+        if self.total > self.limit:
+            self.evict()
+    
+    def evict(self):
+        """Drop least recently used thumbnails until the store is at 90% of its limit"""
+        victims = []
+        for key, size in self.db.execute("SELECT key, bytes FROM thumbs ORDER BY used"):
+            if self.total <= self.limit * 0.9:
+                break
+            victims.append((key,))
+            self.total -= size
+            try:
+                os.remove(thumbnail_store_path(self.folder, key))
+            except OSError:
+                pass
+        self.db.executemany("DELETE FROM thumbs WHERE key = ?", victims)
+        self.db.executemany("DELETE FROM paths WHERE key = ?", victims)
+        self.db.commit()
+    
+    def commit(self):
+        self.db.commit()
+    
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+
+class ThumbnailLoader:
+    """Thread that serves thumbnail requests from the cache or a process pool
+    
+    request() replaces the wanted list, so rows scrolled out of view are dropped and
+    visible rows are served first. Results arrive on `results` as (path, PNG bytes).
+    """
+    def __init__(self, size=THUMB_SIZE, workers=None, folder=None):
+        self.size = size
+        self.workers = workers or os.cpu_count() or 1
+        self.folder = folder
+        self.results = queue.Queue()
+        self.wanted = deque()
+        self.lock = threading.Lock()
+        self.wake = Event()
+        self.stop_event = Event()
+        self.thread = Thread(target=self._run, daemon=True)
+        self.thread.start()
+    
+    def request(self, paths):
+        with self.lock:
+            self.wanted = deque(paths)
+        self.wake.set()
+    
+    def close(self):
+        self.stop_event.set()
+        self.wake.set()
+    
+    def _next(self):
+        with self.lock:
+            return self.wanted.popleft() if self.wanted else None
+    
+    def _run(self):
+        # SQLite objects must stay in the thread that created them
+        cache = ThumbnailCache(self.folder)
+        pool = process_pool(self.workers)
+        running, failed = {}, set()
+        try:
+            while not self.stop_event.is_set():
+                while len(running) < 2 * self.workers:
+                    path = self._next()
+                    if path is None:
+                        break
+                    if path in failed or path in running.values():
+                        continue
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    data = cache.lookup(path, stat)
+                    if data is not None:
+                        self.results.put((path, data))
+                    else:
+                        running[pool.submit(make_thumbnail, path, cache.folder, self.size)] = path
+                if not running:
+                    cache.commit()
+                    self.wake.wait()
+                    self.wake.clear()
+                    continue
+                done, _ = wait(running, timeout=0.05, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = running.pop(future)
+                    try:
+                        key, size = future.result()
+                        stat = os.stat(path)
+                    except concurrent.futures.process.BrokenProcessPool:
+                        return
+                    except Exception:
+                        failed.add(path)
+                        continue
+                    cache.add(path, stat, key, size)
+                    data = cache.read(key)
+                    if data is not None:
+                        self.results.put((path, data))
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            cache.close()
+
+
+# ========== GAME ENGINE ==========
+
+GAME_FPS = 60
+GAME_STEP = 1 / 60
+GAME_MAX_STEPS = 5
+
+
+class InputBuffer:
+    """Key presses kept in order between simulation steps, plus the set of held keys"""
+    def __init__(self, widget, size=8):
+        self.presses = deque(maxlen=size)
+        self.held = set()
+        widget.bind('<KeyPress>', self._press)
+        widget.bind('<KeyRelease>', self._release)
+    
+    def _press(self, event):
+        self.presses.append(event.keysym)
+        self.held.add(event.keysym)
+    
+    def _release(self, event):
+        self.held.discard(event.keysym)
+    
+    def pop(self):
+        return self.presses.popleft() if self.presses else None
+    
+    def clear(self):
+        self.presses.clear()
+
+
+class Sprite:
+    """Canvas item with a simulated box; the previous box is kept for interpolation"""
+    __slots__ = ('item', 'kind', 'x', 'y', 'w', 'h', 'px', 'py', 'fill', 'drawn', 'drawn_fill')
+    
+    def __init__(self, item, kind, x, y, w, h, fill):
+        self.item, self.kind = item, kind
+        self.x, self.y, self.w, self.h = x, y, w, h
+        self.px, self.py = x, y
+        self.fill = self.drawn_fill = fill
+        self.drawn = None
+    
+    def place(self, x, y):
+        """Jump without interpolating from the old position"""
+        self.x = self.px = x
+        self.y = self.py = y
+
+
+class Scene:
+    """Sprites on one Canvas
+    
+    Items are created once and pooled; render() only calls coords()/itemconfigure() for
+    sprites whose pixel box or colour changed, so Tk redraws just the regions that moved.
+    """
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.sprites = []
+        self.pool = defaultdict(list)
+        self.texts = {}
+        self.operations = 0
+    
+    def sprite(self, kind, x, y, w, h, fill):
+        pool = self.pool[kind]
+        if pool:
+            sprite = pool.pop()
+            sprite.place(x, y)
+            sprite.w, sprite.h, sprite.fill = w, h, fill
+            self.canvas.itemconfigure(sprite.item, state=tk.NORMAL)
+        else:
+            create = self.canvas.create_oval if kind == 'oval' else self.canvas.create_rectangle
+            item = create(x, y, x + w, y + h, fill=fill, outline='')
+            sprite = Sprite(item, kind, x, y, w, h, fill)
+        self.sprites.append(sprite)
+        return sprite
+    
+    def release(self, sprite):
+        """Hide a sprite and keep its item for reuse"""
+        self.sprites.remove(sprite)
+        self.canvas.itemconfigure(sprite.item, state=tk.HIDDEN)
+        self.pool[sprite.kind].append(sprite)
+    
+    def text(self, x, y, text="", **options):
+        item = self.canvas.create_text(x, y, text=text, **options)
+        self.texts[item] = text
+        return item
+    
+    def set_text(self, item, text):
+        if self.texts[item] != text:
+            self.canvas.itemconfigure(item, text=text)
+            self.texts[item] = text
+    
+    def begin_step(self):
+        for sprite in self.sprites:
+            sprite.px, sprite.py = sprite.x, sprite.y
+    
+    def render(self, alpha):
+        canvas = self.canvas
+        operations = 0
+        for sprite in self.sprites:
+            x = round(sprite.px + (sprite.x - sprite.px) * alpha)
+            y = round(sprite.py + (sprite.y - sprite.py) * alpha)
+            box = (x, y, x + round(sprite.w), y + round(sprite.h))
+            if box != sprite.drawn:
+                canvas.coords(sprite.item, box)
+                sprite.drawn = box
+                operations += 1
+            if sprite.fill != sprite.drawn_fill:
+                canvas.itemconfigure(sprite.item, fill=sprite.fill)
+                sprite.drawn_fill = sprite.fill
+                operations += 1
+        self.operations = operations
+    
+    def clear(self):
+        self.canvas.delete('all')
+        self.sprites = []
+        self.pool = defaultdict(list)
+        self.texts = {}
+
+
+class GameLoop:
+    """Fixed-timestep loop on after(): the simulation advances in GAME_STEP increments and
+    each frame renders between the last two steps, so motion is smooth despite timer jitter
+    """
+    def __init__(self, widget, game, step=GAME_STEP, fps=GAME_FPS):
+        self.widget = widget
+        self.game = game
+        self.step = step
+        self.frame = 1 / fps
+        self.accumulator = 0.0
+        self.paused = False
+        self.job = None
+        self.frame_times = deque(maxlen=120)
+        self.update_time = self.render_time = 0.0
+    
+    def start(self):
+        self.last = self.next_frame = time.perf_counter()
+        self.job = self.widget.after(1, self._tick)
+    
+    def stop(self):
+        if self.job is not None:
+            self.widget.after_cancel(self.job)
+            self.job = None
+    
+    def _tick(self):
+        now = time.perf_counter()
+        self.frame_times.append(now - self.last)
+        if not self.paused:
+            # Drop time rather than spiral when a frame took far too long
+            self.accumulator += min(now - self.last, self.step * GAME_MAX_STEPS)
+            while self.accumulator >= self.step:
+                self.game.step(self.step)
+                self.accumulator -= self.step
+        self.last = now
+        rendered = time.perf_counter()
+        self.game.render(self.accumulator / self.step)
+        end = time.perf_counter()
+        self.update_time, self.render_time = rendered - now, end - rendered
+        
+        self.next_frame += self.frame
+        if self.next_frame < end:
+            self.next_frame = end
+        self.job = self.widget.after(max(1, int((self.next_frame - end) * 1000)), self._tick)
+    
+    def stats(self):
+        """(fps, mean frame ms, worst frame ms, update ms, render ms)"""
+        times = list(self.frame_times)
+        if not times:
+            return 0.0, 0.0, 0.0, 0.0, 0.0
+        mean = sum(times) / len(times)
+        return (1 / mean if mean else 0.0, mean * 1000, max(times) * 1000,
+                self.update_time * 1000, self.render_time * 1000)
+
+
+class Game:
+    """Base for games run by GameLoop: update() advances the simulation, render() draws"""
+    title = ""
+    help = ""
+    width, height = 600, 480
+    
+    def __init__(self, scene, keys):
+        self.scene = scene
+        self.keys = keys
+        self.restart()
+    
+    def restart(self):
+        self.scene.clear()
+        self.keys.clear()
+        self.score = 0
+        self.over = False
+        self.message = "GAME OVER"
+        self.setup()
+    
+    def setup(self):
+        pass
+    
+    def step(self, dt):
+        if self.over:
+            if self.keys.pop() in ('Return', 'space'):
+                self.restart()
+            return
+        self.scene.begin_step()
+        self.update(dt)
+        if self.over:
+            self.scene.text(self.width // 2, self.height // 2, text=f"{self.message}\nEnter to play again",
+                            fill="white", font=("Arial", 22, "bold"), justify=tk.CENTER)
+    
+    def update(self, dt):
+        pass
+    
+    def render(self, alpha):
+        self.scene.render(alpha)
+    
+    def status(self):
+        return f"Score {self.score}"
+
+
+SNAKE_DIRECTIONS = {'Up': (0, -1), 'Down': (0, 1), 'Left': (-1, 0), 'Right': (1, 0),
+                    'w': (0, -1), 's': (0, 1), 'a': (-1, 0), 'd': (1, 0)}
+
+
+class SnakeGame(Game):
+    title = "Snake"
+    help = "Arrows/WASD steer. Turns are buffered, so quick double turns work."
+    CELL = 20
+    
+    def setup(self):
+        self.columns, self.rows = self.width // self.CELL, self.height // self.CELL
+        self.body = deque([(8, 12), (7, 12), (6, 12)])
+        self.segments = deque(self.cell(x, y, "#2ecc71") for x, y in self.body)
+        self.direction = (1, 0)
+        self.interval = 0.12
+        self.timer = 0.0
+        self.food = None
+        self.food_sprite = self.cell(0, 0, "#e74c3c")
+        self.place_food()
+    
+    def cell(self, x, y, fill):
+        return self.scene.sprite('rect', x * self.CELL + 1, y * self.CELL + 1, self.CELL - 2, self.CELL - 2, fill)
+    
+    def place_food(self):
+        occupied = set(self.body)
+        free = [(x, y) for x in range(self.columns) for y in range(self.rows) if (x, y) not in occupied]
+        if not free:
+            # The snake fills the board
+            self.over = True
+            self.message = "YOU WIN"
+            return
+        self.food = random.choice(free)
+        self.food_sprite.place(self.food[0] * self.CELL + 1, self.food[1] * self.CELL + 1)
+    
+    def update(self, dt):
+        self.timer += dt
+        if self.timer < self.interval:
+            return
+        self.timer -= self.interval
+        # Use one buffered turn per move; the rest wait for the next moves
+        while True:
+            key = self.keys.pop()
+            if key is None:
+                break
+            direction = SNAKE_DIRECTIONS.get(key)
+            if direction and direction != self.direction and direction != (-self.direction[0], -self.direction[1]):
+                self.direction = direction
+                break
+        x, y = self.body[0]
+        head = (x + self.direction[0], y + self.direction[1])
+        grow = head == self.food
+        tail = None if grow else self.body.pop()
+        if not (0 <= head[0] < self.columns and 0 <= head[1] < self.rows) or head in self.body:
+            if tail is not None:
+                self.body.append(tail)
+            self.over = True
+            return
+        if grow:
+            sprite = self.cell(*head, "#2ecc71")
+            self.score += 10
+            self.interval = max(0.05, self.interval * 0.97)
+        else:
+            # The tail segment becomes the new head: no items are created or deleted
+            sprite = self.segments.pop()
+            sprite.place(head[0] * self.CELL + 1, head[1] * self.CELL + 1)
+        self.body.appendleft(head)
+        self.segments.appendleft(sprite)
+        if grow:
+            self.place_food()
+    
+    def status(self):
+        return f"Score {self.score}   Length {len(self.body)}"
+
+
+TETROMINOES = {
+    'I': (((0, 1), (1, 1), (2, 1), (3, 1)), 4, "#1abc9c"),
+    'O': (((0, 0), (1, 0), (0, 1), (1, 1)), 2, "#f1c40f"),
+    'T': (((1, 0), (0, 1), (1, 1), (2, 1)), 3, "#9b59b6"),
+    'S': (((1, 0), (2, 0), (0, 1), (1, 1)), 3, "#2ecc71"),
+    'Z': (((0, 0), (1, 0), (1, 1), (2, 1)), 3, "#e74c3c"),
+    'J': (((0, 0), (0, 1), (1, 1), (2, 1)), 3, "#3498db"),
+    'L': (((2, 0), (0, 1), (1, 1), (2, 1)), 3, "#e67e22"),
+}
+TETRIS_LINE_SCORES = (0, 100, 300, 500, 800)
+
+
+class TetrisGame(Game):
+    title = "Tetris"
+    help = "Left/Right move, Up rotates, Down soft-drops, Space hard-drops."
+    CELL = 22
+    COLUMNS, ROWS = 10, 20
+    EMPTY = "#17202a"
+    
+    def setup(self):
+        self.origin = (20, (self.height - self.ROWS * self.CELL) // 2)
+        self.board = [[None] * self.COLUMNS for _ in range(self.ROWS)]
+        # One item per board cell; clearing lines only changes their colours
+        self.cells = [[self.scene.sprite('rect', *self.cell_xy(x, y), self.CELL - 1, self.CELL - 1, self.EMPTY)
+                       for x in range(self.COLUMNS)] for y in range(self.ROWS)]
+        self.piece_sprites = [self.scene.sprite('rect', -50, -50, self.CELL - 1, self.CELL - 1, self.EMPTY)
+                              for _ in range(4)]
+        self.preview = [self.scene.sprite('rect', -50, -50, self.CELL - 1, self.CELL - 1, self.EMPTY)
+                        for _ in range(4)]
+        panel = self.origin[0] + self.COLUMNS * self.CELL + 30
+        self.scene.text(panel, self.origin[1], text="Next", anchor=tk.NW, fill="white", font=("Arial", 12, "bold"))
+        self.info = self.scene.text(panel, self.origin[1] + 120, anchor=tk.NW, fill="white", font=("Consolas", 11))
+        self.lines = 0
+        self.level = 1
+        self.timer = 0.0
+        self.bag = []
+        self.next_kind = self.draw_kind()
+        self.spawn()
+    
+    def cell_xy(self, x, y):
+        return self.origin[0] + x * self.CELL, self.origin[1] + y * self.CELL
+    
+    def draw_kind(self):
+        if not self.bag:
+            self.bag = list(TETROMINOES)
+            random.shuffle(self.bag)
+        return self.bag.pop()
+    
+    def spawn(self):
+        self.kind = self.next_kind
+        self.next_kind = self.draw_kind()
+        self.shape = list(TETROMINOES[self.kind][0])
+        self.position = (3, 0)
+        cells, _, color = TETROMINOES[self.next_kind]
+        panel = self.origin[0] + self.COLUMNS * self.CELL + 30
+        for sprite, (x, y) in zip(self.preview, cells):
+            sprite.place(panel + x * self.CELL, self.origin[1] + 30 + y * self.CELL)
+            sprite.fill = color
+        if not self.fits(self.shape, self.position):
+            self.over = True
+    
+    def fits(self, shape, position):
+        for x, y in shape:
+            x, y = x + position[0], y + position[1]
+            if not (0 <= x < self.COLUMNS and y < self.ROWS) or (y >= 0 and self.board[y][x] is not None):
+                return False
+        return True
+    
+    def rotate(self):
+        size = TETROMINOES[self.kind][1]
+        rotated = [(size - 1 - y, x) for x, y in self.shape]
+        # Simple wall kicks
+        for shift in (0, -1, 1, -2, 2):
+            position = (self.position[0] + shift, self.position[1])
+            if self.fits(rotated, position):
+                self.shape, self.position = rotated, position
+                return
+    
+    def move(self, dx, dy):
+        position = (self.position[0] + dx, self.position[1] + dy)
+        if self.fits(self.shape, position):
+            self.position = position
+            return True
+        return False
+    
+    def lock(self):
+        color = TETROMINOES[self.kind][2]
+        for x, y in self.shape:
+            if y + self.position[1] >= 0:
+                self.board[y + self.position[1]][x + self.position[0]] = color
+        full = [y for y in range(self.ROWS) if all(self.board[y])]
+        for y in full:
+            del self.board[y]
+            self.board.insert(0, [None] * self.COLUMNS)
+        self.lines += len(full)
+        self.score += TETRIS_LINE_SCORES[len(full)] * self.level
+        self.level = 1 + self.lines // 10
+        for y, row in enumerate(self.board):
+            for x, value in enumerate(row):
+                self.cells[y][x].fill = value or self.EMPTY
+        self.spawn()
+    
+    def update(self, dt):
+        while True:
+            key = self.keys.pop()
+            if key is None:
+                break
+            if key == 'Left':
+                self.move(-1, 0)
+            elif key == 'Right':
+                self.move(1, 0)
+            elif key == 'Up':
+                self.rotate()
+            elif key == 'space':
+                while self.move(0, 1):
+                    self.score += 2
+                self.lock()
+                return
+        interval = 0.03 if 'Down' in self.keys.held else max(0.05, 0.8 - (self.level - 1) * 0.07)
+        self.timer += dt
+        if self.timer >= interval:
+            self.timer = 0.0
+            if not self.move(0, 1):
+                self.lock()
+        color = TETROMINOES[self.kind][2]
+        for sprite, (x, y) in zip(self.piece_sprites, self.shape):
+            x, y = self.cell_xy(x + self.position[0], y + self.position[1])
+            sprite.place(x, y if y >= self.origin[1] else -50)
+            sprite.fill = color
+        self.scene.set_text(self.info, f"Score {self.score}\nLines {self.lines}\nLevel {self.level}")
+    
+    def status(self):
+        return f"Score {self.score}   Lines {self.lines}   Level {self.level}"
+
+
+class BreakoutGame(Game):
+    title = "Breakout"
+    help = "Left/Right move the paddle. B adds 50 balls (stress test), C removes extras."
+    BRICK_COLUMNS, BRICK_ROWS = 10, 6
+    BRICK_W, BRICK_H = 58, 18
+    BALL = 8
+    BRICK_COLORS = ("#e74c3c", "#e67e22", "#f1c40f", "#2ecc71", "#3498db", "#9b59b6")
+    
+    def setup(self):
+        self.paddle = self.scene.sprite('rect', self.width / 2 - 45, self.height - 30, 90, 12, "#ecf0f1")
+        self.balls = []
+        self.bricks = {}
+        self.lives = 3
+        self.build_bricks()
+        self.serve()
+    
+    def build_bricks(self):
+        for column in range(self.BRICK_COLUMNS):
+            for row in range(self.BRICK_ROWS):
+                self.bricks[column, row] = self.scene.sprite(
+                    'rect', 10 + column * (self.BRICK_W + 1), 40 + row * (self.BRICK_H + 2),
+                    self.BRICK_W, self.BRICK_H, self.BRICK_COLORS[row])
+    
+    def serve(self, count=1):
+        for _ in range(count):
+            angle = random.uniform(-2.4, -0.75)
+            sprite = self.scene.sprite('oval', self.paddle.x + 41, self.paddle.y - self.BALL - 2,
+                                       self.BALL, self.BALL, "#ffffff")
+            self.balls.append([sprite, 320 * math.cos(angle), 320 * math.sin(angle)])
+    
+    def update(self, dt):
+        while True:
+            key = self.keys.pop()
+            if key is None:
+                break
+            if key in ('b', 'B'):
+                self.serve(50)
+            elif key in ('c', 'C'):
+                for ball in self.balls[1:]:
+                    self.scene.release(ball[0])
+                del self.balls[1:]
+        held = self.keys.held
+        paddle = self.paddle
+        speed = 480 * dt
+        if 'Left' in held:
+            paddle.x = max(0, paddle.x - speed)
+        if 'Right' in held:
+            paddle.x = min(self.width - paddle.w, paddle.x + speed)
+        
+        size, width = self.BALL, self.width
+        lost = []
+        for ball in self.balls:
+            sprite, vx, vy = ball
+            x, y = sprite.x + vx * dt, sprite.y + vy * dt
+            if x < 0 or x > width - size:
+                vx = -vx
+                x = min(max(x, 0), width - size)
+            if y < 0:
+                vy, y = -vy, 0
+            if vy > 0 and paddle.y <= y + size <= paddle.y + paddle.h and paddle.x - size < x < paddle.x + paddle.w:
+                # Bounce angle depends on where the paddle was hit
+                offset = (x + size / 2 - paddle.x - paddle.w / 2) / (paddle.w / 2)
+                speed_now = math.hypot(vx, vy)
+                angle = -math.pi / 2 + offset * 1.1
+                vx, vy = speed_now * math.cos(angle), speed_now * math.sin(angle)
+                y = paddle.y - size
+            column, row = int((x + size / 2 - 10) // (self.BRICK_W + 1)), int((y + size / 2 - 40) // (self.BRICK_H + 2))
+            brick = self.bricks.get((column, row))
+            if brick is not None:
+                self.scene.release(brick)
+                del self.bricks[column, row]
+                self.score += 10 * (self.BRICK_ROWS - row)
+                centre_x, centre_y = brick.x + brick.w / 2, brick.y + brick.h / 2
+                if abs(x + size / 2 - centre_x) / brick.w > abs(y + size / 2 - centre_y) / brick.h:
+                    vx = -vx
+                else:
+                    vy = -vy
+            sprite.x, sprite.y = x, y
+            ball[1], ball[2] = vx, vy
+            if y > self.height:
+                lost.append(ball)
+        for ball in lost:
+            self.balls.remove(ball)
+            self.scene.release(ball[0])
+        if not self.balls:
+            self.lives -= 1
+            if self.lives <= 0:
+                self.over = True
+                return
+            self.serve()
+        if not self.bricks:
+            self.build_bricks()
+    
+    def status(self):
+        return f"Score {self.score}   Lives {self.lives}   Balls {len(self.balls)}   Bricks {len(self.bricks)}"
+
+
+GAMES = (SnakeGame, TetrisGame, BreakoutGame)
+
+
+# ========== TEXT SEARCH ==========
+
+SEARCH_CHUNK = 4 << 20
+SEARCH_OVERLAP = 64 * 1024
+SEARCH_CONTEXT = 256
+
+
+class TextSearch:
+    """Regex search over a str or a bytes-like buffer (an mmap for files), chunk by chunk
+    
+    Meant for a worker thread: `count` grows while run() works and can be read at any time,
+    and the GIL is released between chunks. Each SEARCH_CHUNK window starts SEARCH_CONTEXT
+    characters early so anchors and lookbehinds see the real text, and reaches SEARCH_OVERLAP
+    past the chunk; a match that runs into the end of the window is retried with a larger
+    one. The last SEARCH_OVERLAP characters of a chunk that no match covered are searched
+    again with the next chunk, so a match that starts there but needs more text to finish
+    (a lazy a.*?b, say) is still reported at its real start. Not handled: a match starting
+    further back that needs more than SEARCH_OVERLAP of text past the chunk, which may be
+    missed in favour of a later one inside it, and a greedy match that backtracked from
+    the end of the window, which may come out short. Offsets are characters for str and
+    bytes for bytes buffers.
+    """
+    def __init__(self, buffer, pattern, flags=0, limit=None):
+        self.buffer = buffer
+        self.text = isinstance(buffer, str)
+        if not self.text and isinstance(pattern, str):
+            pattern = pattern.encode('utf-8')
+        self.regex = re.compile(pattern, flags)
+        self.newline = '\n' if self.text else b'\n'
+        self.limit = limit
+        self.starts = array('q')
+        self.ends = array('q')
+        self.lines = array('q')
+        self.position = 0
+        self.done = False
+        self.cancel_event = Event()
+    
+    @property
+    def count(self):
+        return len(self.starts)
+    
+    def progress(self):
+        return self.position / len(self.buffer) if len(self.buffer) else 1.0
+    
+    def run(self):
+        buffer, size = self.buffer, len(self.buffer)
+        position = line = 0
+        previous = None
+        while position < size and not self.cancel_event.is_set():
+            end = min(size, position + SEARCH_CHUNK)
+            extra = SEARCH_OVERLAP
+            base = max(0, position - SEARCH_CONTEXT)
+            while True:
+                window = buffer[base:min(size, end + extra)]
+                found = [match.span() for match in self.regex.finditer(window, position - base)]
+                # Matches starting in the overlap belong to the next chunk
+                while found and base + found[-1][0] >= end and end < size:
+                    found.pop()
+                if not (found and found[-1][1] == len(window) and base + len(window) < size):
+                    break
+                extra *= 4
+            # An empty match the previous chunk ended with is found again when resuming at it
+            if found and (base + found[0][0], base + found[0][1]) == previous:
+                del found[0]
+            
+            counted = position - base
+            count, newline, lines = window.count, self.newline, self.lines
+            for start, _ in found:
+                line += count(newline, counted, start)
+                counted = start
+                lines.append(line)
+            self.starts.extend([base + start for start, _ in found])
+            self.ends.extend([base + stop for _, stop in found])
+            if found:
+                previous = (base + found[-1][0], base + found[-1][1])
+            # Resume where the last match ended, at most SEARCH_OVERLAP back, so a match starting
+            # late in this chunk that the window cut short is found in full by the next one
+            next_position = end if end == size else max(end - SEARCH_OVERLAP, previous[1] if previous else 0)
+            line += count(newline, counted, next_position - base)
+            position = next_position
+            self.position = max(self.position, next_position)
+            if self.limit is not None and self.count >= self.limit:
+                break
+        self.done = True
+        return self
+    
+    def location(self, index):
+        """(line, column) of a match, 0-based"""
+        start = self.starts[index]
+        return self.lines[index], start - (self.buffer.rfind(self.newline, 0, start) + 1)
+    
+    def between_lines(self, first, last):
+        """Range of match indices whose start line lies in [first, last]"""
+        count = len(self.lines)
+        return bisect.bisect_left(self.lines, first, 0, count), bisect.bisect_right(self.lines, last, 0, count)
+    
+    def after(self, line, column):
+        """Index of the first match at or after (line, column), wrapping to 0"""
+        index = bisect.bisect_left(self.lines, line, 0, len(self.lines))
+        while index < len(self.lines) and self.location(index) < (line, column):
+            index += 1
+        return index if index < len(self.lines) else 0
+    
+    def expand(self, template):
+        """Replacement text for every match once run() is done; None if cancelled
+        
+        Groups come from re-matching at each start against the whole buffer, so lookarounds
+        see the same text as the search did. A bad template raises re.error or IndexError.
+        """
+        regex, buffer = self.regex, self.buffer
+        replacements = []
+        for index, (start, end) in enumerate(zip(self.starts, self.ends)):
+            if index & 1023 == 0 and self.cancel_event.is_set():
+                return None
+            match = regex.match(buffer, start)
+            replacements.append(match.expand(template) if match is not None else buffer[start:end])
+        return replacements
+    
+    def snippet(self, index, width=120):
+        """Line containing a match, trimmed around it, as text"""
+        start, end = self.starts[index], self.ends[index]
+        line_start = self.buffer.rfind(self.newline, max(0, start - width), start) + 1 or max(0, start - width)
+        line_end = self.buffer.find(self.newline, end, end + width)
+        text = self.buffer[line_start:line_end if line_end >= 0 else end + width]
+        return text if self.text else text.decode('utf-8', errors='replace')
+
+
+def search_file(path, pattern, flags=0, limit=None):
+    """TextSearch over a memory-mapped file (call run() in a worker)"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return TextSearch(b'', pattern, flags, limit)
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return TextSearch(mapped, pattern, flags, limit)
+
+
+# ========== LINTER ==========
+
+LINT_CACHE_SIZE = 4000
+LINT_MERGE_LIMIT = 8
+LINT_CONTINUATIONS = ('else', 'elif', 'except', 'finally')
+LINT_RUNTIME_NAMES = ('__name__',)
+STRING_LITERAL = re.compile(r'''(?:[rRbBuUfF]{0,2})("""|\'\'\'|"|')''')
+
+_lint_cache = OrderedDict()
+
+
+def lint_blocks(lines):
+    """Split source lines into top-level blocks as (start, end) line indices
+    
+    A block starts at a column-0 statement outside brackets and triple-quoted strings;
+    decorators, else/elif/except/finally and comments stay with their block. The
+    tracking is approximate; lint_source() re-joins blocks that do not parse alone.
+    """
+    blocks = []
+    start, decorator, depth, quote = None, False, 0, None
+    for index, line in enumerate(lines):
+        top_level = depth == 0 and quote is None
+        stripped = line.lstrip()
+        if top_level and stripped and not stripped.startswith('#') and line[0] not in ' \t)]}':
+            word = re.match(r'\w*', stripped).group()
+            if start is None or not (decorator or word in LINT_CONTINUATIONS):
+                if start is not None:
+                    blocks.append((start, index))
+                start = index
+            decorator = stripped.startswith('@')
+        
+        # Track open brackets and triple-quoted strings for the next line
+        position = 0
+        while position < len(line):
+            if quote is not None:
+                end = line.find(quote, position)
+                if end < 0:
+                    break
+                quote, position = None, end + 3
+                continue
+            char = line[position]
+            if char == '#':
+                break
+            if char in '([{':
+                depth += 1
+            elif char in ')]}':
+                depth = max(0, depth - 1)
+            elif char in '"\'':
+                match = STRING_LITERAL.match(line, position)
+                delimiter = match.group(1)
+                if len(delimiter) == 3:
+                    quote, position = delimiter, position + 3
+                    continue
+                end = position + 1
+                while end < len(line) and line[end] != delimiter:
+                    end += 2 if line[end] == '\\' else 1
+                position = end
+            position += 1
+    if start is not None:
+        blocks.append((start, len(lines)))
+    return blocks
+
+
+class LintScope:
+    __slots__ = ('kind', 'parent', 'bindings', 'assigned', 'loads', 'declared', 'children')
+    
+    def __init__(self, kind, parent=None):
+        self.kind = kind
+        self.parent = parent
+        self.bindings = set()
+        self.assigned = {}
+        self.loads = []
+        self.declared = set()
+        self.children = []
+        if parent is not None:
+            parent.children.append(self)
+
+
+class BlockAnalyzer(ast.NodeVisitor):
+    """Scopes, bindings and name loads of one parsed block"""
+    def __init__(self):
+        self.module = self.scope = LintScope('module')
+        self.diagnostics = []
+    
+    def analyze(self, tree):
+        self.visit(tree)
+        unresolved = []
+        self._resolve(self.module, unresolved)
+        return frozenset(self.module.bindings), tuple(unresolved), tuple(self.diagnostics)
+    
+    def _resolve(self, scope, unresolved):
+        for name, line, column in scope.loads:
+            current = scope
+            while current is not None:
+                if name in current.bindings and (current is scope or current.kind != 'class'):
+                    break
+                current = current.parent
+            else:
+                unresolved.append((name, line, column))
+        for child in scope.children:
+            self._resolve(child, unresolved)
+        if scope.kind == 'function':
+            used = self._loaded_names(scope)
+            for name, (line, column) in scope.assigned.items():
+                if name not in used and name not in scope.declared and not name.startswith('_'):
+                    self.diagnostics.append((line, column, 'warning', f"local variable '{name}' is assigned but never used"))
+    
+    def _loaded_names(self, scope):
+        names = {name for name, _, _ in scope.loads}
+        for child in scope.children:
+            names |= self._loaded_names(child)
+        return names
+    
+    def _bind(self, name, node=None, simple=False):
+        scope = self.scope
+        if name in scope.declared:
+            # global/nonlocal: the binding belongs to an outer scope
+            return
+        scope.bindings.add(name)
+        if simple and scope.kind == 'function':
+            scope.assigned.setdefault(name, (node.lineno, node.col_offset))
+    
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Load):
+            self.scope.loads.append((node.id, node.lineno, node.col_offset))
+        else:
+            self._bind(node.id)
+    
+    def visit_Assign(self, node):
+        self.visit(node.value)
+        for target in node.targets:
+            if isinstance(target, ast.Name):
+                self._bind(target.id, target, simple=True)
+            else:
+                self.visit(target)
+    
+    def visit_AnnAssign(self, node):
+        self.visit(node.annotation)
+        if node.value is not None:
+            self.visit(node.value)
+        if isinstance(node.target, ast.Name):
+            self._bind(node.target.id, node.target, simple=node.value is not None)
+        else:
+            self.visit(node.target)
+    
+    def visit_AugAssign(self, node):
+        self.visit(node.value)
+        if isinstance(node.target, ast.Name):
+            self.scope.loads.append((node.target.id, node.target.lineno, node.target.col_offset))
+            self._bind(node.target.id)
+        else:
+            self.visit(node.target)
+    
+    def visit_NamedExpr(self, node):
+        self.visit(node.value)
+        scope = self.scope
+        while scope.kind == 'comprehension':
+            scope = scope.parent
+        scope.bindings.add(node.target.id)
+    
+    def visit_Global(self, node):
+        self.scope.declared.update(node.names)
+        self.module.bindings.update(node.names)
+    
+    def visit_Nonlocal(self, node):
+        self.scope.declared.update(node.names)
+    
+    def visit_Import(self, node):
+        self._sandbox_import(node, [alias.name for alias in node.names])
+        for alias in node.names:
+            self._bind(alias.asname or alias.name.split('.')[0])
+    
+    def visit_ImportFrom(self, node):
+        self._sandbox_import(node, [node.module or '.'])
+        for alias in node.names:
+            if alias.name != '*':
+                self._bind(alias.asname or alias.name)
+    
+    def _sandbox_import(self, node, modules):
+        preloaded = [module for module in modules if module in SAFE_MODULES]
+        if preloaded and len(preloaded) == len(modules):
+            message = f"imports are not allowed in the sandbox; {', '.join(preloaded)} is already available"
+        else:
+            message = f"imports are not allowed in the sandbox (available: {', '.join(SAFE_MODULES)})"
+        self.diagnostics.append((node.lineno, node.col_offset, 'error', message))
+    
+    def _function(self, node, name=None):
+        for decorator in getattr(node, 'decorator_list', ()):
+            self.visit(decorator)
+        arguments = node.args
+        for default in arguments.defaults + [d for d in arguments.kw_defaults if d is not None]:
+            self.visit(default)
+        for argument in arguments.posonlyargs + arguments.args + arguments.kwonlyargs:
+            if argument.annotation is not None:
+                self.visit(argument.annotation)
+        if getattr(node, 'returns', None) is not None:
+            self.visit(node.returns)
+        if name is not None:
+            self._bind(name)
+        
+        outer = self.scope
+        self.scope = LintScope('function', outer)
+        for argument in arguments.posonlyargs + arguments.args + arguments.kwonlyargs + \
+                [arguments.vararg, arguments.kwarg]:
+            if argument is not None:
+                self.scope.bindings.add(argument.arg)
+        if isinstance(node, ast.Lambda):
+            self.visit(node.body)
+        else:
+            for statement in node.body:
+                self.visit(statement)
+        self.scope = outer
+    
+    def visit_FunctionDef(self, node):
+        self._function(node, node.name)
+    
+    visit_AsyncFunctionDef = visit_FunctionDef
+    
+    def visit_Lambda(self, node):
+        self._function(node)
+    
+    def visit_ClassDef(self, node):
+        self.diagnostics.append((node.lineno, node.col_offset, 'error', "class definitions are not available in the sandbox"))
+        for expression in node.decorator_list + node.bases + [item.value for item in node.keywords]:
+            self.visit(expression)
+        self._bind(node.name)
+        outer = self.scope
+        self.scope = LintScope('class', outer)
+        for statement in node.body:
+            self.visit(statement)
+        self.scope = outer
+    
+    def _comprehension(self, node, elements):
+        # The first iterable is evaluated in the enclosing scope
+        self.visit(node.generators[0].iter)
+        outer = self.scope
+        self.scope = LintScope('comprehension', outer)
+        for index, generator in enumerate(node.generators):
+            if index:
+                self.visit(generator.iter)
+            self.visit(generator.target)
+            for condition in generator.ifs:
+                self.visit(condition)
+        for element in elements:
+            self.visit(element)
+        self.scope = outer
+    
+    def visit_ListComp(self, node):
+        self._comprehension(node, [node.elt])
+    
+    visit_SetComp = visit_GeneratorExp = visit_ListComp
+    
+    def visit_DictComp(self, node):
+        self._comprehension(node, [node.key, node.value])
+    
+    def visit_ExceptHandler(self, node):
+        if node.type is not None:
+            self.visit(node.type)
+        if node.name:
+            self._bind(node.name)
+        for statement in node.body:
+            self.visit(statement)
+    
+    def visit_MatchAs(self, node):
+        if node.pattern is not None:
+            self.visit(node.pattern)
+        if node.name:
+            self._bind(node.name)
+    
+    def visit_MatchStar(self, node):
+        if node.name:
+            self._bind(node.name)
+    
+    def visit_MatchMapping(self, node):
+        self.generic_visit(node)
+        if node.rest:
+            self._bind(node.rest)
+
+
+def lint_block(text):
+    """Position-independent facts about one block, cached by its text
+    
+    ('syntax', line, column, message) if it does not parse, else
+    ('ok', module bindings, unresolved loads, diagnostics) with block-relative lines.
+    """
+    facts = _lint_cache.get(text)
+    if facts is not None:
+        _lint_cache.move_to_end(text)
+        return facts
+    try:
+        tree = ast.parse(text)
+    except SyntaxError as e:
+        facts = ('syntax', e.lineno or 1, max(0, (e.offset or 1) - 1), e.msg)
+    except ValueError as e:
+        facts = ('syntax', 1, 0, str(e))
+    else:
+        facts = ('ok',) + BlockAnalyzer().analyze(tree)
+    _lint_cache[text] = facts
+    if len(_lint_cache) > LINT_CACHE_SIZE:
+        _lint_cache.popitem(last=False)
+    return facts
+
+
+def lint_source(source):
+    """Diagnostics for editor code as sorted (line, column, severity, message), lines 1-based
+    
+    Runs in a worker process; blocks whose text did not change since the last call reuse
+    their cached analysis, so only edited blocks are parsed again.
+    """
+    lines = source.split('\n')
+    blocks = lint_blocks(lines)
+    results = []
+    index = 0
+    while index < len(blocks):
+        start, end = blocks[index]
+        facts = lint_block('\n'.join(lines[start:end]))
+        if facts[0] == 'syntax':
+            # The split may have cut through a string or bracket: try joining the next blocks
+            for following in range(index + 1, min(len(blocks), index + 1 + LINT_MERGE_LIMIT)):
+                merged = lint_block('\n'.join(lines[start:blocks[following][1]]))
+                if merged[0] == 'ok':
+                    facts, index = merged, following
+                    break
+        results.append((start, facts))
+        index += 1
+    
+    known = set(SAFE_BUILTINS) | set(SAFE_MODULES) | set(LINT_RUNTIME_NAMES)
+    for _, facts in results:
+        if facts[0] == 'ok':
+            known |= facts[1]
+    diagnostics = []
+    for start, facts in results:
+        if facts[0] == 'syntax':
+            diagnostics.append((start + facts[1], facts[2], 'error', f"syntax error: {facts[3]}"))
+            continue
+        for name, line, column in facts[2]:
+            if name in known:
+                continue
+            if hasattr(builtins, name):
+                message = f"'{name}' is not available in the sandbox"
+            else:
+                message = f"undefined name '{name}'"
+            diagnostics.append((start + line, column, 'error', message))
+        diagnostics.extend((start + line, column, severity, message) for line, column, severity, message in facts[3])
+    diagnostics.sort()
+    return diagnostics
+
+
+# ========== COURSES ==========
+
+COURSE_CACHE_SIZE = 64
+COURSE_IMAGE_CACHE = 32
+COURSE_SEARCH_LIMIT = 200
+LESSON_EXTENSIONS = ('.md', '.txt')
+LESSON_WORD = re.compile(r'\w{2,}')
+LESSON_INLINE = re.compile(r'\*\*(.+?)\*\*|`([^`]+)`')
+LESSON_IMAGE = re.compile(r'!\[([^\]]*)\]\(([^)]+)\)\s*$')
+LESSON_LINK = re.compile(r'\[\[([^\]]+)\]\]\s*$')
+
+# Labs and tools a lesson can link to with [[Name]]
+LESSON_LINKS = {
+    'Memory Lab': 'open_memory_lab',
+    'Network Lab': 'open_network_lab',
+    'IPC Lab': 'open_ipc_lab',
+    'Coding Challenge': 'coding_challenge',
+    'Games': 'open_games',
+    'File Manager': 'open_file_manager',
+    'Function Plotter': 'open_function_plotter'
+}
+
+# Lessons written to the course folder on first start; edit or add files there freely
+COURSE_SEED = {
+    'Welcome.md': """# Welcome to MKS-OS v1.2 Educational System
+
+This virtual operating system is designed to teach you the fundamental concepts of real operating systems.
+
+Pick a course on the left, then a lesson below it. Lessons are plain text files in the course folder, so you can edit them or add your own:
+
+- `# Title` and `## Section` start headings
+- `- item` makes a bullet, `**bold**` and `` `code` `` work inside lines
+- a ```python fence makes a runnable code cell
+- a ```quiz fence holds questions for the course quiz
+- `[[Network Lab]]` links to a lab, `![caption](picture.png)` shows an image
+
+Type in the search box to find a word in every lesson of every course.
+""",
+    '01 Introduction to Operating Systems/01 What is an OS.md': """# What is an Operating System?
+
+An operating system sits between programs and hardware. It decides which program runs on the CPU, gives each one memory, and turns devices into files, sockets and windows.
+
+## Key components
+
+- **Kernel**: schedules processes, manages memory and talks to devices
+- **System calls**: the only door from a program into the kernel
+- **Shell and desktop**: programs like any other, started by the user
+
+## Types of operating systems
+
+- Batch systems run queued jobs one after another
+- Time-sharing systems switch between users many times a second
+- Real-time systems guarantee a response within a deadline
+- Embedded systems run one dedicated device
+
+```quiz
+? Which part of the OS decides which program runs next on the CPU?
+- The shell
+* The kernel scheduler
+- The file manager
+? How does a program ask the kernel for a service?
+- By writing into kernel memory
+* Through a system call
+- By restarting the computer
+? Which kind of system must answer within a fixed deadline?
+- Batch
+- Time-sharing
+* Real-time
+```
+""",
+    '01 Introduction to Operating Systems/02 Programs and Processes.md': """# Programs and Processes
+
+A **program** is a file on disk. A **process** is a program being executed: its code, its memory, its open files and the CPU state needed to continue it later.
+
+The same program can run as many processes at once: every Run in the Development tab starts a fresh process for your code.
+
+```python
+processes = [("editor", 3), ("clock", 1), ("browser", 5)]
+for name, threads in sorted(processes, key=lambda p: -p[1]):
+    print(f"{name:10} {threads} thread(s)")
+```
+
+```quiz
+? What is the difference between a program and a process?
+* A process is a running instance of a program
+- A program is always bigger than a process
+- There is no difference
+```
+""",
+    '02 Python Programming Basics/01 Values and Variables.md': """# Values and Variables
+
+Python names refer to values. Assignment never copies a value, it binds a name to it.
+
+- `int`, `float` and `str` are immutable
+- `list`, `dict` and `set` can change in place
+
+```python
+numbers = [3, 1, 2]
+alias = numbers
+alias.append(4)
+print(numbers)        # the same list, seen through two names
+print(sorted(numbers), len(numbers), sum(numbers))
+```
+
+```quiz
+? After `a = [1]; b = a; b.append(2)`, what is `a`?
+- [1]
+* [1, 2]
+- An error
+? Which of these types is immutable?
+- list
+- dict
+* str
+```
+""",
+    '02 Python Programming Basics/02 Control Flow and Functions.md': """# Control Flow and Functions
+
+`if`, `for` and `while` control which statements run; functions give a block of code a name and parameters.
+
+```python
+def collatz(n):
+    steps = 0
+    while n != 1:
+        n = n // 2 if n % 2 == 0 else 3 * n + 1
+        steps += 1
+    return steps
+
+for start in range(1, 11):
+    print(start, collatz(start))
+```
+
+Try the [[Coding Challenge]] when this feels easy.
+""",
+    '03 GUI Development with Tkinter/01 Widgets and Events.md': """# Widgets and Events
+
+Tkinter programs build a tree of widgets and then hand control to `mainloop()`. From then on the program only runs in **event handlers**: a button command, a key binding or an `after` timer.
+
+## Rules of thumb
+
+- Never block an event handler: long work goes to a thread or a process
+- Only the main thread may touch widgets; workers hand results back through a queue polled with `after`
+- `pack`, `grid` and `place` are the three layout managers; do not mix `pack` and `grid` in one parent
+
+```quiz
+? Where should a slow computation run in a Tkinter application?
+- Directly in the button command
+* In a worker thread or process, with results polled via after()
+- Inside mainloop() itself
+```
+""",
+    '04 System Architecture/01 Kernel and User Space.md': """# Kernel and User Space
+
+The CPU runs in (at least) two modes. **Kernel mode** may touch any memory and device; **user mode** may not. A program switches to kernel mode only through a system call, an interrupt or a fault.
+
+## Why it matters
+
+- A crash in user space kills one process, not the machine
+- Every system call has a cost: batching reads and writes into big chunks is faster than many tiny ones
+
+```quiz
+? Which mode can access any device directly?
+* Kernel mode
+- User mode
+- Both equally
+```
+""",
+    '05 Process Management/01 Scheduling.md': """# Process Scheduling
+
+The scheduler picks which ready process runs next and for how long.
+
+- **First come, first served**: simple, but one long job delays everybody
+- **Shortest job first**: best average waiting time, needs to know job lengths
+- **Round robin**: every process gets a time slice in turn
+
+```python
+jobs = [("A", 5), ("B", 2), ("C", 8)]
+quantum = 3
+clock = 0
+queue = list(jobs)
+while queue:
+    name, left = queue.pop(0)
+    run = min(quantum, left)
+    clock += run
+    if left > run:
+        queue.append((name, left - run))
+    else:
+        print(f"{name} finished at t={clock}")
+```
+
+```quiz
+? Which algorithm gives every process a fixed time slice in turn?
+- First come, first served
+- Shortest job first
+* Round robin
+```
+""",
+    '05 Process Management/02 Inter-process Communication.md': """# Inter-process Communication
+
+Processes do not share memory by default, so they talk through the kernel:
+
+- **Pipes and sockets** copy bytes through a kernel buffer
+- **Shared memory** maps the same pages into both processes; it is the fastest, but the programs must synchronise themselves
+- **Signals** deliver small notifications
+
+The code you run from the Development tab already works this way: it runs in its own process and its output comes back through a shared-memory ring buffer.
+
+Compare the transports yourself in the IPC Lab:
+
+[[IPC Lab]]
+
+```quiz
+? Which IPC mechanism avoids copying data through the kernel?
+- Pipes
+- Sockets
+* Shared memory
+```
+""",
+    '06 Memory Management/01 Virtual Memory.md': """# Virtual Memory
+
+Every process sees its own address space. The MMU translates virtual pages to physical frames through page tables; pages that are not in RAM cause a **page fault** and are loaded on demand.
+
+- Paging splits memory into fixed-size pages (often 4 KB)
+- Segmentation splits it into variable-size logical parts
+- Allocators trade speed for fragmentation: first fit, best fit, buddy systems
+
+```python
+page_size = 4096
+address = 74565
+print("page", address // page_size, "offset", address % page_size)
+```
+
+Watch allocation and fragmentation in the [[Memory Lab]].
+
+```quiz
+? What happens when a process touches a page that is not in RAM?
+- The process is killed immediately
+* A page fault loads it on demand
+- The CPU ignores the access
+```
+""",
+    '07 File Systems/01 Files and Directories.md': """# Files and Directories
+
+A file system maps names to data blocks. Directories are files that list names; metadata such as size, owner and times lives in inodes (or their equivalent).
+
+- Opening a file gives a descriptor; reads and writes go through it
+- Reading in large chunks, or mapping the file with `mmap`, is far faster than many small reads
+- Deleting a name only frees the data when no other name or open descriptor refers to it
+
+```quiz
+? What does a directory contain?
+* A list of names pointing to files
+- The contents of every file inside it
+- Only the free space map
+```
+""",
+    '08 Networking Basics/01 Sockets.md': """# Sockets
+
+A socket is one end of a network conversation. TCP gives an ordered byte stream; UDP sends independent datagrams.
+
+## Client-server
+
+- The server binds a port, listens and accepts connections
+- Each client connects, sends a request and reads the reply
+- One thread per client is simple; an event loop (`selectors`, `asyncio`) scales to many more connections
+
+Benchmark all three server models on loopback:
+
+[[Network Lab]]
+
+```quiz
+? Which protocol delivers an ordered, reliable byte stream?
+* TCP
+- UDP
+- ICMP
+```
+""",
+    '09 Security Fundamentals/01 Authentication and Encryption.md': """# Authentication and Encryption
+
+**Authentication** proves who you are; **authorization** decides what you may do.
+
+- Store password hashes with a slow, salted function, never the passwords
+- Symmetric encryption uses one shared key; public-key encryption uses a key pair
+- TLS combines both to protect network connections
+
+The Development tab runs your code in a sandbox: only a few builtins and modules are available, which is why `open` and `import` are reported by the linter.
+
+```quiz
+? How should passwords be stored?
+- In plain text in a database
+- Encrypted with a key stored next to them
+* As salted hashes from a slow hash function
+```
+""",
+    '10 System Administration/01 Monitoring and Backup.md': """# Monitoring and Backup
+
+An administrator keeps the system healthy:
+
+- **User management**: accounts, groups, permissions
+- **Monitoring**: CPU, memory, disk and network usage over time
+- **Backup and recovery**: regular copies, tested restores, copies kept off the machine
+
+```python
+usage = [12, 18, 35, 80, 92, 40]
+for minute, percent in enumerate(usage):
+    print(f"{minute:2} min {'#' * (percent // 5):20} {percent}%" + ("  <- alert" if percent > 85 else ""))
+```
+"""
+}
+
+
+def seed_courses(root):
+    """Write the built-in lessons into an empty course folder"""
+    if any(os.scandir(root)):
+        return
+    for relative, text in COURSE_SEED.items():
+        path = os.path.join(root, *relative.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+def lesson_title(name):
+    """'05 Process Management' -> '5. Process Management', '01 Scheduling.md' -> 'Scheduling'"""
+    stem = os.path.splitext(name)[0] if name.endswith(LESSON_EXTENSIONS) else name
+    number, _, rest = stem.partition(' ')
+    if number.isdigit() and rest:
+        return rest if stem != name else f"{int(number)}. {rest}"
+    return stem
+
+
+def lesson_inline(line, base, args):
+    """Append text/tag pairs for one line with **bold** and `code` spans"""
+    position = 0
+    for match in LESSON_INLINE.finditer(line):
+        if match.start() > position:
+            args += [line[position:match.start()], base]
+        if match.group(1) is not None:
+            args += [match.group(1), base + ('bold',)]
+        else:
+            args += [match.group(2), base + ('code_inline',)]
+        position = match.end()
+    args += [line[position:] + '\n', base]
+
+
+def parse_quiz(text):
+    """Questions of a quiz fence as (question, options, index of the correct option)"""
+    questions = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith('?'):
+            questions.append((line[1:].strip(), [], None))
+        elif line[:1] in '-*' and line[1:2] == ' ' and questions:
+            question, options, correct = questions[-1]
+            if line[0] == '*':
+                correct = len(options)
+            options.append(line[2:].strip())
+            questions[-1] = (question, options, correct)
+    return [question for question in questions if question[2] is not None and len(question[1]) > 1]
+
+
+def lesson_quiz(text):
+    """Questions of every quiz fence in a lesson, without rendering the rest of it"""
+    questions = []
+    lines = text.splitlines()
+    index = 0
+    while index < len(lines):
+        stripped = lines[index].strip()
+        index += 1
+        if stripped.startswith('```'):
+            body = []
+            while index < len(lines) and not lines[index].strip().startswith('```'):
+                body.append(lines[index])
+                index += 1
+            index += 1
+            if stripped[3:].strip().lower() == 'quiz':
+                questions.extend(parse_quiz('\n'.join(body)))
+    return questions
+
+
+def parse_lesson(text, folder):
+    """Render lesson markup into runs for the Education view
+    
+    ('text', args) carries text/tag pairs for a single Text.insert call; the other runs
+    ('code', source), ('quiz', questions), ('link', name) and ('image', path, caption)
+    become embedded widgets.
+    """
+    runs = []
+    args = []
+    
+    def flush():
+        if args:
+            runs.append(('text', tuple(args)))
+            del args[:]
+    
+    lines = text.splitlines()
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        stripped = line.strip()
+        index += 1
+        if stripped.startswith('```'):
+            kind = stripped[3:].strip().lower()
+            body = []
+            while index < len(lines) and not lines[index].strip().startswith('```'):
+                body.append(lines[index])
+                index += 1
+            index += 1
+            body = '\n'.join(body)
+            if kind == 'quiz':
+                flush()
+                runs.append(('quiz', tuple(parse_quiz(body))))
+            elif kind in ('python', 'py'):
+                flush()
+                runs.append(('code', body))
+            else:
+                args += [body + '\n', ('code_block',)]
+            continue
+        
+        image = LESSON_IMAGE.match(stripped)
+        link = LESSON_LINK.match(stripped)
+        if image:
+            flush()
+            runs.append(('image', os.path.join(folder, image.group(2)), image.group(1)))
+        elif link and link.group(1) in LESSON_LINKS:
+            flush()
+            runs.append(('link', link.group(1)))
+        elif stripped.startswith('#'):
+            level = len(stripped) - len(stripped.lstrip('#'))
+            args += [stripped[level:].strip() + '\n', (f"h{min(level, 3)}",)]
+        elif stripped[:2] in ('- ', '* '):
+            lesson_inline('  • ' + stripped[2:], ('bullet',), args)
+        elif stripped.startswith('>'):
+            lesson_inline(stripped[1:].strip(), ('quote',), args)
+        else:
+            lesson_inline(line, (), args)
+    flush()
+    return runs
+
+
+class CourseLibrary:
+    """Lesson files on disk: lazy parsing into an LRU of rendered runs, plus a word and quiz index"""
+    def __init__(self, root, cache_size=COURSE_CACHE_SIZE):
+        self.root = root
+        self.cache_size = cache_size
+        self._rendered = OrderedDict()
+        self._lock = threading.Lock()
+        self._stamps = {}
+        self._postings = defaultdict(set)
+        self._words = {}
+        self._quizzes = {}
+        self._vocabulary = None
+    
+    def courses(self):
+        """(title, folder) of every course folder, in name order"""
+        try:
+            with os.scandir(self.root) as it:
+                folders = sorted(entry.name for entry in it if entry.is_dir())
+        except OSError:
+            return []
+        return [(lesson_title(name), os.path.join(self.root, name)) for name in folders]
+    
+    def lessons(self, folder):
+        """(title, path) of the lessons in a course folder; only names are read, not contents"""
+        try:
+            with os.scandir(folder) as it:
+                names = sorted(entry.name for entry in it
+                               if entry.is_file() and entry.name.lower().endswith(LESSON_EXTENSIONS))
+        except OSError:
+            return []
+        return [(lesson_title(name), os.path.join(folder, name)) for name in names]
+    
+    def render(self, path):
+        """Runs of a lesson, parsed on first use and kept until the file changes or is evicted"""
+        try:
+            stamp = os.stat(path).st_mtime_ns
+        except OSError:
+            return [('text', (f"Lesson not found: {path}\n", ()))]
+        with self._lock:
+            cached = self._rendered.get(path)
+            if cached is not None and cached[0] == stamp:
+                self._rendered.move_to_end(path)
+                return cached[1]
+        with open(path, encoding='utf-8', errors='replace') as f:
+            runs = parse_lesson(f.read(), os.path.dirname(path))
+        with self._lock:
+            self._rendered[path] = (stamp, runs)
+            self._rendered.move_to_end(path)
+            while len(self._rendered) > self.cache_size:
+                self._rendered.popitem(last=False)
+        return runs
+    
+    def quiz(self, folder=None, cancel_event=None):
+        """Quiz questions of one course (or of all courses) as (question, options, correct, lesson)
+        
+        Questions come from the index, so this reads files and belongs off the UI thread;
+        the rendered-lesson LRU is left alone.
+        """
+        if self.index(cancel_event) is None:
+            return []
+        folders = [folder] if folder else [path for _, path in self.courses()]
+        lessons = [lesson for course in folders for lesson in self.lessons(course)]
+        questions = []
+        with self._lock:
+            for title, path in lessons:
+                questions.extend(question + (title,) for question in self._quizzes.get(path, ()))
+        return questions
+    
+    def index(self, cancel_event=None):
+        """Bring the word index up to date; only lessons whose mtime or size changed are read"""
+        current = {}
+        for _, folder in self.courses():
+            for _, path in self.lessons(folder):
+                if cancel_event is not None and cancel_event.is_set():
+                    return None
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                current[path] = (st.st_mtime_ns, st.st_size)
+        
+        changed = [path for path, stamp in current.items() if self._stamps.get(path) != stamp]
+        removed = [path for path in self._stamps if path not in current]
+        for path in changed:
+            try:
+                with open(path, encoding='utf-8', errors='replace') as f:
+                    text = f.read()
+            except OSError:
+                text = ''
+            words = set(LESSON_WORD.findall(text.lower()))
+            quizzes = lesson_quiz(text)
+            with self._lock:
+                self._forget(path)
+                for word in words:
+                    self._postings[word].add(path)
+                self._words[path] = words
+                if quizzes:
+                    self._quizzes[path] = quizzes
+                self._stamps[path] = current[path]
+        with self._lock:
+            for path in removed:
+                self._forget(path)
+            if changed or removed:
+                self._vocabulary = None
+        return len(current)
+    
+    def _forget(self, path):
+        for word in self._words.pop(path, ()):
+            paths = self._postings[word]
+            paths.discard(path)
+            if not paths:
+                del self._postings[word]
+        self._quizzes.pop(path, None)
+        self._stamps.pop(path, None)
+    
+    def search(self, query, limit=COURSE_SEARCH_LIMIT):
+        """Lessons containing every word of the query; the last word also matches as a prefix"""
+        words = LESSON_WORD.findall(query.lower())
+        if not words:
+            return []
+        with self._lock:
+            if self._vocabulary is None:
+                self._vocabulary = sorted(self._postings)
+            found = None
+            for position, word in enumerate(words):
+                if position == len(words) - 1:
+                    paths = set()
+                    for name in prefix_range(self._vocabulary, word, len(self._vocabulary)):
+                        paths |= self._postings[name]
+                else:
+                    paths = self._postings.get(word, set())
+                found = set(paths) if found is None else found & paths
+                if not found:
+                    return []
+        return sorted(found)[:limit]
+
+
+class MKSOperatingSystem:
+    def __init__(self, root, session=None):
+        self.root = root
+        self.root.title("MKS-OS v1.2 - Mini Operating System")
+        self.root.geometry("1000x700")
+        
+        # Load settings (a soft restart hands over the open session)
+        self.session = session or SessionStore()
+        self.settings = self.load_settings()
+        self.current_language = "english"  # English by default
+        
+        # System information
+        self.system_name = "MKS-OS"
+        self.version = "1.2"
+        self.username = self.settings.get('username', 'User')
+        self.start_time = time.time()
+        
+        # Development variables
+        self.output_queue = queue.Queue()
+        self.completion = CompletionEngine()
+        self.calculator = CalculatorEngine()
+        self.editor_state = {}
+        self.completion_popup = None
+        
+        # Stop callbacks of workers owned by open windows (see register_worker)
+        self.window_workers = []
+        
+        # Mounted virtual disk image
+        self.vfs = None
+        
+        # Create interface
+        self.create_widgets()
+        self.update_time()
+        
+        # Finish timing a full restart started by the previous process
+        restart_start = os.environ.pop('MKSOS_RESTART_T0', None)
+        if restart_start:
+            self.report_restart('full', time.time() - float(restart_start))
+        
+    def load_settings(self):
+        """Load settings from the session store"""
+        settings = {
+            'language': 'english',
+            'username': 'User',
+            'theme': 'dark',
+            'font_size': 12,
+            'recent_files': [],
+            'recent_projects': [],
+            'restart_mode': 'soft'
+        }
+        
+        stored = self.session.get('settings')
+        if stored is None and os.path.exists('mksos_settings.json'):
+            # Import settings written by older versions
+            try:
+                with open('mksos_settings.json', 'r', encoding='utf-8') as f:
+                    stored = json.load(f)
+            except (OSError, ValueError):
+                stored = None
+        if isinstance(stored, dict):
+            settings.update(stored)
+        return settings
+    
+    def save_settings(self):
+        """Save settings (written in the background)"""
+        self.session.set('settings', self.settings)
+    
+    def create_widgets(self):
+        """Create user interface"""
+        # Top panel
+        self.create_top_panel()
+        
+        # Main tabs
+        self.create_main_tabs()
+        
+        # Status bar
+        self.create_status_bar()
+        
+        # Update system info
+        self.update_system_info()
+    
+    def create_top_panel(self):
+        """Create top panel"""
+        top_frame = tk.Frame(self.root, bg='#2c3e50', height=60)
+        top_frame.pack(fill=tk.X)
+        top_frame.pack_propagate(False)
+        
+        # Logo
+        tk.Label(top_frame, text="MKS-OS", font=("Arial", 22, "bold"),
+                bg="#2c3e50", fg="white").pack(side=tk.LEFT, padx=20)
+        
+        tk.Label(top_frame, text=f"v{self.version}", font=("Arial", 10),
+                bg="#2c3e50", fg="#bdc3c7").pack(side=tk.LEFT)
+        
+        # User info
+        tk.Label(top_frame, text=f"User: {self.username}", font=("Arial", 10),
+                bg="#2c3e50", fg="#bdc3c7").pack(side=tk.LEFT, padx=20)
+        
+        # Buttons
+        button_frame = tk.Frame(top_frame, bg="#2c3e50")
+        button_frame.pack(side=tk.RIGHT, padx=20)
+        
+        tk.Button(button_frame, text="⚙️", command=self.open_settings,
+                 bg="#3498db", fg="white", width=3, height=1).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="ℹ️", command=self.show_system_info,
+                 bg="#2ecc71", fg="white", width=3, height=1).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="🔄", command=self.restart_system,
+                 bg="#e74c3c", fg="white", width=3, height=1).pack(side=tk.LEFT, padx=5)
+    
+    def create_main_tabs(self):
+        """Create main tabs"""
+        self.notebook = ttk.Notebook(self.root)
+        self.notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # Home version
+        self.home_frame = tk.Frame(self.notebook, bg='#ecf0f1')
+        self.notebook.add(self.home_frame, text="🏠 Home")
+        self.create_home_tab()
+        
+        # Development mode
+        self.dev_frame = tk.Frame(self.notebook, bg='#ecf0f1')
+        self.notebook.add(self.dev_frame, text="⚙️ Development")
+        self.create_dev_tab()
+        
+        # Pro version
+        self.pro_frame = tk.Frame(self.notebook, bg='#ecf0f1')
+        self.notebook.add(self.pro_frame, text="🚀 Pro")
+        self.create_pro_tab()
+        
+        # Education version
+        self.edu_frame = tk.Frame(self.notebook, bg='#ecf0f1')
+        self.notebook.add(self.edu_frame, text="🎓 Education")
+        self.create_edu_tab()
+        
+        # Settings
+        self.settings_frame = tk.Frame(self.notebook, bg='#ecf0f1')
+        self.notebook.add(self.settings_frame, text="⚙️ Settings")
+        self.create_settings_tab()
+    
+    def create_home_tab(self):
+        """Create home tab"""
+        frame = self.home_frame
+        
+        # Welcome
+        tk.Label(frame, text="Welcome to MKS-OS", font=("Arial", 20, "bold"),
+                bg="#ecf0f1").pack(pady=30)
+        
+        tk.Label(frame, text="Mini Operating System Simulation", font=("Arial", 14),
+                bg="#ecf0f1", fg="#7f8c8d").pack(pady=5)
+        
+        # Quick access
+        quick_frame = tk.LabelFrame(frame, text="Quick Access", font=("Arial", 14, "bold"),
+                                   bg="#ecf0f1", padx=30, pady=30)
+        quick_frame.pack(pady=20, padx=40, fill=tk.X)
+        
+        # Buttons
+        buttons = [
+            ("📁", "File Manager", self.open_file_manager, "#3498db"),
+            ("📝", "Text Editor", self.open_text_editor, "#2ecc71"),
+            ("🧮", "Calculator", self.open_calculator, "#9b59b6"),
+            ("📊", "System Info", self.show_system_info, "#e67e22"),
+            ("💽", "Disk Usage", self.open_disk_usage, "#d35400"),
+            ("🎮", "Games", self.open_games, "#1abc9c"),
+            ("🎵", "Media", self.open_media_player, "#f39c12")
+        ]
+        
+        for i, (icon, text, command, color) in enumerate(buttons):
+            btn = tk.Button(quick_frame, text=f"{icon}\n{text}", command=command,
+                          bg=color, fg="white", font=("Arial", 10, "bold"),
+                          width=12, height=3)
+            btn.pack(side=tk.LEFT, padx=15, pady=10)
+        
+        # System information
+        info_frame = tk.LabelFrame(frame, text="System Information", font=("Arial", 14, "bold"),
+                                  bg="#ecf0f1", padx=30, pady=30)
+        info_frame.pack(pady=20, padx=40, fill=tk.X)
+        
+        self.info_text = scrolledtext.ScrolledText(info_frame, height=12, width=70,
+                                                  bg="#2c3e50", fg="white",
+                                                  font=("Courier", 10))
+        self.info_text.pack(fill=tk.BOTH, expand=True)
+    
+    def create_dev_tab(self):
+        """Create development tab with full functionality"""
+        frame = self.dev_frame
+        
+        # Development toolbar
+        toolbar = tk.Frame(frame, bg='#34495e', height=50)
+        toolbar.pack(fill=tk.X, padx=10, pady=5)
+        toolbar.pack_propagate(False)
+        
+        # Tool buttons
+        dev_buttons = [
+            ("▶️ Run", self.run_code, "#2ecc71"),
+            ("⏹️ Stop", self.stop_code, "#e74c3c"),
+            ("🐛 Debug", self.debug_code, "#3498db"),
+            ("📁 New File", self.new_code_file, "#9b59b6"),
+            ("📂 Open File", self.open_code_file, "#1abc9c"),
+            ("💾 Save File", self.save_code_file, "#f39c12"),
+            ("🕘 Recent", self.show_recent_files, "#16a085"),
+            ("🗑️ Clear", self.clear_console, "#95a5a6")
+        ]
+        
+        for text, command, color in dev_buttons:
+            btn = tk.Button(toolbar, text=text, command=command,
+                          bg=color, fg="white", font=("Arial", 10),
+                          padx=10, pady=5)
+            btn.pack(side=tk.LEFT, padx=5)
+        
+        # Main area - split into editor and console
+        paned = tk.PanedWindow(frame, orient=tk.HORIZONTAL, sashwidth=5, sashrelief=tk.RAISED)
+        paned.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # Left panel - code editor
+        left_frame = tk.Frame(paned, bg='#1e1e1e')
+        
+        # Editor tabs
+        self.lint_status_var = tk.StringVar()
+        self.lint_pool = None
+        tk.Label(left_frame, textvariable=self.lint_status_var, anchor=tk.W, bg='#252526', fg="#bdc3c7",
+                 font=("Arial", 9)).pack(side=tk.BOTTOM, fill=tk.X)
+        self.dev_notebook = ttk.Notebook(left_frame)
+        self.dev_notebook.pack(fill=tk.BOTH, expand=True)
+        self.create_find_bar(left_frame)
+        
+        # Restore editor tabs from the last session
+        self.dev_notebook.bind('<Button-2>', self.close_code_tab_at)
+        self.dev_notebook.bind('<Control-w>', lambda e: self.close_code_tab())
+        self.restore_workspace()
+        
+        paned.add(left_frame, width=600)
+        
+        # Right panel - console and tools
+        right_frame = tk.Frame(paned, bg='#2c3e50')
+        
+        # Right tabs
+        right_notebook = ttk.Notebook(right_frame)
+        right_notebook.pack(fill=tk.BOTH, expand=True)
+        
+        # Console output tab
+        console_frame = tk.Frame(right_notebook, bg='#2c3e50')
+        right_notebook.add(console_frame, text="📟 Console")
+        
+        # Console output
+        self.console_output = scrolledtext.ScrolledText(console_frame,
+                                                       bg="#1c2833", fg="#ecf0f1",
+                                                       font=("Consolas", 10),
+                                                       wrap=tk.WORD)
+        self.console_output.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.code_runner = None
+        self.console_output.insert(tk.END, "MKS-OS Development Console v1.2\n")
+        self.console_output.insert(tk.END, "Python " + sys.version.split()[0] + "\n")
+        self.console_output.insert(tk.END, "Type your code and press Run\n")
+        self.console_output.insert(tk.END, "="*50 + "\n")
+        
+        # Terminal tab
+        terminal_frame = tk.Frame(right_notebook, bg='#2c3e50')
+        right_notebook.add(terminal_frame, text="💻 Terminal")
+        
+        self.terminal_output = scrolledtext.ScrolledText(terminal_frame,
+                                                        bg="#1c2833", fg="#ecf0f1",
+                                                        font=("Consolas", 10))
+        self.terminal_output.pack(fill=tk.BOTH, expand=True, padx=5, pady=(5, 0))
+        self.terminal_output.insert(tk.END, "MKS-OS Terminal v1.2\n")
+        self.terminal_output.insert(tk.END, "Type 'help' for built-in commands\n")
+        
+        # Command line
+        input_frame = tk.Frame(terminal_frame, bg='#1c2833')
+        input_frame.pack(fill=tk.X, padx=5, pady=(0, 5))
+        self.terminal_prompt = tk.Label(input_frame, bg="#1c2833", fg="#2ecc71",
+                                        font=("Consolas", 10))
+        self.terminal_prompt.pack(side=tk.LEFT)
+        self.terminal_input = tk.Entry(input_frame, bg="#1c2833", fg="#ecf0f1",
+                                       insertbackground="white", relief=tk.FLAT,
+                                       font=("Consolas", 10))
+        self.terminal_input.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        self.shell = TerminalShell(lambda: self.vfs)
+        self.terminal_queue = queue.Queue(maxsize=TerminalShell.QUEUE_ITEMS)
+        self.terminal_job = None
+        self.history_index = 0
+        
+        self.terminal_input.bind('<Return>', self.terminal_execute)
+        self.terminal_input.bind('<Up>', lambda e: self.terminal_history(-1))
+        self.terminal_input.bind('<Down>', lambda e: self.terminal_history(1))
+        self.terminal_input.bind('<Tab>', self.terminal_complete)
+        self.terminal_input.bind('<Control-c>', self.terminal_interrupt)
+        self.terminal_output.bind('<Control-c>', self.terminal_interrupt)
+        self.update_terminal_prompt()
+        
+        # Projects tab
+        projects_frame = tk.Frame(right_notebook, bg='#2c3e50')
+        right_notebook.add(projects_frame, text="📁 Projects")
+        
+        project_toolbar = tk.Frame(projects_frame, bg='#2c3e50')
+        project_toolbar.pack(fill=tk.X, padx=5, pady=(5, 0))
+        tk.Button(project_toolbar, text="📂 Open Folder", command=self.open_project_folder,
+                  bg="#1abc9c", fg="white", font=("Arial", 9)).pack(side=tk.LEFT, padx=2)
+        tk.Button(project_toolbar, text="🔄 Reindex", command=self.index_project,
+                  bg="#3498db", fg="white", font=("Arial", 9)).pack(side=tk.LEFT, padx=2)
+        
+        self.project_listbox = tk.Listbox(projects_frame, bg="#1c2833", fg="#ecf0f1",
+                                         font=("Arial", 10), height=5)
+        self.project_listbox.pack(fill=tk.X, padx=5, pady=5)
+        self.project_listbox.bind('<Double-1>', self.select_project)
+        
+        # Recent project folders
+        self.project_index = None
+        self.project_paths = [p for p in self.settings.get('recent_projects', []) if os.path.isdir(p)]
+        for path in self.project_paths:
+            self.project_listbox.insert(tk.END, "📦 " + os.path.basename(path.rstrip(os.sep)) + "  " + path)
+        
+        # Search
+        search_frame = tk.Frame(projects_frame, bg='#2c3e50')
+        search_frame.pack(fill=tk.X, padx=5)
+        self.project_search_var = tk.StringVar()
+        self.project_search_mode = tk.StringVar(value='symbol')
+        search_entry = tk.Entry(search_frame, textvariable=self.project_search_var,
+                                bg="#1c2833", fg="#ecf0f1", insertbackground="white")
+        search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        search_entry.bind('<KeyRelease>', self.schedule_project_search)
+        search_entry.bind('<Return>', self.run_project_search)
+        for text, mode in (("Symbol", 'symbol'), ("Text", 'text')):
+            tk.Radiobutton(search_frame, text=text, value=mode, variable=self.project_search_mode,
+                           command=self.run_project_search, bg='#2c3e50', fg="#ecf0f1",
+                           selectcolor='#1c2833').pack(side=tk.LEFT)
+        
+        self.project_results = tk.Listbox(projects_frame, bg="#1c2833", fg="#ecf0f1",
+                                          font=("Consolas", 9))
+        self.project_results.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.project_results.bind('<Double-1>', self.open_project_result)
+        self.project_result_items = []
+        self.project_search_job = None
+        self.project_search_generation = 0
+        self.project_search_cancel = Event()
+        
+        self.project_status = tk.Label(projects_frame, text="Open a folder to index it",
+                                       bg='#2c3e50', fg="#bdc3c7", anchor=tk.W, font=("Arial", 9))
+        self.project_status.pack(fill=tk.X, padx=5, pady=(0, 5))
+        
+        paned.add(right_frame, width=400)
+    
+    def create_editor_tab(self, filename, content=None, path=None, key=None, dirty=False, cursor=None):
+        """Create editor tab"""
+        editor_frame = tk.Frame(self.dev_notebook, bg='#1e1e1e')
+        
+        # Text area with scroll
+        text_area = scrolledtext.ScrolledText(editor_frame,
+                                             bg="#1e1e1e", fg="#d4d4d4",
+                                             font=("Consolas", 12),
+                                             insertbackground="white",
+                                             undo=True)
+        gutter = tk.Canvas(editor_frame, width=14, bg='#252526', highlightthickness=0)
+        gutter.pack(side=tk.LEFT, fill=tk.Y)
+        text_area.pack(fill=tk.BOTH, expand=True)
+        
+        # Sample code
+        sample_code = '''# Welcome to MKS-OS Development Environment
+print("Hello, MKS-OS v1.2!")
+
+def fibonacci(n):
+    """Calculate Fibonacci sequence"""
+    if n <= 1:
+        return n
+    else:
+        return fibonacci(n-1) + fibonacci(n-2)
+
+# Example usage
+if __name__ == "__main__":
+    print("Fibonacci(10) =", fibonacci(10))
+    
+    # List comprehension example
+    squares = [x**2 for x in range(10)]
+    print("Squares:", squares)
+    
+    # Working with files
+    try:
+        with open("example.txt", "w") as f:
+            f.write("Hello from MKS-OS v1.2!")
+        print("File created successfully")
+    except Exception as e:
+        print(f"Error: {e}")'''
+        
+        text_area.insert(tk.END, sample_code if content is None else content)
+        text_area.edit_reset()
+        text_area.edit_modified(dirty)
+        if cursor:
+            text_area.mark_set(tk.INSERT, cursor)
+            text_area.see(cursor)
+        restored = key is not None
+        self.setup_editor(text_area, path, key, gutter)
+        
+        # Save reference to editor
+        self.current_editor = text_area
+        
+        # Add tab
+        self.dev_notebook.add(editor_frame, text=filename)
+        self.dev_notebook.select(editor_frame)
+        
+        if not restored:
+            self.persist_tab(text_area)
+            self.persist_tab_order()
+    
+    def create_pro_tab(self):
+        """Create Pro tab"""
+        frame = self.pro_frame
+        
+        # Title
+        tk.Label(frame, text="Pro Version v1.2 - System Tools", font=("Arial", 20, "bold"),
+                bg="#ecf0f1").pack(pady=20)
+        
+        # System monitoring
+        monitor_frame = tk.LabelFrame(frame, text="System Monitoring", font=("Arial", 14, "bold"),
+                                     bg="#ecf0f1", padx=30, pady=30)
+        monitor_frame.pack(pady=10, padx=40, fill=tk.X)
+        
+        # System metrics
+        metrics_frame = tk.Frame(monitor_frame, bg="#ecf0f1")
+        metrics_frame.pack(fill=tk.X)
+        
+        self.metrics = {}
+        metric_data = [
+            ("CPU Usage", "75%", "#e74c3c"),
+            ("Memory", "64%", "#3498db"),
+            ("Disk", "42%", "#2ecc71"),
+            ("Network", "1.2 MB/s", "#9b59b6"),
+            ("Uptime", self.get_uptime(), "#f39c12"),
+            ("Processes", "24", "#1abc9c")
+        ]
+        
+        for i, (label, value, color) in enumerate(metric_data):
+            metric_box = tk.Frame(metrics_frame, bg="#ecf0f1", relief=tk.RAISED, bd=2)
+            metric_box.grid(row=0, column=i, padx=10, pady=10, sticky='nsew')
+            
+            tk.Label(metric_box, text=label, font=("Arial", 10), 
+                    bg="#ecf0f1", fg="#7f8c8d").pack(pady=(10, 5))
+            value_label = tk.Label(metric_box, text=value, font=("Arial", 16, "bold"),
+                                  bg="#ecf0f1", fg=color)
+            value_label.pack(pady=(5, 10))
+            
+            self.metrics[label] = value_label
+            metrics_frame.grid_columnconfigure(i, weight=1)
+        
+        # Professional tools
+        tools_frame = tk.LabelFrame(frame, text="Professional Tools", font=("Arial", 14, "bold"),
+                                   bg="#ecf0f1", padx=30, pady=30)
+        tools_frame.pack(pady=10, padx=40, fill=tk.X)
+        
+        pro_tools = [
+            ("🚀 Turbo Mode", self.turbo_boost, "#e74c3c"),
+            ("🔒 Security Scan", self.security_scan, "#2ecc71"),
+            ("📊 System Analytics", self.system_analytics, "#3498db"),
+            ("⚡ Performance Test", self.performance_test, "#9b59b6"),
+            ("💾 Backup System", self.backup_system, "#f39c12"),
+            ("🔧 System Diagnostics", self.system_diagnostics, "#1abc9c")
+        ]
+        
+        row, col = 0, 0
+        for text, command, color in pro_tools:
+            btn = tk.Button(tools_frame, text=text, command=command,
+                          bg=color, fg="white", font=("Arial", 11),
+                          width=20, height=2)
+            btn.grid(row=row, column=col, padx=10, pady=10)
+            col += 1
+            if col > 2:
+                col = 0
+                row += 1
+        
+        # System logs
+        log_frame = tk.LabelFrame(frame, text="System Logs", font=("Arial", 14, "bold"),
+                                 bg="#ecf0f1", padx=30, pady=30)
+        log_frame.pack(pady=10, padx=40, fill=tk.BOTH, expand=True)
+        
+        self.system_logs = scrolledtext.ScrolledText(log_frame, height=8,
+                                                    bg="#2c3e50", fg="#ecf0f1",
+                                                    font=("Courier", 9))
+        self.system_logs.pack(fill=tk.BOTH, expand=True)
+        self.log_message("System started successfully")
+        self.log_message(f"User: {self.username}")
+        self.log_message(f"Python: {sys.version.split()[0]}")
+    
+    def create_edu_tab(self):
+        """Create education tab"""
+        frame = self.edu_frame
+        
+        # Title
+        tk.Label(frame, text="Education Version v1.2", font=("Arial", 20, "bold"),
+                bg="#ecf0f1").pack(pady=20)
+        
+        # Main panel
+        main_paned = tk.PanedWindow(frame, orient=tk.HORIZONTAL, sashwidth=5)
+        main_paned.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+        
+        # Left panel - courses
+        left_frame = tk.Frame(main_paned, bg='#ecf0f1')
         
-        # User info
-        tk.Label(top_frame, text=f"User: {self.username}", font=("Arial", 10),
-                bg="#2c3e50", fg="#bdc3c7").pack(side=tk.LEFT, padx=20)
+        tk.Label(left_frame, text="Learning Courses", font=("Arial", 16, "bold"),
+                bg="#ecf0f1").pack(pady=20)
         
-        # Buttons
-        button_frame = tk.Frame(top_frame, bg="#2c3e50")
-        button_frame.pack(side=tk.RIGHT, padx=20)
+        # Lessons live as text files in the course folder; seeded with the built-in courses
+        folder = mksos_data_dir('courses')
+        try:
+            seed_courses(folder)
+        except OSError as e:
+            self.log_message(f"Could not write the built-in courses: {e}")
+        self.course_library = CourseLibrary(folder)
+        self.edu_state = {'courses': self.course_library.courses(), 'course': None, 'lessons': [],
+                          'lesson': None, 'widgets': [], 'images': OrderedDict(), 'search_job': None}
         
-        tk.Button(button_frame, text="⚙️", command=self.open_settings,
-                 bg="#3498db", fg="white", width=3, height=1).pack(side=tk.LEFT, padx=5)
-        tk.Button(button_frame, text="ℹ️", command=self.show_system_info,
-                 bg="#2ecc71", fg="white", width=3, height=1).pack(side=tk.LEFT, padx=5)
-        tk.Button(button_frame, text="🔄", command=self.restart_system,
-                 bg="#e74c3c", fg="white", width=3, height=1).pack(side=tk.LEFT, padx=5)
-    
-    def create_main_tabs(self):
-        """Create main tabs"""
-        self.notebook = ttk.Notebook(self.root)
-        self.notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        # Full-text search over all lessons
+        self.edu_search_var = tk.StringVar()
+        tk.Entry(left_frame, textvariable=self.edu_search_var, font=("Arial", 11)).pack(fill=tk.X, padx=20)
+        self.edu_search_var.trace_add('write', lambda *args: self.schedule_edu_search())
         
-        # Home version
-        self.home_frame = tk.Frame(self.notebook, bg='#ecf0f1')
-        self.notebook.add(self.home_frame, text="🏠 Home")
-        self.create_home_tab()
+        # Courses list
+        self.courses_listbox = tk.Listbox(left_frame, font=("Arial", 12), 
+                                          selectmode=tk.SINGLE, height=10, exportselection=False)
+        self.courses_listbox.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
         
-        # Development mode
-        self.dev_frame = tk.Frame(self.notebook, bg='#ecf0f1')
-        self.notebook.add(self.dev_frame, text="⚙️ Development")
-        self.create_dev_tab()
+        for title, _ in self.edu_state['courses']:
+            self.courses_listbox.insert(tk.END, title)
         
-        # Pro version
-        self.pro_frame = tk.Frame(self.notebook, bg='#ecf0f1')
-        self.notebook.add(self.pro_frame, text="🚀 Pro")
-        self.create_pro_tab()
+        self.lessons_label = tk.Label(left_frame, text="Lessons", font=("Arial", 12, "bold"), bg="#ecf0f1")
+        self.lessons_label.pack(anchor=tk.W, padx=20)
+        self.lessons_listbox = tk.Listbox(left_frame, font=("Arial", 11), selectmode=tk.SINGLE, height=8,
+                                          exportselection=False)
+        self.lessons_listbox.pack(fill=tk.BOTH, expand=True, padx=20, pady=(0, 10))
+        self.courses_listbox.bind('<<ListboxSelect>>', lambda e: self.select_course())
+        self.lessons_listbox.bind('<<ListboxSelect>>', lambda e: self.select_lesson())
         
-        # Education version
-        self.edu_frame = tk.Frame(self.notebook, bg='#ecf0f1')
-        self.notebook.add(self.edu_frame, text="🎓 Education")
-        self.create_edu_tab()
+        main_paned.add(left_frame, width=300)
         
-        # Settings
-        self.settings_frame = tk.Frame(self.notebook, bg='#ecf0f1')
-        self.notebook.add(self.settings_frame, text="⚙️ Settings")
-        self.create_settings_tab()
-    
-    def create_home_tab(self):
-        """Create home tab"""
-        frame = self.home_frame
+        # Right panel - content
+        right_frame = tk.Frame(main_paned, bg='#ecf0f1')
         
-        # Welcome
-        tk.Label(frame, text="Welcome to MKS-OS", font=("Arial", 20, "bold"),
-                bg="#ecf0f1").pack(pady=30)
+        self.edu_content = scrolledtext.ScrolledText(right_frame,
+                                                    font=("Arial", 12),
+                                                    wrap=tk.WORD)
+        self.edu_content.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        content = self.edu_content
+        content.tag_configure('h1', font=("Arial", 18, "bold"), spacing1=6, spacing3=8)
+        content.tag_configure('h2', font=("Arial", 15, "bold"), spacing1=10, spacing3=4)
+        content.tag_configure('h3', font=("Arial", 13, "bold"), spacing1=6, spacing3=2)
+        content.tag_configure('bold', font=("Arial", 12, "bold"))
+        content.tag_configure('code_inline', font=("Consolas", 11), background="#e8e8e8")
+        content.tag_configure('code_block', font=("Consolas", 11), background="#1e1e1e", foreground="#d4d4d4",
+                              lmargin1=10, lmargin2=10)
+        content.tag_configure('bullet', lmargin1=10, lmargin2=28)
+        content.tag_configure('quote', lmargin1=20, lmargin2=20, foreground="#7f8c8d")
+        content.tag_configure('caption', font=("Arial", 10, "italic"), foreground="#7f8c8d")
+        content.tag_configure('search_hit', background="#f9e79f")
         
-        tk.Label(frame, text="Mini Operating System Simulation", font=("Arial", 14),
-                bg="#ecf0f1", fg="#7f8c8d").pack(pady=5)
+        # Welcome page; the search index is built in the background
+        self.load_edu_content()
+        self.run_background_task(self.course_library.index, lambda count: None)
         
-        # Quick access
-        quick_frame = tk.LabelFrame(frame, text="Quick Access", font=("Arial", 14, "bold"),
-                                   bg="#ecf0f1", padx=30, pady=30)
-        quick_frame.pack(pady=20, padx=40, fill=tk.X)
+        main_paned.add(right_frame)
         
-        # Buttons
-        buttons = [
-            ("📁", "File Manager", self.open_file_manager, "#3498db"),
-            ("📝", "Text Editor", self.open_text_editor, "#2ecc71"),
-            ("🧮", "Calculator", self.open_calculator, "#9b59b6"),
-            ("📊", "System Info", self.show_system_info, "#e67e22"),
-            ("🎮", "Games", self.open_games, "#1abc9c"),
-            ("🎵", "Media", self.open_media_player, "#f39c12")
+        # Practical exercises
+        exercises_frame = tk.LabelFrame(frame, text="Practical Exercises", 
+                                       font=("Arial", 14, "bold"),
+                                       bg="#ecf0f1", padx=30, pady=30)
+        exercises_frame.pack(fill=tk.X, padx=20, pady=10)
+        
+        exercises = [
+            ("📝 Course Quiz", self.start_quiz),
+            ("💻 Coding Challenge", self.coding_challenge),
+            ("⚙️ System Simulation", self.system_simulation),
+            ("🐛 Debug Practice", self.debug_practice),
+            ("🧠 Memory Lab", self.open_memory_lab),
+            ("🌐 Network Lab", self.open_network_lab),
+            ("🔗 IPC Lab", self.open_ipc_lab)
         ]
         
-        for i, (icon, text, command, color) in enumerate(buttons):
-            btn = tk.Button(quick_frame, text=f"{icon}\n{text}", command=command,
-                          bg=color, fg="white", font=("Arial", 10, "bold"),
-                          width=12, height=3)
-            btn.pack(side=tk.LEFT, padx=15, pady=10)
+        for text, command in exercises:
+            tk.Button(exercises_frame, text=text, command=command,
+                     bg="#3498db", fg="white", font=("Arial", 11),
+                     width=20).pack(side=tk.LEFT, padx=10, pady=10)
+    
+    def create_settings_tab(self):
+        """Create settings tab"""
+        frame = self.settings_frame
         
-        # System information
-        info_frame = tk.LabelFrame(frame, text="System Information", font=("Arial", 14, "bold"),
+        # Title
+        tk.Label(frame, text="System Settings v1.2", font=("Arial", 20, "bold"),
+                bg="#ecf0f1").pack(pady=20)
+        
+        # Main settings
+        main_frame = tk.LabelFrame(frame, text="General Settings", font=("Arial", 14, "bold"),
                                   bg="#ecf0f1", padx=30, pady=30)
-        info_frame.pack(pady=20, padx=40, fill=tk.X)
+        main_frame.pack(pady=10, padx=40, fill=tk.X)
         
-        self.info_text = scrolledtext.ScrolledText(info_frame, height=12, width=70,
-                                                  bg="#2c3e50", fg="white",
-                                                  font=("Courier", 10))
-        self.info_text.pack(fill=tk.BOTH, expand=True)
-    
-    def create_dev_tab(self):
-        """Create development tab with full functionality"""
-        frame = self.dev_frame
+        # Username
+        tk.Label(main_frame, text="Username:", font=("Arial", 12)).grid(row=0, column=0, sticky=tk.W, pady=15)
+        self.user_var = tk.StringVar(value=self.username)
+        user_entry = tk.Entry(main_frame, textvariable=self.user_var, width=28)
+        user_entry.grid(row=0, column=1, pady=15, padx=20)
         
-        # Development toolbar
-        toolbar = tk.Frame(frame, bg='#34495e', height=50)
-        toolbar.pack(fill=tk.X, padx=10, pady=5)
-        toolbar.pack_propagate(False)
+        # Font size
+        tk.Label(main_frame, text="Font Size:", font=("Arial", 12)).grid(row=1, column=0, sticky=tk.W, pady=15)
+        self.font_var = tk.StringVar(value=str(self.settings.get('font_size', 12)))
+        font_combo = ttk.Combobox(main_frame, textvariable=self.font_var,
+                                 values=['10', '11', '12', '13', '14', '16'], state='readonly', width=25)
+        font_combo.grid(row=1, column=1, pady=15, padx=20)
         
-        # Tool buttons
-        dev_buttons = [
-            ("▶️ Run", self.run_code, "#2ecc71"),
-            ("⏹️ Stop", self.stop_code, "#e74c3c"),
-            ("🐛 Debug", self.debug_code, "#3498db"),
-            ("📁 New File", self.new_code_file, "#9b59b6"),
-            ("📂 Open File", self.open_code_file, "#1abc9c"),
-            ("💾 Save File", self.save_code_file, "#f39c12"),
-            ("🗑️ Clear", self.clear_console, "#95a5a6")
-        ]
+        # Restart mode
+        tk.Label(main_frame, text="Restart Mode:", font=("Arial", 12)).grid(row=2, column=0, sticky=tk.W, pady=15)
+        self.restart_var = tk.StringVar(value=self.settings.get('restart_mode', 'soft'))
+        restart_combo = ttk.Combobox(main_frame, textvariable=self.restart_var,
+                                    values=['soft', 'full'], state='readonly', width=25)
+        restart_combo.grid(row=2, column=1, pady=15, padx=20)
         
-        for text, command, color in dev_buttons:
-            btn = tk.Button(toolbar, text=text, command=command,
-                          bg=color, fg="white", font=("Arial", 10),
-                          padx=10, pady=5)
-            btn.pack(side=tk.LEFT, padx=5)
+        # Buttons
+        button_frame = tk.Frame(main_frame, bg="#ecf0f1")
+        button_frame.grid(row=3, column=0, columnspan=2, pady=30)
         
-        # Main area - split into editor and console
-        paned = tk.PanedWindow(frame, orient=tk.HORIZONTAL, sashwidth=5, sashrelief=tk.RAISED)
-        paned.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        tk.Button(button_frame, text="💾 Save", 
+                 command=self.save_settings_changes,
+                 bg="#2ecc71", fg="white", font=("Arial", 12),
+                 width=15).pack(side=tk.LEFT, padx=10)
         
-        # Left panel - code editor
-        left_frame = tk.Frame(paned, bg='#1e1e1e')
+        tk.Button(button_frame, text="🔄 Defaults", 
+                 command=self.restore_defaults,
+                 bg="#3498db", fg="white", font=("Arial", 12),
+                 width=15).pack(side=tk.LEFT, padx=10)
         
-        # Editor tabs
-        self.dev_notebook = ttk.Notebook(left_frame)
-        self.dev_notebook.pack(fill=tk.BOTH, expand=True)
+        tk.Button(button_frame, text="Cancel", 
+                 command=self.cancel_settings,
+                 bg="#e74c3c", fg="white", font=("Arial", 12),
+                 width=15).pack(side=tk.LEFT, padx=10)
         
-        # Create first editor tab
-        self.create_editor_tab("main.py")
+        # System information
+        info_frame = tk.LabelFrame(frame, text="System Information", 
+                                  font=("Arial", 14, "bold"),
+                                  bg="#ecf0f1", padx=30, pady=30)
+        info_frame.pack(pady=10, padx=40, fill=tk.X)
         
-        paned.add(left_frame, width=600)
+        sys_info = f"""
+MKS-OS Version: {self.version}
+Python Version: {sys.version.split()[0]}
+Platform: {sys.platform}
+Home Directory: {os.path.expanduser('~')}
+System Uptime: {self.get_uptime()}
+Current User: {self.username}
+"""
+        
+        sys_text = scrolledtext.ScrolledText(info_frame, height=8, 
+                                            font=("Courier", 10))
+        sys_text.pack(fill=tk.BOTH, expand=True)
+        sys_text.insert(tk.END, sys_info)
+        sys_text.config(state=tk.DISABLED)
+    
+    def create_status_bar(self):
+        """Create status bar"""
+        self.status_bar = tk.Label(self.root, text="MKS-OS v1.2 Ready | Status: OK", 
+                                  bd=1, relief=tk.SUNKEN, anchor=tk.W,
+                                  font=("Arial", 9))
+        self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+    
+    def update_time(self):
+        """Update time"""
+        current_time = time.strftime("%H:%M:%S %d.%m.%Y")
+        self.status_bar.config(text=f"MKS-OS v1.2 Ready | Time: {current_time} | Status: OK")
+        self.root.after(1000, self.update_time)
+    
+    def update_system_info(self):
+        """Update system information"""
+        uptime = self.get_uptime()
+        info = f"""
+=== MKS-OS System Information ===
+Version: {self.version}
+User: {self.username}
+System Uptime: {uptime}
+Python Version: {sys.version.split()[0]}
+Platform: {sys.platform}
+Architecture: {platform.architecture()[0] if hasattr(platform, 'architecture') else 'Unknown'}
+
+System Status: ✅ Operational
+Virtual Environment: MKS-OS is running as an application
+
+Memory Usage: 64% (Simulated)
+CPU Usage: 75% (Simulated)
+Disk Usage: 42% (Simulated)
+
+Active Processes: 24 (Simulated)
+Network Status: Connected (Simulated)
+
+===================================
+Note: MKS-OS v1.2 is a virtual operating system
+running inside your main OS: {sys.platform}
+"""
+        if hasattr(self, 'info_text'):
+            self.info_text.delete(1.0, tk.END)
+            self.info_text.insert(tk.END, info)
+    
+    def get_uptime(self):
+        """Get system uptime"""
+        uptime = time.time() - self.start_time
+        hours = int(uptime // 3600)
+        minutes = int((uptime % 3600) // 60)
+        seconds = int(uptime % 60)
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    
+    def log_message(self, message):
+        """Log messages"""
+        timestamp = time.strftime("%H:%M:%S")
+        if hasattr(self, 'system_logs'):
+            self.system_logs.insert(tk.END, f"[{timestamp}] {message}\n")
+            self.system_logs.see(tk.END)
+    
+    def load_edu_content(self):
+        """Show the welcome page of the course folder"""
+        self.show_lesson(os.path.join(self.course_library.root, 'Welcome.md'))
+    
+    def select_course(self):
+        """List the lessons of the selected course and open the first one"""
+        selection = self.courses_listbox.curselection()
+        if not selection:
+            return
+        self.edu_state['course'] = self.edu_state['courses'][selection[0]][1]
+        if self.edu_search_var.get():
+            self.edu_search_var.set("")
+            self.root.after_cancel(self.edu_state['search_job'])
+            self.edu_state['search_job'] = None
+        self.show_course_lessons()
+        if self.edu_state['lessons']:
+            self.lessons_listbox.selection_set(0)
+            self.show_lesson(self.edu_state['lessons'][0][1])
+    
+    def show_course_lessons(self):
+        folder = self.edu_state['course']
+        self.edu_state['lessons'] = self.course_library.lessons(folder) if folder else []
+        self.lessons_label.config(text="Lessons")
+        self.lessons_listbox.delete(0, tk.END)
+        for title, _ in self.edu_state['lessons']:
+            self.lessons_listbox.insert(tk.END, title)
+    
+    def select_lesson(self):
+        selection = self.lessons_listbox.curselection()
+        if selection:
+            self.show_lesson(self.edu_state['lessons'][selection[0]][1])
+    
+    def show_lesson(self, path):
+        """Display a lesson from the render cache: one insert call per text run, widgets for the rest"""
+        runs = self.course_library.render(path)
+        content = self.edu_content
+        for widget in self.edu_state['widgets']:
+            widget.destroy()
+        self.edu_state['widgets'] = []
+        content.configure(state=tk.NORMAL)
+        content.delete('1.0', tk.END)
+        title = lesson_title(os.path.basename(path))
+        for run in runs:
+            kind = run[0]
+            if kind == 'text':
+                content.insert(tk.END, *run[1])
+            elif kind == 'code':
+                content.insert(tk.END, run[1] + '\n', ('code_block',))
+                self.edu_widget("▶ Run in Editor", lambda code=run[1]: self.run_lesson_code(title, code), "#27ae60")
+            elif kind == 'quiz' and run[1]:
+                self.edu_widget(f"📝 Quiz ({len(run[1])} questions)",
+                                lambda questions=run[1]: self.start_quiz([question + (title,) for question in questions]),
+                                "#8e44ad")
+            elif kind == 'link':
+                self.edu_widget(f"🔗 Open {run[1]}", getattr(self, LESSON_LINKS[run[1]]), "#3498db")
+            elif kind == 'image':
+                image = self.lesson_image(run[1])
+                if image is not None:
+                    content.image_create(tk.END, image=image)
+                    content.insert(tk.END, '\n' + run[2] + '\n', ('caption',))
+                else:
+                    content.insert(tk.END, f"[image: {run[2] or os.path.basename(run[1])}]\n", ('caption',))
+        
+        # Mark the words of an active search
+        for word in LESSON_WORD.findall(self.edu_search_var.get().lower()):
+            start = '1.0'
+            while True:
+                start = content.search(word, start, tk.END, nocase=True)
+                if not start:
+                    break
+                end = f"{start}+{len(word)}c"
+                content.tag_add('search_hit', start, end)
+                start = end
+        content.configure(state=tk.DISABLED)
+        self.edu_state['lesson'] = path
+    
+    def edu_widget(self, text, command, color):
+        button = tk.Button(self.edu_content, text=text, command=command, bg=color, fg="white",
+                           font=("Arial", 10), cursor="hand2")
+        self.edu_content.window_create(tk.END, window=button, padx=4, pady=4)
+        self.edu_content.insert(tk.END, '\n')
+        self.edu_state['widgets'].append(button)
+    
+    def lesson_image(self, path):
+        """PhotoImage of a lesson picture, decoded on first display and kept in a small LRU"""
+        images = self.edu_state['images']
+        try:
+            key = (path, os.stat(path).st_mtime_ns)
+        except OSError:
+            return None
+        image = images.get(key)
+        if image is None:
+            try:
+                image = tk.PhotoImage(file=path)
+            except tk.TclError:
+                return None
+            if image.width() > 640:
+                image = image.subsample(math.ceil(image.width() / 640))
+            images[key] = image
+            if len(images) > COURSE_IMAGE_CACHE:
+                images.popitem(last=False)
+        images.move_to_end(key)
+        return image
+    
+    def run_lesson_code(self, title, code):
+        """Open a code cell in a new editor tab and run it"""
+        self.create_editor_tab(f"{title}.py", code)
+        self.notebook.select(self.dev_frame)
+        self.run_code()
+    
+    def schedule_edu_search(self):
+        if self.edu_state['search_job'] is not None:
+            self.root.after_cancel(self.edu_state['search_job'])
+        self.edu_state['search_job'] = self.root.after(200, self.edu_search)
+    
+    def edu_search(self):
+        """Search every lesson of every course; the index is refreshed for changed files first"""
+        self.edu_state['search_job'] = None
+        query = self.edu_search_var.get().strip()
+        if not query:
+            self.show_course_lessons()
+            return
         
-        # Right panel - console and tools
-        right_frame = tk.Frame(paned, bg='#2c3e50')
+        def task():
+            self.course_library.index()
+            return self.course_library.search(query)
         
-        # Right tabs
-        right_notebook = ttk.Notebook(right_frame)
-        right_notebook.pack(fill=tk.BOTH, expand=True)
+        def done(paths):
+            if self.edu_search_var.get().strip() != query:
+                return
+            self.edu_state['lessons'] = [
+                (f"{lesson_title(os.path.basename(os.path.dirname(path)))} › {lesson_title(os.path.basename(path))}",
+                 path) for path in paths]
+            self.lessons_label.config(text=f"Search: {len(paths)} lesson(s)")
+            self.lessons_listbox.delete(0, tk.END)
+            for title, _ in self.edu_state['lessons']:
+                self.lessons_listbox.insert(tk.END, title)
         
-        # Console output tab
-        console_frame = tk.Frame(right_notebook, bg='#2c3e50')
-        right_notebook.add(console_frame, text="📟 Console")
+        self.run_background_task(task, done)
+    
+    # ========== DEVELOPMENT MODE FUNCTIONS ==========
+    
+    def run_code(self):
+        """Run Python code"""
+        # Get code from current editor
+        current_tab = self.dev_notebook.select()
+        if current_tab:
+            text_area = self.tab_editor(current_tab)
+            if text_area is not None:
+                code = text_area.get("1.0", tk.END)
+                
+                # Clear console
+                self.console_output.delete(1.0, tk.END)
+                self.console_output.insert(tk.END, ">>> Running Python code...\n")
+                self.console_output.insert(tk.END, "="*50 + "\n")
+                
+                # Run in a separate process, output arrives through a shared-memory ring
+                if self.code_runner is not None:
+                    self.code_runner.release()
+                self.code_runner = CodeRunner(code)
+                self.root.after(30, self.poll_code_runner, self.code_runner)
+    
+    def poll_code_runner(self, runner):
+        """Copy runner output to the console until the process exits"""
+        if runner is not self.code_runner:
+            return
+        output = runner.read(limit=64 * 1024)
+        if output:
+            self.console_output.insert(tk.END, output)
+            self.console_output.see(tk.END)
+        if not runner.finished():
+            self.root.after(30, self.poll_code_runner, runner)
+            return
+        if runner.process.exitcode == 0:
+            self.console_output.insert(tk.END, "\n" + "="*50 + "\n")
+            self.console_output.insert(tk.END, "✅ Code executed successfully!\n")
+            self.console_output.see(tk.END)
+        runner.release()
+        self.code_runner = None
+    
+    def stop_code(self):
+        """Stop code execution"""
+        if self.code_runner is not None:
+            self.code_runner.stop()
+            self.console_output.insert(tk.END, self.code_runner.read())
+            self.code_runner.release()
+            self.code_runner = None
+        self.console_output.insert(tk.END, "\n⏹️ Execution stopped\n")
+    
+    def debug_code(self):
+        """Debug code"""
+        self.console_output.insert(tk.END, "\n🔍 Starting debug mode...\n")
+        self.console_output.insert(tk.END, "Debugger initialized\n")
+        self.console_output.insert(tk.END, "Set breakpoints in the code editor\n")
+        self.console_output.insert(tk.END, "Use 'Run' to execute with debugging\n")
         
-        # Console output
-        self.console_output = scrolledtext.ScrolledText(console_frame,
-                                                       bg="#1c2833", fg="#ecf0f1",
-                                                       font=("Consolas", 10),
-                                                       wrap=tk.WORD)
-        self.console_output.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        self.console_output.insert(tk.END, "MKS-OS Development Console v1.2\n")
-        self.console_output.insert(tk.END, "Python " + sys.version.split()[0] + "\n")
-        self.console_output.insert(tk.END, "Type your code and press Run\n")
+        # Add debug info
+        debug_info = """
+Debug Commands Available:
+• Step Over (F10) - Execute current line
+• Step Into (F11) - Step into function
+• Step Out (Shift+F11) - Step out of function
+• Continue (F5) - Continue execution
+• Breakpoint (F9) - Toggle breakpoint
+
+Current Debug Status: Ready
+"""
+        self.console_output.insert(tk.END, debug_info)
+        self.console_output.see(tk.END)
+    
+    def new_code_file(self):
+        """Create new code file"""
+        filename = simpledialog.askstring("New File", "Enter filename (e.g., script.py):")
+        if filename:
+            if not filename.endswith('.py'):
+                filename += '.py'
+            self.create_editor_tab(filename)
+    
+    def open_code_file(self):
+        """Open code file"""
+        filename = filedialog.askopenfilename(
+            title="Open Python File",
+            filetypes=[("Python files", "*.py"), ("Text files", "*.txt"), ("All files", "*.*")]
+        )
+        if filename and self.open_file_in_editor(filename):
+            self.console_output.insert(tk.END, f"\n📂 Opened file: {filename}\n")
+    
+    def save_code_file(self):
+        """Save code file"""
+        current_tab = self.dev_notebook.select()
+        text_area = self.tab_editor(current_tab) if current_tab else None
+        if text_area is not None:
+            code = text_area.get("1.0", tk.END)
+            state = self.editor_state.get(text_area, {})
+            known_path = state.get('path')
+            
+            filename = filedialog.asksaveasfilename(
+                title="Save Python File",
+                defaultextension=".py",
+                initialdir=os.path.dirname(known_path) if known_path else None,
+                initialfile=os.path.basename(known_path) if known_path else None,
+                filetypes=[("Python files", "*.py"), ("Text files", "*.txt"), ("All files", "*.*")]
+            )
+            
+            if filename:
+                try:
+                    with open(filename, 'w', encoding='utf-8') as f:
+                        f.write(code)
+                    
+                    # Update tab name
+                    tab_name = os.path.basename(filename)
+                    self.dev_notebook.tab(current_tab, text=tab_name)
+                    state['path'] = filename
+                    text_area.edit_modified(False)
+                    self.persist_tab(text_area)
+                    self.add_recent_file(filename)
+                    
+                    self.console_output.insert(tk.END, f"\n💾 Saved to: {filename}\n")
+                    messagebox.showinfo("Success", f"File saved successfully!\n{filename}")
+                    
+                except Exception as e:
+                    messagebox.showerror("Error", f"Could not save file: {str(e)}")
+    
+    def clear_console(self):
+        """Clear console"""
+        self.console_output.delete(1.0, tk.END)
+        self.console_output.insert(tk.END, "Console cleared\n")
         self.console_output.insert(tk.END, "="*50 + "\n")
+    
+    # ========== SESSION FUNCTIONS ==========
+    
+    def editor_tabs(self):
+        """(tab id, text widget) for every editor tab in order"""
+        tabs = []
+        for tab_id in self.dev_notebook.tabs():
+            text_area = self.tab_editor(tab_id)
+            if text_area is not None:
+                tabs.append((tab_id, text_area))
+        return tabs
+    
+    def tab_editor(self, tab_id):
+        """Text widget of an editor tab (the ScrolledText sits in a frame of its own inside the tab)"""
+        for child in self.dev_notebook.nametowidget(tab_id).winfo_children():
+            for widget in (child, *child.winfo_children()):
+                if isinstance(widget, scrolledtext.ScrolledText):
+                    return widget
+        return None
+    
+    def persist_tab(self, text_area):
+        """Queue the buffer of one editor for the session store"""
+        state = self.editor_state.get(text_area)
+        if state is None:
+            return
+        tab_id = str(text_area.frame.master)
+        title = self.dev_notebook.tab(tab_id, 'text') if tab_id in self.dev_notebook.tabs() else ''
+        self.session.save_tab(state['key'], title, state['path'], text_area.get('1.0', 'end-1c'),
+                              text_area.edit_modified(), text_area.index(tk.INSERT))
+    
+    def persist_tab_order(self):
+        """Queue the tab order and the selected tab"""
+        tabs = self.editor_tabs()
+        keys = [self.editor_state[text]['key'] for _, text in tabs if text in self.editor_state]
+        self.session.set_tab_order(keys)
+        selected = self.dev_notebook.select()
+        for tab_id, text in tabs:
+            if tab_id == selected and text in self.editor_state:
+                self.session.set('active_tab', self.editor_state[text]['key'])
+    
+    def persist_workspace(self):
+        """Snapshot all editors (cursor positions included) and commit"""
+        for _, text_area in self.editor_tabs():
+            self.persist_tab(text_area)
+        self.persist_tab_order()
+        self.session.flush()
+    
+    def restore_workspace(self):
+        """Reopen editor tabs saved by the previous session"""
+        start = time.perf_counter()
+        tabs = self.session.tabs()
+        if not tabs:
+            self.create_editor_tab("main.py")
+            return
+        active = self.session.get('active_tab')
+        selected = None
+        for tab in tabs:
+            self.create_editor_tab(tab['title'] or "untitled.py", tab['content'], path=tab['path'],
+                                   key=tab['key'], dirty=bool(tab['dirty']), cursor=tab['cursor'])
+            if tab['key'] == active:
+                selected = self.dev_notebook.select()
+        if selected:
+            self.dev_notebook.select(selected)
+        self.restore_time = time.perf_counter() - start
+        self.console_output.insert(tk.END, f"Workspace restored: {len(tabs)} tabs in "
+                                           f"{self.restore_time * 1000:.0f} ms\n")
+    
+    def close_code_tab(self, tab_id=None):
+        """Close an editor tab, asking first if it has unsaved changes"""
+        tab_id = tab_id or self.dev_notebook.select()
+        if not tab_id:
+            return
+        for current, text_area in self.editor_tabs():
+            if current == tab_id:
+                if text_area.edit_modified() and not messagebox.askyesno(
+                        "Close Tab", f"{self.dev_notebook.tab(tab_id, 'text')} has unsaved changes.\nClose anyway?"):
+                    return
+                key = self.editor_state.get(text_area, {}).get('key')
+                self.dev_notebook.forget(tab_id)
+                self.dev_notebook.nametowidget(tab_id).destroy()
+                if key:
+                    self.session.remove_tab(key)
+                self.persist_tab_order()
+                return
+    
+    def close_code_tab_at(self, event):
+        """Middle click closes the tab under the mouse"""
+        try:
+            index = self.dev_notebook.index(f"@{event.x},{event.y}")
+        except tk.TclError:
+            return
+        self.close_code_tab(self.dev_notebook.tabs()[index])
+    
+    # ========== TERMINAL FUNCTIONS ==========
+    
+    def update_terminal_prompt(self):
+        """Show user and current directory"""
+        cwd = self.shell.cwd
+        home = os.path.expanduser('~')
+        if cwd.startswith(home):
+            cwd = '~' + cwd[len(home):]
+        self.terminal_prompt.config(text=f"{self.username}@mks-os:{cwd}$ ")
+    
+    def terminal_execute(self, event=None):
+        """Run the command line in a worker thread"""
+        if self.terminal_job is not None and self.terminal_job.is_alive():
+            self.terminal_input.bell()
+            return "break"
         
-        # Terminal tab
-        terminal_frame = tk.Frame(right_notebook, bg='#2c3e50')
-        right_notebook.add(terminal_frame, text="💻 Terminal")
-        
-        self.terminal_output = scrolledtext.ScrolledText(terminal_frame,
-                                                        bg="#1c2833", fg="#ecf0f1",
-                                                        font=("Consolas", 10))
-        self.terminal_output.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        self.terminal_output.insert(tk.END, "MKS-OS Terminal v1.2\n")
-        self.terminal_output.insert(tk.END, "System terminal simulation\n")
-        
-        # Projects tab
-        projects_frame = tk.Frame(right_notebook, bg='#2c3e50')
-        right_notebook.add(projects_frame, text="📁 Projects")
-        
-        self.project_listbox = tk.Listbox(projects_frame, bg="#1c2833", fg="#ecf0f1",
-                                         font=("Arial", 10))
-        self.project_listbox.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        line = self.terminal_input.get()
+        self.terminal_input.delete(0, tk.END)
+        self.terminal_output.insert(tk.END, self.terminal_prompt.cget('text') + line + "\n")
+        self.terminal_output.see(tk.END)
+        if line.strip():
+            self.history_index = len(self.shell.history) + 1
         
-        # Add example projects
-        projects = ["Calculator App", "Text Editor", "File Manager", 
-                   "Game: Snake", "Weather App", "Database Manager"]
-        for project in projects:
-            self.project_listbox.insert(tk.END, "📦 " + project)
+        if line.strip() == 'clear':
+            self.shell.history.append(line.strip())
+            self.terminal_output.delete(1.0, tk.END)
+            return "break"
         
-        paned.add(right_frame, width=400)
+        self.terminal_job = Thread(target=self.shell.run_queued, args=(line, self.terminal_queue), daemon=True)
+        self.terminal_job.start()
+        self.root.after(30, self.flush_terminal_output)
+        return "break"
     
-    def create_editor_tab(self, filename):
-        """Create editor tab"""
-        editor_frame = tk.Frame(self.dev_notebook, bg='#1e1e1e')
-        
-        # Text area with scroll
-        text_area = scrolledtext.ScrolledText(editor_frame,
-                                             bg="#1e1e1e", fg="#d4d4d4",
-                                             font=("Consolas", 12),
-                                             insertbackground="white",
-                                             undo=True)
-        text_area.pack(fill=tk.BOTH, expand=True)
+    def flush_terminal_output(self):
+        """Move queued output into the widget in batches"""
+        parts = []
+        size = 0
+        while size < 256 * 1024:
+            try:
+                chunk = self.terminal_queue.get_nowait()
+            except queue.Empty:
+                break
+            parts.append(chunk)
+            size += len(chunk)
+        if parts:
+            self.terminal_output.insert(tk.END, ''.join(parts))
+            # Keep the widget small so inserts stay cheap
+            lines = int(self.terminal_output.index('end-1c').split('.')[0])
+            if lines > 5000:
+                self.terminal_output.delete('1.0', f'{lines - 5000}.0')
+            self.terminal_output.see(tk.END)
         
-        # Sample code
-        sample_code = '''# Welcome to MKS-OS Development Environment
-print("Hello, MKS-OS v1.2!")
-
-def fibonacci(n):
-    """Calculate Fibonacci sequence"""
-    if n <= 1:
-        return n
-    else:
-        return fibonacci(n-1) + fibonacci(n-2)
-
-# Example usage
-if __name__ == "__main__":
-    print("Fibonacci(10) =", fibonacci(10))
+        if self.terminal_job.is_alive() or not self.terminal_queue.empty():
+            self.root.after(30, self.flush_terminal_output)
+        else:
+            self.update_terminal_prompt()
     
-    # List comprehension example
-    squares = [x**2 for x in range(10)]
-    print("Squares:", squares)
+    def terminal_history(self, step):
+        """Browse command history"""
+        history = self.shell.history
+        if not history:
+            return "break"
+        self.history_index = max(0, min(len(history), self.history_index + step))
+        self.terminal_input.delete(0, tk.END)
+        if self.history_index < len(history):
+            self.terminal_input.insert(0, history[self.history_index])
+        return "break"
     
-    # Working with files
-    try:
-        with open("example.txt", "w") as f:
-            f.write("Hello from MKS-OS v1.2!")
-        print("File created successfully")
-    except Exception as e:
-        print(f"Error: {e}")'''
+    def terminal_complete(self, event=None):
+        """Tab completion for commands and paths"""
+        position = self.terminal_input.index(tk.INSERT)
+        line = self.terminal_input.get()
+        completed, matches = self.shell.complete(line[:position])
+        if len(matches) > 1 and completed == line[:position]:
+            self.terminal_output.insert(tk.END, "  ".join(matches[:200]) + "\n")
+            self.terminal_output.see(tk.END)
+        self.terminal_input.delete(0, position)
+        self.terminal_input.insert(0, completed)
+        self.terminal_input.icursor(len(completed))
+        return "break"
+    
+    def terminal_interrupt(self, event=None):
+        """Ctrl-C cancels the running command, otherwise copies as usual"""
+        if self.terminal_job is not None and self.terminal_job.is_alive():
+            self.shell.cancel()
+            return "break"
+        return None
+    
+    # ========== PROJECT FUNCTIONS ==========
+    
+    def open_project_folder(self):
+        """Choose a project folder and index it"""
+        folder = filedialog.askdirectory(title="Open Project Folder")
+        if not folder:
+            return
+        folder = os.path.abspath(folder)
+        if folder in self.project_paths:
+            index = self.project_paths.index(folder)
+            self.project_paths.pop(index)
+            self.project_listbox.delete(index)
+        self.project_paths.insert(0, folder)
+        self.project_listbox.insert(0, "📦 " + os.path.basename(folder.rstrip(os.sep)) + "  " + folder)
+        del self.project_paths[10:]
+        self.project_listbox.delete(10, tk.END)
+        self.settings['recent_projects'] = self.project_paths
+        self.save_settings()
         
-        text_area.insert(tk.END, sample_code)
+        self.project_listbox.selection_clear(0, tk.END)
+        self.project_listbox.selection_set(0)
+        self.select_project()
+    
+    def select_project(self, event=None):
+        """Make the selected folder the active project"""
+        selection = self.project_listbox.curselection()
+        if not selection:
+            return
+        folder = self.project_paths[selection[0]]
+        if self.project_index is not None:
+            if self.project_index.root == folder:
+                return
+            self.project_index.close()
+        self.project_index = ProjectIndex(folder)
+        self.log_message(f"Project opened: {folder}")
+        self.index_project()
+    
+    def index_project(self):
+        """Update the project index in the background"""
+        index = self.project_index
+        if index is None or getattr(self, 'project_indexing', False):
+            return
+        self.project_indexing = True
+        self.project_progress = "Scanning..."
         
-        # Save reference to editor
-        self.current_editor = text_area
+        def progress(done, total):
+            self.project_progress = f"Indexing {done}/{total} files..."
         
-        # Add tab
-        self.dev_notebook.add(editor_frame, text=filename)
-        self.dev_notebook.select(editor_frame)
-    
-    def create_pro_tab(self):
-        """Create Pro tab"""
-        frame = self.pro_frame
+        def show_progress():
+            if self.project_indexing:
+                self.project_status.config(text=self.project_progress)
+                self.root.after(200, show_progress)
         
-        # Title
-        tk.Label(frame, text="Pro Version v1.2 - System Tools", font=("Arial", 20, "bold"),
-                bg="#ecf0f1").pack(pady=20)
+        def done(result):
+            self.project_indexing = False
+            self.project_status.config(
+                text=f"{os.path.basename(index.root)}: {result['files']} files, "
+                     f"{result['indexed']} updated, {result['removed']} removed "
+                     f"in {result['seconds']:.1f}s")
+            self.run_project_search()
         
-        # System monitoring
-        monitor_frame = tk.LabelFrame(frame, text="System Monitoring", font=("Arial", 14, "bold"),
-                                     bg="#ecf0f1", padx=30, pady=30)
-        monitor_frame.pack(pady=10, padx=40, fill=tk.X)
+        def task():
+            try:
+                return index.update(progress)
+            finally:
+                # Background connection must not outlive the worker thread
+                index.close()
+                self.project_indexing = False
         
-        # System metrics
-        metrics_frame = tk.Frame(monitor_frame, bg="#ecf0f1")
-        metrics_frame.pack(fill=tk.X)
+        show_progress()
+        self.run_background_task(task, done)
+    
+    def schedule_project_search(self, event=None):
+        """Debounce search while typing"""
+        if self.project_search_job is not None:
+            self.root.after_cancel(self.project_search_job)
+        self.project_search_job = self.root.after(150, self.run_project_search)
+    
+    def run_project_search(self, event=None):
+        """Go to symbol or find in files"""
+        self.project_search_job = None
+        # A newer search makes older results stale; the generation tells them apart
+        self.project_search_generation += 1
+        generation = self.project_search_generation
+        self.project_search_cancel.set()
+        cancel = self.project_search_cancel = Event()
+        query = self.project_search_var.get().strip()
+        mode = self.project_search_mode.get()
+        self.project_results.delete(0, tk.END)
+        self.project_result_items = []
+        index = self.project_index
+        if index is None or not query:
+            return
+        if mode == 'text' and len(query) < INDEX_MIN_QUERY:
+            if not getattr(self, 'project_indexing', False):
+                self.project_status.config(text=f"Type at least {INDEX_MIN_QUERY} characters to find in files")
+            return
         
-        self.metrics = {}
-        metric_data = [
-            ("CPU Usage", "75%", "#e74c3c"),
-            ("Memory", "64%", "#3498db"),
-            ("Disk", "42%", "#2ecc71"),
-            ("Network", "1.2 MB/s", "#9b59b6"),
-            ("Uptime", self.get_uptime(), "#f39c12"),
-            ("Processes", "24", "#1abc9c")
-        ]
+        start = time.perf_counter()
+        root = index.root
         
-        for i, (label, value, color) in enumerate(metric_data):
-            metric_box = tk.Frame(metrics_frame, bg="#ecf0f1", relief=tk.RAISED, bd=2)
-            metric_box.grid(row=0, column=i, padx=10, pady=10, sticky='nsew')
-            
-            tk.Label(metric_box, text=label, font=("Arial", 10), 
-                    bg="#ecf0f1", fg="#7f8c8d").pack(pady=(10, 5))
-            value_label = tk.Label(metric_box, text=value, font=("Arial", 16, "bold"),
-                                  bg="#ecf0f1", fg=color)
-            value_label.pack(pady=(5, 10))
-            
-            self.metrics[label] = value_label
-            metrics_frame.grid_columnconfigure(i, weight=1)
+        def task():
+            try:
+                if mode == 'symbol':
+                    results = []
+                    for name, kind, scope, path, line, col in index.find_symbols(query):
+                        where = f"{scope}." if scope and kind != 'import' else ""
+                        results.append((f"{kind:<6} {where}{name}  —  {os.path.relpath(path, root)}:{line}",
+                                        path, line))
+                    return results
+                return [(f"{os.path.relpath(path, root)}:{line}: {text.strip()[:120]}", path, line)
+                        for path, line, text in index.search_text(query, cancel_event=cancel)]
+            finally:
+                # Background connection must not outlive the worker thread
+                index.close()
         
-        # Professional tools
-        tools_frame = tk.LabelFrame(frame, text="Professional Tools", font=("Arial", 14, "bold"),
-                                   bg="#ecf0f1", padx=30, pady=30)
-        tools_frame.pack(pady=10, padx=40, fill=tk.X)
+        def done(results):
+            if generation != self.project_search_generation or index is not self.project_index:
+                return
+            for label, path, line in results:
+                self.project_results.insert(tk.END, label)
+                self.project_result_items.append((path, line))
+            elapsed = (time.perf_counter() - start) * 1000
+            if not self.project_indexing:
+                self.project_status.config(text=f"{len(self.project_result_items)} results in {elapsed:.1f} ms")
         
-        pro_tools = [
-            ("🚀 Turbo Mode", self.turbo_boost, "#e74c3c"),
-            ("🔒 Security Scan", self.security_scan, "#2ecc71"),
-            ("📊 System Analytics", self.system_analytics, "#3498db"),
-            ("⚡ Performance Test", self.performance_test, "#9b59b6"),
-            ("💾 Backup System", self.backup_system, "#f39c12"),
-            ("🔧 System Diagnostics", self.system_diagnostics, "#1abc9c")
-        ]
+        self.run_background_task(task, done)
+    
+    def open_project_result(self, event=None):
+        """Open the selected search result in the editor"""
+        selection = self.project_results.curselection()
+        if selection:
+            path, line = self.project_result_items[selection[0]]
+            self.open_file_in_editor(path, line)
+    
+    def open_file_in_editor(self, path, line=None):
+        """Open a host file in a new editor tab"""
+        path = os.path.abspath(path)
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                content = f.read()
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not open file: {str(e)}")
+            return False
+        self.create_editor_tab(os.path.basename(path), content, path=path)
+        self.add_recent_file(path)
+        if line:
+            self.current_editor.mark_set(tk.INSERT, f"{line}.0")
+            self.current_editor.see(f"{line}.0")
+            self.current_editor.tag_add(tk.SEL, f"{line}.0", f"{line}.end")
+        self.current_editor.focus_set()
+        return True
+    
+    def add_recent_file(self, path):
+        """Move a file to the top of the recent files list"""
+        recent = [p for p in self.settings.get('recent_files', []) if p != path]
+        self.settings['recent_files'] = [path] + recent[:9]
+        self.save_settings()
+    
+    def show_recent_files(self):
+        """Menu of recently used files"""
+        menu = tk.Menu(self.root, tearoff=0)
+        recent = self.settings.get('recent_files', [])
+        for path in recent:
+            menu.add_command(label=path, command=lambda p=path: self.open_file_in_editor(p))
+        if not recent:
+            menu.add_command(label="(no recent files)", state=tk.DISABLED)
+        menu.tk_popup(self.root.winfo_pointerx(), self.root.winfo_pointery())
+    
+    # ========== FIND / REPLACE ==========
+    
+    def create_find_bar(self, parent):
+        """Find/replace bar under the editor tabs (hidden until Ctrl+F / Ctrl+H)"""
+        bar = tk.Frame(parent, bg='#2d2d30')
+        self.find_bar = bar
+        self.find_var = tk.StringVar()
+        self.replace_var = tk.StringVar()
+        self.find_regex_var = tk.BooleanVar(value=True)
+        self.find_case_var = tk.BooleanVar(value=False)
+        self.find_status_var = tk.StringVar()
+        self.find_state = {'search': None, 'text': None, 'current': None, 'job': None, 'highlight_job': None,
+                           'replace': None}
         
-        row, col = 0, 0
-        for text, command, color in pro_tools:
-            btn = tk.Button(tools_frame, text=text, command=command,
-                          bg=color, fg="white", font=("Arial", 11),
-                          width=20, height=2)
-            btn.grid(row=row, column=col, padx=10, pady=10)
-            col += 1
-            if col > 2:
-                col = 0
-                row += 1
+        row = tk.Frame(bar, bg='#2d2d30')
+        row.pack(fill=tk.X, padx=5, pady=(4, 0))
+        tk.Label(row, text="Find:", width=8, anchor=tk.W, bg='#2d2d30', fg="white").pack(side=tk.LEFT)
+        self.find_entry = tk.Entry(row, textvariable=self.find_var, font=("Consolas", 10))
+        self.find_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        for text, value in (("Regex", self.find_regex_var), ("Aa", self.find_case_var)):
+            tk.Checkbutton(row, text=text, variable=value, command=self.schedule_find, bg='#2d2d30', fg="white",
+                           selectcolor='#2d2d30', activebackground='#2d2d30').pack(side=tk.LEFT, padx=2)
+        tk.Button(row, text="▲", width=2, command=lambda: self.find_step(-1)).pack(side=tk.LEFT, padx=1)
+        tk.Button(row, text="▼", width=2, command=lambda: self.find_step(1)).pack(side=tk.LEFT, padx=1)
+        tk.Button(row, text="✖", width=2, command=self.hide_find_bar).pack(side=tk.LEFT, padx=1)
         
-        # System logs
-        log_frame = tk.LabelFrame(frame, text="System Logs", font=("Arial", 14, "bold"),
-                                 bg="#ecf0f1", padx=30, pady=30)
-        log_frame.pack(pady=10, padx=40, fill=tk.BOTH, expand=True)
+        row = tk.Frame(bar, bg='#2d2d30')
+        row.pack(fill=tk.X, padx=5, pady=4)
+        tk.Label(row, text="Replace:", width=8, anchor=tk.W, bg='#2d2d30', fg="white").pack(side=tk.LEFT)
+        self.replace_entry = tk.Entry(row, textvariable=self.replace_var, font=("Consolas", 10))
+        self.replace_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        tk.Button(row, text="Replace", command=self.replace_one).pack(side=tk.LEFT, padx=2)
+        tk.Button(row, text="Replace All", command=self.replace_all).pack(side=tk.LEFT, padx=2)
+        tk.Button(row, text="📄 Find in File...", command=self.find_in_file).pack(side=tk.LEFT, padx=2)
+        tk.Label(bar, textvariable=self.find_status_var, anchor=tk.W, bg='#2d2d30', fg="#bdc3c7",
+                 font=("Arial", 9)).pack(fill=tk.X, padx=5)
         
-        self.system_logs = scrolledtext.ScrolledText(log_frame, height=8,
-                                                    bg="#2c3e50", fg="#ecf0f1",
-                                                    font=("Courier", 9))
-        self.system_logs.pack(fill=tk.BOTH, expand=True)
-        self.log_message("System started successfully")
-        self.log_message(f"User: {self.username}")
-        self.log_message(f"Python: {sys.version.split()[0]}")
+        self.find_var.trace_add('write', lambda *args: self.schedule_find())
+        self.find_entry.bind('<Return>', lambda e: self.find_step(1))
+        self.find_entry.bind('<Shift-Return>', lambda e: self.find_step(-1))
+        for entry in (self.find_entry, self.replace_entry):
+            entry.bind('<Escape>', lambda e: self.hide_find_bar())
     
-    def create_edu_tab(self):
-        """Create education tab"""
-        frame = self.edu_frame
-        
-        # Title
-        tk.Label(frame, text="Education Version v1.2", font=("Arial", 20, "bold"),
-                bg="#ecf0f1").pack(pady=20)
+    def show_find_bar(self, text_area, replace=False):
+        """Open the find bar for an editor, seeded with its selection"""
+        if not self.find_bar.winfo_ismapped():
+            self.find_bar.pack(fill=tk.X)
+        self.find_state['text'] = text_area
+        try:
+            selected = text_area.get(tk.SEL_FIRST, tk.SEL_LAST)
+        except tk.TclError:
+            selected = ""
+        if selected and '\n' not in selected:
+            self.find_regex_var.set(False)
+            self.find_var.set(selected)
+        if replace and self.find_var.get():
+            self.replace_entry.focus_set()
+            self.replace_entry.select_range(0, tk.END)
+        else:
+            self.find_entry.focus_set()
+            self.find_entry.select_range(0, tk.END)
+        self.schedule_find()
+        return "break"
+    
+    def hide_find_bar(self):
+        self.cancel_find()
+        text_area = self.find_state['text']
+        if text_area is not None and text_area.winfo_exists():
+            text_area.tag_remove('find_match', '1.0', tk.END)
+            text_area.tag_remove('find_current', '1.0', tk.END)
+            text_area.focus_set()
+        self.find_bar.pack_forget()
+    
+    def cancel_find(self):
+        for key in ('search', 'replace'):
+            search = self.find_state[key]
+            if search is not None:
+                search.cancel_event.set()
+            self.find_state[key] = None
+    
+    def find_pattern(self):
+        """Pattern and flags from the find bar, or None if the pattern is empty or invalid"""
+        pattern = self.find_var.get()
+        if not pattern:
+            return None
+        if not self.find_regex_var.get():
+            pattern = re.escape(pattern)
+        flags = re.MULTILINE | (0 if self.find_case_var.get() else re.IGNORECASE)
+        try:
+            re.compile(pattern, flags)
+        except re.error as e:
+            self.find_status_var.set(f"Invalid pattern: {e}")
+            return None
+        return pattern, flags
+    
+    def schedule_find(self):
+        """Restart the search shortly after the pattern or the buffer changed"""
+        if self.find_state['job'] is not None:
+            self.root.after_cancel(self.find_state['job'])
+        self.find_state['job'] = self.root.after(200, self.start_find)
+    
+    def start_find(self):
+        """Search a snapshot of the editor buffer in a worker thread"""
+        self.find_state['job'] = None
+        self.cancel_find()
+        text_area = self.find_state['text']
+        if text_area is None or not text_area.winfo_exists() or not self.find_bar.winfo_ismapped():
+            return
+        text_area.tag_remove('find_match', '1.0', tk.END)
+        text_area.tag_remove('find_current', '1.0', tk.END)
+        self.find_state['current'] = None
+        parsed = self.find_pattern()
+        if parsed is None:
+            if not self.find_var.get():
+                self.find_status_var.set("")
+            return
+        search = TextSearch(text_area.get('1.0', 'end-1c'), *parsed)
+        self.find_state['search'] = search
+        Thread(target=search.run, daemon=True).start()
+        self.poll_find(search)
+    
+    def poll_find(self, search):
+        """Live match count while the worker runs"""
+        if search is not self.find_state['search']:
+            return
+        if search.done:
+            self.find_status_var.set(f"{search.count:,} matches" if search.count else "No matches")
+        else:
+            self.find_status_var.set(f"{search.count:,} matches so far ({search.progress():.0%})")
+            self.root.after(100, self.poll_find, search)
+        self.highlight_viewport()
+    
+    def editor_scrolled(self, text_area):
+        """Re-highlight once scrolling pauses"""
+        if text_area is not self.find_state['text'] or self.find_state['search'] is None:
+            return
+        if self.find_state['highlight_job'] is None:
+            self.find_state['highlight_job'] = self.root.after(30, self.highlight_viewport)
+    
+    def highlight_viewport(self):
+        """Tag only the matches on the visible lines"""
+        self.find_state['highlight_job'] = None
+        search, text_area = self.find_state['search'], self.find_state['text']
+        if search is None or text_area is None or not text_area.winfo_exists():
+            return
+        first = int(text_area.index('@0,0').split('.')[0]) - 1
+        last = int(text_area.index(f'@0,{text_area.winfo_height()}').split('.')[0]) - 1
+        text_area.tag_remove('find_match', '1.0', tk.END)
+        low, high = search.between_lines(first, last)
+        for index in range(low, high):
+            line, column = search.location(index)
+            length = search.ends[index] - search.starts[index]
+            text_area.tag_add('find_match', f"{line + 1}.{column}", f"{line + 1}.{column} + {length} chars")
+        text_area.tag_configure('find_match', background="#613a00")
+        text_area.tag_configure('find_current', background="#a0522d")
+        text_area.tag_raise('find_current')
+    
+    def find_step(self, direction):
+        """Select the next (1) or previous (-1) match from the cursor"""
+        search, text_area = self.find_state['search'], self.find_state['text']
+        if search is None or not search.count:
+            return "break"
+        line, column = map(int, text_area.index(tk.INSERT).split('.'))
+        current = self.find_state['current']
+        if current is not None and search.location(current) == (line - 1, column - (search.ends[current] -
+                                                                                   search.starts[current])):
+            index = (current + direction) % search.count
+        else:
+            index = search.after(line - 1, column)
+            if direction < 0:
+                index = (index - 1) % search.count
+        self.find_state['current'] = index
+        line, column = search.location(index)
+        start = f"{line + 1}.{column}"
+        end = f"{start} + {search.ends[index] - search.starts[index]} chars"
+        text_area.tag_remove('find_current', '1.0', tk.END)
+        text_area.tag_add('find_current', start, end)
+        text_area.tag_remove(tk.SEL, '1.0', tk.END)
+        text_area.tag_add(tk.SEL, start, end)
+        text_area.mark_set(tk.INSERT, end)
+        text_area.see(start)
+        self.find_status_var.set(f"{index + 1:,} of {search.count:,}" + ("" if search.done else "+"))
+        self.highlight_viewport()
+        return "break"
+    
+    def replace_one(self):
+        """Replace the current match and move to the next one"""
+        search, text_area = self.find_state['search'], self.find_state['text']
+        parsed = self.find_pattern()
+        if parsed is None or text_area is None:
+            return
+        try:
+            start, end = text_area.index(tk.SEL_FIRST), text_area.index(tk.SEL_LAST)
+        except tk.TclError:
+            self.find_step(1)
+            return
+        selected = text_area.get(start, end)
+        match = re.compile(*parsed).fullmatch(selected)
+        if match is None or search is None:
+            self.find_step(1)
+            return
+        try:
+            replacement = match.expand(self.replace_var.get())
+        except (re.error, IndexError) as e:
+            self.find_status_var.set(f"Invalid replacement: {e}")
+            return
+        text_area.delete(start, end)
+        text_area.insert(start, replacement)
+        text_area.mark_set(tk.INSERT, f"{start} + {len(replacement)} chars")
+        self.start_find()
+    
+    def replace_all(self):
+        """Replace every match in one edit that a single Undo reverts
         
-        # Main panel
-        main_paned = tk.PanedWindow(frame, orient=tk.HORIZONTAL, sashwidth=5)
-        main_paned.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+        Matches and their replacement text are computed by a TextSearch worker; the UI
+        thread only applies them, and drops them if the buffer changed meanwhile.
+        """
+        text_area = self.find_state['text']
+        parsed = self.find_pattern()
+        if parsed is None or text_area is None or self.find_state['replace'] is not None:
+            return
+        content = text_area.get('1.0', 'end-1c')
+        template = self.replace_var.get()
+        search = TextSearch(content, *parsed)
+        self.find_state['replace'] = search
+        self.find_status_var.set("Replacing...")
         
-        # Left panel - courses
-        left_frame = tk.Frame(main_paned, bg='#ecf0f1')
+        def task():
+            search.run()
+            try:
+                return search.expand(template), None
+            except (re.error, IndexError) as e:
+                return None, e
         
-        tk.Label(left_frame, text="Learning Courses", font=("Arial", 16, "bold"),
-                bg="#ecf0f1").pack(pady=20)
+        def done(result):
+            replacements, error = result
+            if search is not self.find_state['replace']:
+                return
+            self.find_state['replace'] = None
+            if error is not None:
+                self.find_status_var.set(f"Invalid replacement: {error}")
+                return
+            if replacements is None or not text_area.winfo_exists():
+                return
+            if text_area.get('1.0', 'end-1c') != content:
+                self.find_status_var.set("Buffer changed during Replace All; nothing replaced")
+                return
+            if not replacements:
+                self.find_status_var.set("No matches")
+                return
+            self.apply_replacements(text_area, content, search.starts, search.ends, replacements)
+            self.find_status_var.set(f"Replaced {len(replacements):,} matches")
         
-        # Courses list
-        courses_listbox = tk.Listbox(left_frame, font=("Arial", 12), 
-                                    selectmode=tk.SINGLE, height=15)
-        courses_listbox.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
-        
-        courses = [
-            "1. Introduction to Operating Systems",
-            "2. Python Programming Basics",
-            "3. GUI Development with Tkinter",
-            "4. System Architecture",
-            "5. Process Management",
-            "6. Memory Management",
-            "7. File Systems",
-            "8. Networking Basics",
-            "9. Security Fundamentals",
-            "10. System Administration"
-        ]
+        self.run_background_task(task, done)
+    
+    def apply_replacements(self, text_area, content, starts, ends, replacements):
+        """Apply precomputed replacements to an editor as a single undo step"""
+        cursor = text_area.index(tk.INSERT)
+        text_area.configure(autoseparators=False)
+        text_area.edit_separator()
+        try:
+            if len(replacements) > 2000:
+                # Many edits: one delete and insert is far cheaper than thousands of small ones
+                parts, last = [], 0
+                for start, end, replacement in zip(starts, ends, replacements):
+                    parts.append(content[last:start])
+                    parts.append(replacement)
+                    last = end
+                parts.append(content[last:])
+                text_area.delete('1.0', tk.END)
+                text_area.insert('1.0', ''.join(parts))
+            else:
+                # Back to front, so earlier offsets stay valid
+                for start, end, replacement in zip(reversed(starts), reversed(ends), reversed(replacements)):
+                    index = f"1.0 + {start} chars"
+                    text_area.delete(index, f"1.0 + {end} chars")
+                    text_area.insert(index, replacement)
+        finally:
+            text_area.edit_separator()
+            text_area.configure(autoseparators=True)
+        text_area.mark_set(tk.INSERT, cursor)
+        text_area.see(cursor)
+        self.analyze_buffer(text_area)
+        self.start_find()
+    
+    def find_in_file(self):
+        """Search a file of any size through a memory map, with a live result count"""
+        path = filedialog.askopenfilename(title="Find in File")
+        parsed = self.find_pattern()
+        if not path or parsed is None:
+            if path:
+                messagebox.showinfo("Find in File", "Enter a search pattern first")
+            return
+        window = tk.Toplevel(self.root)
+        window.title(f"Find in File - {os.path.basename(path)}")
+        window.geometry("820x480")
+        status_var = tk.StringVar(value="Searching...")
+        tk.Label(window, textvariable=status_var, anchor=tk.W, font=("Arial", 10)).pack(fill=tk.X, padx=10, pady=5)
+        results = tk.Listbox(window, font=("Consolas", 10), bg="#1e1e1e", fg="#d4d4d4")
+        results.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        try:
+            search = search_file(path, *parsed)
+        except (OSError, ValueError, re.error) as e:
+            window.destroy()
+            messagebox.showerror("Find in File", str(e))
+            return
+        shown_limit = 1000
+        Thread(target=search.run, daemon=True).start()
+        start = time.perf_counter()
         
-        for course in courses:
-            courses_listbox.insert(tk.END, course)
+        def poll():
+            if not window.winfo_exists():
+                search.cancel_event.set()
+                return
+            # List the first matches; the count keeps growing for the rest
+            for index in range(results.size(), min(search.count, shown_limit)):
+                line, column = search.location(index)
+                results.insert(tk.END, f"{line + 1:>9}:{column + 1:<5} {search.snippet(index).strip()[:150]}")
+            scanned = self.format_size(search.position)
+            state = "Done" if search.done else f"{search.progress():.0%}"
+            status_var.set(f"{search.count:,} matches  |  {scanned} of {self.format_size(len(search.buffer))} "
+                           f"in {time.perf_counter() - start:.1f} s  |  {state}")
+            if not search.done:
+                window.after(100, poll)
         
-        main_paned.add(left_frame, width=300)
+        def open_match(event=None):
+            selection = results.curselection()
+            if not selection:
+                return
+            line = int(results.get(selection[0]).split(':')[0])
+            if os.path.getsize(path) > 64 * 1024 * 1024:
+                messagebox.showinfo("Find in File", "File is too large to open in the editor", parent=window)
+                return
+            if self.open_file_in_editor(path, line):
+                self.notebook.select(self.dev_frame)
         
-        # Right panel - content
-        right_frame = tk.Frame(main_paned, bg='#ecf0f1')
+        results.bind('<Double-1>', open_match)
+        self.register_worker(window, search.cancel_event.set)
+        window.after(100, poll)
+    
+    # ========== LINT ==========
+    
+    def lint_editor(self, text_area):
+        """Check an editor's code in the lint worker; a run still in flight is followed by one more"""
+        state = self.editor_state.get(text_area)
+        if state is None:
+            return
+        if state['path'] and not state['path'].endswith(('.py', '.pyw')):
+            self.apply_lint(text_area, [])
+            return
+        if state['lint_future'] is not None:
+            state['lint_again'] = True
+            return
+        if self.lint_pool is None:
+            self.lint_pool = process_pool(1)
+        state['lint_again'] = False
+        state['lint_future'] = self.lint_pool.submit(lint_source, text_area.get('1.0', 'end-1c'))
+        self.root.after(20, self.poll_lint, text_area)
+    
+    def poll_lint(self, text_area):
+        state = self.editor_state.get(text_area)
+        if state is None or state['lint_future'] is None:
+            return
+        future = state['lint_future']
+        if not future.done():
+            self.root.after(20, self.poll_lint, text_area)
+            return
+        state['lint_future'] = None
+        try:
+            diagnostics = future.result()
+        except Exception:
+            # Worker died (or the pool was shut down): start a fresh one next time
+            self.lint_pool = None
+            diagnostics = []
+        if state['lint_again']:
+            # The buffer changed while the worker was busy, these results are already stale
+            self.lint_editor(text_area)
+        else:
+            self.apply_lint(text_area, diagnostics)
+    
+    def apply_lint(self, text_area, diagnostics):
+        """Underline diagnostics in the text and redraw the gutter markers"""
+        state = self.editor_state.get(text_area)
+        if state is None:
+            return
+        state['lint'] = diagnostics
+        state['lint_lines'] = [line for line, _, _, _ in diagnostics]
+        text_area.tag_remove('lint_error', '1.0', tk.END)
+        text_area.tag_remove('lint_warning', '1.0', tk.END)
+        for line, column, severity, _ in diagnostics:
+            start = f"{line}.{column}"
+            text_area.tag_add(f'lint_{severity}', start, f"{start} wordend")
+        self.draw_gutter(text_area)
+        self.show_lint_message(text_area)
+    
+    def schedule_gutter(self, text_area):
+        state = self.editor_state.get(text_area)
+        if state is not None and state['gutter_job'] is None:
+            state['gutter_job'] = self.root.after(15, self.draw_gutter, text_area)
+    
+    def draw_gutter(self, text_area):
+        """Markers for the diagnostics on the visible lines only"""
+        state = self.editor_state.get(text_area)
+        if state is None or state['gutter'] is None:
+            return
+        state['gutter_job'] = None
+        gutter = state['gutter']
+        gutter.delete('all')
+        if not state['lint']:
+            return
+        first = int(text_area.index('@0,0').split('.')[0])
+        last = int(text_area.index(f"@0,{text_area.winfo_height()}").split('.')[0])
+        lines = state['lint_lines']
+        worst = {}
+        for line, _, severity, _ in state['lint'][bisect.bisect_left(lines, first):bisect.bisect_right(lines, last)]:
+            if worst.get(line) != 'error':
+                worst[line] = severity
+        offset = text_area.winfo_rooty() - gutter.winfo_rooty()
+        for line, severity in worst.items():
+            info = text_area.dlineinfo(f"{line}.0")
+            if info is None:
+                continue
+            y = offset + info[1] + info[3] // 2
+            gutter.create_oval(3, y - 4, 11, y + 4, outline='',
+                               fill="#e74c3c" if severity == 'error' else "#f1c40f")
+    
+    def lint_messages(self, text_area, line):
+        state = self.editor_state.get(text_area)
+        if state is None:
+            return []
+        lines = state['lint_lines']
+        return state['lint'][bisect.bisect_left(lines, line):bisect.bisect_right(lines, line)]
+    
+    def show_lint_message(self, text_area, y=None):
+        """Diagnostics of the line under the pointer, or a summary for the whole buffer"""
+        state = self.editor_state.get(text_area)
+        if state is None:
+            return
+        if y is not None:
+            line = self.gutter_line(text_area, y)
+            messages = self.lint_messages(text_area, line)
+            if messages:
+                self.lint_status_var.set("   ".join(f"Line {line}:{column + 1}: {message}"
+                                                   for line, column, _, message in messages))
+                return
+        errors = sum(1 for _, _, severity, _ in state['lint'] if severity == 'error')
+        warnings = len(state['lint']) - errors
+        if errors or warnings:
+            self.lint_status_var.set(f"⚠ {errors} error(s), {warnings} warning(s) - point at a marker for details")
+        else:
+            self.lint_status_var.set("✓ No problems found")
+    
+    def gutter_line(self, text_area, y):
+        """Text line next to a gutter y coordinate"""
+        offset = text_area.winfo_rooty() - self.editor_state[text_area]['gutter'].winfo_rooty()
+        return int(text_area.index(f"@0,{y - offset}").split('.')[0])
+    
+    def goto_lint_line(self, text_area, y):
+        line = self.gutter_line(text_area, y)
+        messages = self.lint_messages(text_area, line)
+        if messages:
+            text_area.mark_set(tk.INSERT, f"{line}.{messages[0][1]}")
+            text_area.focus_set()
+    
+    # ========== EDITOR FUNCTIONS ==========
+    
+    def setup_editor(self, text_area, path=None, key=None, gutter=None):
+        """Attach completion, buffer analysis, linting and session tracking to an editor"""
+        self.editor_state[text_area] = {'names': BufferNames(), 'job': None, 'path': path,
+                                        'key': key or f"{time.time_ns():x}{id(text_area):x}",
+                                        'gutter': gutter, 'gutter_job': None, 'lint': [], 'lint_lines': [],
+                                        'lint_future': None, 'lint_again': False}
+        self.editor_state[text_area]['names'].update(text_area.get('1.0', 'end-1c'))
         
-        self.edu_content = scrolledtext.ScrolledText(right_frame,
-                                                    font=("Arial", 12),
-                                                    wrap=tk.WORD)
-        self.edu_content.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        text_area.bind('<KeyRelease>', lambda e: self.on_editor_key(text_area, e), add='+')
+        text_area.bind('<Control-space>', lambda e: self.show_completions(text_area, force=True))
+        for key in ('<Down>', '<Up>', '<Tab>', '<Return>', '<Escape>'):
+            text_area.bind(key, lambda e, k=key: self.completion_key(text_area, k))
+        text_area.bind('<FocusOut>', lambda e: self.root.after(100, self.hide_completions), add='+')
+        text_area.bind('<Button-1>', lambda e: self.hide_completions(), add='+')
+        text_area.bind('<Destroy>', lambda e: self.editor_state.pop(text_area, None), add='+')
+        text_area.bind('<Control-f>', lambda e: self.show_find_bar(text_area))
+        text_area.bind('<Control-h>', lambda e: self.show_find_bar(text_area, replace=True))
+        text_area.bind('<F3>', lambda e: self.find_step(1))
+        text_area.bind('<Shift-F3>', lambda e: self.find_step(-1))
+        text_area.configure(yscrollcommand=lambda first, last: (text_area.vbar.set(first, last),
+                                                                self.editor_scrolled(text_area),
+                                                                self.schedule_gutter(text_area)))
+        text_area.tag_configure('lint_error', underline=True, background='#4b1c1c')
+        text_area.tag_configure('lint_warning', underline=True)
+        if gutter is not None:
+            gutter.bind('<Motion>', lambda e: self.show_lint_message(text_area, e.y))
+            gutter.bind('<Leave>', lambda e: self.show_lint_message(text_area))
+            gutter.bind('<Button-1>', lambda e: self.goto_lint_line(text_area, e.y))
+        self.root.after(200, self.lint_editor, text_area)
+    
+    def on_editor_key(self, text_area, event):
+        """Debounce buffer analysis and refresh the completion popup"""
+        state = self.editor_state.get(text_area)
+        if state is None or event.keysym in ('Up', 'Down', 'Return', 'Tab', 'Escape'):
+            return
+        if state['job'] is not None:
+            self.root.after_cancel(state['job'])
+        state['job'] = self.root.after(300, lambda: self.analyze_buffer(text_area))
         
-        # Load demo content
-        self.load_edu_content()
+        if event.char and (event.char.isalnum() or event.char in '_.') or event.keysym == 'BackSpace':
+            self.show_completions(text_area)
+        else:
+            self.hide_completions()
+    
+    def analyze_buffer(self, text_area):
+        """Re-scan changed lines of the buffer for names"""
+        state = self.editor_state.get(text_area)
+        if state is not None:
+            state['job'] = None
+            state['names'].update(text_area.get('1.0', 'end-1c'))
+            self.persist_tab(text_area)
+            self.lint_editor(text_area)
+            if text_area is self.find_state['text'] and self.find_bar.winfo_ismapped():
+                self.schedule_find()
+    
+    def show_completions(self, text_area, force=False):
+        """Show the completion popup at the cursor"""
+        before = text_area.get('insert linestart', 'insert')
+        match = re.search(r'(?:([A-Za-z_]\w*)\.)?([A-Za-z_]\w*)?$', before)
+        qualifier, prefix = match.group(1), match.group(2) or ''
+        if not prefix and not qualifier and not force:
+            self.hide_completions()
+            return "break"
         
-        main_paned.add(right_frame)
+        state = self.editor_state.get(text_area)
+        items = self.completion.complete(prefix, qualifier,
+                                         buffer=state['names'] if state else None,
+                                         project=self.project_index)
+        bbox = text_area.bbox(tk.INSERT)
+        if not items or bbox is None:
+            self.hide_completions()
+            return "break"
         
-        # Practical exercises
-        exercises_frame = tk.LabelFrame(frame, text="Practical Exercises", 
-                                       font=("Arial", 14, "bold"),
-                                       bg="#ecf0f1", padx=30, pady=30)
-        exercises_frame.pack(fill=tk.X, padx=20, pady=10)
+        if self.completion_popup is None:
+            popup = tk.Toplevel(self.root)
+            popup.overrideredirect(True)
+            popup.withdraw()
+            listbox = tk.Listbox(popup, bg="#252526", fg="#d4d4d4", selectbackground="#094771",
+                                 font=("Consolas", 10), height=8, width=36, activestyle='none')
+            listbox.pack(fill=tk.BOTH, expand=True)
+            listbox.bind('<Double-1>', lambda e: self.accept_completion())
+            self.completion_popup = popup
+            self.completion_listbox = listbox
         
-        exercises = [
-            ("📝 Quiz: OS Basics", self.start_quiz),
-            ("💻 Coding Challenge", self.coding_challenge),
-            ("⚙️ System Simulation", self.system_simulation),
-            ("🐛 Debug Practice", self.debug_practice)
-        ]
+        listbox = self.completion_listbox
+        listbox.delete(0, tk.END)
+        for name, kind in items:
+            listbox.insert(tk.END, f"{name:<26} {kind}")
+        listbox.selection_set(0)
+        self.completion_items = items
+        self.completion_target = (text_area, prefix)
         
-        for text, command in exercises:
-            tk.Button(exercises_frame, text=text, command=command,
-                     bg="#3498db", fg="white", font=("Arial", 11),
-                     width=20).pack(side=tk.LEFT, padx=10, pady=10)
+        x = text_area.winfo_rootx() + bbox[0]
+        y = text_area.winfo_rooty() + bbox[1] + bbox[3]
+        self.completion_popup.geometry(f"+{x}+{y}")
+        self.completion_popup.deiconify()
+        self.completion_popup.lift()
+        return "break"
     
-    def create_settings_tab(self):
-        """Create settings tab"""
-        frame = self.settings_frame
-        
-        # Title
-        tk.Label(frame, text="System Settings v1.2", font=("Arial", 20, "bold"),
-                bg="#ecf0f1").pack(pady=20)
-        
-        # Main settings
-        main_frame = tk.LabelFrame(frame, text="General Settings", font=("Arial", 14, "bold"),
-                                  bg="#ecf0f1", padx=30, pady=30)
-        main_frame.pack(pady=10, padx=40, fill=tk.X)
+    def hide_completions(self):
+        """Hide the completion popup"""
+        if self.completion_popup is not None:
+            self.completion_popup.withdraw()
+    
+    def completions_visible(self):
+        return self.completion_popup is not None and self.completion_popup.winfo_viewable()
+    
+    def completion_key(self, text_area, key):
+        """Navigate or accept the popup; normal editing when it is hidden"""
+        if not self.completions_visible():
+            return None
+        listbox = self.completion_listbox
+        if key == '<Escape>':
+            self.hide_completions()
+        elif key in ('<Tab>', '<Return>'):
+            self.accept_completion()
+        else:
+            current = listbox.curselection()
+            index = (current[0] if current else 0) + (1 if key == '<Down>' else -1)
+            index = max(0, min(listbox.size() - 1, index))
+            listbox.selection_clear(0, tk.END)
+            listbox.selection_set(index)
+            listbox.see(index)
+        return "break"
+    
+    def accept_completion(self):
+        """Replace the typed prefix with the selected completion"""
+        selection = self.completion_listbox.curselection()
+        text_area, prefix = self.completion_target
+        if selection:
+            name = self.completion_items[selection[0]][0]
+            if prefix:
+                text_area.delete(f'insert-{len(prefix)}c', 'insert')
+            text_area.insert('insert', name)
+        self.hide_completions()
+        text_area.focus_set()
+    
+    # ========== HOME VERSION FUNCTIONS ==========
+    
+    def open_file_manager(self):
+        """Open file manager"""
+        if getattr(self, 'fm_window', None) is not None and self.fm_window.winfo_exists():
+            self.fm_window.lift()
+            return
         
-        # Username
-        tk.Label(main_frame, text="Username:", font=("Arial", 12)).grid(row=0, column=0, sticky=tk.W, pady=15)
-        self.user_var = tk.StringVar(value=self.username)
-        user_entry = tk.Entry(main_frame, textvariable=self.user_var, width=28)
-        user_entry.grid(row=0, column=1, pady=15, padx=20)
+        window = tk.Toplevel(self.root)
+        window.title("File Manager v1.2")
+        window.geometry("760x520")
+        self.fm_window = window
+        self.fm_location = 'vfs' if self.vfs else 'host'
+        self.fm_path = '/' if self.vfs else os.path.expanduser('~')
         
-        # Font size
-        tk.Label(main_frame, text="Font Size:", font=("Arial", 12)).grid(row=1, column=0, sticky=tk.W, pady=15)
-        self.font_var = tk.StringVar(value=str(self.settings.get('font_size', 12)))
-        font_combo = ttk.Combobox(main_frame, textvariable=self.font_var,
-                                 values=['10', '11', '12', '13', '14', '16'], state='readonly', width=25)
-        font_combo.grid(row=1, column=1, pady=15, padx=20)
+        # Toolbar
+        toolbar = tk.Frame(window, bg='#34495e')
+        toolbar.pack(fill=tk.X)
+        self.fm_toolbar = toolbar
         
-        # Buttons
-        button_frame = tk.Frame(main_frame, bg="#ecf0f1")
-        button_frame.grid(row=2, column=0, columnspan=2, pady=30)
+        fm_buttons = [
+            ("⬆️ Up", self.fm_go_up, "#3498db"),
+            ("🏠 Home", self.fm_go_home, "#1abc9c"),
+            ("📁 New Folder", self.fm_new_folder, "#9b59b6"),
+            ("💽 New Image", self.create_vfs_image, "#e67e22"),
+            ("📀 Mount", self.mount_vfs_dialog, "#2ecc71"),
+            ("⏏️ Unmount", self.unmount_vfs, "#e74c3c"),
+            ("📥 Import", self.fm_import_file, "#16a085"),
+            ("🩺 fsck", self.check_vfs, "#f39c12"),
+            ("⏱️ Benchmark", self.benchmark_vfs_dialog, "#95a5a6")
+        ]
+        for text, command, color in fm_buttons:
+            tk.Button(toolbar, text=text, command=command, bg=color, fg="white",
+                      font=("Arial", 9)).pack(side=tk.LEFT, padx=2, pady=4)
         
-        tk.Button(button_frame, text="💾 Save", 
-                 command=self.save_settings_changes,
-                 bg="#2ecc71", fg="white", font=("Arial", 12),
-                 width=15).pack(side=tk.LEFT, padx=10)
+        # Tools for host folders
+        tools = tk.Frame(window, bg='#34495e')
+        tools.pack(fill=tk.X)
+        tool_buttons = [
+            ("🔍 Duplicates", self.fm_find_duplicates, "#8e44ad"),
+            ("📊 Disk Usage", self.open_disk_usage, "#d35400"),
+            ("🗜️ Compress", self.fm_compress_selected, "#27ae60"),
+            ("📦 Extract", self.fm_extract_selected, "#2980b9")
+        ]
+        for text, command, color in tool_buttons:
+            tk.Button(tools, text=text, command=command, bg=color, fg="white",
+                      font=("Arial", 9)).pack(side=tk.LEFT, padx=2, pady=4)
+        self.fm_thumbs_var = tk.BooleanVar(value=self.settings.get('fm_thumbnails', True))
+        tk.Checkbutton(tools, text="🖼️ Thumbnails", variable=self.fm_thumbs_var, command=self.fm_toggle_thumbnails,
+                       bg='#34495e', fg="white", selectcolor='#34495e', activebackground='#34495e',
+                       font=("Arial", 9)).pack(side=tk.LEFT, padx=8)
         
-        tk.Button(button_frame, text="🔄 Defaults", 
-                 command=self.restore_defaults,
-                 bg="#3498db", fg="white", font=("Arial", 12),
-                 width=15).pack(side=tk.LEFT, padx=10)
+        # Path bar
+        self.fm_path_var = tk.StringVar()
+        path_entry = tk.Entry(window, textvariable=self.fm_path_var, font=("Consolas", 10))
+        path_entry.pack(fill=tk.X, padx=5, pady=5)
+        path_entry.bind('<Return>', lambda e: self.fm_navigate(self.fm_path_var.get()))
         
-        tk.Button(button_frame, text="Cancel", 
-                 command=self.cancel_settings,
-                 bg="#e74c3c", fg="white", font=("Arial", 12),
-                 width=15).pack(side=tk.LEFT, padx=10)
+        # File list
+        list_frame = tk.Frame(window)
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=5)
+        self.fm_tree = ttk.Treeview(list_frame, columns=('size', 'modified'))
+        self.fm_tree.heading('#0', text='Name')
+        self.fm_tree.heading('size', text='Size')
+        self.fm_tree.heading('modified', text='Modified')
+        self.fm_tree.column('#0', width=380)
+        self.fm_tree.column('size', width=100, anchor=tk.E)
+        self.fm_tree.column('modified', width=150)
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.fm_tree.yview)
         
-        # System information
-        info_frame = tk.LabelFrame(frame, text="System Information", 
-                                  font=("Arial", 14, "bold"),
-                                  bg="#ecf0f1", padx=30, pady=30)
-        info_frame.pack(pady=10, padx=40, fill=tk.X)
+        def on_scroll(first, last):
+            # Thumbnails follow the visible rows
+            scrollbar.set(first, last)
+            self.fm_schedule_thumbnails()
+        self.fm_tree.configure(yscrollcommand=on_scroll)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.fm_tree.pack(fill=tk.BOTH, expand=True)
+        self.fm_tree.bind('<Double-1>', self.fm_open_selected)
+        ttk.Style().configure('Thumbs.Treeview', rowheight=THUMB_SIZE + 4)
+        self.fm_rows = []
+        self.fm_thumbs = OrderedDict()
+        self.fm_thumb_loader = None
+        self.fm_thumb_job = None
         
-        sys_info = f"""
-MKS-OS Version: {self.version}
-Python Version: {sys.version.split()[0]}
-Platform: {sys.platform}
-Home Directory: {os.path.expanduser('~')}
-System Uptime: {self.get_uptime()}
-Current User: {self.username}
-"""
+        self.fm_status = tk.Label(window, text="", anchor=tk.W, font=("Arial", 9))
+        self.fm_status.pack(fill=tk.X, padx=5, pady=2)
         
-        sys_text = scrolledtext.ScrolledText(info_frame, height=8, 
-                                            font=("Courier", 10))
-        sys_text.pack(fill=tk.BOTH, expand=True)
-        sys_text.insert(tk.END, sys_info)
-        sys_text.config(state=tk.DISABLED)
+        window.protocol("WM_DELETE_WINDOW", self.fm_close)
+        window.after(50, self.fm_poll_thumbnails)
+        self.fm_refresh()
     
-    def create_status_bar(self):
-        """Create status bar"""
-        self.status_bar = tk.Label(self.root, text="MKS-OS v1.2 Ready | Status: OK", 
-                                  bd=1, relief=tk.SUNKEN, anchor=tk.W,
-                                  font=("Arial", 9))
-        self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+    def fm_display_path(self):
+        """Path as shown in the path bar"""
+        return f"vfs:{self.fm_path}" if self.fm_location == 'vfs' else self.fm_path
     
-    def update_time(self):
-        """Update time"""
-        current_time = time.strftime("%H:%M:%S %d.%m.%Y")
-        self.status_bar.config(text=f"MKS-OS v1.2 Ready | Time: {current_time} | Status: OK")
-        self.root.after(1000, self.update_time)
+    def fm_join(self, name):
+        """Join a name to the current File Manager path"""
+        if self.fm_location == 'vfs':
+            return self.fm_path.rstrip('/') + '/' + name
+        return os.path.join(self.fm_path, name)
     
-    def update_system_info(self):
-        """Update system information"""
-        uptime = self.get_uptime()
-        info = f"""
-=== MKS-OS System Information ===
-Version: {self.version}
-User: {self.username}
-System Uptime: {uptime}
-Python Version: {sys.version.split()[0]}
-Platform: {sys.platform}
-Architecture: {platform.architecture()[0] if hasattr(platform, 'architecture') else 'Unknown'}
-
-System Status: ✅ Operational
-Virtual Environment: MKS-OS is running as an application
-
-Memory Usage: 64% (Simulated)
-CPU Usage: 75% (Simulated)
-Disk Usage: 42% (Simulated)
-
-Active Processes: 24 (Simulated)
-Network Status: Connected (Simulated)
-
-===================================
-Note: MKS-OS v1.2 is a virtual operating system
-running inside your main OS: {sys.platform}
-"""
-        if hasattr(self, 'info_text'):
-            self.info_text.delete(1.0, tk.END)
-            self.info_text.insert(tk.END, info)
+    def fm_list(self):
+        """List the current directory as (name, is_dir, size, mtime)"""
+        entries = []
+        if self.fm_location == 'vfs':
+            for name in self.vfs.listdir(self.fm_path):
+                st = self.vfs.stat(self.fm_join(name))
+                entries.append((name, st['type'] == 'dir', st['size'], st['mtime']))
+        else:
+            with os.scandir(self.fm_path) as it:
+                for entry in it:
+                    try:
+                        st = entry.stat()
+                        entries.append((entry.name, entry.is_dir(), st.st_size, st.st_mtime))
+                    except OSError:
+                        continue
+        entries.sort(key=lambda e: (not e[1], e[0].lower()))
+        return entries
     
-    def get_uptime(self):
-        """Get system uptime"""
-        uptime = time.time() - self.start_time
-        hours = int(uptime // 3600)
-        minutes = int((uptime % 3600) // 60)
-        seconds = int(uptime % 60)
-        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    def fm_refresh(self):
+        """Reload the file list"""
+        self.fm_tree.delete(*self.fm_tree.get_children())
+        self.fm_rows = []
+        self.fm_thumbs.clear()
+        thumbnails = self.fm_thumbs_var.get() and self.fm_location == 'host'
+        self.fm_tree.configure(style='Thumbs.Treeview' if thumbnails else 'Treeview')
+        self.fm_path_var.set(self.fm_display_path())
+        try:
+            entries = self.fm_list()
+        except OSError as e:
+            self.fm_status.config(text=f"Error: {e}")
+            return
+        for name, is_dir, size, mtime in entries:
+            icon = "📁" if is_dir else "📄"
+            modified = time.strftime("%Y-%m-%d %H:%M", time.localtime(mtime))
+            self.fm_tree.insert('', tk.END, iid=name, text=f"{icon} {name}",
+                                values=("" if is_dir else self.format_size(size), modified))
+            self.fm_rows.append(name)
+        status = f"{len(entries)} items"
+        if self.fm_location == 'vfs':
+            usage = self.vfs.usage()
+            status += (f" | Virtual disk {os.path.basename(self.vfs.path)}: "
+                       f"{self.format_size(usage['free'])} free of {self.format_size(usage['total'])}")
+        self.fm_status.config(text=status)
+        self.fm_schedule_thumbnails()
     
-    def log_message(self, message):
-        """Log messages"""
-        timestamp = time.strftime("%H:%M:%S")
-        if hasattr(self, 'system_logs'):
-            self.system_logs.insert(tk.END, f"[{timestamp}] {message}\n")
-            self.system_logs.see(tk.END)
+    def fm_navigate(self, path):
+        """Go to a host path or vfs:/path"""
+        if path.startswith('vfs:'):
+            if not self.vfs:
+                messagebox.showerror("File Manager", "No virtual disk mounted")
+                return
+            location, path = 'vfs', path[4:] or '/'
+            valid = self.vfs.isdir(path)
+        else:
+            location = 'host'
+            path = os.path.abspath(os.path.expanduser(path))
+            valid = os.path.isdir(path)
+        if not valid:
+            messagebox.showerror("File Manager", f"Not a directory: {path}")
+            return
+        self.fm_location, self.fm_path = location, path
+        self.fm_refresh()
     
-    def load_edu_content(self):
-        """Load education content"""
-        content = """
-=== Welcome to MKS-OS v1.2 Educational System ===
-
-This virtual operating system is designed to teach you 
-the fundamental concepts of real operating systems.
-
-📚 Available Courses:
-
-1. Introduction to Operating Systems
-   - What is an OS?
-   - Types of operating systems
-   - Key components and functions
-
-2. Python Programming Basics
-   - Python syntax and semantics
-   - Data types and variables
-   - Control structures and functions
-
-3. GUI Development with Tkinter
-   - Creating windows and widgets
-   - Event handling
-   - Layout management
-
-4. System Architecture
-   - Kernel and user space
-   - Process management
-   - Memory management
-
-5. Process Management
-   - Process scheduling algorithms
-   - Inter-process communication
-   - Threads and concurrency
-
-6. Memory Management
-   - Virtual memory
-   - Paging and segmentation
-   - Memory allocation algorithms
-
-7. File Systems
-   - File organization
-   - Directory structures
-   - File operations
-
-8. Networking Basics
-   - Network protocols
-   - Socket programming
-   - Client-server architecture
-
-9. Security Fundamentals
-   - Authentication and authorization
-   - Encryption
-   - Security protocols
-
-10. System Administration
-    - User management
-    - System monitoring
-    - Backup and recovery
-
-Select a course from the left panel to begin learning!
-"""
-        self.edu_content.insert(tk.END, content)
+    def fm_go_up(self):
+        """Go to parent directory"""
+        if self.fm_location == 'vfs':
+            parent = '/' + '/'.join(self.fm_path.strip('/').split('/')[:-1])
+            self.fm_navigate('vfs:' + parent)
+        else:
+            self.fm_navigate(os.path.dirname(self.fm_path))
     
-    # ========== DEVELOPMENT MODE FUNCTIONS ==========
+    def fm_go_home(self):
+        """Go to home directory"""
+        self.fm_navigate(os.path.expanduser('~'))
     
-    def run_code(self):
-        """Run Python code"""
-        # Get code from current editor
-        current_tab = self.dev_notebook.select()
-        if current_tab:
-            tab_widget = self.dev_notebook.nametowidget(current_tab)
-            for child in tab_widget.winfo_children():
-                if isinstance(child, scrolledtext.ScrolledText):
-                    code = child.get("1.0", tk.END)
-                    
-                    # Clear console
-                    self.console_output.delete(1.0, tk.END)
-                    self.console_output.insert(tk.END, ">>> Running Python code...\n")
-                    self.console_output.insert(tk.END, "="*50 + "\n")
-                    
-                    # Run in separate thread
-                    thread = Thread(target=self.execute_python_code, args=(code,))
-                    thread.daemon = True
-                    thread.start()
-                    break
+    def fm_selected_names(self):
+        """Names of the selected rows"""
+        return list(self.fm_tree.selection())
+    
+    def fm_open_selected(self, event=None):
+        """Enter a directory or open a file in the editor"""
+        names = self.fm_selected_names()
+        if not names:
+            return
+        path = self.fm_join(names[0])
+        if self.fm_location == 'vfs':
+            if self.vfs.isdir(path):
+                self.fm_navigate('vfs:' + path)
+                return
+            data = self.vfs.read_file(path)
+            self.create_editor_tab(names[0], data.decode('utf-8', errors='replace'))
+        elif os.path.isdir(path):
+            self.fm_navigate(path)
+            return
+        elif path.lower().endswith(('.wav', '.wave')):
+            self.open_media_player(path)
+            return
+        elif path.lower().endswith(thumbnail_extensions()):
+            self.open_image_viewer(path)
+            return
+        elif not self.open_file_in_editor(path):
+            return
+        self.notebook.select(self.dev_frame)
+    
+    def fm_schedule_thumbnails(self):
+        """Request thumbnails shortly after the list stops moving"""
+        if getattr(self, 'fm_thumb_job', None) is not None:
+            self.fm_window.after_cancel(self.fm_thumb_job)
+        self.fm_thumb_job = self.fm_window.after(60, self.fm_request_thumbnails)
+    
+    def fm_request_thumbnails(self):
+        """Ask for thumbnails of visible rows first, then the next and previous page"""
+        self.fm_thumb_job = None
+        if not self.fm_thumbs_var.get() or self.fm_location != 'host' or not self.fm_rows:
+            if self.fm_thumb_loader is not None:
+                self.fm_thumb_loader.request([])
+            return
+        if self.fm_thumb_loader is None:
+            self.fm_thumb_loader = ThumbnailLoader()
+        first, last = self.fm_tree.yview()
+        count = len(self.fm_rows)
+        top, bottom = int(first * count), min(count, math.ceil(last * count) + 1)
+        page = bottom - top
+        order = list(range(top, bottom)) + list(range(bottom, min(count, bottom + page))) + \
+            list(range(top - 1, max(-1, top - page - 1), -1))
+        extensions = thumbnail_extensions()
+        self.fm_thumb_loader.request([self.fm_join(self.fm_rows[index]) for index in order
+                                      if self.fm_rows[index] not in self.fm_thumbs and
+                                      self.fm_rows[index].lower().endswith(extensions)])
+    
+    def fm_poll_thumbnails(self):
+        """Put finished thumbnails into their rows; keeps at most THUMB_MEMORY images alive"""
+        if not self.fm_window.winfo_exists():
+            return
+        loader = self.fm_thumb_loader
+        while loader is not None:
+            try:
+                path, data = loader.results.get_nowait()
+            except queue.Empty:
+                break
+            name = os.path.basename(path)
+            if os.path.dirname(path) != self.fm_path or not self.fm_tree.exists(name):
+                continue
+            try:
+                image = tk.PhotoImage(data=data, format='PNG')
+            except tk.TclError:
+                continue
+            self.fm_tree.item(name, image=image)
+            self.fm_thumbs[name] = image
+            while len(self.fm_thumbs) > THUMB_MEMORY:
+                old, _ = self.fm_thumbs.popitem(last=False)
+                if self.fm_tree.exists(old):
+                    self.fm_tree.item(old, image='')
+        self.fm_window.after(50, self.fm_poll_thumbnails)
+    
+    def fm_toggle_thumbnails(self):
+        self.settings['fm_thumbnails'] = self.fm_thumbs_var.get()
+        self.save_settings()
+        self.fm_refresh()
+    
+    def fm_close(self):
+        if self.fm_thumb_loader is not None:
+            self.fm_thumb_loader.close()
+            self.fm_thumb_loader = None
+        self.fm_window.destroy()
+    
+    def open_image_viewer(self, path):
+        """Show an image scaled to the window; Left/Right step through the folder"""
+        window = tk.Toplevel(self.root)
+        window.geometry("800x600")
+        canvas = tk.Canvas(window, bg="#2c3e50", highlightthickness=0)
+        canvas.pack(fill=tk.BOTH, expand=True)
+        status = tk.Label(window, anchor=tk.W, font=("Arial", 9))
+        status.pack(fill=tk.X)
+        folder = os.path.dirname(path)
+        extensions = thumbnail_extensions()
+        names = sorted((name for name in os.listdir(folder) if name.lower().endswith(extensions)), key=str.lower)
+        viewer = {'index': names.index(os.path.basename(path)) if os.path.basename(path) in names else 0,
+                  'image': None, 'shown': None}
+        
+        def load():
+            path = os.path.join(folder, names[viewer['index']])
+            window.title(f"Image Viewer - {names[viewer['index']]}")
+            try:
+                if path.lower().endswith(THUMB_EXTENSIONS):
+                    viewer['image'] = tk.PhotoImage(file=path)
+                else:
+                    buffer = io.BytesIO()
+                    with Image.open(path) as image:
+                        image.convert('RGB').save(buffer, 'PNG')
+                    viewer['image'] = tk.PhotoImage(data=buffer.getvalue(), format='PNG')
+            except (tk.TclError, OSError) as e:
+                viewer['image'] = None
+                status.config(text=f"Cannot open {names[viewer['index']]}: {e}")
+            show()
+        
+        def show():
+            canvas.delete('all')
+            image = viewer['image']
+            if image is None:
+                return
+            width, height = canvas.winfo_width() or 800, canvas.winfo_height() or 580
+            factor = max(1, math.ceil(max(image.width() / width, image.height() / height)))
+            viewer['shown'] = image.subsample(factor) if factor > 1 else image
+            canvas.create_image(width // 2, height // 2, image=viewer['shown'])
+            status.config(text=f"{viewer['index'] + 1}/{len(names)}  {image.width()}×{image.height()}"
+                               f"{f'  (1/{factor})' if factor > 1 else ''}")
+        
+        def step(delta):
+            if names:
+                viewer['index'] = (viewer['index'] + delta) % len(names)
+                load()
+        
+        window.bind('<Left>', lambda event: step(-1))
+        window.bind('<Right>', lambda event: step(1))
+        canvas.bind('<Configure>', lambda event: show())
+        if names:
+            load()
     
-    def execute_python_code(self, code):
-        """Execute Python code"""
+    def fm_new_folder(self):
+        """Create folder in the current directory"""
+        name = simpledialog.askstring("New Folder", "Folder name:", parent=self.fm_window)
+        if not name:
+            return
         try:
-            # Create safe environment
-            safe_builtins = {
-                'print': print,
-                'len': len,
-                'range': range,
-                'str': str,
-                'int': int,
-                'float': float,
-                'list': list,
-                'dict': dict,
-                'tuple': tuple,
-                'set': set,
-                'bool': bool,
-                'type': type,
-                'abs': abs,
-                'min': min,
-                'max': max,
-                'sum': sum,
-                'sorted': sorted,
-                'enumerate': enumerate,
-                'zip': zip,
-                'map': map,
-                'filter': filter,
-                'isinstance': isinstance,
-                'issubclass': issubclass
-            }
-            
-            # Add safe modules
-            safe_globals = {
-                '__builtins__': safe_builtins,
-                'math': math,
-                'random': random,
-                'datetime': datetime,
-                'time': time,
-                'json': json
-            }
-            
-            # Redirect output to console
-            old_stdout = sys.stdout
-            old_stderr = sys.stderr
-            sys.stdout = self.ConsoleRedirector(self.console_output)
-            sys.stderr = self.ConsoleRedirector(self.console_output)
-            
-            # Execute code
-            exec(code, safe_globals, {})
+            if self.fm_location == 'vfs':
+                self.vfs.mkdir(self.fm_join(name))
+                self.vfs.flush()
+            else:
+                os.mkdir(self.fm_join(name))
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not create folder: {str(e)}")
+        self.fm_refresh()
+    
+    def fm_import_file(self):
+        """Copy host files into the mounted virtual disk"""
+        if self.fm_location != 'vfs':
+            messagebox.showinfo("Import", "Open a mounted virtual disk first")
+            return
+        filenames = filedialog.askopenfilenames(title="Import into virtual disk", parent=self.fm_window)
+        for filename in filenames:
+            try:
+                with open(filename, 'rb') as src, self.vfs.open(self.fm_join(os.path.basename(filename)), 'w') as dst:
+                    while True:
+                        chunk = src.read(1024 * 1024)
+                        if not chunk:
+                            break
+                        dst.write(chunk)
+            except OSError as e:
+                messagebox.showerror("Error", f"Could not import {filename}: {str(e)}")
+        self.vfs.flush()
+        self.fm_refresh()
+    
+    def fm_find_duplicates(self):
+        """Find duplicate files below the current host folder"""
+        if self.fm_location != 'host':
+            messagebox.showinfo("Find Duplicates", "Duplicate search works on host folders")
+            return
+        
+        window = tk.Toplevel(self.fm_window)
+        window.title(f"Duplicates - {self.fm_path}")
+        window.geometry("820x520")
+        root_path = self.fm_path
+        
+        controls = tk.Frame(window)
+        controls.pack(fill=tk.X, padx=5, pady=5)
+        tk.Label(controls, text="Parallel reads:").pack(side=tk.LEFT)
+        io_var = tk.StringVar(value=str(self.settings.get('dup_io_limit', 2)))
+        tk.Spinbox(controls, from_=1, to=16, textvariable=io_var, width=4).pack(side=tk.LEFT, padx=5)
+        tk.Label(controls, text="Min size (KB):").pack(side=tk.LEFT)
+        min_var = tk.StringVar(value="1")
+        tk.Entry(controls, textvariable=min_var, width=8).pack(side=tk.LEFT, padx=5)
+        
+        tree = ttk.Treeview(window, columns=('size', 'wasted'))
+        tree.heading('#0', text='File')
+        tree.heading('size', text='Size')
+        tree.heading('wasted', text='Wasted')
+        tree.column('#0', width=560)
+        tree.column('size', width=100, anchor=tk.E)
+        tree.column('wasted', width=100, anchor=tk.E)
+        scrollbar = ttk.Scrollbar(window, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        status = tk.Label(window, text="Press Start to search", anchor=tk.W, font=("Arial", 9))
+        status.pack(side=tk.BOTTOM, fill=tk.X, padx=5, pady=2)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        tree.pack(fill=tk.BOTH, expand=True, padx=5)
+        
+        state = {'finder': None, 'wasted': 0, 'groups': 0}
+        events = queue.Queue()
+        
+        def worker(finder):
+            try:
+                for event in finder.find():
+                    events.put(event)
+            except Exception as e:
+                events.put(('error', str(e)))
+        
+        def poll():
+            if not window.winfo_exists():
+                return
+            finished = False
+            for _ in range(500):
+                try:
+                    event = events.get_nowait()
+                except queue.Empty:
+                    break
+                kind = event[0]
+                if kind == 'scan':
+                    status.config(text=f"Scanned {event[1]} files, {event[2]} share a size with another file")
+                elif kind == 'progress':
+                    status.config(text=f"Hashing ({event[1]}): {event[2]}/{event[3]} | "
+                                       f"{state['groups']} groups, {self.format_size(state['wasted'])} wasted")
+                elif kind == 'group':
+                    _, size, digest, paths = event
+                    state['groups'] += 1
+                    state['wasted'] += size * (len(paths) - 1)
+                    group = tree.insert('', tk.END, iid=digest, open=True,
+                                        text=f"{len(paths)} copies of {os.path.basename(paths[0])}",
+                                        values=(self.format_size(size), self.format_size(size * (len(paths) - 1))))
+                    for path in sorted(paths):
+                        tree.insert(group, tk.END, text=path, values=(self.format_size(size), ""))
+                elif kind == 'done':
+                    stats = event[1]
+                    status.config(text=f"{'Cancelled' if stats['cancelled'] else 'Done'}: {stats.get('groups', 0)} groups, "
+                                       f"{self.format_size(state['wasted'])} wasted | {stats['files']} files, "
+                                       f"{stats.get('cached', 0)} hashes from cache, "
+                                       f"{self.format_size(stats.get('bytes_read', 0))} read in {stats['seconds']:.1f} s")
+                    finished = True
+                elif kind == 'error':
+                    status.config(text=f"Error: {event[1]}")
+                    finished = True
+            if finished:
+                state['finder'] = None
+            else:
+                window.after(100, poll)
+        
+        def start():
+            if state['finder'] is not None:
+                return
+            try:
+                io_limit = max(1, min(16, int(io_var.get())))
+                min_size = max(1, int(float(min_var.get()) * 1024))
+            except ValueError:
+                messagebox.showerror("Find Duplicates", "Enter numbers", parent=window)
+                return
+            self.settings['dup_io_limit'] = io_limit
+            self.save_settings()
+            tree.delete(*tree.get_children())
+            state.update(wasted=0, groups=0)
+            status.config(text="Scanning...")
+            state['finder'] = DuplicateFinder([root_path], min_size=min_size, io_limit=io_limit)
+            Thread(target=worker, args=(state['finder'],), daemon=True).start()
+            window.after(100, poll)
+        
+        def cancel():
+            if state['finder'] is not None:
+                state['finder'].cancel()
+        
+        def delete_selected():
+            paths = [tree.item(item, 'text') for item in tree.selection() if tree.parent(item)]
+            if not paths or not messagebox.askyesno(
+                    "Delete", f"Delete {len(paths)} selected files?", parent=window):
+                return
+            for item in [item for item in tree.selection() if tree.parent(item)]:
+                try:
+                    os.remove(tree.item(item, 'text'))
+                    tree.delete(item)
+                except OSError as e:
+                    messagebox.showerror("Error", f"Could not delete file: {str(e)}", parent=window)
+            self.fm_refresh()
+        
+        def show_in_folder(event):
+            item = tree.focus()
+            if item and tree.parent(item):
+                self.fm_navigate(os.path.dirname(tree.item(item, 'text')))
+        
+        tk.Button(controls, text="▶️ Start", command=start, bg="#2ecc71", fg="white").pack(side=tk.LEFT, padx=5)
+        tk.Button(controls, text="⏹️ Cancel", command=cancel, bg="#e74c3c", fg="white").pack(side=tk.LEFT, padx=5)
+        tk.Button(controls, text="🗑️ Delete Selected", command=delete_selected,
+                  bg="#95a5a6", fg="white").pack(side=tk.LEFT, padx=5)
+        tree.bind('<Double-1>', show_in_folder)
+        self.register_worker(window, cancel)
+    
+    def open_disk_usage(self, path=None):
+        """Disk usage of a folder: size list and treemap, rescanned incrementally"""
+        if path is None:
+            path = self.fm_path if getattr(self, 'fm_location', None) == 'host' else os.path.expanduser('~')
+        root_path = os.path.abspath(path)
+        
+        window = tk.Toplevel(self.root)
+        window.title(f"Disk Usage - {root_path}")
+        window.geometry("980x600")
+        
+        toolbar = tk.Frame(window, bg='#34495e')
+        toolbar.pack(fill=tk.X)
+        location = tk.Label(toolbar, text=root_path, bg='#34495e', fg="white", font=("Consolas", 10))
+        
+        panes = ttk.PanedWindow(window, orient=tk.HORIZONTAL)
+        panes.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        tree = ttk.Treeview(panes, columns=('size', 'percent', 'items'))
+        tree.heading('#0', text='Name')
+        tree.heading('size', text='Size')
+        tree.heading('percent', text='%')
+        tree.heading('items', text='Files')
+        tree.column('#0', width=200)
+        tree.column('size', width=80, anchor=tk.E)
+        tree.column('percent', width=50, anchor=tk.E)
+        tree.column('items', width=70, anchor=tk.E)
+        canvas = tk.Canvas(panes, bg="#2c3e50", highlightthickness=0)
+        panes.add(tree, weight=1)
+        panes.add(canvas, weight=2)
+        status = tk.Label(window, text="", anchor=tk.W, font=("Arial", 9))
+        status.pack(fill=tk.X, padx=5, pady=2)
+        
+        state = {'tree': None, 'node': 0, 'items': [], 'scanning': False, 'progress': (0, 0),
+                 'listing': 0, 'cancel': Event()}
+        colors = ["#3498db", "#2ecc71", "#e67e22", "#9b59b6", "#1abc9c", "#e74c3c", "#f1c40f", "#16a085"]
+        
+        def entries(du, node):
+            """(name, size, files, child node or None) for a directory, largest first (worker thread)"""
+            items = [(du.names[child], du.total[child], du.count[child], child) for child in du.children(node)]
+            try:
+                with os.scandir(du.path(node)) as it:
+                    for entry in it:
+                        try:
+                            if not entry.is_dir(follow_symlinks=False):
+                                items.append((entry.name, entry.stat(follow_symlinks=False).st_size, 1, None))
+                        except OSError:
+                            continue
+            except OSError:
+                pass
+            items.sort(key=lambda item: item[1], reverse=True)
+            return items
+        
+        def draw_treemap(event=None):
+            canvas.delete('all')
+            items = [item for item in state['items'][:300] if item[1] > 0]
+            width, height = canvas.winfo_width(), canvas.winfo_height()
+            rects = squarify([item[1] for item in items], 0, 0, width, height)
+            for i, ((name, size, _, child), (x, y, w, h)) in enumerate(zip(items, rects)):
+                color = colors[i % len(colors)] if child is not None else "#7f8c8d"
+                canvas.create_rectangle(x, y, x + w, y + h, fill=color, outline="#2c3e50",
+                                        tags=(f"item{i}",))
+                if w > 60 and h > 18:
+                    canvas.create_text(x + 4, y + 3, anchor=tk.NW, fill="white", font=("Arial", 8),
+                                       text=f"{name}\n{self.format_size(size)}" if h > 32 else name,
+                                       tags=(f"item{i}",))
+        
+        def show(node):
+            # Files are listed in a worker: a folder may hold hundreds of thousands of them
+            du = state['tree']
+            state['node'] = node
+            state['items'] = []
+            state['listing'] += 1
+            listing = state['listing']
+            location.config(text=du.path(node))
             
-            # Restore standard streams
-            sys.stdout = old_stdout
-            sys.stderr = old_stderr
+            def listed(items):
+                if listing != state['listing'] or not window.winfo_exists():
+                    return
+                state['items'] = items
+                tree.delete(*tree.get_children())
+                total = max(1, sum(item[1] for item in items))
+                for i, (name, size, files, child) in enumerate(items[:1000]):
+                    icon = "📁" if child is not None else "📄"
+                    tree.insert('', tk.END, iid=str(i), text=f"{icon} {name}",
+                                values=(self.format_size(size), f"{size * 100 / total:.1f}", files))
+                draw_treemap()
             
-            # Show success message
-            self.console_output.insert(tk.END, "\n" + "="*50 + "\n")
-            self.console_output.insert(tk.END, "✅ Code executed successfully!\n")
-            self.console_output.see(tk.END)
+            self.run_background_task(entries, listed, du, node)
+        
+        def open_item(index):
+            if 0 <= index < len(state['items']) and state['items'][index][3] is not None:
+                show(state['items'][index][3])
+        
+        def on_canvas_click(event):
+            for tag in canvas.gettags(canvas.find_withtag('current')):
+                if tag.startswith('item'):
+                    open_item(int(tag[4:]))
+        
+        def go_up():
+            if state['tree'] is not None and state['node'] > 0:
+                show(state['tree'].parent[state['node']])
+        
+        def update_progress():
+            if state['scanning'] and window.winfo_exists():
+                dirs, listed = state['progress']
+                status.config(text=f"Scanning... {dirs} folders ({listed} listed)")
+                window.after(200, update_progress)
+        
+        def scan():
+            cache = du_cache_path(root_path)
+            try:
+                previous = DiskUsageTree.load(cache)
+            except (OSError, ValueError, EOFError):
+                previous = None
+            du = scan_disk_usage(root_path, previous, cancel_event=state['cancel'],
+                                 progress=lambda dirs, listed: state.update(progress=(dirs, listed)))
+            if du is not None:
+                du.save(cache)
+            return du
+        
+        def on_scanned(du):
+            state['scanning'] = False
+            if du is None or not window.winfo_exists():
+                return
+            current = state['tree'].path(state['node']) if state['tree'] is not None else root_path
+            state['tree'] = du
+            node = du.find(current)
+            show(node if node is not None else 0)
+            stats = du.scan_stats
+            status.config(text=f"{self.format_size(du.total[0])} in {stats['files']} files, {stats['dirs']} folders | "
+                               f"scanned in {stats['seconds']:.2f} s, {stats.get('reused', 0)} unchanged folders "
+                               f"reused, {stats.get('listed', 0)} listed")
+        
+        def rescan():
+            if state['scanning']:
+                return
+            state['scanning'] = True
+            update_progress()
+            self.run_background_task(scan, on_scanned)
+        
+        tk.Button(toolbar, text="⬆️ Up", command=go_up, bg="#3498db", fg="white",
+                  font=("Arial", 9)).pack(side=tk.LEFT, padx=2, pady=4)
+        tk.Button(toolbar, text="🔄 Rescan", command=rescan, bg="#2ecc71", fg="white",
+                  font=("Arial", 9)).pack(side=tk.LEFT, padx=2, pady=4)
+        location.pack(side=tk.LEFT, padx=10)
+        tree.bind('<Double-1>', lambda e: open_item(int(tree.focus())) if tree.focus() else None)
+        tree.bind('<BackSpace>', lambda e: go_up())
+        canvas.bind('<Button-1>', on_canvas_click)
+        canvas.bind('<Button-3>', lambda e: go_up())
+        canvas.bind('<Configure>', draw_treemap)
+        self.register_worker(window, state['cancel'].set)
+        rescan()
+    
+    def fm_selected_host_paths(self, title):
+        """Selected host paths, or None after telling the user why not"""
+        if self.fm_location != 'host':
+            messagebox.showinfo(title, "Archives work on host folders", parent=self.fm_window)
+            return None
+        names = self.fm_selected_names()
+        if not names:
+            messagebox.showinfo(title, "Select files or folders first", parent=self.fm_window)
+            return None
+        return [self.fm_join(name) for name in names]
+    
+    def run_archive_job(self, title, task, on_done):
+        """Run task(job) in a worker with a progress window (bar, throughput, cancel)"""
+        window = tk.Toplevel(self.root)
+        window.title(title)
+        window.geometry("420x130")
+        bar = ttk.Progressbar(window, maximum=1000)
+        bar.pack(fill=tk.X, padx=15, pady=15)
+        label = tk.Label(window, text="Starting...", font=("Arial", 9))
+        label.pack()
+        job = ArchiveJob()
+        tk.Button(window, text="Cancel", command=job.cancel, bg="#e74c3c", fg="white").pack(pady=8)
+        window.protocol("WM_DELETE_WINDOW", job.cancel)
+        self.register_worker(window, job.cancel)
+        results = queue.Queue()
+        
+        def worker():
+            try:
+                results.put((True, task(job)))
+            except Exception as e:
+                results.put((False, e))
+        
+        def poll():
+            try:
+                ok, value = results.get_nowait()
+            except queue.Empty:
+                if job.total:
+                    bar['value'] = 1000 * min(1.0, job.done / job.total)
+                label.config(text=f"{self.format_size(job.done)} of {self.format_size(job.total)} | "
+                                  f"{self.format_size(job.throughput())}/s")
+                window.after(100, poll)
+                return
+            window.destroy()
+            if ok:
+                on_done(value)
+            elif isinstance(value, ArchiveCancelled):
+                self.fm_status.config(text=f"{title}: cancelled")
+            else:
+                messagebox.showerror("Error", str(value))
+        
+        Thread(target=worker, daemon=True).start()
+        window.after(100, poll)
+    
+    def fm_compress_selected(self):
+        """Pack the selected files and folders into an archive"""
+        sources = self.fm_selected_host_paths("Compress")
+        if not sources:
+            return
+        window = tk.Toplevel(self.fm_window)
+        window.title("Create Archive")
+        window.geometry("420x200")
+        
+        formats = archive_formats()
+        base = os.path.basename(sources[0]) if len(sources) == 1 else os.path.basename(self.fm_path)
+        name_var = tk.StringVar(value=f"{base}.{formats[0]}")
+        format_var = tk.StringVar(value=formats[0])
+        level_var = tk.StringVar(value=str(ARCHIVE_DEFAULT_LEVEL[formats[0]]))
+        workers_var = tk.StringVar(value=str(os.cpu_count() or 1))
+        
+        fields = [("Archive name:", tk.Entry(window, textvariable=name_var, width=30)),
+                  ("Format:", ttk.Combobox(window, textvariable=format_var, values=formats,
+                                           state='readonly', width=27)),
+                  ("Level:", tk.Spinbox(window, from_=0, to=22, textvariable=level_var, width=6)),
+                  ("Processes:", tk.Spinbox(window, from_=1, to=64, textvariable=workers_var, width=6))]
+        for row, (text, widget) in enumerate(fields):
+            tk.Label(window, text=text).grid(row=row, column=0, sticky=tk.W, padx=10, pady=4)
+            widget.grid(row=row, column=1, sticky=tk.W, padx=10, pady=4)
+        
+        def format_changed(event=None):
+            fmt = format_var.get()
+            level_var.set(str(ARCHIVE_DEFAULT_LEVEL[fmt]))
+            name = name_var.get()
+            old = archive_format(name)
+            stem = name[:-len(old) - 1] if old else name
+            name_var.set(f"{stem}.{fmt}")
+        fields[1][1].bind('<<ComboboxSelected>>', format_changed)
+        
+        def create():
+            try:
+                level, workers = int(level_var.get()), int(workers_var.get())
+            except ValueError:
+                messagebox.showerror("Create Archive", "Level and processes must be numbers", parent=window)
+                return
+            path = self.fm_join(name_var.get())
+            fmt = format_var.get()
+            window.destroy()
             
-        except Exception as e:
-            # Restore standard streams
-            sys.stdout = old_stdout
-            sys.stderr = old_stderr
+            def done(stats):
+                self.fm_refresh()
+                self.fm_status.config(text=f"Created {os.path.basename(path)}: {stats['files']} entries, "
+                                           f"{self.format_size(stats['input'])} -> {self.format_size(stats['output'])} "
+                                           f"in {stats['seconds']:.1f} s "
+                                           f"({self.format_size(stats['input'] / stats['seconds'])}/s)")
             
-            # Show error
-            error_msg = f"\n❌ Error: {str(e)}\n"
-            error_msg += "Traceback:\n"
-            error_msg += traceback.format_exc()
-            self.console_output.insert(tk.END, error_msg)
-            self.console_output.see(tk.END)
+            self.run_archive_job("Compress", lambda job: create_archive(path, sources, fmt, level, workers, job), done)
+        
+        buttons = tk.Frame(window)
+        buttons.grid(row=len(fields), column=0, columnspan=2, pady=10)
+        tk.Button(buttons, text="🗜️ Create", command=create, bg="#2ecc71", fg="white").pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="⏱️ Benchmark", command=lambda: (window.destroy(), self.fm_archive_benchmark(sources)),
+                  bg="#95a5a6", fg="white").pack(side=tk.LEFT, padx=5)
     
-    class ConsoleRedirector:
-        """Redirect output to console"""
-        def __init__(self, text_widget):
-            self.text_widget = text_widget
+    def fm_extract_selected(self):
+        """Extract the selected archive into a folder named after it"""
+        sources = self.fm_selected_host_paths("Extract")
+        if not sources:
+            return
+        path = sources[0]
+        fmt = archive_format(path)
+        if fmt is None:
+            messagebox.showinfo("Extract", "Not a zip, tar.gz, tar.xz or tar.zst archive", parent=self.fm_window)
+            return
+        dest = path[:-len(fmt) - 1]
         
-        def write(self, string):
-            self.text_widget.insert(tk.END, string)
-            self.text_widget.see(tk.END)
-            self.text_widget.update()
+        def done(stats):
+            self.fm_refresh()
+            self.fm_status.config(text=f"Extracted {stats['files']} entries ({self.format_size(stats['output'])}) "
+                                       f"into {os.path.basename(dest)} in {stats['seconds']:.1f} s")
         
-        def flush(self):
-            pass
-    
-    def stop_code(self):
-        """Stop code execution"""
-        self.console_output.insert(tk.END, "\n⏹️ Execution stopped\n")
+        self.run_archive_job("Extract", lambda job: extract_archive(path, dest, job), done)
     
-    def debug_code(self):
-        """Debug code"""
-        self.console_output.insert(tk.END, "\n🔍 Starting debug mode...\n")
-        self.console_output.insert(tk.END, "Debugger initialized\n")
-        self.console_output.insert(tk.END, "Set breakpoints in the code editor\n")
-        self.console_output.insert(tk.END, "Use 'Run' to execute with debugging\n")
+    def fm_archive_benchmark(self, sources=None):
+        """Compare formats and levels on the selection or a generated sample corpus"""
+        window = tk.Toplevel(self.root)
+        window.title("Archive Benchmark")
+        window.geometry("640x420")
+        output = scrolledtext.ScrolledText(window, font=("Consolas", 10))
+        output.pack(fill=tk.BOTH, expand=True)
+        output.insert(tk.END, f"{'format':<9}{'level':>6}{'procs':>6}{'ratio':>8}{'pack MB/s':>11}{'unpack MB/s':>13}\n")
+        rows = queue.Queue()
         
-        # Add debug info
-        debug_info = """
-Debug Commands Available:
-• Step Over (F10) - Execute current line
-• Step Into (F11) - Step into function
-• Step Out (Shift+F11) - Step out of function
-• Continue (F5) - Continue execution
-• Breakpoint (F9) - Toggle breakpoint
-
-Current Debug Status: Ready
-"""
-        self.console_output.insert(tk.END, debug_info)
-        self.console_output.see(tk.END)
+        def task():
+            with tempfile.TemporaryDirectory() as folder:
+                corpus = sources or archive_sample_corpus(os.path.join(folder, 'corpus'))
+                return benchmark_archives(corpus, folder, report=rows.put)
+        
+        def show_rows():
+            if not window.winfo_exists():
+                return
+            while True:
+                try:
+                    row = rows.get_nowait()
+                except queue.Empty:
+                    break
+                output.insert(tk.END, f"{row['format']:<9}{row['level']:>6}{row['workers']:>6}{row['ratio']:>8.3f}"
+                                      f"{row['compress_mb_s']:>11.1f}{row['extract_mb_s']:>13.1f}\n")
+            if state['finished']:
+                output.insert(tk.END, "Done\n")
+            else:
+                window.after(200, show_rows)
+        
+        def done(result):
+            state['finished'] = True
+        
+        state = {'finished': False}
+        show_rows()
+        self.run_background_task(task, done)
     
-    def new_code_file(self):
-        """Create new code file"""
-        filename = simpledialog.askstring("New File", "Enter filename (e.g., script.py):")
-        if filename:
-            if not filename.endswith('.py'):
-                filename += '.py'
-            self.create_editor_tab(filename)
+    def format_size(self, size):
+        """Human readable size"""
+        for unit in ("B", "KB", "MB", "GB"):
+            if size < 1024:
+                return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+            size /= 1024
+        return f"{size:.1f} TB"
     
-    def open_code_file(self):
-        """Open code file"""
-        filename = filedialog.askopenfilename(
-            title="Open Python File",
-            filetypes=[("Python files", "*.py"), ("Text files", "*.txt"), ("All files", "*.*")]
-        )
+    # ========== VIRTUAL DISK FUNCTIONS ==========
+    
+    def create_vfs_image(self):
+        """Format a new virtual disk image"""
+        filename = filedialog.asksaveasfilename(title="Create Virtual Disk", defaultextension=".img",
+                                                filetypes=[("Disk images", "*.img"), ("All files", "*.*")])
+        if not filename:
+            return
+        size = simpledialog.askinteger("Virtual Disk", "Size in MB:", initialvalue=64,
+                                       minvalue=1, maxvalue=65536)
+        if not size:
+            return
+        try:
+            VirtualFileSystem.format(filename, size).close()
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not create disk image: {str(e)}")
+            return
+        self.log_message(f"Virtual disk created: {filename} ({size} MB)")
+        self.mount_vfs(filename)
+    
+    def mount_vfs_dialog(self):
+        """Choose a disk image to mount"""
+        filename = filedialog.askopenfilename(title="Mount Virtual Disk",
+                                              filetypes=[("Disk images", "*.img"), ("All files", "*.*")])
         if filename:
-            try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Create new tab with file content
-                editor_frame = tk.Frame(self.dev_notebook, bg='#1e1e1e')
-                
-                text_area = scrolledtext.ScrolledText(editor_frame,
-                                                     bg="#1e1e1e", fg="#d4d4d4",
-                                                     font=("Consolas", 12),
-                                                     insertbackground="white",
-                                                     undo=True)
-                text_area.pack(fill=tk.BOTH, expand=True)
-                text_area.insert(tk.END, content)
-                
-                self.dev_notebook.add(editor_frame, text=os.path.basename(filename))
-                self.dev_notebook.select(editor_frame)
-                
-                self.console_output.insert(tk.END, f"\n📂 Opened file: {filename}\n")
-                
-            except Exception as e:
-                messagebox.showerror("Error", f"Could not open file: {str(e)}")
+            self.mount_vfs(filename)
     
-    def save_code_file(self):
-        """Save code file"""
-        current_tab = self.dev_notebook.select()
-        if current_tab:
-            tab_widget = self.dev_notebook.nametowidget(current_tab)
-            for child in tab_widget.winfo_children():
-                if isinstance(child, scrolledtext.ScrolledText):
-                    code = child.get("1.0", tk.END)
-                    
-                    filename = filedialog.asksaveasfilename(
-                        title="Save Python File",
-                        defaultextension=".py",
-                        filetypes=[("Python files", "*.py"), ("Text files", "*.txt"), ("All files", "*.*")]
-                    )
-                    
-                    if filename:
-                        try:
-                            with open(filename, 'w', encoding='utf-8') as f:
-                                f.write(code)
-                            
-                            # Update tab name
-                            tab_name = os.path.basename(filename)
-                            self.dev_notebook.tab(current_tab, text=tab_name)
-                            
-                            self.console_output.insert(tk.END, f"\n💾 Saved to: {filename}\n")
-                            messagebox.showinfo("Success", f"File saved successfully!\n{filename}")
-                            
-                        except Exception as e:
-                            messagebox.showerror("Error", f"Could not save file: {str(e)}")
-                    break
+    def mount_vfs(self, filename):
+        """Mount a disk image for the Terminal and File Manager"""
+        try:
+            vfs = VirtualFileSystem(filename)
+        except (OSError, ValueError, struct.error) as e:
+            messagebox.showerror("Error", f"Could not mount disk image: {str(e)}")
+            return
+        self.unmount_vfs()
+        self.vfs = vfs
+        self.log_message(f"Mounted {filename} at /vfs")
+        self.terminal_output.insert(tk.END, f"Mounted {os.path.basename(filename)} at /vfs\n")
+        self.terminal_output.see(tk.END)
+        if getattr(self, 'fm_window', None) is not None and self.fm_window.winfo_exists():
+            self.fm_navigate('vfs:/')
     
-    def clear_console(self):
-        """Clear console"""
-        self.console_output.delete(1.0, tk.END)
-        self.console_output.insert(tk.END, "Console cleared\n")
-        self.console_output.insert(tk.END, "="*50 + "\n")
+    def unmount_vfs(self):
+        """Flush and unmount the virtual disk"""
+        if not self.vfs:
+            return
+        path = self.vfs.path
+        self.vfs.close()
+        self.vfs = None
+        self.log_message(f"Unmounted {path}")
+        self.terminal_output.insert(tk.END, "Unmounted /vfs\n")
+        if getattr(self, 'fm_window', None) is not None and self.fm_window.winfo_exists() \
+                and self.fm_location == 'vfs':
+            self.fm_go_home()
     
-    # ========== HOME VERSION FUNCTIONS ==========
+    def check_vfs(self):
+        """Run fsck on the mounted virtual disk"""
+        if not self.vfs:
+            messagebox.showinfo("fsck", "No virtual disk mounted")
+            return
+        self.vfs.flush()
+        problems = self.vfs.fsck()
+        if not problems:
+            messagebox.showinfo("fsck", "File system is clean")
+            return
+        shown = "\n".join(problems[:20])
+        if messagebox.askyesno("fsck", f"{len(problems)} problems found:\n\n{shown}\n\nRepair now?"):
+            self.vfs.fsck(repair=True)
+            self.log_message(f"fsck repaired {self.vfs.path}")
+            if getattr(self, 'fm_window', None) is not None and self.fm_window.winfo_exists():
+                self.fm_refresh()
     
-    def open_file_manager(self):
-        """Open file manager"""
-        messagebox.showinfo("File Manager", "File Manager would open here\n(Simulated functionality in v1.2)")
+    def benchmark_vfs_dialog(self):
+        """Compare virtual disk throughput with the host file system"""
+        if not self.vfs:
+            messagebox.showinfo("Benchmark", "No virtual disk mounted")
+            return
+        size = min(64, self.vfs.usage()['free'] // (2 * 1024 * 1024))
+        if size < 1:
+            messagebox.showerror("Benchmark", "Not enough free space on virtual disk")
+            return
+        host_dir = os.path.dirname(os.path.abspath(self.vfs.path))
+        
+        def show(results):
+            messagebox.showinfo("Benchmark v1.2",
+                                f"Sequential throughput ({size} MB):\n\n"
+                                f"Virtual disk write: {results['vfs_write']:.0f} MB/s\n"
+                                f"Virtual disk read:  {results['vfs_read']:.0f} MB/s\n"
+                                f"Host write: {results['host_write']:.0f} MB/s\n"
+                                f"Host read:  {results['host_read']:.0f} MB/s")
+        
+        self.log_message("Virtual disk benchmark started")
+        self.run_background_task(benchmark_vfs, show, self.vfs, host_dir, size)
     
     def open_text_editor(self):
         """Open text editor"""
@@ -872,12 +9575,14 @@ Current Debug Status: Ready
         """Open calculator"""
         calc_window = tk.Toplevel(self.root)
         calc_window.title("Calculator v1.2")
-        calc_window.geometry("300x400")
+        calc_window.geometry("300x460")
         
         # Entry field
         entry_var = tk.StringVar()
+        mode_var = tk.StringVar(value="float")
         entry = tk.Entry(calc_window, textvariable=entry_var, font=("Arial", 20), justify='right')
         entry.grid(row=0, column=0, columnspan=4, sticky='nsew', padx=10, pady=10)
+        entry.bind('<Return>', lambda e: self.calculate(entry_var, mode_var))
         
         # Buttons
         buttons = [
@@ -885,7 +9590,7 @@ Current Debug Status: Ready
             '4', '5', '6', '*',
             '1', '2', '3', '-',
             '0', '.', '=', '+',
-            'C'
+            'C', '(', ')', '^'
         ]
         
         row = 1
@@ -893,7 +9598,7 @@ Current Debug Status: Ready
         for button in buttons:
             if button == '=':
                 tk.Button(calc_window, text=button, font=("Arial", 14),
-                         command=lambda: self.calculate(entry_var),
+                         command=lambda: self.calculate(entry_var, mode_var),
                          bg="#2ecc71", fg="white").grid(row=row, column=col, sticky='nsew', padx=2, pady=2)
             elif button == 'C':
                 tk.Button(calc_window, text=button, font=("Arial", 14),
@@ -908,27 +9613,424 @@ Current Debug Status: Ready
                 col = 0
                 row += 1
         
+        # Precision mode and function plotter
+        ttk.Combobox(calc_window, textvariable=mode_var, values=CALC_MODES, state='readonly',
+                     width=8).grid(row=row + 1, column=0, columnspan=2, sticky='nsew', padx=2, pady=2)
+        tk.Button(calc_window, text="📈 Plot", font=("Arial", 12),
+                  command=lambda: self.open_function_plotter(entry_var.get()),
+                  bg="#3498db", fg="white").grid(row=row + 1, column=2, columnspan=2, sticky='nsew', padx=2, pady=2)
+        
         # Configure column weights
         for i in range(4):
             calc_window.grid_columnconfigure(i, weight=1)
-        for i in range(6):
+        for i in range(row + 2):
             calc_window.grid_rowconfigure(i, weight=1)
     
-    def calculate(self, entry_var):
+    def calculate(self, entry_var, mode_var=None):
         """Perform calculation"""
+        mode = mode_var.get() if mode_var is not None else "float"
         try:
-            result = eval(entry_var.get())
-            entry_var.set(str(result))
-        except:
+            result = self.calculator.evaluate(entry_var.get(), mode)
+            entry_var.set(calc_format(result))
+        except (ValueError, OverflowError, RecursionError):
             entry_var.set("Error")
     
+    def open_function_plotter(self, expression=""):
+        """Tabulate and plot f(x) over a range"""
+        window = tk.Toplevel(self.root)
+        window.title("Function Plotter v1.2")
+        window.geometry("760x560")
+        
+        controls = tk.Frame(window)
+        controls.pack(fill=tk.X, padx=10, pady=10)
+        
+        fields = [("f(x) =", expression if 'x' in expression else "sin(x) * exp(-x / 5)", 28),
+                  ("from", "0", 6), ("to", "20", 6), ("points", "1000000", 9)]
+        variables = []
+        for label, default, width in fields:
+            tk.Label(controls, text=label, font=("Arial", 10)).pack(side=tk.LEFT)
+            var = tk.StringVar(value=default)
+            tk.Entry(controls, textvariable=var, width=width).pack(side=tk.LEFT, padx=(2, 8))
+            variables.append(var)
+        expr_var, start_var, stop_var, count_var = variables
+        
+        canvas = tk.Canvas(window, bg="white", height=300)
+        canvas.pack(fill=tk.X, padx=10)
+        table = scrolledtext.ScrolledText(window, height=10, font=("Consolas", 10))
+        table.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        def plot():
+            try:
+                start, stop = float(start_var.get()), float(stop_var.get())
+                count = max(2, min(int(count_var.get()), 50000000))
+                self.calculator.compile(expr_var.get())
+            except (ValueError, CalculatorError) as e:
+                messagebox.showerror("Plotter", str(e), parent=window)
+                return
+            table.delete(1.0, tk.END)
+            table.insert(tk.END, f"Evaluating {count} points...\n")
+            began = time.perf_counter()
+            
+            def done(result):
+                xs, ys = result
+                elapsed = time.perf_counter() - began
+                table.delete(1.0, tk.END)
+                table.insert(tk.END, f"{count} points in {elapsed * 1000:.0f} ms\n")
+                table.insert(tk.END, f"{'x':>16} {'f(x)':>20}\n")
+                step = max(1, count // 200)
+                for i in range(0, count, step):
+                    table.insert(tk.END, f"{float(xs[i]):>16.6g} {float(ys[i]):>20.10g}\n")
+                self.draw_function(canvas, ys)
+            
+            self.run_background_task(self.calculator.evaluate_range, done,
+                                     expr_var.get(), 'x', start, stop, count)
+        
+        tk.Button(controls, text="📈 Plot", command=plot, bg="#2ecc71", fg="white").pack(side=tk.LEFT)
+        window.after(100, plot)
+    
+    def draw_function(self, canvas, ys):
+        """Draw a min/max envelope with one vertical segment per pixel column"""
+        canvas.delete("all")
+        width = max(canvas.winfo_width(), 200)
+        height = max(canvas.winfo_height(), 100)
+        columns = min(width - 20, len(ys))
+        
+        # Per-column minimum and maximum of the finite values
+        if np is not None:
+            values = np.asarray(ys, dtype=float)
+            edges = np.linspace(0, len(values), columns + 1).astype(np.int64)[:-1]
+            finite = np.where(np.isfinite(values), values, np.nan)
+            with np.errstate(all='ignore'):
+                lows = np.fmin.reduceat(finite, edges)
+                highs = np.fmax.reduceat(finite, edges)
+            pairs = list(zip(lows.tolist(), highs.tolist()))
+        else:
+            pairs = []
+            for c in range(columns):
+                chunk = [v for v in ys[c * len(ys) // columns:(c + 1) * len(ys) // columns]
+                         if math.isfinite(v)]
+                pairs.append((min(chunk), max(chunk)) if chunk else (math.nan, math.nan))
+        
+        finite_pairs = [p for p in pairs if math.isfinite(p[0])]
+        if not finite_pairs:
+            canvas.create_text(width // 2, height // 2, text="No finite values")
+            return
+        bottom = min(p[0] for p in finite_pairs)
+        top = max(p[1] for p in finite_pairs)
+        span = (top - bottom) or 1.0
+        
+        def y_of(value):
+            return height - 10 - (height - 20) * (value - bottom) / span
+        
+        if bottom < 0 < top:
+            canvas.create_line(10, y_of(0), width - 10, y_of(0), fill="#bdc3c7")
+        for column, (low, high) in enumerate(pairs):
+            if math.isfinite(low):
+                x = 10 + column
+                canvas.create_line(x, y_of(high), x, y_of(low) + 1, fill="#2980b9")
+        canvas.create_text(12, 10, text=f"{top:.4g}", anchor=tk.NW, font=("Arial", 8))
+        canvas.create_text(12, height - 10, text=f"{bottom:.4g}", anchor=tk.SW, font=("Arial", 8))
+    
     def open_games(self):
-        """Open games"""
-        messagebox.showinfo("Games", "Games would open here\n(Simulated functionality in v1.2)")
+        """Snake, Tetris and Breakout on the fixed-timestep game loop"""
+        window = tk.Toplevel(self.root)
+        window.title("Games v1.2")
+        window.resizable(False, False)
+        
+        sidebar = tk.Frame(window, bg="#2c3e50")
+        sidebar.pack(side=tk.LEFT, fill=tk.Y)
+        canvas = tk.Canvas(window, width=Game.width, height=Game.height, bg="#0b0f14", highlightthickness=0)
+        canvas.pack(side=tk.LEFT)
+        help_var = tk.StringVar()
+        
+        keys = InputBuffer(canvas)
+        scene = Scene(canvas)
+        arcade = {'loop': None, 'game': None, 'overlay': True}
+        overlay = tk.Label(window, anchor=tk.W, font=("Consolas", 9), bg="#0b0f14", fg="#2ecc71")
+        
+        def start(game_class):
+            if arcade['loop'] is not None:
+                arcade['loop'].stop()
+            arcade['game'] = game_class(scene, keys)
+            arcade['loop'] = GameLoop(canvas, arcade['game'])
+            arcade['loop'].start()
+            help_var.set(f"{game_class.title}\n\n{game_class.help}\n\nP pause, F3 stats")
+            canvas.focus_set()
+        
+        def toggle_pause(event=None):
+            if arcade['loop'] is not None:
+                arcade['loop'].paused = not arcade['loop'].paused
+        
+        def toggle_overlay(event=None):
+            arcade['overlay'] = not arcade['overlay']
+            if arcade['overlay']:
+                overlay.place(x=sidebar.winfo_width() + 6, y=6)
+            else:
+                overlay.place_forget()
+        
+        def update_overlay():
+            if not window.winfo_exists():
+                return
+            loop = arcade['loop']
+            if loop is not None and arcade['overlay']:
+                fps, mean, worst, update, render = loop.stats()
+                overlay.config(text=f"{fps:5.1f} FPS  frame {mean:5.2f} ms (max {worst:5.1f})  "
+                                    f"update {update:4.2f} ms  render {render:4.2f} ms  "
+                                    f"{len(scene.sprites)} sprites  {scene.operations} item updates"
+                                    f"{'  PAUSED' if loop.paused else ''}\n{arcade['game'].status()}")
+            window.after(250, update_overlay)
+        
+        def stop_loop():
+            if arcade['loop'] is not None:
+                arcade['loop'].stop()
+        
+        tk.Label(sidebar, text="🎮 Games", bg="#2c3e50", fg="white", font=("Arial", 14, "bold")).pack(pady=10, padx=10)
+        for game_class, color in zip(GAMES, ("#27ae60", "#8e44ad", "#d35400")):
+            tk.Button(sidebar, text=game_class.title, width=12, bg=color, fg="white", font=("Arial", 11),
+                      command=lambda game_class=game_class: start(game_class)).pack(pady=4, padx=10)
+        tk.Label(sidebar, textvariable=help_var, bg="#2c3e50", fg="#bdc3c7", wraplength=130,
+                 justify=tk.LEFT, font=("Arial", 9)).pack(pady=10, padx=10)
+        
+        canvas.bind('<p>', toggle_pause, add=True)
+        canvas.bind('<F3>', toggle_overlay, add=True)
+        canvas.bind('<Button-1>', lambda event: canvas.focus_set())
+        self.register_worker(window, stop_loop)
+        window.after(50, lambda: overlay.place(x=sidebar.winfo_width() + 6, y=6))
+        window.after(250, update_overlay)
+        start(SnakeGame)
     
-    def open_media_player(self):
-        """Open media player"""
-        messagebox.showinfo("Media Player", "Media Player would open here\n(Simulated functionality in v1.2)")
+    def open_media_player(self, path=None):
+        """WAV waveform viewer: memory-mapped PCM, cached min/max pyramid, spectrogram worker"""
+        window = tk.Toplevel(self.root)
+        window.title("Media Player v1.2")
+        window.geometry("1000x660")
+        
+        toolbar = tk.Frame(window)
+        toolbar.pack(fill=tk.X, padx=10, pady=8)
+        spectrogram_var = tk.BooleanVar(value=np is not None)
+        info_var = tk.StringVar(value="Open a WAV file")
+        status_var = tk.StringVar(value="")
+        
+        canvas = tk.Canvas(window, bg="#1c2833", height=300, highlightthickness=0)
+        canvas.pack(fill=tk.BOTH, expand=True, padx=10)
+        spectrum = tk.Canvas(window, bg="black", height=180, highlightthickness=0)
+        spectrum.pack(fill=tk.X, padx=10, pady=(4, 0))
+        scrollbar = tk.Scrollbar(window, orient=tk.HORIZONTAL)
+        scrollbar.pack(fill=tk.X, padx=10)
+        tk.Label(window, textvariable=status_var, anchor=tk.W, font=("Consolas", 9)).pack(fill=tk.X, padx=10, pady=(0, 6))
+        
+        view = {'wav': None, 'pyramid': None, 'start': 0.0, 'span': 1.0, 'cancel': Event(),
+                'executor': None, 'generation': 0, 'job': None, 'image': None, 'drag': None}
+        events = queue.Queue()
+        
+        def format_time(seconds):
+            minutes, seconds = divmod(seconds, 60)
+            hours, minutes = divmod(int(minutes), 60)
+            return f"{hours}:{minutes:02d}:{seconds:06.3f}" if hours else f"{minutes}:{seconds:06.3f}"
+        
+        def clamp_view():
+            wav = view['wav']
+            view['span'] = min(max(view['span'], 16), wav.frames)
+            view['start'] = min(max(view['start'], 0), wav.frames - view['span'])
+        
+        def redraw():
+            canvas.delete('all')
+            wav, pyramid = view['wav'], view['pyramid']
+            if pyramid is None:
+                return
+            clamp_view()
+            width, height = canvas.winfo_width() or 980, canvas.winfo_height() or 300
+            start, span = view['start'], view['span']
+            columns = pyramid.columns(start, start + span, width)
+            count = len(columns)
+            ruler = 18
+            lane = (height - ruler) / wav.channels
+            for channel in range(wav.channels):
+                middle = ruler + lane * (channel + 0.5)
+                scale = lane / 2 - 4
+                canvas.create_line(0, middle, width, middle, fill="#34495e")
+                points = []
+                for index in range(count):
+                    x = index * width / count
+                    low, high = columns[index][channel]
+                    points.extend((x, middle - float(high) * scale, x, middle - float(low) * scale))
+                if len(points) >= 4:
+                    canvas.create_line(*points, fill="#2ecc71")
+            
+            # Time ruler with roughly 100 pixels between ticks
+            seconds = span / wav.rate
+            step = 10 ** math.floor(math.log10(max(seconds * 100 / width, 1e-6)))
+            for factor in (1, 2, 5, 10):
+                if seconds / (step * factor) * 100 <= width:
+                    step *= factor
+                    break
+            tick = math.ceil(start / wav.rate / step) * step
+            while tick * wav.rate < start + span:
+                x = (tick * wav.rate - start) * width / span
+                canvas.create_line(x, 0, x, ruler, fill="#95a5a6")
+                canvas.create_text(x + 3, 2, anchor=tk.NW, text=format_time(tick), fill="#ecf0f1", font=("Arial", 8))
+                tick += step
+            scrollbar.set(start / wav.frames, (start + span) / wav.frames)
+            status_var.set(f"{format_time(start / wav.rate)} – {format_time((start + span) / wav.rate)}   "
+                           f"{span / width:,.1f} frames/pixel")
+            schedule_spectrogram()
+        
+        def schedule_spectrogram():
+            if view['job'] is not None:
+                window.after_cancel(view['job'])
+            view['job'] = window.after(150, request_spectrogram)
+        
+        def request_spectrogram():
+            view['job'] = None
+            view['generation'] += 1
+            spectrum.delete('all')
+            if not spectrogram_var.get() or view['pyramid'] is None:
+                return
+            if np is None:
+                spectrum.create_text(10, 10, anchor=tk.NW, fill="white", text="Spectrogram needs NumPy")
+                return
+            if view['executor'] is None:
+                view['executor'] = process_pool(1)
+            width, height = spectrum.winfo_width() or 980, spectrum.winfo_height() or 180
+            start = int(view['start'])
+            future = view['executor'].submit(wav_spectrogram, view['wav'].path, start, start + int(view['span']),
+                                             width, height)
+            generation = view['generation']
+            
+            def wait():
+                if not window.winfo_exists() or generation != view['generation']:
+                    return
+                if not future.done():
+                    window.after(30, wait)
+                    return
+                try:
+                    view['image'] = tk.PhotoImage(data=future.result(), format='PPM')
+                except Exception as e:
+                    spectrum.create_text(10, 10, anchor=tk.NW, fill="white", text=f"Spectrogram failed: {e}")
+                    return
+                spectrum.create_image(0, 0, anchor=tk.NW, image=view['image'])
+            window.after(30, wait)
+        
+        def zoom(factor, x=None):
+            if view['pyramid'] is None:
+                return
+            width = canvas.winfo_width() or 980
+            anchor = view['start'] + view['span'] * ((x if x is not None else width / 2) / width)
+            view['span'] *= factor
+            clamp_view()
+            view['start'] = anchor - view['span'] * ((x if x is not None else width / 2) / width)
+            redraw()
+        
+        def fit():
+            if view['pyramid'] is not None:
+                view['start'], view['span'] = 0, view['wav'].frames
+                redraw()
+        
+        def on_scroll(*args):
+            if view['pyramid'] is None:
+                return
+            if args[0] == 'moveto':
+                view['start'] = float(args[1]) * view['wav'].frames
+            elif args[0] == 'scroll':
+                view['start'] += int(args[1]) * view['span'] * (0.9 if args[2] == 'pages' else 0.1)
+            redraw()
+        scrollbar.config(command=on_scroll)
+        
+        def on_wheel(event):
+            if getattr(event, 'num', None) == 4 or getattr(event, 'delta', 0) > 0:
+                zoom(0.8, event.x)
+            else:
+                zoom(1.25, event.x)
+        
+        def on_press(event):
+            view['drag'] = (event.x, view['start'])
+        
+        def on_drag(event):
+            if view['drag'] is None or view['pyramid'] is None:
+                return
+            x, start = view['drag']
+            view['start'] = start - (event.x - x) * view['span'] / (canvas.winfo_width() or 980)
+            redraw()
+        
+        def on_motion(event):
+            if view['pyramid'] is not None:
+                frame = view['start'] + view['span'] * event.x / (canvas.winfo_width() or 980)
+                info_var.set(f"{os.path.basename(view['wav'].path)}  ⏱ {format_time(frame / view['wav'].rate)}")
+        
+        def load(path):
+            view['cancel'].set()
+            view['cancel'] = Event()
+            cancel = view['cancel']
+            status_var.set("Opening...")
+            
+            def work():
+                try:
+                    wav = WavFile(path)
+                    pyramid = WaveformPyramid.open(
+                        wav, lambda done, total: events.put(('progress', f"Building peaks {100 * done // max(total, 1)}%")),
+                        cancel)
+                    events.put(('ready', (wav, pyramid)) if pyramid is not None else ('status', "Cancelled"))
+                except (OSError, ValueError) as e:
+                    events.put(('error', str(e)))
+            Thread(target=work, daemon=True).start()
+        
+        def open_file():
+            path = filedialog.askopenfilename(parent=window, filetypes=[("WAV audio", "*.wav *.wave"), ("All files", "*.*")])
+            if path:
+                load(path)
+        
+        def poll():
+            if not window.winfo_exists():
+                return
+            while True:
+                try:
+                    kind, value = events.get_nowait()
+                except queue.Empty:
+                    break
+                if kind in ('progress', 'status'):
+                    status_var.set(value)
+                elif kind == 'error':
+                    status_var.set("")
+                    messagebox.showerror("Media Player", value, parent=window)
+                elif kind == 'ready':
+                    if view['wav'] is not None:
+                        view['wav'].close()
+                    view['wav'], view['pyramid'] = value
+                    wav = view['wav']
+                    info_var.set(f"{os.path.basename(wav.path)}  {wav.channels} ch  {wav.rate} Hz  "
+                                 f"{8 * wav.width} bit{' float' if wav.float else ''}  {format_time(wav.duration)}  "
+                                 f"{self.format_size(os.path.getsize(wav.path))}")
+                    fit()
+            window.after(100, poll)
+        
+        def release():
+            view['cancel'].set()
+            if view['executor'] is not None:
+                view['executor'].shutdown(wait=False, cancel_futures=True)
+            if view['wav'] is not None:
+                view['wav'].close()
+        
+        tk.Button(toolbar, text="📂 Open WAV", command=open_file, bg="#3498db", fg="white",
+                  font=("Arial", 10)).pack(side=tk.LEFT, padx=(0, 5))
+        tk.Button(toolbar, text="➕", width=3, command=lambda: zoom(0.5)).pack(side=tk.LEFT, padx=2)
+        tk.Button(toolbar, text="➖", width=3, command=lambda: zoom(2)).pack(side=tk.LEFT, padx=2)
+        tk.Button(toolbar, text="⤢ Fit", command=fit).pack(side=tk.LEFT, padx=2)
+        tk.Checkbutton(toolbar, text="Spectrogram", variable=spectrogram_var,
+                       command=schedule_spectrogram).pack(side=tk.LEFT, padx=10)
+        tk.Label(toolbar, textvariable=info_var, anchor=tk.W, font=("Arial", 10)).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        canvas.bind('<MouseWheel>', on_wheel)
+        canvas.bind('<Button-4>', on_wheel)
+        canvas.bind('<Button-5>', on_wheel)
+        canvas.bind('<ButtonPress-1>', on_press)
+        canvas.bind('<B1-Motion>', on_drag)
+        canvas.bind('<ButtonRelease-1>', lambda event: view.update(drag=None))
+        canvas.bind('<Motion>', on_motion)
+        canvas.bind('<Configure>', lambda event: redraw())
+        self.register_worker(window, release)
+        window.after(100, poll)
+        if path:
+            load(path)
     
     # ========== PRO VERSION FUNCTIONS ==========
     
@@ -1019,13 +10121,615 @@ Overall Status: ✅ All systems operational
     
     # ========== EDU VERSION FUNCTIONS ==========
     
-    def start_quiz(self):
-        """Start quiz"""
-        messagebox.showinfo("Quiz v1.2", "Starting OS Basics Quiz...\n(Simulated quiz interface)")
+    def start_quiz(self, questions=None):
+        """Multiple-choice quiz from the quiz blocks of the selected course (the first course by default)"""
+        if questions is None:
+            folder = self.edu_state['course']
+            if folder is None and self.edu_state['courses']:
+                folder = self.edu_state['courses'][0][1]
+            if folder:
+                self.run_background_task(self.course_library.quiz, self.start_quiz, folder)
+                return
+            questions = []
+        if not questions:
+            messagebox.showinfo("Quiz v1.2", "This course has no quiz questions yet.\n"
+                                             "Add a ```quiz block to one of its lessons.")
+            return
+        
+        window = tk.Toplevel(self.root)
+        window.title("Quiz v1.2")
+        window.geometry("560x380")
+        progress = tk.Label(window, text="", font=("Arial", 10), fg="#7f8c8d")
+        progress.pack(anchor=tk.W, padx=20, pady=(15, 0))
+        question_label = tk.Label(window, text="", font=("Arial", 13, "bold"), wraplength=520, justify=tk.LEFT)
+        question_label.pack(anchor=tk.W, padx=20, pady=10)
+        options_frame = tk.Frame(window)
+        options_frame.pack(fill=tk.X, padx=30)
+        feedback = tk.Label(window, text="", font=("Arial", 11), wraplength=520, justify=tk.LEFT)
+        feedback.pack(anchor=tk.W, padx=20, pady=10)
+        button = tk.Button(window, text="Check", bg="#3498db", fg="white", font=("Arial", 11), width=12)
+        button.pack(pady=5)
+        
+        choice = tk.IntVar(value=-1)
+        state = {'index': 0, 'score': 0, 'answered': False, 'missed': []}
+        
+        def show():
+            question, options, _, lesson = questions[state['index']]
+            progress.config(text=f"Question {state['index'] + 1} of {len(questions)}   ·   {lesson}")
+            question_label.config(text=question)
+            for child in options_frame.winfo_children():
+                child.destroy()
+            choice.set(-1)
+            for index, option in enumerate(options):
+                tk.Radiobutton(options_frame, text=option, variable=choice, value=index, font=("Arial", 11),
+                               anchor=tk.W, justify=tk.LEFT, wraplength=480).pack(fill=tk.X, anchor=tk.W)
+            feedback.config(text="")
+            button.config(text="Check")
+            state['answered'] = False
+        
+        def step():
+            question, options, correct, lesson = questions[state['index']]
+            if not state['answered']:
+                if choice.get() < 0:
+                    return
+                state['answered'] = True
+                if choice.get() == correct:
+                    state['score'] += 1
+                    feedback.config(text="✅ Correct!", fg="#27ae60")
+                else:
+                    state['missed'].append(lesson)
+                    feedback.config(text=f"❌ The answer is: {options[correct]}", fg="#c0392b")
+                button.config(text="Next" if state['index'] + 1 < len(questions) else "Finish")
+                return
+            state['index'] += 1
+            if state['index'] < len(questions):
+                show()
+                return
+            for child in options_frame.winfo_children():
+                child.destroy()
+            progress.config(text="")
+            question_label.config(text=f"Score: {state['score']} / {len(questions)}")
+            review = sorted(set(state['missed']))
+            feedback.config(text="Perfect score!" if not review else "Worth another look: " + ", ".join(review),
+                            fg="#2c3e50")
+            button.config(text="Close", command=window.destroy)
+        
+        button.config(command=step)
+        show()
     
     def coding_challenge(self):
-        """Coding challenge"""
-        messagebox.showinfo("Coding Challenge v1.2", "Opening coding challenge...\nTry the Fibonacci sequence exercise!")
+        """Coding challenges judged against hidden tests"""
+        window = tk.Toplevel(self.root)
+        window.title("Coding Challenge v1.2")
+        window.geometry("860x600")
+        
+        left = tk.Frame(window)
+        left.pack(side=tk.LEFT, fill=tk.Y, padx=10, pady=10)
+        tk.Label(left, text="Challenges", font=("Arial", 12, "bold")).pack(anchor=tk.W)
+        challenge_list = tk.Listbox(left, width=22, height=8, font=("Arial", 11), exportselection=False)
+        challenge_list.pack(fill=tk.Y)
+        names = list(CHALLENGES)
+        for name in names:
+            challenge_list.insert(tk.END, CHALLENGES[name]['title'])
+        
+        right = tk.Frame(window)
+        right.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
+        description = tk.Label(right, text="", justify=tk.LEFT, anchor=tk.W, font=("Arial", 11))
+        description.pack(fill=tk.X)
+        
+        buttons = tk.Frame(right)
+        buttons.pack(fill=tk.X, pady=8)
+        
+        results = ttk.Treeview(right, columns=('verdict', 'time', 'memory'), height=10)
+        results.heading('#0', text='Test')
+        results.heading('verdict', text='Verdict')
+        results.heading('time', text='Time')
+        results.heading('memory', text='Peak memory')
+        results.column('#0', width=150)
+        results.column('verdict', width=220)
+        results.column('time', width=100, anchor=tk.E)
+        results.column('memory', width=110, anchor=tk.E)
+        results.tag_configure('pass', foreground="#27ae60")
+        results.tag_configure('fail', foreground="#c0392b")
+        results.pack(fill=tk.BOTH, expand=True)
+        summary = tk.Label(right, text="", justify=tk.LEFT, anchor=tk.W, font=("Consolas", 10))
+        summary.pack(fill=tk.X, pady=5)
+        
+        state = {'judge': None}
+        events = queue.Queue()
+        
+        def selected():
+            selection = challenge_list.curselection()
+            return names[selection[0]] if selection else names[0]
+        
+        def show_challenge(event=None):
+            spec = CHALLENGES[selected()]
+            description.config(text=spec['description'])
+        
+        def open_starter():
+            spec = CHALLENGES[selected()]
+            self.create_editor_tab(f"{selected()}.py", spec['starter'])
+            self.notebook.select(self.dev_frame)
+        
+        def submit():
+            if state['judge'] is not None:
+                return
+            current_tab = self.dev_notebook.select()
+            code = None
+            if current_tab:
+                text_area = self.tab_editor(current_tab)
+                if text_area is not None:
+                    code = text_area.get("1.0", tk.END)
+            if not code or not code.strip():
+                messagebox.showinfo("Coding Challenge", "Open the challenge in the editor and write a solution first",
+                                    parent=window)
+                return
+            results.delete(*results.get_children())
+            for index, (name, _, _) in enumerate(CHALLENGES[selected()]['tests']):
+                results.insert('', tk.END, iid=str(index), text=name, values=("running...", "", ""))
+            summary.config(text="Judging...")
+            judge = Judge(selected(), code)
+            state['judge'] = judge
+            
+            def work():
+                verdicts = judge.run(lambda *row: events.put(('case',) + row))
+                events.put(('status', "Measuring complexity..."))
+                growth, points = judge.complexity()
+                events.put(('done', verdicts, growth, points))
+            
+            Thread(target=work, daemon=True).start()
+            window.after(100, poll)
+        
+        def poll():
+            if not window.winfo_exists():
+                if state['judge'] is not None:
+                    state['judge'].cancel()
+                return
+            while True:
+                try:
+                    event = events.get_nowait()
+                except queue.Empty:
+                    break
+                if event[0] == 'case':
+                    _, index, name, verdict, seconds, peak, detail = event
+                    text = f"{verdict}: {detail}" if detail else verdict
+                    results.item(str(index), values=(text, f"{seconds * 1000:.1f} ms",
+                                                      self.format_size(peak) if peak else ""),
+                                 tags=('pass' if verdict == 'Accepted' else 'fail',))
+                elif event[0] == 'status':
+                    summary.config(text=event[1])
+                elif event[0] == 'done':
+                    _, verdicts, growth, points = event
+                    passed = sum(1 for row in verdicts if row and row[1] == 'Accepted')
+                    lines = [f"{'✅ Accepted' if passed == len(verdicts) else '❌ Not accepted'}: "
+                             f"{passed}/{len(verdicts)} tests passed"]
+                    if growth:
+                        lines.append(f"Measured complexity: {growth}   "
+                                     + "  ".join(f"n={size}: {seconds * 1000:.2f} ms" for size, seconds in points[-4:]))
+                    summary.config(text="\n".join(lines))
+                    state['judge'] = None
+                    return
+            window.after(100, poll)
+        
+        tk.Button(buttons, text="📝 Open in Editor", command=open_starter, bg="#3498db", fg="white",
+                  font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="🏁 Submit Current Editor", command=submit, bg="#2ecc71", fg="white",
+                  font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="⏹️ Cancel", command=lambda: state['judge'] and state['judge'].cancel(),
+                  bg="#e74c3c", fg="white", font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
+        challenge_list.bind('<<ListboxSelect>>', show_challenge)
+        self.register_worker(window, lambda: state['judge'] is not None and state['judge'].cancel())
+        challenge_list.selection_set(0)
+        show_challenge()
+    
+    def open_network_lab(self):
+        """asyncio / selectors / threads servers and a load generator on loopback"""
+        window = tk.Toplevel(self.root)
+        window.title("Network Lab v1.2")
+        window.geometry("900x660")
+        
+        controls = tk.Frame(window)
+        controls.pack(fill=tk.X, padx=10, pady=8)
+        mode_var = tk.StringVar(value='asyncio')
+        protocol_var = tk.StringVar(value='echo')
+        connections_var = tk.StringVar(value="1000")
+        duration_var = tk.StringVar(value="5")
+        tk.Label(controls, text="Server:").pack(side=tk.LEFT)
+        ttk.Combobox(controls, textvariable=mode_var, values=NET_MODES, state='readonly',
+                     width=10).pack(side=tk.LEFT, padx=(2, 10))
+        tk.Label(controls, text="Protocol:").pack(side=tk.LEFT)
+        ttk.Combobox(controls, textvariable=protocol_var, values=NET_PROTOCOLS, state='readonly',
+                     width=7).pack(side=tk.LEFT, padx=(2, 10))
+        tk.Label(controls, text="Connections:").pack(side=tk.LEFT)
+        tk.Entry(controls, textvariable=connections_var, width=7).pack(side=tk.LEFT, padx=(2, 10))
+        tk.Label(controls, text="Seconds:").pack(side=tk.LEFT)
+        tk.Entry(controls, textvariable=duration_var, width=4).pack(side=tk.LEFT, padx=(2, 10))
+        
+        buttons = tk.Frame(window)
+        buttons.pack(fill=tk.X, padx=10)
+        
+        chart = tk.Canvas(window, bg="white", height=260)
+        chart.pack(fill=tk.X, padx=10, pady=8)
+        
+        client = tk.Frame(window)
+        client.pack(fill=tk.X, padx=10)
+        tk.Label(client, text="Client:").pack(side=tk.LEFT)
+        message_var = tk.StringVar(value="hello")
+        message_entry = tk.Entry(client, textvariable=message_var, font=("Consolas", 10))
+        message_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        
+        log = scrolledtext.ScrolledText(window, height=10, bg="#1c2833", fg="#ecf0f1", font=("Consolas", 10))
+        log.pack(fill=tk.BOTH, expand=True, padx=10, pady=8)
+        
+        lab = {'server': None, 'busy': False, 'samples': [], 'cancel': Event()}
+        events = queue.Queue()
+        
+        def report(text):
+            log.insert(tk.END, text + "\n")
+            log.see(tk.END)
+        
+        def draw_chart():
+            chart.delete('all')
+            samples = lab['samples']
+            width, height = chart.winfo_width() or 880, 260
+            margin = 45
+            half = (height - 30) // 2
+            chart.create_text(margin, 8, anchor=tk.NW, text="requests/s", fill="#2980b9", font=("Arial", 9, "bold"))
+            chart.create_text(margin, half + 22, anchor=tk.NW, text="latency ms: p50 / p90 / p99",
+                              fill="#c0392b", font=("Arial", 9, "bold"))
+            if len(samples) < 2:
+                return
+            span = max(sample['time'] for sample in samples) or 1
+            panels = [(10, ['rps'], ["#2980b9"], 1), (half + 20, ['p50', 'p90', 'p99'],
+                                                      ["#27ae60", "#e67e22", "#c0392b"], 1000)]
+            for top, keys, colors, scale in panels:
+                peak = max(max(sample[key] for sample in samples) * scale for key in keys) or 1
+                chart.create_text(margin - 4, top, anchor=tk.NE, text=f"{peak:,.0f}" if peak >= 10 else f"{peak:.2f}",
+                                  font=("Arial", 8))
+                chart.create_line(margin, top + half, width - 10, top + half, fill="#bdc3c7")
+                for key, color in zip(keys, colors):
+                    points = []
+                    for sample in samples:
+                        points.append(margin + (width - margin - 10) * sample['time'] / span)
+                        points.append(top + half - (half - 12) * sample[key] * scale / peak)
+                    chart.create_line(*points, fill=color, width=2)
+        
+        def poll():
+            if not window.winfo_exists():
+                return
+            while True:
+                try:
+                    kind, value = events.get_nowait()
+                except queue.Empty:
+                    break
+                if kind == 'sample':
+                    lab['samples'].append(value)
+                    draw_chart()
+                elif kind == 'reset':
+                    lab['samples'] = []
+                elif kind == 'log':
+                    report(value)
+                elif kind == 'done':
+                    lab['busy'] = False
+            window.after(100, poll)
+        
+        def settings():
+            try:
+                return max(1, int(connections_var.get())), max(1.0, float(duration_var.get()))
+            except ValueError:
+                messagebox.showerror("Network Lab", "Enter numbers", parent=window)
+                return None
+        
+        def summary_line(result):
+            return (f"{result['mode']:<10}{result['protocol']:<6}{result['connections']:>7} conns "
+                    f"{result['rps']:>10,.0f} req/s  p50 {result['p50'] * 1000:7.2f} ms  "
+                    f"p99 {result['p99'] * 1000:7.2f} ms  errors {result['errors']}")
+        
+        def start_job(task):
+            if lab['busy']:
+                return
+            lab['busy'] = True
+            lab['cancel'] = Event()
+            
+            def work():
+                try:
+                    task()
+                except Exception as e:
+                    events.put(('log', f"Error: {e}"))
+                events.put(('done', None))
+            Thread(target=work, daemon=True).start()
+        
+        def toggle_server():
+            if lab['server'] is not None:
+                lab['server'].stop()
+                lab['server'] = None
+                report("Server stopped")
+                server_button.config(text="▶️ Start Server")
+                return
+            if lab['busy']:
+                return
+            mode, protocol = mode_var.get(), protocol_var.get()
+            
+            def task():
+                lab['server'] = NetLabServer(mode, protocol)
+                events.put(('log', f"{mode} {protocol} server listening on 127.0.0.1:{lab['server'].port}"))
+            start_job(task)
+            server_button.config(text="⏹️ Stop Server")
+        
+        def send_message(event=None):
+            server = lab['server']
+            if server is None:
+                report("Start the server first")
+                return
+            text = message_var.get()
+            
+            def task():
+                try:
+                    reply = asyncio.run(net_exchange(server.port, server.protocol, text))
+                except (OSError, EOFError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                    events.put(('log', f"Error: {str(e) or type(e).__name__}"))
+                    return
+                events.put(('log', f"> {text}\n< {reply.rstrip()}"))
+            Thread(target=task, daemon=True).start()
+        
+        def load_test():
+            values = settings()
+            if values is None:
+                return
+            connections, duration = values
+            mode, protocol = mode_var.get(), protocol_var.get()
+            server = lab['server'] if lab['server'] is not None and lab['server'].mode == mode \
+                and lab['server'].protocol == protocol else None
+            lab['samples'] = []
+            draw_chart()
+            report(f"Load test: {connections} connections for {duration:g} s against {mode} ({protocol})...")
+            
+            def task():
+                result = run_network_benchmark(mode, protocol, connections, duration,
+                                               lambda sample: events.put(('sample', sample)),
+                                               lab['cancel'], server)
+                if result:
+                    events.put(('log', summary_line(result)))
+            start_job(task)
+        
+        def compare():
+            values = settings()
+            if values is None:
+                return
+            connections, duration = values
+            protocol = protocol_var.get()
+            report(f"Comparing server models: {connections} connections, {duration:g} s each, {protocol}")
+            
+            def task():
+                for mode in NET_MODES:
+                    if lab['cancel'].is_set():
+                        break
+                    events.put(('reset', None))
+                    result = run_network_benchmark(mode, protocol, connections, duration,
+                                                   lambda sample: events.put(('sample', sample)), lab['cancel'])
+                    if result:
+                        events.put(('log', summary_line(result)))
+            start_job(task)
+        
+        def release():
+            lab['cancel'].set()
+            if lab['server'] is not None:
+                lab['server'].stop()
+                lab['server'] = None
+        
+        server_button = tk.Button(buttons, text="▶️ Start Server", command=toggle_server,
+                                  bg="#2ecc71", fg="white", font=("Arial", 10))
+        server_button.pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="🚀 Load Test", command=load_test, bg="#3498db", fg="white",
+                  font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="📊 Compare Models", command=compare, bg="#9b59b6", fg="white",
+                  font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="⏹️ Cancel", command=lambda: lab['cancel'].set(), bg="#e74c3c", fg="white",
+                  font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
+        tk.Button(client, text="Send", command=send_message).pack(side=tk.LEFT)
+        message_entry.bind('<Return>', send_message)
+        self.register_worker(window, release)
+        report("All traffic stays on 127.0.0.1. Each server and the load generator run in their own process.")
+        window.after(100, poll)
+    
+    def open_ipc_lab(self):
+        """Shared-memory ring buffer: benchmark against Queue/Pipe/socket and a live visualizer"""
+        window = tk.Toplevel(self.root)
+        window.title("IPC Lab v1.2")
+        window.geometry("900x680")
+        
+        notebook = ttk.Notebook(window)
+        notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # Benchmark tab
+        bench = tk.Frame(notebook)
+        notebook.add(bench, text="📊 Benchmark")
+        controls = tk.Frame(bench)
+        controls.pack(fill=tk.X, pady=5)
+        sizes_var = tk.StringVar(value="64 1024 16384 65536")
+        count_var = tk.StringVar(value="20000")
+        tk.Label(controls, text="Message sizes:").pack(side=tk.LEFT)
+        tk.Entry(controls, textvariable=sizes_var, width=24).pack(side=tk.LEFT, padx=(2, 10))
+        tk.Label(controls, text="Messages:").pack(side=tk.LEFT)
+        tk.Entry(controls, textvariable=count_var, width=8).pack(side=tk.LEFT, padx=(2, 10))
+        
+        columns = ('transport', 'size', 'messages', 'throughput', 'p50', 'p99')
+        table = ttk.Treeview(bench, columns=columns, show='headings', height=12)
+        for column, title, width in zip(columns, ("Transport", "Size", "Messages/s", "MB/s", "RTT p50 µs", "RTT p99 µs"),
+                                        (110, 80, 120, 100, 110, 110)):
+            table.heading(column, text=title)
+            table.column(column, width=width, anchor=tk.E if column != 'transport' else tk.W)
+        table.pack(fill=tk.BOTH, expand=True, pady=5)
+        status_var = tk.StringVar(value="Each transport sends from a child process; latency is a ping-pong round trip.")
+        tk.Label(bench, textvariable=status_var, anchor=tk.W).pack(fill=tk.X)
+        
+        lab = {'busy': False, 'cancel': Event(), 'ring': None}
+        events = queue.Queue()
+        
+        def run_benchmark():
+            if lab['busy']:
+                return
+            try:
+                sizes = [int(size) for size in sizes_var.get().split()]
+                count = max(100, int(count_var.get()))
+            except ValueError:
+                messagebox.showerror("IPC Lab", "Enter numbers", parent=window)
+                return
+            table.delete(*table.get_children())
+            lab['busy'] = True
+            lab['cancel'] = Event()
+            
+            def work():
+                try:
+                    for size in sizes:
+                        for kind in IPC_TRANSPORTS:
+                            if lab['cancel'].is_set():
+                                return
+                            events.put(('status', f"{kind}, {size} byte messages..."))
+                            # Keep large-message runs short
+                            events.put(('row', benchmark_ipc(kind, size, max(100, min(count, (64 << 20) // max(size, 1))))))
+                finally:
+                    events.put(('done', None))
+            Thread(target=work, daemon=True).start()
+        
+        tk.Button(controls, text="▶️ Run", command=run_benchmark, bg="#3498db", fg="white",
+                  font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
+        tk.Button(controls, text="⏹️ Cancel", command=lambda: lab['cancel'].set(), bg="#e74c3c", fg="white",
+                  font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
+        
+        # Visualizer tab
+        visual = tk.Frame(notebook)
+        notebook.add(visual, text="🔄 Ring Buffer")
+        rates = tk.Frame(visual)
+        rates.pack(fill=tk.X, pady=5)
+        producer_var = tk.IntVar(value=40)
+        consumer_var = tk.IntVar(value=30)
+        tk.Label(rates, text="Producer msgs/s:").pack(side=tk.LEFT)
+        tk.Scale(rates, from_=0, to=200, orient=tk.HORIZONTAL, variable=producer_var, length=180).pack(side=tk.LEFT)
+        tk.Label(rates, text="Consumer msgs/s:").pack(side=tk.LEFT, padx=(15, 0))
+        tk.Scale(rates, from_=0, to=200, orient=tk.HORIZONTAL, variable=consumer_var, length=180).pack(side=tk.LEFT)
+        canvas = tk.Canvas(visual, bg="white", height=420)
+        canvas.pack(fill=tk.BOTH, expand=True, pady=5)
+        info_var = tk.StringVar()
+        tk.Label(visual, textvariable=info_var, anchor=tk.W, font=("Consolas", 10)).pack(fill=tk.X)
+        
+        # The demo threads read plain copies of the rates: Tk variables belong to the UI thread
+        demo_rates = {'producer': producer_var.get(), 'consumer': consumer_var.get()}
+        
+        def copy_rates(*_):
+            demo_rates['producer'], demo_rates['consumer'] = producer_var.get(), consumer_var.get()
+        producer_var.trace_add('write', copy_rates)
+        consumer_var.trace_add('write', copy_rates)
+        
+        def stop_demo():
+            # No join here: the threads notice within their 0.1 s timeouts and the last one
+            # out releases the ring
+            lab['cancel'].set()
+            lab['ring'] = None
+        
+        def start_demo():
+            stop_demo()
+            lab['cancel'] = Event()
+            # Small ring so wrap-around and a full buffer are easy to see
+            ring = lab['ring'] = RingBuffer(capacity=1024)
+            cancel = lab['cancel']
+            running = {'threads': 2}
+            lock = threading.Lock()
+            
+            def finish():
+                with lock:
+                    running['threads'] -= 1
+                    last = running['threads'] == 0
+                if last:
+                    ring.release()
+            
+            def producer():
+                number = 0
+                try:
+                    while not cancel.is_set():
+                        rate = demo_rates['producer']
+                        if rate and ring.put(f"message {number}".encode() + b'.' * (number % 24), timeout=0.1):
+                            number += 1
+                        cancel.wait(1 / rate if rate else 0.1)
+                finally:
+                    finish()
+            
+            def consumer():
+                try:
+                    while not cancel.is_set():
+                        rate = demo_rates['consumer']
+                        if rate:
+                            ring.get(timeout=0.1)
+                        cancel.wait(1 / rate if rate else 0.1)
+                finally:
+                    finish()
+            Thread(target=producer, daemon=True).start()
+            Thread(target=consumer, daemon=True).start()
+        
+        def draw_ring():
+            canvas.delete('all')
+            ring = lab['ring']
+            if ring is None:
+                canvas.create_text(20, 20, anchor=tk.NW, text="Press Start to run a producer and a consumer thread.",
+                                   font=("Arial", 11))
+                return
+            head, tail = ring.head, ring.tail
+            width, height = canvas.winfo_width() or 860, canvas.winfo_height() or 420
+            cx, cy = width // 2, height // 2
+            outer, inner = min(cx, cy) - 30, min(cx, cy) - 80
+            segments = 64
+            step = ring.capacity // segments
+            for index in range(segments):
+                start, extent = 90 - index * 360 / segments, -360 / segments
+                # Segment is used if any byte of it lies between tail and head
+                position = tail - (tail & ring.mask) + index * step
+                if position + step <= tail:
+                    position += ring.capacity
+                used = position < head and position + step > tail
+                color = "#3498db" if used else "#ecf0f1"
+                canvas.create_arc(cx - outer, cy - outer, cx + outer, cy + outer, start=start, extent=extent,
+                                  fill=color, outline="white", style=tk.PIESLICE)
+            canvas.create_oval(cx - inner, cy - inner, cx + inner, cy + inner, fill="white", outline="white")
+            for counter, color, label in ((head, "#27ae60", "producer (head)"), (tail, "#c0392b", "consumer (tail)")):
+                angle = math.radians(90 - 360 * (counter & ring.mask) / ring.capacity)
+                x, y = cx + (outer + 15) * math.cos(angle), cy - (outer + 15) * math.sin(angle)
+                canvas.create_line(cx + inner * math.cos(angle), cy - inner * math.sin(angle), x, y,
+                                   fill=color, width=3, arrow=tk.LAST)
+                canvas.create_text(x, y - 10, text=label, fill=color, font=("Arial", 9, "bold"))
+            used = head - tail
+            canvas.create_text(cx, cy, text=f"{used} / {ring.capacity} bytes\n{100 * used / ring.capacity:.0f}% full",
+                               font=("Arial", 12, "bold"), justify=tk.CENTER)
+            info_var.set(f"head {head:>10}   tail {tail:>10}   wraps {head // ring.capacity}   shm {ring.name}")
+        
+        demo_buttons = tk.Frame(visual)
+        demo_buttons.pack(fill=tk.X)
+        tk.Button(demo_buttons, text="▶️ Start", command=start_demo, bg="#2ecc71", fg="white",
+                  font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
+        tk.Button(demo_buttons, text="⏹️ Stop", command=stop_demo, bg="#e74c3c", fg="white",
+                  font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
+        
+        def poll():
+            if not window.winfo_exists():
+                return
+            while True:
+                try:
+                    kind, value = events.get_nowait()
+                except queue.Empty:
+                    break
+                if kind == 'row':
+                    table.insert('', tk.END, values=(value['transport'], value['size'], f"{value['messages_s']:,.0f}",
+                                                     f"{value['mb_s']:,.1f}", f"{value['rtt_p50'] * 1e6:,.1f}",
+                                                     f"{value['rtt_p99'] * 1e6:,.1f}"))
+                elif kind == 'status':
+                    status_var.set(value)
+                elif kind == 'done':
+                    lab['busy'] = False
+                    status_var.set("Done")
+            draw_ring()
+            window.after(100, poll)
+        
+        self.register_worker(window, stop_demo)
+        window.after(100, poll)
     
     def system_simulation(self):
         """System simulation"""
@@ -1035,6 +10739,158 @@ Overall Status: ✅ All systems operational
         """Debug practice"""
         messagebox.showinfo("Debug Practice v1.2", "Opening debugging exercises...\nTry fixing the buggy code!")
     
+    def open_memory_lab(self):
+        """Open page replacement and allocator simulator"""
+        window = tk.Toplevel(self.root)
+        window.title("Memory Management Lab v1.2")
+        window.geometry("820x620")
+        
+        # Trace parameters
+        controls = tk.Frame(window)
+        controls.pack(fill=tk.X, padx=10, pady=10)
+        
+        fields = [("References:", "200000"), ("Pages:", "512"), ("Max frames:", "128")]
+        entries = []
+        for label, default in fields:
+            tk.Label(controls, text=label, font=("Arial", 10)).pack(side=tk.LEFT)
+            var = tk.StringVar(value=default)
+            tk.Entry(controls, textvariable=var, width=9).pack(side=tk.LEFT, padx=(2, 10))
+            entries.append(var)
+        length_var, pages_var, frames_var = entries
+        
+        lab = {'trace': None}
+        
+        # Results
+        result_text = scrolledtext.ScrolledText(window, height=12, bg="#1c2833", fg="#ecf0f1",
+                                                font=("Consolas", 10))
+        curve_canvas = tk.Canvas(window, bg="white", height=240)
+        
+        def report(text):
+            result_text.insert(tk.END, text + "\n")
+            result_text.see(tk.END)
+        
+        def generate():
+            try:
+                length, pages = int(length_var.get()), int(pages_var.get())
+            except ValueError:
+                messagebox.showerror("Memory Lab", "Enter whole numbers")
+                return
+            if length < 1 or pages < 1:
+                messagebox.showerror("Memory Lab", "Length and pages must be at least 1")
+                return
+            lab['trace'] = PageTrace.synthetic(length, pages)
+            report(f"Generated synthetic trace: {length} references over {pages} pages")
+        
+        def load():
+            filename = filedialog.askopenfilename(
+                title="Open Page Trace",
+                filetypes=[("Raw uint32 trace", "*.bin *.trace *.u32"), ("Text files", "*.txt"), ("All files", "*.*")]
+            )
+            if filename:
+                try:
+                    lab['trace'] = PageTrace.load(filename)
+                    report(f"Loaded trace: {filename} ({len(lab['trace'])} references)")
+                except Exception as e:
+                    messagebox.showerror("Error", f"Could not load trace: {str(e)}")
+        
+        def run():
+            if lab['trace'] is None:
+                generate()
+            trace = lab['trace']
+            if trace is None:
+                return
+            try:
+                max_frames = max(1, int(frames_var.get()))
+            except ValueError:
+                max_frames = 128
+            report(f"Simulating {len(trace)} references...")
+            self.run_background_task(self.simulate_memory, show_results, trace, max_frames)
+        
+        def show_results(results):
+            curve, points, elapsed = results
+            report(f"{'Frames':>8} " + " ".join(f"{p:>8}" for p in PAGE_POLICIES))
+            for frames, row in points:
+                report(f"{frames:>8} " + " ".join(f"{rate:>8.1%}" for rate in row))
+            report(f"Done in {elapsed:.2f}s")
+            self.draw_hit_curve(curve_canvas, curve, points)
+        
+        def allocators():
+            def workload():
+                heap = 1 << 20
+                return [(a.name, run_allocation_workload(a, seed=42))
+                        for a in (FreeListAllocator(heap, "first"), FreeListAllocator(heap, "best"),
+                                  BuddyAllocator(heap), SlabAllocator(heap))]
+            
+            def show(rows):
+                report(f"{'Allocator':<10} {'Used':>9} {'Free':>9} {'Largest':>9} {'Frag':>6} {'Fails':>6}")
+                for name, st in rows:
+                    report(f"{name:<10} {st['used']:>9} {st['free']:>9} {st['largest_free']:>9} "
+                           f"{st['fragmentation']:>6.1%} {st['failures']:>6}")
+            
+            report("Running allocator workload (20000 operations, 1 MiB heap)...")
+            self.run_background_task(workload, show)
+        
+        # Buttons
+        buttons = [
+            ("🎲 Generate", generate, "#3498db"),
+            ("📂 Load Trace", load, "#1abc9c"),
+            ("▶️ Simulate", run, "#2ecc71"),
+            ("🧱 Allocators", allocators, "#9b59b6")
+        ]
+        for text, command, color in buttons:
+            tk.Button(controls, text=text, command=command, bg=color, fg="white",
+                      font=("Arial", 10)).pack(side=tk.LEFT, padx=3)
+        
+        curve_canvas.pack(fill=tk.X, padx=10)
+        result_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+    
+    def simulate_memory(self, trace, max_frames):
+        """Run every policy on a trace (worker thread)"""
+        start = time.time()
+        curve = lru_hit_curve(trace, max_frames)
+        points = []
+        for frames in sorted({max(1, max_frames // 8), max(1, max_frames // 4),
+                              max(1, max_frames // 2), max_frames}):
+            row = [simulate_page_policy(trace, frames, policy)[0] / max(1, len(trace))
+                   for policy in PAGE_POLICIES]
+            points.append((frames, row))
+        return curve, points, time.time() - start
+    
+    def draw_hit_curve(self, canvas, curve, points):
+        """Draw LRU hit rate vs frame count"""
+        canvas.delete("all")
+        canvas.update_idletasks()
+        width = max(canvas.winfo_width(), 400)
+        height = max(canvas.winfo_height(), 200)
+        margin = 40
+        
+        canvas.create_line(margin, height - margin, width - 10, height - margin)
+        canvas.create_line(margin, 10, margin, height - margin)
+        canvas.create_text(margin - 5, 10, text="100%", anchor=tk.E, font=("Arial", 8))
+        canvas.create_text(width - 10, height - margin + 12, text=f"{len(curve)} frames",
+                           anchor=tk.E, font=("Arial", 8))
+        
+        def xy(frames, rate):
+            x = margin + (width - margin - 10) * frames / max(1, len(curve))
+            y = height - margin - (height - margin - 10) * rate
+            return x, y
+        
+        coords = []
+        for frames, rate in enumerate(curve, start=1):
+            coords.extend(xy(frames, rate))
+        if len(coords) >= 4:
+            canvas.create_line(*coords, fill="#3498db", width=2)
+        
+        # Policy markers at the sampled frame counts
+        colors = ["#e67e22", "#3498db", "#2ecc71", "#9b59b6", "#e74c3c"]
+        for frames, row in points:
+            for color, rate in zip(colors, row):
+                x, y = xy(frames, rate)
+                canvas.create_oval(x - 3, y - 3, x + 3, y + 3, fill=color, outline="")
+        for i, (policy, color) in enumerate(zip(PAGE_POLICIES, colors)):
+            canvas.create_text(margin + 10 + i * 60, height - 12, text=policy,
+                               fill=color, anchor=tk.W, font=("Arial", 9, "bold"))
+    
     # ========== SETTINGS FUNCTIONS ==========
     
     def open_settings(self):
@@ -1045,6 +10901,7 @@ Overall Status: ✅ All systems operational
         """Save settings changes"""
         self.settings['username'] = self.user_var.get()
         self.settings['font_size'] = int(self.font_var.get())
+        self.settings['restart_mode'] = self.restart_var.get()
         
         # Update variables
         self.username = self.settings['username']
@@ -1064,11 +10921,13 @@ Overall Status: ✅ All systems operational
             'username': 'User',
             'theme': 'dark',
             'font_size': 12,
-            'recent_files': []
+            'recent_files': [],
+            'restart_mode': 'soft'
         }
         
         self.user_var.set('User')
         self.font_var.set('12')
+        self.restart_var.set('soft')
         
         messagebox.showinfo("Defaults", "Default settings restored in v1.2")
     
@@ -1076,6 +10935,7 @@ Overall Status: ✅ All systems operational
         """Cancel settings"""
         self.user_var.set(self.username)
         self.font_var.set(str(self.settings.get('font_size', 12)))
+        self.restart_var.set(self.settings.get('restart_mode', 'soft'))
         messagebox.showinfo("Cancel", "Changes cancelled")
     
     def update_ui(self):
@@ -1085,6 +10945,7 @@ Overall Status: ✅ All systems operational
         
         # Update status bar
         self.status_bar.config(text=f"MKS-OS v{self.version} | User: {self.username}")
+        self.update_terminal_prompt()
     
     # ========== SYSTEM FUNCTIONS ==========
     
@@ -1111,24 +10972,155 @@ All operations are simulated for educational purposes.
 """
         messagebox.showinfo("System Information", info)
     
+    def run_background_task(self, task, on_done, *args):
+        """Run task in a worker thread and deliver the result on the UI thread"""
+        results = queue.Queue()
+        
+        def worker():
+            try:
+                results.put((True, task(*args)))
+            except Exception as e:
+                results.put((False, e))
+        
+        def poll():
+            try:
+                ok, value = results.get_nowait()
+            except queue.Empty:
+                self.root.after(50, poll)
+                return
+            if ok:
+                on_done(value)
+            else:
+                messagebox.showerror("Error", str(value))
+        
+        Thread(target=worker, daemon=True).start()
+        self.root.after(50, poll)
+    
+    def register_worker(self, window, stop):
+        """Call stop() once when window goes away, closed by the user or torn down by shutdown()"""
+        self.window_workers.append(stop)
+        
+        def destroyed(event):
+            if str(event.widget) == str(window):
+                self.stop_worker(stop)
+        window.bind('<Destroy>', destroyed, add='+')
+    
+    def stop_worker(self, stop):
+        if stop in self.window_workers:
+            self.window_workers.remove(stop)
+            try:
+                stop()
+            except Exception:
+                traceback.print_exc()
+    
+    def stop_window_workers(self):
+        for stop in list(self.window_workers):
+            self.stop_worker(stop)
+    
     def restart_system(self):
         """Restart system"""
-        if messagebox.askyesno("Restart MKS-OS v1.2", "Restart MKS-OS?\nUnsaved changes will be lost."):
-            # Close window
-            self.root.destroy()
-            
-            # Restart application
-            python = sys.executable
-            os.execl(python, python, *sys.argv)
+        if messagebox.askyesno("Restart MKS-OS v1.2", "Restart MKS-OS?\nOpen editor tabs will be restored."):
+            if self.settings.get('restart_mode', 'soft') == 'soft':
+                try:
+                    self.soft_restart()
+                    return
+                except Exception:
+                    # Anything left half torn down is cleaned up by re-executing
+                    traceback.print_exc()
+            self.full_restart()
+    
+    def shutdown(self):
+        """Stop background work and save the workspace before this instance goes away
+        
+        Every step runs even if an earlier one fails (a soft restart that broke halfway may
+        have destroyed widgets already); failures are printed, not raised.
+        """
+        def close_thumbnails():
+            if getattr(self, 'fm_thumb_loader', None) is not None:
+                self.fm_thumb_loader.close()
+        
+        def release_code_runner():
+            if self.code_runner is not None:
+                self.code_runner.release()
+                self.code_runner = None
+        
+        def stop_lint():
+            if self.lint_pool is not None:
+                self.lint_pool.shutdown(wait=False, cancel_futures=True)
+                self.lint_pool = None
+        
+        def close_project_index():
+            if self.project_index is not None:
+                self.project_index.close()
+                self.project_index = None
+        
+        steps = (lambda: self.shell.cancel(), self.stop_window_workers, lambda: self.cancel_find(),
+                 close_thumbnails, release_code_runner, stop_lint, close_project_index,
+                 self.hide_completions, self.unmount_vfs, self.persist_workspace)
+        for step in steps:
+            try:
+                step()
+            except Exception:
+                traceback.print_exc()
+    
+    def soft_restart(self):
+        """Rebuild the interface in this process, reusing loaded modules and the session"""
+        start = time.perf_counter()
+        geometry = self.root.geometry()
+        self.shutdown()
+        
+        # Cancel timers of the old instance (clock, polls, debounced jobs)
+        for job in self.root.tk.splitlist(self.root.tk.call('after', 'info')):
+            self.root.after_cancel(job)
+        for child in self.root.winfo_children():
+            child.destroy()
+        
+        app = MKSOperatingSystem(self.root, session=self.session)
+        self.root.geometry(geometry)
+        self.root.protocol("WM_DELETE_WINDOW", app.exit_system)
+        app.report_restart('soft', time.perf_counter() - start)
+        return app
+    
+    def full_restart(self):
+        """Re-execute the interpreter"""
+        # Nothing may stop the exec: the interface can be half torn down by a failed soft restart
+        self.shutdown()
+        for step in (self.session.close, self.root.destroy):
+            try:
+                step()
+            except Exception:
+                traceback.print_exc()
+        
+        # Restart application; the new process reports how long it took
+        os.environ['MKSOS_RESTART_T0'] = repr(time.time())
+        python = sys.executable
+        os.execl(python, python, *sys.argv)
+    
+    def report_restart(self, mode, seconds):
+        """Print the restart time next to the last one of the other mode"""
+        times = self.settings.setdefault('restart_times', {})
+        times[mode] = round(seconds * 1000, 1)
+        self.save_settings()
+        other = 'full' if mode == 'soft' else 'soft'
+        message = f"Restart ({mode}): {times[mode]:.0f} ms"
+        if other in times:
+            message += f" | last {other} restart: {times[other]:.0f} ms"
+        self.console_output.insert(tk.END, message + "\n")
+        self.log_message(message)
     
     def exit_system(self):
         """Exit system"""
         if messagebox.askyesno("Exit MKS-OS v1.2", "Exit MKS-OS?"):
             self.save_settings()
+            self.shutdown()
+            self.session.close()
             self.root.quit()
 
 def main():
     """Main function"""
+    # Worker processes of the frozen executable must not start the GUI
+    multiprocessing.freeze_support()
+    
     root = tk.Tk()
     app = MKSOperatingSystem(root)
     